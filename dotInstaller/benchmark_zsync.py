@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Medición de la búsqueda de bloques reutilizables de zsync (match_local_blocks)
+
+Uso: python3 benchmark_zsync.py [MB]
+Mide tres casos sobre un archivo aleatorio: sin cambios, con una inserción en
+medio (el resto queda desplazado) y totalmente distinto (el peor caso: todo se
+recorre byte a byte).
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.utils.zsync import parse_control, match_local_blocks
+from test_appimage_update import build_zsync
+
+BLOCKSIZE = 2048
+
+def md4_source():
+    try:
+        hashlib.new('md4', b'')
+        return 'OpenSSL'
+    except ValueError:
+        return 'Python puro'
+
+def main():
+    size = int(float(sys.argv[1]) * 1024 * 1024) if len(sys.argv) > 1 else 8 * 1024 * 1024
+    old = os.urandom(size)
+    cases = (
+        ('Sin cambios', old),
+        ('Inserción en medio', old[:size // 2] + os.urandom(1000) + old[size // 2:]),
+        ('Totalmente distinto', os.urandom(size)),
+    )
+    print(f"🚀 match_local_blocks con {size / 1024 / 1024:.1f} MB, bloques de {BLOCKSIZE} bytes "
+          f"(MD4: {md4_source()})")
+    fd, path = tempfile.mkstemp(prefix='zsync-bench-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(old)
+        for name, new in cases:
+            control = parse_control(build_zsync(new, 'app.AppImage', BLOCKSIZE))
+            start = time.perf_counter()
+            found = match_local_blocks(control, path)
+            elapsed = time.perf_counter() - start
+            print(f"  {name:<20} {elapsed:6.2f} s  {size / 1024 / 1024 / elapsed:6.1f} MB/s  "
+                  f"{len(found)}/{control.block_count} bloques reutilizados")
+    finally:
+        os.remove(path)
+
+if __name__ == "__main__":
+    main()
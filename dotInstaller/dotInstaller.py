@@ -4,9 +4,25 @@ Punto de entrada principal para dotInstaller
 import gi
 from src.ui import MainWindow
 from src.core.installer import Installer
-from src.data.database import init_db
+from src.core.scheduler import get_scheduler, DONE
+from src.handlers.registry import handler_for
+from src.data.database import init_db, get_setting
+from src.utils.readahead import warm_top_appimages, is_system_idle
+from src.utils.wine_pool import is_pool_enabled, warm_top_prefixes
+from src.utils.prefix_dedup import deduplicate_prefixes
+from src.utils.tombstone import purge_tombstones
+from src.utils.wine_programs import PREFIX_ROOTS
+from src.core.privileged import stop_helper
 from gi.repository import Gtk, GLib, Gio, Gdk  # type: ignore
 import os
+import threading
+
+# Cada cuánto se intenta precargar las AppImages más usadas (solo si el sistema está ocioso)
+READAHEAD_INTERVAL_SECONDS = 600
+# Cada cuánto se revisa el grupo de wineserver en espera (opcional, wine_pool_enabled)
+WINE_POOL_INTERVAL_SECONDS = 900
+# Cada cuánto se comparten los archivos repetidos entre prefijos (solo los que cambiaron y con el sistema ocioso)
+PREFIX_DEDUP_INTERVAL_SECONDS = 3600
 
 # Hook: Detección de tema del sistema (puedes expandir para cargar CSS oscuro si el sistema lo usa)
 def get_system_theme():
@@ -36,16 +52,47 @@ class DotInstallerApp(Gtk.Application):
         self.win.on_file_dropped = self.on_file_dropped  # Sobrescribir handler
         self.win.on_file_selected = self.on_file_selected
         self.win.present()
+        # Prefijos desinstalados cuyo borrado se interrumpió al cerrar
+        purge_tombstones([base for _, base in PREFIX_ROOTS])
+        if get_setting('readahead_enabled', '1') == '1':
+            # Primera precarga al abrir (si el sistema está ocioso); después, cada intervalo
+            self._warm_page_cache()
+            GLib.timeout_add_seconds(READAHEAD_INTERVAL_SECONDS, self._warm_page_cache)
+        if is_pool_enabled():
+            self._warm_wine_pool()
+            GLib.timeout_add_seconds(WINE_POOL_INTERVAL_SECONDS, self._warm_wine_pool)
+        if get_setting('prefix_dedup_enabled', '1') == '1':
+            GLib.timeout_add_seconds(PREFIX_DEDUP_INTERVAL_SECONDS, self._deduplicate_prefixes)
+
+    def do_shutdown(self):
+        # Cerrar el auxiliar con privilegios de la sesión, si se llegó a lanzar
+        stop_helper()
+        Gtk.Application.do_shutdown(self)
+
+    def _warm_page_cache(self):
+        # Se ejecuta en segundo plano para no bloquear la interfaz
+        threading.Thread(target=warm_top_appimages, daemon=True).start()
+        return True
+
+    def _warm_wine_pool(self):
+        # Abrir dotInstaller ya indica que el usuario está activo: no se espera a que el sistema esté ocioso
+        threading.Thread(target=warm_top_prefixes, kwargs={'only_when_idle': False}, daemon=True).start()
+        return True
+
+    def _deduplicate_prefixes(self):
+        if is_system_idle():
+            threading.Thread(target=deduplicate_prefixes, daemon=True).start()
+        return True
 
     def on_file_dropped(self, drop_target, file, x, y):
         if isinstance(file, Gio.File):
             file_path = file.get_path()
-            if file_path and (file_path.endswith('.deb') or file_path.endswith('.sh') or file_path.endswith('.run') or file_path.endswith('.AppImage') or file_path.endswith('.appimage')):
+            if file_path and handler_for(file_path):
                 self._start_install(file_path)
         return True
 
     def on_file_selected(self, file_path):
-        if file_path and (file_path.endswith('.deb') or file_path.endswith('.sh') or file_path.endswith('.run') or file_path.endswith('.AppImage') or file_path.endswith('.appimage')):
+        if file_path and handler_for(file_path):
             self._start_install(file_path)
 
     def _start_install(self, file_path):
@@ -54,17 +101,17 @@ class DotInstallerApp(Gtk.Application):
         spinner = Gtk.Spinner()
         spinner.start()
         self.win.set_drop_content(spinner)
-        GLib.idle_add(self._install_file, file_path, spinner)
+        # La instalación va a la cola de trabajos; el aviso llega al hilo de la interfaz al terminar
+        get_scheduler().submit_install(file_path, callback=lambda job: GLib.idle_add(self._install_finished, job, spinner))
 
-    def _install_file(self, file_path, spinner):
-        result = self.installer.install_file(file_path)
+    def _install_finished(self, job, spinner):
         spinner.stop()
         self.win.set_drop_content(self.win.drop_label)
         self.win.select_button.set_sensitive(True)
-        if result == 'already_installed':
+        if job.result == 'already_installed':
             self._show_notification("El archivo ya está instalado.")
             self.win.reset_drop_label("Ya instalado")
-        elif result:
+        elif job.state == DONE:
             self._show_notification("Instalación exitosa")
             self.win.reset_drop_label("¡Instalación exitosa!")
             self.win.refresh_apps_list()
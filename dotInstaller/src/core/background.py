@@ -0,0 +1,145 @@
+"""
+Tareas de mantenimiento de dotInstaller sin la interfaz abierta.
+
+Un temporizador de usuario de systemd ejecuta cada pocos minutos
+`python3 -m src.core.background` desde el directorio de la aplicación; si no
+hay systemd de usuario, una entrada de autoarranque lo deja corriendo en
+bucle desde el inicio de sesión. Cada pasada hace las tareas activadas en la
+configuración, las mismas que hace la ventana mientras está abierta.
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import time
+from src.data.database import init_db, get_setting
+from src.utils.readahead import warm_top_appimages
+from src.utils.wine_pool import is_pool_enabled, warm_top_prefixes
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+UNIT_NAME = 'dotinstaller-background'
+SYSTEMD_USER_DIR = os.path.expanduser('~/.config/systemd/user')
+AUTOSTART_DIR = os.path.expanduser('~/.config/autostart')
+# Cada cuánto se repite la pasada (temporizador o bucle del autoarranque)
+INTERVAL_MINUTES = 10
+# Primera pasada tras iniciar sesión: el escritorio ya ha terminado de arrancar
+FIRST_RUN_MINUTES = 2
+
+def is_background_enabled():
+    return get_setting('background_tasks_enabled', '0') == '1'
+
+def run_once():
+    """Una pasada de las tareas activadas; devuelve el resumen de cada una"""
+    summary = {}
+    if get_setting('readahead_enabled', '1') == '1':
+        summary['readahead'] = warm_top_appimages()
+    if is_pool_enabled():
+        summary['wine_pool'] = warm_top_prefixes()
+    return summary
+
+def _command():
+    return [sys.executable, '-m', 'src.core.background']
+
+def service_unit():
+    return f"""[Unit]
+Description=Mantenimiento de dotInstaller (precarga de aplicaciones y wineserver en espera)
+
+[Service]
+Type=oneshot
+WorkingDirectory={APP_DIR}
+ExecStart={' '.join(_command())}
+Nice=10
+IOSchedulingClass=idle
+"""
+
+def timer_unit():
+    return f"""[Unit]
+Description=Mantenimiento periódico de dotInstaller
+
+[Timer]
+OnStartupSec={FIRST_RUN_MINUTES}min
+OnUnitActiveSec={INTERVAL_MINUTES}min
+
+[Install]
+WantedBy=timers.target
+"""
+
+def autostart_entry():
+    return f"""[Desktop Entry]
+Type=Application
+Name=dotInstaller (mantenimiento)
+Exec=sh -c 'cd "{APP_DIR}" && exec {' '.join(_command())} --loop'
+NoDisplay=true
+X-GNOME-Autostart-enabled=true
+"""
+
+def _systemctl(*args):
+    try:
+        return subprocess.run(['systemctl', '--user'] + list(args), stdout=subprocess.DEVNULL,
+                              stderr=subprocess.DEVNULL, timeout=30).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+def install_timer(systemd_dir=None, autostart_dir=None):
+    """Programa las pasadas fuera de la interfaz; devuelve 'systemd', 'autostart' o None"""
+    systemd_dir = systemd_dir or SYSTEMD_USER_DIR
+    autostart_dir = autostart_dir or AUTOSTART_DIR
+    try:
+        # daemon-reload solo funciona si hay un gestor de systemd de usuario en la sesión
+        if shutil.which('systemctl') and _systemctl('daemon-reload'):
+            os.makedirs(systemd_dir, exist_ok=True)
+            with open(os.path.join(systemd_dir, f'{UNIT_NAME}.service'), 'w') as f:
+                f.write(service_unit())
+            with open(os.path.join(systemd_dir, f'{UNIT_NAME}.timer'), 'w') as f:
+                f.write(timer_unit())
+            if _systemctl('daemon-reload') and _systemctl('enable', '--now', f'{UNIT_NAME}.timer'):
+                return 'systemd'
+        # Sin systemd de usuario: un proceso en bucle desde el inicio de sesión
+        os.makedirs(autostart_dir, exist_ok=True)
+        with open(os.path.join(autostart_dir, f'{UNIT_NAME}.desktop'), 'w') as f:
+            f.write(autostart_entry())
+        return 'autostart'
+    except OSError as e:
+        print(f"[Background] No se pudo programar el mantenimiento: {e}")
+        return None
+
+def remove_timer(systemd_dir=None, autostart_dir=None):
+    """Quita el temporizador y la entrada de autoarranque, si existen"""
+    systemd_dir = systemd_dir or SYSTEMD_USER_DIR
+    autostart_dir = autostart_dir or AUTOSTART_DIR
+    if shutil.which('systemctl'):
+        _systemctl('disable', '--now', f'{UNIT_NAME}.timer')
+    for path in (os.path.join(systemd_dir, f'{UNIT_NAME}.service'), os.path.join(systemd_dir, f'{UNIT_NAME}.timer'),
+                 os.path.join(autostart_dir, f'{UNIT_NAME}.desktop')):
+        if os.path.exists(path):
+            os.remove(path)
+    if shutil.which('systemctl'):
+        _systemctl('daemon-reload')
+
+def main():
+    parser = argparse.ArgumentParser(description='Tareas de mantenimiento de dotInstaller')
+    parser.add_argument('--loop', action='store_true', help='Repite la pasada cada pocos minutos (autoarranque)')
+    parser.add_argument('--install', action='store_true', help='Programa las pasadas con systemd o el autoarranque')
+    parser.add_argument('--remove', action='store_true', help='Quita la programación')
+    options = parser.parse_args()
+    init_db()
+    if options.install:
+        print(install_timer() or 'error')
+        return
+    if options.remove:
+        remove_timer()
+        return
+    if options.loop:
+        time.sleep(FIRST_RUN_MINUTES * 60)
+        while True:
+            # Se vuelve a mirar la configuración en cada pasada: se puede desactivar sin reiniciar la sesión
+            if not is_background_enabled():
+                break
+            run_once()
+            time.sleep(INTERVAL_MINUTES * 60)
+        return
+    run_once()
+
+if __name__ == '__main__':
+    main()
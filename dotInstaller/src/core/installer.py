@@ -1,9 +1,18 @@
 from src.handlers.deb_handler import DebHandler
 from src.handlers.script_handler import ScriptHandler
-from src.data.database import is_installed, register_install, get_app_details, remove_app, list_installed
+from src.data.database import (is_installed, register_install, get_app_details, remove_app, list_installed,
+                               save_manifest, get_manifest)
 from src.handlers.appimage_handler import AppImageHandler
 from src.handlers.wine_handler import WineHandler
 from src.handlers.proton_handler import ProtonHandler
+from src.handlers.registry import handler_for, supported_extensions
+from src.utils.deb_repo import is_cache_enabled, add_to_repo
+from src.utils.deb_folder import plan_folder, format_plan
+from src.utils.fs_tracker import ChangeTracker, tracked_roots, remove_manifest, manifest_paths, format_size
+from src.utils.tombstone import entomb, remove_in_background
+from src.utils.pe import read_exe_metadata
+from src.utils.silent_install import detect_installer, is_silent_enabled, parallel_install_limit
+from concurrent.futures import ThreadPoolExecutor
 import os
 
 class Installer:
@@ -27,51 +36,280 @@ class Installer:
                         return {"status": "huérfano_detectado", "id": _id, "file_path": file_path, "name": name}
                     else:
                         return 'already_installed'
-        if file_path.endswith('.deb'):
-            success = self.deb_handler.install(file_path)
-            if success:
-                name = os.path.basename(file_path)
-                register_install(name, file_path, 'deb')
-            return success
-        elif file_path.endswith('.sh') or file_path.endswith('.run'):
-            success = self.script_handler.install(file_path)
+        handler = handler_for(file_path)
+        if handler is None:
+            raise NotImplementedError(f"Formato no reconocido (se admiten {', '.join(supported_extensions())})")
+        return handler.install(self, file_path, use_proton)
+
+    def install_deb(self, file_path):
+        # Leer el control antes de pedir privilegios: un .deb ilegible no llega a pkexec
+        info = self.deb_handler.get_info(file_path)
+        if not info or not info.get('Package'):
+            return False
+        success = self.deb_handler.install(file_path)
+        if success:
+            self._record_debs([(file_path, info)])
+        return success
+
+    def install_deb_packages(self, file_paths, progress_callback=None, infos=None):
+        """Instala .deb ya comprobados en una transacción y, si termina bien, los registra y guarda en la caché.
+
+        infos ({ruta: control}) evita volver a leer los paquetes. Devuelve el
+        resultado de DebHandler.install_packages, con los errores de apt.
+        """
+        result = self.deb_handler.install_packages(file_paths, progress_callback)
+        if result['returncode'] == 0:
+            infos = infos or {}
+            self._record_debs([(path, infos.get(path) or self.deb_handler.get_info(path)) for path in file_paths])
+        return result
+
+    def install_script_file(self, file_path):
+        try:
+            capture = self.install_script(file_path)
+        except Exception as e:
+            print(f"Error ejecutando script: {e}")
+            return False
+        print(capture.tail(50))
+        print(f"Registro completo: {capture.log_path}")
+        return capture.returncode == 0
+
+    def install_appimage(self, file_path):
+        success = self.appimage_handler.install(file_path)
+        if success == True:
+            name = os.path.basename(file_path)
+            register_install(name, file_path, 'appimage')
+        return success
+
+    def install_windows(self, file_path, use_proton=None, unattended=False):
+        """Instala un .exe/.msi en su propio prefijo de Wine o Proton.
+
+        Si se reconoce el instalador (Inno Setup, NSIS, InstallShield, WiX,
+        MSI) se usan sus opciones silenciosas. Con unattended solo se vigila el
+        prefijo: así varias instalaciones en paralelo no se atribuyen archivos
+        entre sí.
+        """
+        # El prefijo usa el nombre del archivo; el lanzador y el registro, el del producto
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        metadata = read_exe_metadata(file_path) or {}
+        display_name = metadata.get('name') or name
+        installer_kind = detect_installer(file_path) if is_silent_enabled() else None
+        if installer_kind:
+            print(f"Instalador {installer_kind} detectado en {os.path.basename(file_path)}: instalación desatendida")
+        kind = 'proton' if use_proton else 'wine'
+        handler = self.proton_handler if use_proton else self.wine_handler
+        prefix = os.path.join(handler.prefix_base, name)
+        tracker = ChangeTracker([prefix] if unattended else tracked_roots([prefix]))
+        tracker.start()
+        icon_path = self._save_exe_icon(metadata, name, kind)
+        handler.install(file_path, name, display_name, icon_path, installer_kind)
+        manifest = tracker.finish()
+        if unattended:
+            # Lo único que se crea fuera del prefijo es el acceso directo y el icono de dotInstaller
+            for path in (handler.desktop_path(name), icon_path):
+                if path and os.path.exists(path):
+                    manifest['files'][path] = os.path.getsize(path)
+                    manifest['size'] += os.path.getsize(path)
+        self._register_tracked(display_name, file_path, kind, manifest)
+        return True
+
+    def install_script(self, file_path, line_callback=None, min_interval=0, timeout=None, progress_callback=None,
+                       preview_callback=None):
+        """Ejecuta un instalador .sh/.run anotando qué crea en disco.
+
+        Devuelve el StreamingCapture del script; si termina bien se registra
+        junto con el manifiesto de cambios para poder desinstalarlo con precisión.
+        """
+        tracker = ChangeTracker()
+        tracker.start()
+        capture = self.script_handler.run(file_path, line_callback, min_interval, timeout, progress_callback,
+                                          preview_callback)
+        if capture.returncode == 0:
+            self._register_tracked(os.path.basename(file_path), file_path, 'script', tracker.finish())
+        return capture
+
+    def _save_exe_icon(self, metadata, name, kind):
+        """Guarda el icono extraído del .exe junto a los de las AppImage; devuelve su ruta o None"""
+        if not metadata.get('icon_png'):
+            return None
+        icon_dir = os.path.expanduser('~/.local/share/icons')
+        os.makedirs(icon_dir, exist_ok=True)
+        icon_path = os.path.join(icon_dir, f"{name}-{kind}.png")
+        with open(icon_path, 'wb') as f:
+            f.write(metadata['icon_png'])
+        return icon_path
+
+    def _register_tracked(self, name, file_path, type_, manifest):
+        app_id = register_install(name, file_path, type_)
+        save_manifest(app_id, manifest)
+        return app_id
+
+    def install_files(self, file_paths, use_proton=None, progress_callback=None):
+        """Instala varios archivos; todos los .deb van juntos en una única transacción.
+
+        progress_callback(fraction, message) recibe el progreso real de apt para los .deb.
+        """
+        results = {}
+        debs = []
+        # Una sola lectura de cabecera por archivo para todo el reparto
+        kinds = {}
+        for file_path in file_paths:
+            handler = handler_for(file_path)
+            kinds[file_path] = handler.kind if handler else None
+        for file_path in file_paths:
+            if kinds[file_path] != 'deb':
+                continue
+            info = self.deb_handler.get_info(file_path)
+            if not info or not info.get('Package'):
+                results[file_path] = False
+                continue
+            debs.append((file_path, info))
+
+        if debs:
+            success = self.deb_handler.install_batch([file_path for file_path, _ in debs], progress_callback)
             if success:
-                name = os.path.basename(file_path)
-                register_install(name, file_path, 'script')
-            return success
-        elif file_path.endswith('.AppImage') or file_path.endswith('.appimage'):
-            success = self.appimage_handler.install(file_path)
-            if success == True:
-                name = os.path.basename(file_path)
-                register_install(name, file_path, 'appimage')
-            return success
-        elif file_path.endswith('.exe'):
-            name = os.path.splitext(os.path.basename(file_path))[0]
-            if use_proton:
-                self.proton_handler.install(file_path, name)
-                register_install(name, file_path, 'proton')
-                return True
-            else:
-                self.wine_handler.install(file_path, name)
-                register_install(name, file_path, 'wine')
-                return True
-        else:
-            raise NotImplementedError("Solo se soportan archivos .deb, .sh, .run, .AppImage y .exe en esta versión.")
-
-    def uninstall_file(self, app_id):
+                self._record_debs(debs)
+            for file_path, _ in debs:
+                results[file_path] = success
+
+        # Los instaladores de Windows desatendidos van en paralelo, cada uno en su prefijo.
+        # Dos archivos con el mismo nombre compartirían prefijo: esos se instalan uno tras otro.
+        if is_silent_enabled():
+            by_prefix = {}
+            for file_path in file_paths:
+                if file_path not in results and kinds[file_path] == 'windows' and detect_installer(file_path):
+                    by_prefix.setdefault(os.path.splitext(os.path.basename(file_path))[0], []).append(file_path)
+
+            def install_group(group):
+                return [(file_path, self.install_windows(file_path, use_proton, unattended=True)) for file_path in group]
+
+            if by_prefix:
+                with ThreadPoolExecutor(max_workers=parallel_install_limit()) as executor:
+                    for group_results in executor.map(install_group, by_prefix.values()):
+                        results.update(group_results)
+
+        for file_path in file_paths:
+            if file_path not in results:
+                try:
+                    results[file_path] = self.install_file(file_path, use_proton=use_proton)
+                except NotImplementedError as e:
+                    results[file_path] = {"error": str(e)}
+        return results
+
+    def install_deb_folder(self, directory, progress_callback=None, plan=None):
+        """Instala el conjunto mínimo de .deb de una carpeta en una única transacción.
+
+        Las dependencias se resuelven antes de pedir privilegios: si el conjunto
+        no se puede instalar se devuelve {"error": ...} sin llamar a apt.
+        """
+        plan = plan or plan_folder(directory)
+        if not plan['ok']:
+            return {"error": format_plan(plan)}
+        if not plan['install']:
+            return 'already_installed'
+        result = self.deb_handler.install_packages(plan['install'], progress_callback)
+        if result['returncode'] != 0:
+            return {"error": '\n'.join(result['errors']) or result['output'].strip()[-500:]}
+        self._record_debs([(file_path, self.deb_handler.get_info(file_path)) for file_path in plan['install']])
+        return True
+
+    def _record_debs(self, debs):
+        """Registra los .deb instalados con el nombre real del paquete (para desinstalarlos) y los guarda en la caché"""
+        for file_path, info in debs:
+            if info and info.get('Package'):
+                register_install(info['Package'], file_path, 'deb')
+                self._cache_deb(file_path, info)
+
+    def _cache_deb(self, file_path, info):
+        """Guarda el .deb instalado en el repositorio local si la caché está activada"""
+        if not is_cache_enabled():
+            return
+        try:
+            add_to_repo(file_path, info)
+        except OSError as e:
+            print(f"No se pudo guardar {os.path.basename(file_path)} en la caché local: {e}")
+
+    def uninstall_file(self, app_id, done_callback=None):
         app = get_app_details(app_id)
         if not app:
             return False
         _id, name, file_path, type_, install_date = app
         success = False
         if type_ == 'deb':
-            # Se asume que el nombre del paquete es el nombre sin extensión
-            package_name = os.path.splitext(name)[0]
+            package_name = self._deb_package_name(name, file_path)
             success = self.deb_handler.uninstall(package_name)
         elif type_ == 'script':
-            success = self.script_handler.uninstall(file_path)
+            success = self.script_handler.uninstall(file_path, get_manifest(app_id))
         elif type_ == 'appimage':
             success = self.appimage_handler.uninstall(file_path)
+        elif type_ in ('wine', 'proton'):
+            app_name = os.path.splitext(os.path.basename(file_path))[0]
+            success = self.uninstall_windows(type_, app_name, app_id, done_callback)
         if success:
             remove_app(app_id)
-        return success 
\ No newline at end of file
+        return success 
+
+    def uninstall_windows(self, kind, app_name, app_id=None, done_callback=None):
+        """Desinstala una aplicación de Wine/Proton retirando su prefijo al instante.
+
+        Se detiene el wineserver del prefijo (y con él los programas que sigan
+        abiertos); después el prefijo se renombra a una lápida y se borra en
+        segundo plano; done_callback(bytes liberados, fallos) se llama al terminar. El acceso
+        directo, el icono y lo que la instalación dejó fuera del prefijo se
+        borran en el momento.
+        """
+        handler = self.proton_handler if kind == 'proton' else self.wine_handler
+        prefix = os.path.join(handler.prefix_base, app_name)
+        # Primero se cierra el wineserver del prefijo: si no, seguiría escribiendo en la lápida
+        handler.stop_prefix(prefix)
+        try:
+            tomb = entomb(prefix)
+        except OSError as e:
+            print(f"No se pudo retirar el prefijo {prefix}: {e}")
+            return False
+        for path in remove_manifest(self._outside_prefix(handler, kind, app_name, prefix, app_id)):
+            print(f"No se pudo eliminar {path}")
+
+        def finished(freed, failed):
+            print(f"Prefijo de {app_name} borrado: {format_size(freed)} liberados")
+            for path in failed[:10]:
+                print(f"No se pudo eliminar {path}")
+            if done_callback:
+                done_callback(freed, failed)
+
+        if tomb:
+            remove_in_background([tomb], finished)
+        elif done_callback:
+            done_callback(0, [])
+        return True
+
+    def windows_removal_paths(self, kind, app_name, app_id=None):
+        """Lo que borraría uninstall_windows: el prefijo y lo que la instalación dejó fuera de él"""
+        handler = self.proton_handler if kind == 'proton' else self.wine_handler
+        prefix = os.path.join(handler.prefix_base, app_name)
+        return [prefix] + manifest_paths(self._outside_prefix(handler, kind, app_name, prefix, app_id))
+
+    def _outside_prefix(self, handler, kind, app_name, prefix, app_id):
+        manifest = get_manifest(app_id) if app_id is not None else None
+        if manifest is None:
+            # Registros antiguos: lo que dotInstaller crea siempre fuera del prefijo
+            icon = os.path.expanduser(f'~/.local/share/icons/{app_name}-{kind}.png')
+            manifest = {'files': {handler.desktop_path(app_name): 0, icon: 0}, 'dirs': {}}
+        # El contenido del prefijo ya no está en su sitio: se borra con la lápida
+        def inside(path):
+            return path == prefix or path.startswith(prefix + os.sep)
+
+        return {
+            'files': {path: size for path, size in manifest.get('files', {}).items() if not inside(path)},
+            'dirs': {path: size for path, size in manifest.get('dirs', {}).items() if not inside(path)},
+        }
+
+    def _deb_package_name(self, name, file_path):
+        # Los registros nuevos guardan el nombre del paquete; los antiguos, el nombre del archivo
+        if not name.endswith('.deb'):
+            return name
+        if os.path.exists(file_path):
+            info = self.deb_handler.get_info(file_path)
+            if info and info.get('Package'):
+                return info['Package']
+        # Convención Debian: paquete_versión_arquitectura.deb
+        return os.path.splitext(name)[0].split('_')[0]
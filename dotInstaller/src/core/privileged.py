@@ -0,0 +1,405 @@
+"""
+Proceso auxiliar con privilegios para dotInstaller.
+
+Se lanza una sola vez por sesión con pkexec y escucha en un socket Unix
+privado. El cliente abre una conexión por petición y envía una línea JSON
+con una operación de la lista permitida y sus argumentos; el auxiliar
+construye él mismo la línea de órdenes, la ejecuta, devuelve la salida línea
+a línea y el código de salida, y cierra la conexión. Las operaciones se
+atienden en orden, una detrás de otra, con una única autenticación.
+
+Instalar un .deb local como root equivale a ejecutar su código: esas
+operaciones no las atiende el auxiliar de la sesión sino uno aparte (--once)
+que pide la contraseña otra vez y termina tras la petición.
+
+pkexec solo lanza el auxiliar desde una ruta que ningún usuario puede
+modificar (p. ej. /usr/libexec/dotinstaller/dotinstaller-helper, instalado
+con install -Dm755 src/core/privileged.py). Por eso este archivo no importa
+nada del resto del paquete. Si no está instalado (se ejecuta desde una copia
+del repositorio), cada operación se lanza directamente con pkexec: la misma
+orden de la lista permitida, pero con una autenticación por operación.
+"""
+import argparse
+import json
+import os
+import re
+import select
+import shutil
+import socket
+import stat
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+from collections import deque
+
+HELPER_SCRIPT = os.path.abspath(__file__)
+# Ubicaciones del auxiliar instalado por el sistema, por orden de preferencia
+HELPER_LOCATIONS = ('/usr/libexec/dotinstaller/dotinstaller-helper', '/usr/lib/dotinstaller/dotinstaller-helper',
+                    '/usr/local/libexec/dotinstaller/dotinstaller-helper')
+# Intérprete del sistema: el de un entorno virtual del usuario podría estar modificado
+SYSTEM_PYTHON = '/usr/bin/python3'
+SOCKET_NAME = 'helper.sock'
+# El auxiliar termina solo si nadie lo usa durante este tiempo
+IDLE_TIMEOUT = 900
+READY_MESSAGE = 'READY'
+# Líneas de salida que el cliente conserva por operación
+OUTPUT_LINES = 500
+# Sin auxiliar instalado: pkexec de cada orden (pkexec limpia el entorno, apt necesita el modo no interactivo)
+DIRECT_LAUNCHER = ['pkexec', 'env', 'DEBIAN_FRONTEND=noninteractive']
+
+# pkexec cierra los descriptores heredados salvo 0-2, así que el canal de estado de apt va por stdout
+STATUS_FD_OPTIONS = ['-o', 'APT::Status-Fd=1', '-o', 'Dpkg::Use-Pty=0']
+
+_PACKAGE_RE = re.compile(r'^[a-z0-9][a-z0-9+.\-]*(:[a-z0-9\-]+)?$')
+
+class PrivilegedError(Exception):
+    """El auxiliar no se pudo iniciar (autenticación cancelada, pkexec ausente...)"""
+
+def _package_name(arg):
+    return bool(_PACKAGE_RE.match(arg))
+
+def _deb_path(arg):
+    return os.path.isabs(arg) and os.path.normpath(arg) == arg and arg.endswith('.deb') and os.path.isfile(arg)
+
+def _package_or_deb(arg):
+    return _package_name(arg) or _deb_path(arg)
+
+# Operación -> (orden base, validador de cada argumento o None si no admite argumentos)
+OPERATIONS = {
+    'apt-update': (['apt-get', 'update'], None),
+    'apt-install': (['apt-get', 'install', '-y'] + STATUS_FD_OPTIONS, _package_or_deb),
+    # Solo para la caché local: reinstala la misma versión o vuelve a una anterior
+    'apt-reinstall': (['apt-get', 'install', '-y', '--reinstall', '--allow-downgrades'] + STATUS_FD_OPTIONS, _deb_path),
+    'apt-remove': (['apt-get', 'remove', '--purge', '-y'], _package_name),
+    'apt-autoremove': (['apt-get', 'autoremove', '--purge', '-y'], _package_name),
+    'dpkg-install': (['dpkg', '--status-fd', '1', '-i'], _deb_path),
+}
+
+def requires_authorization(op, args):
+    """Las operaciones con rutas locales necesitan autenticarse de nuevo (un .deb es código de root)"""
+    return any(isinstance(arg, str) and arg.startswith('/') for arg in args)
+
+def is_trusted_path(path):
+    """Ni el archivo ni ninguno de sus directorios los puede modificar otro usuario que root"""
+    path = os.path.realpath(path)
+    while True:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if st.st_uid != 0 or st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            return False
+        parent = os.path.dirname(path)
+        if parent == path:
+            return True
+        path = parent
+
+def find_helper_script():
+    """El auxiliar que puede lanzar pkexec o None si solo hay copias modificables por el usuario"""
+    for candidate in HELPER_LOCATIONS + (HELPER_SCRIPT,):
+        if os.path.isfile(candidate) and is_trusted_path(candidate):
+            return candidate
+    return None
+
+def build_command(op, args):
+    """Línea de órdenes para una operación permitida; ValueError si no lo está"""
+    if op not in OPERATIONS:
+        raise ValueError(f"Operación no permitida: {op}")
+    base, validator = OPERATIONS[op]
+    args = list(args)
+    if validator is None:
+        if args:
+            raise ValueError(f"La operación {op} no admite argumentos")
+        return list(base)
+    if not args:
+        raise ValueError(f"La operación {op} necesita al menos un argumento")
+    for arg in args:
+        if not isinstance(arg, str) or not validator(arg):
+            raise ValueError(f"Argumento no permitido para {op}: {arg!r}")
+    return list(base) + args
+
+def _peer_uid(conn):
+    data = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    _, uid, _ = struct.unpack('3i', data)
+    return uid
+
+class HelperServer:
+    """Lado privilegiado: acepta conexiones solo del usuario que lo lanzó"""
+
+    def __init__(self, socket_path, owner_uid, echo=False, idle_timeout=IDLE_TIMEOUT, once=False):
+        self.socket_path = socket_path
+        self.owner_uid = owner_uid
+        # En modo eco no se ejecuta nada: se devuelve la orden (auxiliar de pruebas)
+        self.echo = echo
+        self.idle_timeout = idle_timeout
+        # Auxiliar de una sola petición, con su propia autenticación (paquetes locales)
+        self.once = once
+
+    def serve(self):
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        if os.geteuid() == 0:
+            os.chown(self.socket_path, self.owner_uid, -1)
+        listener.listen(1)
+        print(READY_MESSAGE, flush=True)
+        try:
+            while True:
+                # stdin es una tubería del cliente: si se cierra, el cliente ya no existe
+                readable, _, _ = select.select([listener, sys.stdin], [], [], self.idle_timeout)
+                if not readable:
+                    break
+                if sys.stdin in readable and not sys.stdin.readline():
+                    break
+                if listener in readable:
+                    conn, _ = listener.accept()
+                    with conn:
+                        handled = self.handle(conn)
+                    if handled and self.once:
+                        break
+        finally:
+            listener.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def handle(self, conn):
+        """Atiende una única petición; la conexión se cierra al terminar.
+
+        Así el auxiliar no queda atado a un cliente y el tiempo de espera entre
+        peticiones cuenta de verdad. Devuelve False si no llegó ninguna petición.
+        """
+        if _peer_uid(conn) not in (self.owner_uid, 0):
+            return False
+        # Un cliente que conecta y no envía nada no retiene el auxiliar más allá del tiempo de espera
+        conn.settimeout(self.idle_timeout)
+        try:
+            with conn.makefile('r', encoding='utf-8') as reader:
+                line = reader.readline()
+        except OSError:
+            return False
+        if not line:
+            return False
+        conn.settimeout(None)
+        try:
+            request = json.loads(line)
+            op, args = request.get('op'), request.get('args', [])
+            command = build_command(op, args)
+            if requires_authorization(op, args) and not self.once:
+                raise ValueError(f"La operación {op} con paquetes locales necesita autenticarse de nuevo")
+        except (ValueError, AttributeError) as e:
+            self._send(conn, {'error': str(e)})
+            return True
+        self._run(conn, command)
+        return True
+
+    def _send(self, conn, message):
+        try:
+            conn.sendall((json.dumps(message) + '\n').encode('utf-8'))
+            return True
+        except OSError:
+            return False
+
+    def _run(self, conn, command):
+        if self.echo:
+            self._send(conn, {'line': ' '.join(command)})
+            self._send(conn, {'returncode': 0})
+            return
+        env = dict(os.environ, DEBIAN_FRONTEND='noninteractive')
+        try:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                       stdin=subprocess.DEVNULL, text=True, errors='replace', env=env)
+        except OSError as e:
+            self._send(conn, {'line': str(e)})
+            self._send(conn, {'returncode': 127})
+            return
+        connected = True
+        with process:
+            for output_line in process.stdout:
+                # Si el cliente se desconecta la operación termina igualmente
+                if connected:
+                    connected = self._send(conn, {'line': output_line.rstrip('\n')})
+        self._send(conn, {'returncode': process.returncode})
+
+class PrivilegedHelper:
+    """Lado del usuario: lanza el auxiliar la primera vez y le envía operaciones en cola"""
+
+    def __init__(self, launcher=None, direct_launcher=None):
+        # Por defecto pkexec con el intérprete y el auxiliar del sistema (se buscan al lanzarlo)
+        self.launcher = launcher
+        # Sin auxiliar instalado, cada orden se eleva por separado con esto delante
+        self.direct_launcher = direct_launcher or DIRECT_LAUNCHER
+        self._warned = False
+        self._process = None
+        self._socket_dir = None
+        self._socket_path = None
+        self._lock = threading.Lock()
+
+    def is_running(self):
+        return self._process is not None and self._process.poll() is None
+
+    def start(self):
+        self._process, self._socket_dir, self._socket_path = self._launch()
+
+    def _helper_launcher(self):
+        """Orden que lanza el auxiliar o None si no hay uno instalado en una ruta del sistema"""
+        if self.launcher:
+            return self.launcher
+        script = find_helper_script()
+        return ['pkexec', SYSTEM_PYTHON, '-I', script] if script else None
+
+    def _launch(self, extra=()):
+        """Lanza un auxiliar y espera a que esté listo; devuelve (proceso, directorio, socket)"""
+        launcher = self._helper_launcher()
+        runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+        if not runtime_dir or not os.path.isdir(runtime_dir):
+            runtime_dir = None
+        # Directorio 0700 del usuario: nadie más puede llegar al socket
+        socket_dir = tempfile.mkdtemp(prefix='dotInstaller-', dir=runtime_dir)
+        socket_path = os.path.join(socket_dir, SOCKET_NAME)
+        try:
+            process = subprocess.Popen(
+                launcher + ['--socket', socket_path] + list(extra),
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+            )
+        except OSError as e:
+            shutil.rmtree(socket_dir, ignore_errors=True)
+            raise PrivilegedError(f"No se pudo lanzar el auxiliar: {e}")
+        # Bloquea mientras el usuario se autentica
+        if process.stdout.readline().strip() != READY_MESSAGE:
+            returncode = process.wait()
+            _close(process, socket_dir)
+            raise PrivilegedError(f"Autenticación cancelada o auxiliar no disponible (código {returncode})")
+        return process, socket_dir, socket_path
+
+    def run(self, op, args=(), line_callback=None):
+        """Ejecuta una operación permitida; devuelve {'returncode', 'output'} (y 'error' si se rechaza)"""
+        request = {'op': op, 'args': list(args)}
+        with self._lock:
+            if self._helper_launcher() is None:
+                return self._run_direct(op, request['args'], line_callback)
+            if requires_authorization(op, request['args']):
+                # Un auxiliar solo para esta operación: pide la contraseña y termina al acabar
+                process, socket_dir, socket_path = self._launch(['--once'])
+                try:
+                    return self._exchange(socket_path, request, line_callback)
+                finally:
+                    _close(process, socket_dir)
+            if not self.is_running():
+                self._cleanup()
+                self.start()
+            try:
+                return self._exchange(self._socket_path, request, line_callback)
+            except PrivilegedError:
+                self._cleanup()
+                raise
+
+    def _run_direct(self, op, args, line_callback=None):
+        """pkexec de la orden permitida, sin auxiliar: una autenticación por operación"""
+        if not self._warned:
+            self._warned = True
+            print(f"[Privileged] Auxiliar no instalado; para autenticarse una sola vez por sesión: "
+                  f"sudo install -Dm755 {HELPER_SCRIPT} {HELPER_LOCATIONS[0]}")
+        try:
+            command = build_command(op, args)
+        except ValueError as e:
+            return {'returncode': 1, 'output': '', 'error': str(e)}
+        try:
+            process = subprocess.Popen(self.direct_launcher + command, stdout=subprocess.PIPE,
+                                       stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL, text=True,
+                                       errors='replace')
+        except OSError as e:
+            raise PrivilegedError(f"No se pudo lanzar pkexec: {e}")
+        output = deque(maxlen=OUTPUT_LINES)
+        with process:
+            for line in process.stdout:
+                output.append(line)
+                if line_callback:
+                    line_callback(line.rstrip('\n'))
+        return {'returncode': process.returncode, 'output': ''.join(output)}
+
+    def _exchange(self, socket_path, request, line_callback=None):
+        """Envía una petición por una conexión nueva y lee la salida hasta el código de salida"""
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(socket_path)
+                sock.sendall((json.dumps(request) + '\n').encode('utf-8'))
+                # Solo el final de la salida: el detalle lo recibe line_callback
+                output = deque(maxlen=OUTPUT_LINES)
+                with sock.makefile('r', encoding='utf-8') as reader:
+                    for line in reader:
+                        message = json.loads(line)
+                        if 'line' in message:
+                            output.append(message['line'] + '\n')
+                            if line_callback:
+                                line_callback(message['line'])
+                        elif 'error' in message:
+                            return {'returncode': 1, 'output': '', 'error': message['error']}
+                        elif 'returncode' in message:
+                            return {'returncode': message['returncode'], 'output': ''.join(output)}
+        except OSError as e:
+            raise PrivilegedError(f"Se perdió la conexión con el auxiliar: {e}")
+        raise PrivilegedError("El auxiliar terminó durante la operación")
+
+    def stop(self):
+        with self._lock:
+            self._cleanup()
+
+    def _cleanup(self):
+        if self._process or self._socket_dir:
+            _close(self._process, self._socket_dir)
+        self._process = None
+        self._socket_dir = None
+        self._socket_path = None
+
+def _close(process, socket_dir):
+    if process:
+        # Al cerrar stdin el auxiliar sale de su bucle
+        if process.stdin:
+            process.stdin.close()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+        if process.stdout:
+            process.stdout.close()
+    if socket_dir:
+        shutil.rmtree(socket_dir, ignore_errors=True)
+
+_helper = None
+_helper_lock = threading.Lock()
+
+def get_helper():
+    global _helper
+    with _helper_lock:
+        if _helper is None:
+            _helper = PrivilegedHelper()
+        return _helper
+
+def run_privileged(op, args=(), line_callback=None):
+    """Ejecuta una operación con privilegios a través del auxiliar de la sesión"""
+    try:
+        return get_helper().run(op, args, line_callback)
+    except PrivilegedError as e:
+        print(f"Error con privilegios: {e}")
+        return {'returncode': 126, 'output': '', 'error': str(e)}
+
+def stop_helper():
+    """Cierra el auxiliar al salir de la aplicación"""
+    if _helper is not None:
+        _helper.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description='Auxiliar con privilegios de dotInstaller')
+    parser.add_argument('--socket', required=True)
+    parser.add_argument('--echo', action='store_true', help='No ejecuta nada; devuelve la orden (pruebas)')
+    parser.add_argument('--idle-timeout', type=int, default=IDLE_TIMEOUT)
+    parser.add_argument('--once', action='store_true', help='Atiende una sola petición (paquetes locales)')
+    options = parser.parse_args()
+    # pkexec indica en PKEXEC_UID quién pidió la elevación
+    owner_uid = int(os.environ.get('PKEXEC_UID', os.getuid()))
+    HelperServer(options.socket, owner_uid, options.echo, options.idle_timeout, options.once).serve()
+
+if __name__ == '__main__':
+    main()
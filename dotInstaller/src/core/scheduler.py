@@ -0,0 +1,258 @@
+"""
+Cola de trabajos de instalación y desinstalación de dotInstaller.
+
+Cada trabajo va a un carril según el tipo de archivo. El carril dpkg tiene
+un único hueco, porque apt y dpkg comparten el mismo candado: los .deb en
+cola se juntan en una sola transacción. AppImage, scripts y Wine corren en
+paralelo hasta el límite de su carril. Los trabajos "exclusivos" (scripts e
+instaladores de Windows interactivos, que vigilan todo el directorio
+personal con una instantánea) solo empiezan cuando no corre nada más, y
+mientras esperan no se arranca ningún otro trabajo.
+"""
+import heapq
+import itertools
+from contextlib import contextmanager
+import os
+import threading
+from src.data.database import get_setting
+from src.handlers.registry import handler_for
+from src.utils.silent_install import detect_installer, is_silent_enabled, parallel_install_limit
+
+# Carril -> (ajuste con el límite, valor por defecto); dpkg no es configurable
+LANE_LIMITS = {
+    'dpkg': (None, 1),
+    'appimage': ('jobs_appimage_limit', 4),
+    'script': ('jobs_script_limit', 2),
+    'wine': (None, None),
+}
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+class Job:
+    """Un trabajo en cola; cancel() lo retira si todavía no ha empezado (uno en marcha no se interrumpe)"""
+
+    def __init__(self, scheduler, lane, func, name, priority, exclusive, callback, file_path=None, kind=None):
+        self.id = next(scheduler._ids)
+        self.lane = lane
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.exclusive = exclusive
+        self.callback = callback
+        self.file_path = file_path
+        self.kind = kind
+        self.state = QUEUED
+        self.result = None
+        self.error = None
+        self._scheduler = scheduler
+        self._done = threading.Event()
+
+    def cancel(self):
+        """Devuelve True si el trabajo se retiró de la cola; False si ya había empezado o terminado"""
+        return self._scheduler._cancel(self)
+
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+
+    def _finish(self, state, result=None, error=None):
+        self.state = state
+        self.result = result
+        self.error = error
+        self._done.set()
+        if self.callback:
+            try:
+                self.callback(self)
+            except Exception as e:
+                print(f"[Jobs] Error en el aviso de {self.name}: {e}")
+
+class JobScheduler:
+    def __init__(self, installer=None, limits=None):
+        self._installer = installer
+        self._limits = limits or {}
+        self._ids = itertools.count(1)
+        self._order = itertools.count()
+        self._queues = {lane: [] for lane in LANE_LIMITS}
+        self._running = {lane: 0 for lane in LANE_LIMITS}
+        self._exclusive_running = False
+        self._lock = threading.Lock()
+        # Avisa a quien espera un hueco con lane_slot cuando termina un trabajo
+        self._slot_freed = threading.Condition(self._lock)
+
+    @property
+    def installer(self):
+        if self._installer is None:
+            from src.core.installer import Installer
+            self._installer = Installer()
+        return self._installer
+
+    def limit(self, lane):
+        if lane in self._limits:
+            return self._limits[lane]
+        if lane == 'wine':
+            return parallel_install_limit()
+        setting, default = LANE_LIMITS[lane]
+        return max(1, int(get_setting(setting, default))) if setting else default
+
+    def submit(self, lane, func, name='', priority=0, exclusive=False, callback=None, file_path=None, kind=None):
+        """Encola func(job); los trabajos de mayor prioridad salen antes dentro de su carril"""
+        job = Job(self, lane, func, name or getattr(func, '__name__', 'trabajo'), priority, exclusive, callback,
+                  file_path, kind)
+        with self._lock:
+            heapq.heappush(self._queues[lane], (-priority, next(self._order), job))
+        self._dispatch()
+        return job
+
+    def submit_install(self, file_path, use_proton=None, priority=0, callback=None):
+        """Encola la instalación de un archivo con Installer; job.result es lo que devuelve install_file"""
+        if os.path.isdir(file_path):
+            return self.submit('dpkg', lambda job: self.installer.install_deb_folder(file_path),
+                               os.path.basename(file_path), priority, False, callback, file_path)
+        handler = handler_for(file_path)
+        if handler is None:
+            raise NotImplementedError(f"No se sabe instalar {os.path.basename(file_path)}")
+        lane = handler.lane
+        # Los instaladores de Windows sin modo silencioso abren ventanas y vigilan todo el directorio personal
+        exclusive = lane == 'script' or (lane == 'wine' and not (is_silent_enabled() and detect_installer(file_path)))
+        if lane == 'wine' and not exclusive:
+            def func(job):
+                return self.installer.install_windows(file_path, use_proton, unattended=True)
+        else:
+            def func(job):
+                return self.installer.install_file(file_path, use_proton=use_proton)
+        return self.submit(lane, func, os.path.basename(file_path), priority, exclusive, callback, file_path,
+                           handler.kind)
+
+    def submit_uninstall(self, app_id, type_, name='', priority=0, callback=None):
+        """Encola la desinstalación de un registro de la base de datos"""
+        lane = {'deb': 'dpkg', 'appimage': 'appimage', 'script': 'script'}.get(type_, 'wine')
+        return self.submit(lane, lambda job: self.installer.uninstall_file(app_id), name or str(app_id),
+                           priority, False, callback)
+
+    @contextmanager
+    def lane_slot(self, lane):
+        """Ocupa un hueco del carril mientras dura el with.
+
+        Para trabajos de otro carril que necesitan apt (p. ej. instalar Wine
+        antes de un .exe): así apt nunca corre a la vez que el carril dpkg.
+        No respeta la espera de los exclusivos, porque quien lo pide ya está
+        en marcha y hacerle esperar los bloquearía a ambos.
+        """
+        with self._lock:
+            while self._running[lane] >= self.limit(lane):
+                self._slot_freed.wait()
+            self._running[lane] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._running[lane] -= 1
+                self._slot_freed.notify_all()
+            self._dispatch()
+
+    def jobs(self):
+        """Trabajos en cola, por carril y en el orden en que saldrán"""
+        with self._lock:
+            return {lane: [job for _, _, job in sorted(queue)] for lane, queue in self._queues.items()}
+
+    def _cancel(self, job):
+        with self._lock:
+            queue = self._queues[job.lane]
+            entry = next((entry for entry in queue if entry[2] is job), None)
+            if entry is None:
+                return False
+            queue.remove(entry)
+            heapq.heapify(queue)
+        job._finish(CANCELLED)
+        self._dispatch()
+        return True
+
+    def _exclusive_waiting(self):
+        return any(job.exclusive for queue in self._queues.values() for _, _, job in queue)
+
+    def _next_batch(self):
+        # Con el candado tomado: el siguiente grupo de trabajos que puede arrancar, o None
+        if self._exclusive_running:
+            return None
+        total_running = sum(self._running.values())
+        if self._exclusive_waiting():
+            if total_running:
+                return None
+            # El exclusivo de mayor prioridad, esté en el carril que esté
+            candidates = [entry for queue in self._queues.values() for entry in queue if entry[2].exclusive]
+            entry = min(candidates)
+            queue = self._queues[entry[2].lane]
+            queue.remove(entry)
+            heapq.heapify(queue)
+            return [entry[2]]
+        for lane, queue in self._queues.items():
+            if queue and self._running[lane] < self.limit(lane):
+                job = heapq.heappop(queue)[2]
+                batch = [job]
+                # Los .deb que esperan se instalan en la misma transacción de apt
+                if job.kind == 'deb':
+                    rest = [entry for entry in queue if entry[2].kind == 'deb']
+                    for entry in rest:
+                        queue.remove(entry)
+                        batch.append(entry[2])
+                    heapq.heapify(queue)
+                return batch
+        return None
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                batch = self._next_batch()
+                if batch is None:
+                    return
+                lane = batch[0].lane
+                self._running[lane] += 1
+                if batch[0].exclusive:
+                    self._exclusive_running = True
+                for job in batch:
+                    job.state = RUNNING
+            threading.Thread(target=self._run, args=(batch,), daemon=True).start()
+
+    def _run(self, batch):
+        try:
+            if len(batch) > 1:
+                try:
+                    results = self.installer.install_files([job.file_path for job in batch])
+                except Exception as e:
+                    print(f"[Jobs] La transacción de {len(batch)} paquetes falló: {e}")
+                    for job in batch:
+                        job._finish(FAILED, error=e)
+                    return
+                for job in batch:
+                    result = results.get(job.file_path)
+                    job._finish(DONE if result is True else FAILED, result)
+            else:
+                job = batch[0]
+                try:
+                    result = job.func(job)
+                    failed = result is False or (isinstance(result, dict) and 'error' in result)
+                    job._finish(FAILED if failed else DONE, result)
+                except Exception as e:
+                    print(f"[Jobs] {job.name} falló: {e}")
+                    job._finish(FAILED, error=e)
+        finally:
+            with self._lock:
+                self._running[batch[0].lane] -= 1
+                if batch[0].exclusive:
+                    self._exclusive_running = False
+                self._slot_freed.notify_all()
+            self._dispatch()
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    """Cola compartida por toda la aplicación"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = JobScheduler()
+        return _scheduler
@@ -1,3 +1,4 @@
+import json
 import sqlite3
 import os
 from datetime import datetime
@@ -12,6 +13,21 @@ CREATE TABLE IF NOT EXISTS installed_apps (
     type TEXT,
     install_date TEXT
 );
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS launch_stats (
+    path TEXT PRIMARY KEY,
+    kind TEXT,
+    launch_count INTEGER NOT NULL DEFAULT 0,
+    last_launch TEXT
+);
+CREATE TABLE IF NOT EXISTS install_manifests (
+    app_id INTEGER PRIMARY KEY,
+    manifest TEXT NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0
+);
 """
 
 def get_conn():
@@ -21,16 +37,17 @@ def get_conn():
 
 def init_db():
     with get_conn() as conn:
-        conn.execute(SCHEMA)
+        conn.executescript(SCHEMA)
         conn.commit()
 
 def register_install(name, file_path, type_):
     with get_conn() as conn:
-        conn.execute(
+        cur = conn.execute(
             "INSERT INTO installed_apps (name, file_path, type, install_date) VALUES (?, ?, ?, ?)",
             (name, file_path, type_, datetime.now().isoformat())
         )
         conn.commit()
+        return cur.lastrowid
 
 def is_installed(file_path):
     with get_conn() as conn:
@@ -53,4 +70,63 @@ def get_app_details(app_id):
 def remove_app(app_id):
     with get_conn() as conn:
         conn.execute("DELETE FROM installed_apps WHERE id = ?", (app_id,))
-        conn.commit() 
\ No newline at end of file
+        conn.execute("DELETE FROM install_manifests WHERE app_id = ?", (app_id,))
+        conn.commit()
+
+def save_manifest(app_id, manifest):
+    # manifest: cambios en disco de la instalación (ver src/utils/fs_tracker.py)
+    with get_conn() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO install_manifests (app_id, manifest, size) VALUES (?, ?, ?)",
+            (app_id, json.dumps(manifest), manifest.get('size', 0))
+        )
+        conn.commit()
+
+def get_manifest(app_id):
+    with get_conn() as conn:
+        cur = conn.execute("SELECT manifest FROM install_manifests WHERE app_id = ?", (app_id,))
+        row = cur.fetchone()
+        return json.loads(row[0]) if row else None
+
+def get_install_size(app_id):
+    with get_conn() as conn:
+        cur = conn.execute("SELECT size FROM install_manifests WHERE app_id = ?", (app_id,))
+        row = cur.fetchone()
+        return row[0] if row else None
+
+def get_setting(key, default=None):
+    with get_conn() as conn:
+        cur = conn.execute("SELECT value FROM settings WHERE key = ?", (key,))
+        row = cur.fetchone()
+        return row[0] if row else default
+
+def set_setting(key, value):
+    with get_conn() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+            (key, str(value))
+        )
+        conn.commit()
+
+def record_launches(launches):
+    # launches: lista de (path, kind, count, last_launch)
+    if not launches:
+        return
+    with get_conn() as conn:
+        for path, kind, count, last_launch in launches:
+            conn.execute(
+                "INSERT INTO launch_stats (path, kind, launch_count, last_launch) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET launch_count = launch_count + excluded.launch_count, "
+                "last_launch = excluded.last_launch, kind = excluded.kind",
+                (path, kind, count, last_launch)
+            )
+        conn.commit()
+
+def get_top_launched(kind, limit):
+    with get_conn() as conn:
+        cur = conn.execute(
+            "SELECT path, launch_count, last_launch FROM launch_stats WHERE kind = ? "
+            "ORDER BY launch_count DESC, last_launch DESC LIMIT ?",
+            (kind, limit)
+        )
+        return cur.fetchall()
@@ -4,6 +4,8 @@ import subprocess
 from pathlib import Path
 import tempfile
 import json
+from src.handlers.appimage_updater import AppImageUpdater
+from src.utils.appimage_validator import validate_appimage
 
 class AppImageHandler:
     def __init__(self):
@@ -20,6 +22,13 @@ class AppImageHandler:
     def install(self, file_path):
         """Instala un AppImage en el sistema"""
         try:
+            # Validar las cabeceras antes de ejecutar o copiar nada
+            validation = validate_appimage(file_path)
+            if not validation['valid']:
+                msg = f"El archivo no es una AppImage válida: {validation['error']}"
+                print(msg)
+                return {"error": msg}
+
             # Verificar AppImageLauncher al inicio
             self.check_appimagelauncher()
             
@@ -67,32 +76,18 @@ class AppImageHandler:
 
     def _is_valid_appimage(self, file_path):
         """Verifica si el archivo es un AppImage válido"""
-        try:
-            # Verificar magic bytes del AppImage
-            with open(file_path, 'rb') as f:
-                # Leer los primeros bytes
-                header = f.read(4)
-                if header[:2] == b'\x7fELF':  # ELF header
-                    # Verificar permisos de ejecución
-                    if not os.access(file_path, os.X_OK):
-                        print("AppImage no tiene permisos de ejecución, añadiendo...")
-                        os.chmod(file_path, 0o755)
-                    return True
-                
-                # Buscar signature de AppImage
-                f.seek(0)
-                content = f.read(1024)
-                if b'AppImage' in content or b'appimage' in content:
-                    # Verificar permisos de ejecución
-                    if not os.access(file_path, os.X_OK):
-                        print("AppImage no tiene permisos de ejecución, añadiendo...")
-                        os.chmod(file_path, 0o755)
-                    return True
-                    
-            return False
-        except Exception as e:
-            print(f"Error verificando AppImage: {e}")
+        validation = validate_appimage(file_path)
+        if not validation['valid']:
+            print(f"AppImage no válida: {validation['error']}")
             return False
+        # Verificar permisos de ejecución
+        if not os.access(file_path, os.X_OK):
+            print("AppImage no tiene permisos de ejecución, añadiendo...")
+            try:
+                os.chmod(file_path, 0o755)
+            except Exception as e:
+                print(f"Error verificando AppImage: {e}")
+        return True
 
     def _extract_app_info(self, appimage_path):
         """Extrae información del AppImage sin depender de AppImageLauncher"""
@@ -336,6 +331,11 @@ export APPIMAGE="{appimage_path}"
 export APPIMAGE_EXTRACT_AND_RUN=1
 export DESKTOPINTEGRATION=0
 
+# Record the launch so frequently used AppImages can be pre-cached
+LAUNCH_LOG="$HOME/.local/share/dotInstaller/launches.log"
+mkdir -p "${{LAUNCH_LOG%/*}}" 2>/dev/null
+printf '%(%s)T\\tappimage\\t%s\\n' -1 "{appimage_path}" >> "$LAUNCH_LOG" 2>/dev/null
+
 # Ensure the AppImage is executable
 if [ ! -x "{appimage_path}" ]; then
     chmod +x "{appimage_path}"
@@ -421,6 +421,17 @@ exec "{appimage_path}" "$@"
             print("\n".join(resumen))
             return False, resumen
 
+    def check_update(self, file_path):
+        """Comprueba si hay una versión nueva de una AppImage instalada"""
+        return AppImageUpdater().check_for_update(file_path)
+
+    def update(self, file_path, progress_callback=None):
+        """Actualiza una AppImage instalada descargando solo los bloques que cambian"""
+        result = AppImageUpdater().update(file_path, progress_callback)
+        if result.get("status") == "updated":
+            self._update_desktop_database()
+        return result
+
     def list_installed(self):
         """Lista los AppImages instalados"""
         try:
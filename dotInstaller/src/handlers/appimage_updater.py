@@ -0,0 +1,190 @@
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import urllib.request
+from urllib.parse import urljoin
+from src.utils.elf import read_section
+from src.utils.zsync import parse_control, match_local_blocks, missing_ranges
+
+USER_AGENT = "dotInstaller-updater/0.1"
+HTTP_TIMEOUT = 30
+# Bloques conocidos entre dos rangos que se descargan igualmente para ahorrar peticiones
+MERGE_GAP_BLOCKS = 4
+
+class AppImageUpdater:
+    """Actualiza AppImages instaladas con el mecanismo zsync (solo descarga lo que cambia)"""
+
+    def get_update_info(self, appimage_path):
+        """Lee la información de actualización de la sección ELF .upd_info"""
+        data = read_section(appimage_path, '.upd_info')
+        if not data:
+            return None
+        info = data.split(b'\x00', 1)[0].decode('utf-8', errors='replace').strip()
+        return info or None
+
+    def resolve_zsync_url(self, update_info):
+        """Convierte la cadena de .upd_info en la URL del archivo .zsync"""
+        parts = update_info.split('|')
+        kind = parts[0]
+        if kind == 'zsync' and len(parts) >= 2:
+            return '|'.join(parts[1:])
+        if kind == 'gh-releases-zsync' and len(parts) == 5:
+            _, owner, repo, tag, pattern = parts
+            if tag == 'latest':
+                api_url = f"https://api.github.com/repos/{owner}/{repo}/releases/latest"
+            else:
+                api_url = f"https://api.github.com/repos/{owner}/{repo}/releases/tags/{tag}"
+            release = json.loads(self._http_get(api_url))
+            for asset in release.get('assets', []):
+                if fnmatch.fnmatch(asset.get('name', ''), pattern):
+                    return asset['browser_download_url']
+            raise ValueError(f"No se encontró ningún archivo '{pattern}' en la release de {owner}/{repo}")
+        raise ValueError(f"Formato de actualización no soportado: {kind}")
+
+    def _http_get(self, url):
+        request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+        with urllib.request.urlopen(request, timeout=HTTP_TIMEOUT) as response:
+            return response.read()
+
+    def _download_range(self, url, start, end, control, fd, wanted):
+        """Escribe [start, end) en fd, en su desplazamiento, bloque a bloque según llega.
+
+        Comprueba el checksum de los bloques de wanted. Si el servidor ignora
+        Range escribe el archivo completo. Devuelve (bytes recibidos, completo).
+        """
+        headers = {'User-Agent': USER_AGENT, 'Range': f"bytes={start}-{end - 1}"}
+        request = urllib.request.Request(url, headers=headers)
+        with urllib.request.urlopen(request, timeout=HTTP_TIMEOUT) as response:
+            complete = response.status != 206
+            position, limit = (0, control.length) if complete else (start, end)
+            received = 0
+            while position < limit:
+                length = min(control.blocksize, limit - position)
+                block = response.read(length)
+                while block and len(block) < length:
+                    part = response.read(length - len(block))
+                    if not part:
+                        break
+                    block += part
+                if len(block) != length:
+                    raise ValueError(f"Respuesta incompleta para el rango {start}-{end}")
+                i = position // control.blocksize
+                if i in wanted and control.strong_sum(block) != control.block_sums[i][1]:
+                    raise ValueError(f"El bloque descargado {i} no coincide con su checksum")
+                os.pwrite(fd, block, position)
+                position += length
+                received += length
+            return received, complete
+
+    def _file_sha1(self, path):
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _fetch_control(self, appimage_path):
+        update_info = self.get_update_info(appimage_path)
+        if not update_info:
+            raise ValueError("La AppImage no incluye información de actualización (.upd_info)")
+        zsync_url = self.resolve_zsync_url(update_info)
+        control = parse_control(self._http_get(zsync_url))
+        if not control.url:
+            raise ValueError("El archivo .zsync no indica la URL de descarga")
+        # La URL del archivo puede ser relativa al .zsync
+        return control, urljoin(zsync_url, control.url)
+
+    def check_for_update(self, appimage_path):
+        """Comprueba si hay una versión nueva sin descargar nada más que el .zsync"""
+        try:
+            control, _ = self._fetch_control(appimage_path)
+            if control.sha1 and control.sha1 == self._file_sha1(appimage_path):
+                return {"status": "up_to_date"}
+            return {"status": "update_available", "filename": control.filename, "size": control.length}
+        except Exception as e:
+            print(f"[AppImageUpdater] Error comprobando actualizaciones: {e}")
+            return {"error": f"Error comprobando actualizaciones: {e}"}
+
+    def update(self, appimage_path, progress_callback=None, keep_backup=False):
+        """Reconstruye la nueva versión reutilizando los bloques de la AppImage instalada"""
+        def report(fraction, message):
+            if progress_callback:
+                progress_callback(fraction, message)
+
+        try:
+            report(0.0, "Descargando información de actualización...")
+            control, file_url = self._fetch_control(appimage_path)
+            if control.sha1 and control.sha1 == self._file_sha1(appimage_path):
+                return {"status": "up_to_date"}
+
+            report(0.1, "Buscando bloques reutilizables...")
+            found = match_local_blocks(control, appimage_path)
+            ranges = missing_ranges(control, found, MERGE_GAP_BLOCKS)
+            total_missing = sum(end - start for start, end in ranges)
+
+            # Bloques que se descargan (los huecos pequeños entre rangos incluidos)
+            wanted = set()
+            for start, end in ranges:
+                wanted.update(range(start // control.blocksize, -(-end // control.blocksize)))
+
+            target_dir = os.path.dirname(os.path.abspath(appimage_path))
+            fd, temp_path = tempfile.mkstemp(prefix='.zsync-', dir=target_dir)
+            try:
+                try:
+                    transferred = 0
+                    complete = False
+                    for start, end in ranges:
+                        received, complete = self._download_range(file_url, start, end, control, fd, wanted)
+                        transferred += received
+                        report(0.2 + 0.6 * min(transferred / max(total_missing, 1), 1.0),
+                               "Descargando bloques nuevos...")
+                        # Si el servidor ignora Range ya está escrito el archivo completo
+                        if complete:
+                            break
+                    report(0.8, "Reconstruyendo AppImage...")
+                    if not complete:
+                        self._copy_local_blocks(control, appimage_path, found, wanted, fd)
+                finally:
+                    os.close(fd)
+                if control.sha1 and self._file_sha1(temp_path) != control.sha1:
+                    raise ValueError("La suma SHA-1 de la AppImage reconstruida no coincide")
+                os.chmod(temp_path, 0o755)
+                if keep_backup:
+                    shutil.copy2(appimage_path, appimage_path + '.zs-old')
+                os.replace(temp_path, appimage_path)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+
+            report(1.0, "Actualización completada")
+            print(f"[AppImageUpdater] {os.path.basename(appimage_path)} actualizado: "
+                  f"{len(found)}/{control.block_count} bloques reutilizados, {transferred} bytes descargados")
+            return {
+                "status": "updated",
+                "reused_blocks": len(found),
+                "total_blocks": control.block_count,
+                "downloaded_bytes": transferred,
+            }
+        except Exception as e:
+            print(f"[AppImageUpdater] Error actualizando AppImage: {e}")
+            return {"error": f"Error actualizando AppImage: {e}"}
+
+    def _copy_local_blocks(self, control, local_path, found, downloaded, fd):
+        """Copia a fd, en su sitio, los bloques de la AppImage instalada que no se descargaron"""
+        blocksize = control.blocksize
+        with open(local_path, 'rb') as local:
+            for i in range(control.block_count):
+                if i in downloaded:
+                    continue
+                if i not in found:
+                    raise ValueError(f"Falta el bloque {i}")
+                length = min(blocksize, control.length - i * blocksize)
+                block = os.pread(local.fileno(), length, found[i])
+                if len(block) < length:
+                    # Bloque coincidente al final del archivo local, relleno con ceros
+                    block += bytes(length - len(block))
+                os.pwrite(fd, block, i * blocksize)
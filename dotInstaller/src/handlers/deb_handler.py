@@ -1,32 +1,114 @@
-import subprocess
+import os
+import shutil
+import tempfile
+from src.utils.deb_reader import DebArchive
+from src.utils.deb_preflight import check_deb, format_report
+from src.utils.deb_repo import find_cached
+from src.utils.apt_progress import ProgressTracker
+from src.core.privileged import run_privileged
 
 class DebHandler:
-    def install(self, file_path):
+    def get_info(self, file_path):
+        """Lee los campos de control del .deb (Package, Version, Depends...) sin instalarlo"""
         try:
-            # Instalar el paquete .deb usando pkexec para diálogo gráfico
-            result = subprocess.run([
-                'pkexec', 'dpkg', '-i', file_path
-            ], capture_output=True, text=True)
-            if result.returncode != 0:
-                # Intentar corregir dependencias
-                subprocess.run(['pkexec', 'apt-get', '-f', 'install', '-y'])
+            return DebArchive(file_path).control()
+        except Exception as e:
+            print(f"Error leyendo .deb: {e}")
+            return None
+
+    def preview(self, file_path):
+        """Información, entradas .desktop e icono del .deb antes de pedir privilegios"""
+        try:
+            return DebArchive(file_path).preview()
+        except Exception as e:
+            print(f"Error leyendo .deb: {e}")
+            return None
+
+    def preflight(self, file_path, info=None):
+        """Comprueba Depends/Conflicts/Breaks contra lo instalado y las listas de apt, sin privilegios"""
+        try:
+            info = info or DebArchive(file_path).control()
+            return check_deb(info)
+        except Exception as e:
+            print(f"Error en la comprobación previa del .deb: {e}")
+            return None
+
+    def install(self, file_path, progress_callback=None):
+        report = self.preflight(file_path)
+        if report:
+            if report['already_installed']:
+                # La misma versión ya está instalada: no hace falta pedir privilegios
+                print(format_report(report))
+                return True
+            if not report['ok']:
+                print(format_report(report))
                 return False
-            # Corregir dependencias si es necesario
-            subprocess.run(['pkexec', 'apt-get', '-f', 'install', '-y'])
+            if format_report(report):
+                print(format_report(report))
+        return self.install_packages([file_path], progress_callback)['returncode'] == 0
+
+    def install_batch(self, file_paths, progress_callback=None):
+        """Instala varios .deb en una sola transacción (una autenticación y un solo bloqueo de dpkg)"""
+        # Los paquetes cuya versión exacta ya está instalada no entran en la transacción
+        pending = []
+        for path in file_paths:
+            report = self.preflight(path)
+            if report and report['already_installed']:
+                print(format_report(report))
+                continue
+            pending.append(path)
+        if not pending:
             return True
-        except Exception as e:
-            print(f"Error instalando .deb: {e}")
+        return self.install_packages(pending, progress_callback)['returncode'] == 0
+
+    def install_packages(self, file_paths, progress_callback=None, op='apt-install'):
+        """Ejecuta apt-get sobre los .deb locales informando del progreso real.
+
+        apt-get resuelve las dependencias en la misma transacción (equivale a
+        dpkg -i seguido de apt-get -f install). progress_callback(fraction,
+        message) recibe el avance del canal de estado de apt.
+        """
+        # apt-get acepta rutas locales si son absolutas y acaban en .deb
+        paths = [os.path.abspath(path) for path in file_paths]
+        link_dir = None
+        for i, path in enumerate(paths):
+            if not path.endswith('.deb'):
+                # Paquete reconocido por su contenido pero con otro nombre: se le da uno que apt entienda
+                link_dir = link_dir or tempfile.mkdtemp(prefix='dotInstaller-deb-')
+                paths[i] = os.path.join(link_dir, f"{i}-{os.path.basename(path)}.deb")
+                os.symlink(path, paths[i])
+        tracker = ProgressTracker(progress_callback)
+        try:
+            result = run_privileged(op, paths, tracker.feed_line)
+        finally:
+            if link_dir:
+                shutil.rmtree(link_dir, ignore_errors=True)
+        tracker.finish()
+        if result['returncode'] != 0:
+            print(''.join(tracker.output))
+            for error in tracker.errors:
+                print(error)
+        errors = tracker.errors + ([result['error']] if result.get('error') else [])
+        return {'returncode': result['returncode'], 'output': ''.join(tracker.output), 'errors': errors}
+
+    def install_from_cache(self, package_name, version=None, progress_callback=None):
+        """Reinstala (o vuelve a una versión anterior) desde el repositorio local, sin red"""
+        path = find_cached(package_name, version)
+        if not path:
+            label = f"{package_name} {version}" if version else package_name
+            print(f"{label} no está en la caché local de paquetes")
+            return False
+        # Sin mirar si ya está instalada: reinstalar la misma versión es justo lo que se pide
+        report = self.preflight(path)
+        if report and not report['ok']:
+            print(format_report(report))
             return False
+        return self.install_packages([path], progress_callback, op='apt-reinstall')['returncode'] == 0
 
     def uninstall(self, package_name):
-        try:
-            # Desinstalar el paquete usando pkexec para diálogo gráfico
-            result = subprocess.run([
-                'pkexec', 'apt-get', 'remove', '--purge', '-y', package_name
-            ], capture_output=True, text=True)
-            print(result.stdout)
-            print(result.stderr)
-            return result.returncode == 0
-        except Exception as e:
-            print(f"Error desinstalando .deb: {e}")
-            return False 
\ No newline at end of file
+        # Desinstalar el paquete a través del auxiliar con privilegios de la sesión
+        result = run_privileged('apt-remove', [package_name])
+        print(result['output'])
+        if result.get('error'):
+            print(f"Error desinstalando .deb: {result['error']}")
+        return result['returncode'] == 0
@@ -1,5 +1,19 @@
 import subprocess
 import os
+from src.core.privileged import run_privileged
+from src.core.scheduler import get_scheduler
+from src.data.database import get_setting
+from src.utils.proton_index import find_proton
+from src.utils.wine_programs import main_program
+from src.utils.silent_install import silent_command
+from src.utils.prefix_template import ensure_template, clone_tree, is_empty_dir
+from src.utils.wine_pool import stop_server, wait_server
+
+def _exec_quote(argument):
+    # Reglas de comillas de Exec en la especificación de .desktop; después se escapan de nuevo las
+    # barras, porque el archivo aplica su propio escape a los valores antes que el de Exec
+    escaped = ''.join('\\' + char if char in '"`$\\' else char for char in argument)
+    return f'"{escaped}"'.replace('\\', '\\\\')
 
 class ProtonHandler:
     def __init__(self):
@@ -9,21 +23,18 @@ class ProtonHandler:
         self.warned_no_proton = False
 
     def find_proton(self):
-        steam_root = os.path.expanduser('~/.steam/steam/steamapps/common')
-        if not os.path.exists(steam_root):
-            return None
-        for d in os.listdir(steam_root):
-            if d.lower().startswith('proton'):
-                return os.path.join(steam_root, d, 'proton')
-        return None
+        # Índice en caché de todas las bibliotecas de Steam; la más nueva salvo que se elija otra
+        return find_proton(get_setting('proton_version'))
 
     def is_proton_installed(self):
         return self.proton_bin and os.path.exists(self.proton_bin)
 
     def install_steam(self):
         print('[ProtonHandler] Instalando Steam...')
-        subprocess.run(['pkexec', 'apt', 'update'])
-        subprocess.run(['pkexec', 'apt', 'install', '-y', 'steam'])
+        # apt no puede correr a la vez que las instalaciones de .deb de la cola
+        with get_scheduler().lane_slot('dpkg'):
+            run_privileged('apt-update')
+            return run_privileged('apt-install', ['steam'])['returncode'] == 0
 
     def install_proton(self, ask_user=True):
         # Si no hay Steam/Proton, sugerir instalar Steam y mostrar instrucciones
@@ -33,30 +44,75 @@ class ProtonHandler:
         self.install_steam()
         return 'steam_installed'
 
+    def proton_version(self):
+        # Cada Proton trae un archivo version: "<marca de tiempo> proton-X.Y-Z"
+        try:
+            with open(os.path.join(os.path.dirname(self.proton_bin), 'version')) as f:
+                return f.read().strip().split()[-1]
+        except (OSError, IndexError, TypeError):
+            return None
+
+    def boot_prefix(self, prefix):
+        # Proton copia su prefijo por defecto y arranca Wine la primera vez que se usa
+        env = {**os.environ, 'STEAM_COMPAT_DATA_PATH': prefix,
+               'STEAM_COMPAT_CLIENT_INSTALL_PATH': os.path.expanduser('~/.steam/steam')}
+        result = subprocess.run([self.proton_bin, 'run', 'wineboot', '--init'], env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return result.returncode == 0 and os.path.isdir(os.path.join(prefix, 'pfx'))
+
+    def wineserver_bin(self):
+        # El wineserver de la propia versión de Proton: el del sistema puede no hablar su protocolo
+        if self.proton_bin:
+            for subdir in ('files', 'dist'):
+                path = os.path.join(os.path.dirname(self.proton_bin), subdir, 'bin', 'wineserver')
+                if os.path.exists(path):
+                    return path
+        return None
+
+    def stop_prefix(self, prefix):
+        # El prefijo de Wine de Proton está en pfx/
+        return stop_server(os.path.join(prefix, 'pfx'), self.wineserver_bin())
+
     def prepare_prefix(self, app_name):
         prefix_path = os.path.join(self.prefix_base, app_name)
+        if is_empty_dir(prefix_path) and self.is_proton_installed():
+            version = self.proton_version()
+            template = ensure_template('proton', version, self.boot_prefix) if version else None
+            if template:
+                counts = clone_tree(template, prefix_path)
+                print(f'[ProtonHandler] Prefijo clonado de la plantilla {version}: {counts}')
         os.makedirs(prefix_path, exist_ok=True)
         return prefix_path
 
-    def run_exe(self, exe_path, app_name):
+    def run_exe(self, exe_path, app_name, installer_kind=None):
         prefix = self.prepare_prefix(app_name)
         env = os.environ.copy()
         env['STEAM_COMPAT_DATA_PATH'] = prefix
         if not self.proton_bin:
             print('[ProtonHandler] No se encontró Proton. Abortando.')
             return None
-        subprocess.run([self.proton_bin, 'run', exe_path], env=env)
+        if installer_kind:
+            # Instalación desatendida: sin menús de Wine fuera del prefijo
+            overrides = [env['WINEDLLOVERRIDES']] if env.get('WINEDLLOVERRIDES') else []
+            env['WINEDLLOVERRIDES'] = ';'.join(overrides + ['winemenubuilder.exe=d'])
+        subprocess.run([self.proton_bin, 'run'] + silent_command(exe_path, installer_kind), env=env)
+
+    def desktop_path(self, app_name):
+        return os.path.join(os.path.expanduser('~/.local/share/applications'), f'{app_name}-proton.desktop')
 
-    def create_desktop_entry(self, exe_path, app_name):
+    def create_desktop_entry(self, exe_path, app_name, display_name=None, icon_path=None, arguments=(),
+                             working_dir=None):
         prefix = self.prepare_prefix(app_name)
-        desktop_dir = os.path.expanduser('~/.local/share/applications')
-        os.makedirs(desktop_dir, exist_ok=True)
-        desktop_file = os.path.join(desktop_dir, f'{app_name}-proton.desktop')
+        desktop_file = self.desktop_path(app_name)
+        os.makedirs(os.path.dirname(desktop_file), exist_ok=True)
+        # Path= es el directorio de trabajo; los argumentos del acceso directo van tras el ejecutable
+        extra = ''.join(f' {_exec_quote(argument)}' for argument in arguments)
         content = f'''[Desktop Entry]
-Name={app_name} (Proton)
-Exec=env STEAM_COMPAT_DATA_PATH={prefix} {self.proton_bin} run "{exe_path}"
+Name={display_name or app_name} (Proton)
+Exec=env STEAM_COMPAT_DATA_PATH={prefix} {self.proton_bin} run "{exe_path}"{extra}
+Path={working_dir or os.path.dirname(exe_path)}
 Type=Application
-Icon=application-x-executable
+Icon={icon_path or 'application-x-executable'}
 Categories=Game;Proton;Application;
 Terminal=false
 '''
@@ -65,10 +121,19 @@ Terminal=false
         os.chmod(desktop_file, 0o755)
         return desktop_file
 
-    def install(self, exe_path, app_name):
+    def install(self, exe_path, app_name, display_name=None, icon_path=None, installer_kind=None):
         if not self.is_proton_installed():
             return self.install_proton(ask_user=True)
-        self.run_exe(exe_path, app_name)
-        self.create_desktop_entry(exe_path, app_name)
+        self.run_exe(exe_path, app_name, installer_kind)
+        wine_root = os.path.join(self.prepare_prefix(app_name), 'pfx')
+        # wineserver guarda system.reg al terminar: sin esperar, la entrada de Uninstall aún no está en disco
+        wait_server(wine_root, self.wineserver_bin())
+        # El acceso directo abre el programa que quedó instalado, no otra vez el instalador
+        program = main_program(wine_root)
+        if program:
+            self.create_desktop_entry(program['exe'], app_name, display_name, icon_path,
+                                      program.get('arguments', ()), program.get('working_dir'))
+        else:
+            self.create_desktop_entry(exe_path, app_name, display_name, icon_path)
         print(f'Instalación de {app_name} con Proton completada.')
         return True 
\ No newline at end of file
@@ -0,0 +1,154 @@
+import os
+import struct
+import uuid
+from src.utils.deb_reader import AR_MAGIC
+from src.utils.elf import ELF_MAGIC
+from src.utils.pe import MZ_MAGIC
+from src.utils.silent_install import MSI_MAGIC
+
+# Una sola lectura del principio del archivo basta para reconocer todos los formatos
+HEADER_SIZE = 4096
+# Marca de AppImage en e_ident (desplazamiento 8): 'AI' seguido del tipo 1 o 2
+APPIMAGE_MAGIC = (b'AI\x01', b'AI\x02')
+SHEBANG = b'#!'
+# Intérpretes de los instaladores .sh/.run; otros #! (python, perl...) solo entran por extensión
+SHELL_INTERPRETERS = (b'sh', b'bash', b'dash')
+# CLSID del almacenamiento raíz de un paquete de Windows Installer; .doc, .xls o .ppt llevan otro
+MSI_CLSID = uuid.UUID('000c1084-0000-0000-c000-000000000046').bytes_le
+
+class FileHandler:
+    """Un tipo de archivo instalable: cómo se reconoce, en qué carril de la cola va y cómo se instala.
+
+    install(installer, file_path, use_proton) hace la instalación; check(header)
+    confirma lo que la firma sola no distingue (p. ej. un ELF que no es AppImage).
+    lane es uno de los carriles de la cola de trabajos: dpkg, appimage, script o wine.
+    """
+
+    def __init__(self, kind, install, lane, magics=(), check=None, extensions=(), label=''):
+        self.kind = kind
+        self.install = install
+        self.lane = lane
+        self.magics = tuple(magics)
+        self.check = check
+        self.extensions = tuple(extension.lower() for extension in extensions)
+        self.label = label or kind
+
+_handlers = {}
+# Firma -> tipos que empiezan por ella (varios tipos pueden compartir firma y distinguirse con check)
+_by_magic = {}
+_by_extension = {}
+# Longitudes de firma distintas, de la más larga a la más corta: son muy pocas
+_magic_lengths = []
+
+def register_handler(handler):
+    """Registra (o reemplaza) un tipo de archivo; los módulos externos lo llaman al importarse"""
+    unregister_handler(handler.kind)
+    _handlers[handler.kind] = handler
+    for magic in handler.magics:
+        _by_magic.setdefault(magic, []).append(handler)
+        if len(magic) not in _magic_lengths:
+            _magic_lengths.append(len(magic))
+            _magic_lengths.sort(reverse=True)
+    for extension in handler.extensions:
+        _by_extension[extension] = handler
+    return handler
+
+def unregister_handler(kind):
+    handler = _handlers.pop(kind, None)
+    if handler is None:
+        return
+    for magic in handler.magics:
+        _by_magic[magic].remove(handler)
+        if not _by_magic[magic]:
+            del _by_magic[magic]
+    for extension in handler.extensions:
+        if _by_extension.get(extension) is handler:
+            del _by_extension[extension]
+
+def get_handler(kind):
+    return _handlers.get(kind)
+
+def list_handlers():
+    return list(_handlers.values())
+
+def read_header(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read(HEADER_SIZE)
+    except OSError:
+        return b''
+
+def classify(header):
+    """Tipo de archivo según su cabecera, o None si ninguna firma registrada coincide"""
+    for length in _magic_lengths:
+        for handler in _by_magic.get(header[:length], ()):
+            if handler.check is None or handler.check(header):
+                return handler
+    return None
+
+def handler_for(path, header=None):
+    """El manejador de path: primero por contenido; por extensión solo si el contenido no lo dice"""
+    if header is None:
+        header = read_header(path)
+    handler = classify(header)
+    if handler is None:
+        handler = _by_extension.get(os.path.splitext(path)[1].lower())
+    return handler
+
+def supported_extensions():
+    return sorted(_by_extension)
+
+def _is_appimage(header):
+    return header[8:11] in APPIMAGE_MAGIC
+
+def _is_deb(header):
+    # El primer miembro del ar de un .deb es siempre debian-binary
+    return header[8:24].rstrip(b' ').rstrip(b'/') == b'debian-binary'
+
+def _is_shell_script(header):
+    # #!/bin/sh, #! /bin/bash -e, #!/usr/bin/env bash...
+    words = header[2:].split(b'\n', 1)[0].split()
+    if not words:
+        return False
+    interpreter = os.path.basename(words[0])
+    if interpreter == b'env' and len(words) > 1:
+        interpreter = os.path.basename(words[1])
+    return interpreter in SHELL_INTERPRETERS or b'makeself' in header.lower()
+
+def _is_windows(header):
+    return header.startswith(MZ_MAGIC) or _is_msi(header)
+
+def _is_msi(header):
+    # Cabecera OLE: tamaño de sector (1 << shift) y primer sector del directorio; la primera
+    # entrada del directorio es la raíz, con su CLSID en el desplazamiento 80. Si el directorio
+    # queda fuera de la cabecera leída, decide la extensión (.msi)
+    shift, = struct.unpack_from('<H', header, 30) if len(header) >= 52 else (0,)
+    if not 7 <= shift <= 12:
+        return False
+    directory, = struct.unpack_from('<I', header, 48)
+    offset = ((directory + 1) << shift) + 80
+    return header[offset:offset + 16] == MSI_CLSID
+
+def _install_deb(installer, file_path, use_proton=None):
+    return installer.install_deb(file_path)
+
+def _install_appimage(installer, file_path, use_proton=None):
+    return installer.install_appimage(file_path)
+
+def _install_script(installer, file_path, use_proton=None):
+    return installer.install_script_file(file_path)
+
+def _install_windows(installer, file_path, use_proton=None):
+    return installer.install_windows(file_path, use_proton)
+
+register_handler(FileHandler('deb', _install_deb, 'dpkg', [AR_MAGIC], _is_deb, ['.deb'], 'Paquetes Debian'))
+register_handler(FileHandler('appimage', _install_appimage, 'appimage', [ELF_MAGIC], _is_appimage,
+                             ['.AppImage'], 'AppImages'))
+# Los .msi son documentos OLE como los de Office: solo cuentan con el CLSID de Windows Installer
+# (o la extensión). Los .exe, cualquier ejecutable MZ
+register_handler(FileHandler('windows', _install_windows, 'wine', [MZ_MAGIC, MSI_MAGIC], _is_windows,
+                             ['.exe', '.msi'],
+                             'Ejecutables de Windows'))
+# Los .run de makeself también empiezan por #!: el manejador de scripts los desempaqueta
+register_handler(FileHandler('script', _install_script, 'script', [SHEBANG], _is_shell_script, ['.sh', '.run'],
+                             'Scripts'))
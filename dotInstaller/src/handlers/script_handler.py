@@ -1,27 +1,67 @@
-import subprocess
 import shutil
 import os
+import tempfile
+from src.utils.output_capture import StreamingCapture
+from src.utils.makeself import open_makeself
+from src.utils.fs_tracker import remove_manifest
 
 class ScriptHandler:
-    def install(self, file_path):
+    def run(self, file_path, line_callback=None, min_interval=0, timeout=None, progress_callback=None,
+            preview_callback=None):
+        """Ejecuta el script y devuelve el StreamingCapture con el resultado.
+
+        Los .run de makeself se desempaquetan aquí mismo (con progress_callback),
+        comprobando sus sumas, y solo se ejecuta su script de instalación dentro
+        del directorio extraído. preview_callback(info) recibe el contenido de
+        la carga útil, leído en esa misma pasada, antes de ejecutar nada.
+        """
+        # Hacer ejecutable el script
+        os.chmod(file_path, 0o755)
+        # La salida completa va a un registro comprimido; en memoria solo las últimas líneas
+        capture = StreamingCapture(os.path.basename(file_path), line_callback=line_callback,
+                                   min_interval=min_interval)
+        archive = open_makeself(file_path)
+        if archive is None or not archive.can_extract():
+            capture.run(self._sandboxed([file_path]), timeout=timeout)
+            return capture
+        workdir = tempfile.mkdtemp(prefix='dotInstaller-run-')
         try:
-            # Hacer ejecutable el script
-            os.chmod(file_path, 0o755)
-            # Usar firejail si está disponible
-            if shutil.which('firejail'):
-                cmd = ['firejail', '--noprofile', file_path]
-            else:
-                cmd = [file_path]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            print(result.stdout)
-            print(result.stderr)
-            return result.returncode == 0
+            info = archive.extract(workdir, progress_callback, min_interval)
+            if preview_callback:
+                preview_callback(info)
+            # Las mismas variables que exporta la cabecera de makeself
+            env = dict(os.environ, USER_PWD=os.getcwd(), ARCHIVE_DIR=os.path.dirname(os.path.abspath(file_path)))
+            capture.run(self._sandboxed(archive.startup_command()), env=env, cwd=workdir, timeout=timeout)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        return capture
+
+    def _sandboxed(self, cmd):
+        # Usar firejail si está disponible
+        if shutil.which('firejail'):
+            return ['firejail', '--noprofile'] + cmd
+        return cmd
+
+    def install(self, file_path, line_callback=None):
+        try:
+            capture = self.run(file_path, line_callback)
+            print(capture.tail(50))
+            print(f"Registro completo: {capture.log_path}")
+            return capture.returncode == 0
         except Exception as e:
             print(f"Error ejecutando script: {e}")
             return False
 
-    def uninstall(self, file_path):
+    def uninstall(self, file_path, manifest=None):
         try:
+            if manifest is not None:
+                # Instalación registrada con manifiesto: borrar exactamente lo que creó
+                failed = remove_manifest(manifest)
+                for path in failed:
+                    print(f"No se pudo eliminar {path}")
+                if manifest.get('modified'):
+                    print(f"Archivos modificados por el instalador que se conservan: {len(manifest['modified'])}")
+                return not failed
             if os.path.exists(file_path):
                 os.remove(file_path)
             # Eliminar .desktop si existe
@@ -32,4 +72,4 @@ class ScriptHandler:
             return True
         except Exception as e:
             print(f"Error desinstalando script: {e}")
-            return False 
\ No newline at end of file
+            return False
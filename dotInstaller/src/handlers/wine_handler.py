@@ -1,5 +1,17 @@
 import subprocess
 import os
+from src.core.privileged import run_privileged
+from src.core.scheduler import get_scheduler
+from src.utils.output_capture import StreamingCapture
+from src.utils.prefix_template import ensure_template, clone_tree, is_empty_dir
+from src.utils.pe import read_pe_info, choose_windows_version
+from src.utils.wine_pool import launcher_script, stop_server, wait_server, LAUNCHER_NAME
+from src.utils import wine_registry
+from src.utils.wine_programs import main_program
+from src.utils.silent_install import silent_command
+
+# Mensajes de Wine que indican que hay que probar otra versión de Windows
+VERSION_ERRORS = ('no es compatible con la versión de Windows', 'not compatible with the version of Windows')
 
 class WineHandler:
     def __init__(self):
@@ -12,49 +24,107 @@ class WineHandler:
 
     def install_wine(self):
         print('Instalando Wine estable...')
-        subprocess.run(['pkexec', 'apt', 'update'])
-        subprocess.run(['pkexec', 'apt', 'install', '-y', 'wine'], check=True)
-        # Intentar instalar winetricks, pero no fallar si no está disponible
-        result = subprocess.run(['pkexec', 'apt', 'install', '-y', 'winetricks'])
-        if result.returncode != 0:
+        # Las tres operaciones van al mismo auxiliar (una sola autenticación) y ocupan el carril dpkg de la cola
+        with get_scheduler().lane_slot('dpkg'):
+            run_privileged('apt-update')
+            result = run_privileged('apt-install', ['wine'])
+            if result['returncode'] != 0:
+                raise subprocess.CalledProcessError(result['returncode'], 'apt-get install wine', result['output'])
+            # Intentar instalar winetricks, pero no fallar si no está disponible
+            result = run_privileged('apt-install', ['winetricks'])
+        if result['returncode'] != 0:
             print('[WineHandler] winetricks no está disponible en los repositorios. Puedes instalarlo manualmente si lo necesitas.')
 
+    def wine_version(self):
+        try:
+            result = subprocess.run([self.wine_bin, '--version'], capture_output=True, text=True, timeout=30)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        return result.stdout.strip() or None
+
+    def boot_prefix(self, prefix):
+        # wineboot crea el registro y drive_c; wineserver -w espera a que todo quede escrito
+        env = {**os.environ, 'WINEPREFIX': prefix, 'WINEDEBUG': '-all'}
+        result = subprocess.run([self.wine_bin, 'wineboot', '--init'], env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        subprocess.run(['wineserver', '-w'], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return result.returncode == 0 and os.path.exists(os.path.join(prefix, 'system.reg'))
+
+    def stop_prefix(self, prefix):
+        # Un wineserver vivo (del grupo en espera o de un programa abierto) seguiría escribiendo en el prefijo
+        return stop_server(prefix)
+
     def prepare_prefix(self, app_name):
         prefix_path = os.path.join(self.prefix_base, app_name)
+        if is_empty_dir(prefix_path) and self.is_wine_installed():
+            # Clonar la plantilla ya arrancada de esta versión de Wine en vez de esperar a wineboot
+            version = self.wine_version()
+            template = ensure_template('wine', version, self.boot_prefix) if version else None
+            if template:
+                counts = clone_tree(template, prefix_path)
+                print(f'[WineHandler] Prefijo clonado de la plantilla {version}: {counts}')
         os.makedirs(prefix_path, exist_ok=True)
         return prefix_path
 
     def set_windows_version(self, prefix, version):
         # version: win10, win7, win8, etc.
-        # Cambia la versión de Windows en el prefix usando winecfg en modo no interactivo
+        # Se edita user.reg directamente; arrancar winecfg cuesta un wineserver y varios segundos
+        try:
+            wine_registry.set_windows_version(prefix, version)
+            return
+        except (wine_registry.RegistryBusyError, OSError) as e:
+            # Con un wineserver vivo (o sin user.reg todavía) el cambio tiene que pasar por Wine
+            print(f'[WineHandler] Registro no editable directamente ({e}); usando winecfg')
         subprocess.run([self.wine_bin, 'winecfg', '-v', version], env={**os.environ, 'WINEPREFIX': prefix}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
 
-    def run_exe(self, exe_path, app_name):
+    def run_exe(self, exe_path, app_name, line_callback=None, installer_kind=None):
         prefix = self.prepare_prefix(app_name)
         env = os.environ.copy()
         env['WINEPREFIX'] = prefix
-        # Intentar con diferentes versiones de Windows si hay error de versión
+        # Con un tipo de instalador conocido se instala sin ventanas ni preguntas
+        command = [self.wine_bin] + silent_command(exe_path, installer_kind)
+        if installer_kind:
+            # Sin winemenubuilder Wine no escribe menús fuera del prefijo; el acceso directo lo crea dotInstaller
+            overrides = [env['WINEDLLOVERRIDES']] if env.get('WINEDLLOVERRIDES') else []
+            env['WINEDLLOVERRIDES'] = ';'.join(overrides + ['winemenubuilder.exe=d'])
+        # La versión que pide el propio ejecutable va primero: normalmente basta con una ejecución.
+        # El resto solo se prueba si Wine aun así informa de un error de versión.
         versions = ['win10', 'win7', 'win8']
+        detected = choose_windows_version(read_pe_info(exe_path))
+        if detected:
+            print(f'[WineHandler] Versión de Windows según el ejecutable: {detected}')
+            versions = [detected] + [version for version in versions if version != detected]
         for version in versions:
             self.set_windows_version(prefix, version)
             print(f'[WineHandler] Probando con versión de Windows: {version}')
-            proc = subprocess.run([self.wine_bin, exe_path], env=env, capture_output=True, text=True)
-            if 'no es compatible con la versión de Windows' not in proc.stdout + proc.stderr and 'not compatible with the version of Windows' not in proc.stdout + proc.stderr:
+            # El registro de Wine puede ser enorme: se guarda comprimido y en memoria solo el final
+            capture = StreamingCapture(f'wine-{app_name}', line_callback=line_callback, watch=VERSION_ERRORS)
+            capture.run(command, env=env)
+            proc = capture.completed(command)
+            if not capture.seen:
                 print(f'[WineHandler] Instalación exitosa con versión: {version}')
                 return proc
         print('[WineHandler] Ninguna versión de Windows fue compatible. Considera probar manualmente con winecfg.')
         return proc  # Devuelve el último intento
 
-    def create_desktop_entry(self, exe_path, app_name):
+    def desktop_path(self, app_name):
+        return os.path.join(os.path.expanduser('~/.local/share/applications'), f'{app_name}-wine.desktop')
+
+    def create_desktop_entry(self, exe_path, app_name, display_name=None, icon_path=None, arguments=(),
+                             working_dir=None):
         prefix = self.prepare_prefix(app_name)
-        desktop_dir = os.path.expanduser('~/.local/share/applications')
-        os.makedirs(desktop_dir, exist_ok=True)
-        desktop_file = os.path.join(desktop_dir, f'{app_name}-wine.desktop')
+        desktop_file = self.desktop_path(app_name)
+        os.makedirs(os.path.dirname(desktop_file), exist_ok=True)
+        # El lanzador vive en el prefijo: se desinstala con él
+        launcher = os.path.join(prefix, LAUNCHER_NAME)
+        with open(launcher, 'w') as f:
+            f.write(launcher_script(prefix, exe_path, self.wine_bin, arguments, working_dir))
+        os.chmod(launcher, 0o755)
         content = f'''[Desktop Entry]
-Name={app_name} (Wine)
-Exec=env WINEPREFIX={prefix} wine "{exe_path}"
+Name={display_name or app_name} (Wine)
+Exec="{launcher}"
 Type=Application
-Icon=application-x-executable
+Icon={icon_path or 'application-x-executable'}
 Categories=Wine;Application;
 Terminal=false
 '''
@@ -63,11 +133,20 @@ Terminal=false
         os.chmod(desktop_file, 0o755)
         return desktop_file
 
-    def install(self, exe_path, app_name):
+    def install(self, exe_path, app_name, display_name=None, icon_path=None, installer_kind=None):
         if not self.is_wine_installed():
             self.install_wine()
-        proc = self.run_exe(exe_path, app_name)
-        self.create_desktop_entry(exe_path, app_name)
+        proc = self.run_exe(exe_path, app_name, installer_kind=installer_kind)
+        prefix = self.prepare_prefix(app_name)
+        # wineserver guarda system.reg al terminar: sin esperar, la entrada de Uninstall aún no está en disco
+        wait_server(prefix)
+        # El acceso directo abre el programa que quedó instalado, no otra vez el instalador
+        program = main_program(prefix)
+        if program:
+            self.create_desktop_entry(program['exe'], app_name, display_name, icon_path,
+                                      program.get('arguments', ()), program.get('working_dir'))
+        else:
+            self.create_desktop_entry(exe_path, app_name, display_name, icon_path)
         if proc.returncode == 0:
             print(f'Instalación de {app_name} con Wine completada.')
         else:
@@ -2,11 +2,13 @@ import gi
 # Especificar versión de GTK antes de importar
 gi.require_version('Gtk', '4.0')
 from gi.repository import Gtk, GLib, Gio, Gdk  # type: ignore
-from src.data.database import list_installed, get_app_details, remove_app
+from src.data.database import list_installed, get_app_details, remove_app, get_install_size, get_manifest
+from src.utils.fs_tracker import format_size, manifest_paths
 from src.utils.package_listing import map_packages_to_desktop_entries
+from src.core.privileged import run_privileged
+from src.core.scheduler import get_scheduler
 import os
 import threading
-import subprocess
 import html
 import configparser
 
@@ -463,6 +465,20 @@ class LibraryPanel(Gtk.Box):
             repair_btn.set_child(repair_box)
             repair_btn.connect("clicked", lambda b: self.on_context_menu_item_clicked(popover, lambda: self.repair_app(app)))
             menu_box.append(repair_btn)
+
+        # Opción: Buscar actualización (AppImages con información de actualización zsync)
+        if package_name.endswith('.AppImage') or package_name.endswith('.appimage'):
+            update_btn = Gtk.Button()
+            update_btn.set_name("context-menu-item")
+            update_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
+            update_icon = Gtk.Label(label="🔄")
+            update_label = Gtk.Label(label="Buscar actualización", xalign=0)
+            update_label.set_hexpand(True)
+            update_box.append(update_icon)
+            update_box.append(update_label)
+            update_btn.set_child(update_box)
+            update_btn.connect("clicked", lambda b: self.on_context_menu_item_clicked(popover, lambda: self.check_appimage_update(app)))
+            menu_box.append(update_btn)
         
         # Añadir opciones al menú
         menu_box.append(details_btn)
@@ -510,23 +526,30 @@ class LibraryPanel(Gtk.Box):
         dialog.connect('response', on_response)
         dialog.show()
 
+    def find_appimage_path(self, app):
+        """Ruta del archivo AppImage de la aplicación (el paquete o el Exec de su .desktop) o None"""
+        package_name = app.get('package')
+        if package_name and os.path.exists(package_name):
+            return package_name
+        desktop_path = app.get('desktop')
+        if desktop_path:
+            config = configparser.ConfigParser(interpolation=None)
+            config.read(desktop_path)
+            if 'Desktop Entry' in config:
+                exec_line = (config['Desktop Entry'].get('Exec', '').split() or [''])[0]
+                if os.path.exists(exec_line):
+                    return exec_line
+        return None
+
     def uninstall_app(self, app):
         """Desinstalar aplicación"""
         package_name = app.get('package')
-        desktop_path = app.get('desktop')
         app_name = app.get('name', package_name)
         # Determinar tipo de aplicación
         if package_name and (package_name.endswith('.AppImage') or package_name.endswith('.appimage')):
             from src.handlers.appimage_handler import AppImageHandler
             handler = AppImageHandler()
-            exec_path = package_name if os.path.exists(package_name) else None
-            if not exec_path and desktop_path:
-                config = configparser.ConfigParser(interpolation=None)
-                config.read(desktop_path)
-                if 'Desktop Entry' in config:
-                    exec_line = config['Desktop Entry'].get('Exec', '').split()[0]
-                    if os.path.exists(exec_line):
-                        exec_path = exec_line
+            exec_path = self.find_appimage_path(app)
             if exec_path:
                 # Mostrar animación de desinstalación
                 progress_dialog = Gtk.Window()
@@ -555,40 +578,21 @@ class LibraryPanel(Gtk.Box):
                         if file_path == exec_path and type_ == 'appimage':
                             remove_app(_id)
                     GLib.idle_add(self.on_uninstall_complete, progress_dialog, True, None, app_name)
-                threading.Thread(target=do_uninstall, daemon=True).start()
+                get_scheduler().submit('appimage', lambda job: do_uninstall(), app_name)
             else:
                 self.show_library_error("No se pudo encontrar el archivo AppImage para desinstalar.")
             return
+        elif app.get('type') in ('wine', 'proton'):
+            self.uninstall_windows_app(app)
+            return
         elif package_name and (package_name.endswith('.sh') or package_name.endswith('.run')):
-            from src.handlers.script_handler import ScriptHandler
-            handler = ScriptHandler()
-            progress_dialog = Gtk.Window()
-            progress_dialog.set_title("Desinstalando aplicación")
-            progress_dialog.set_transient_for(self.get_root())
-            progress_dialog.set_modal(True)
-            progress_dialog.set_default_size(400, 200)
-            main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=24)
-            main_box.set_margin_top(24)
-            main_box.set_margin_bottom(24)
-            main_box.set_margin_start(24)
-            main_box.set_margin_end(24)
-            spinner = Gtk.Spinner()
-            spinner.set_size_request(32, 32)
-            spinner.start()
-            label = Gtk.Label(label=f"Desinstalando {app_name}...")
-            main_box.append(spinner)
-            main_box.append(label)
-            progress_dialog.set_child(main_box)
-            progress_dialog.show()
-            def do_uninstall():
-                handler.uninstall(package_name)
-                # Eliminar registro de la base de datos
-                for reg in list_installed():
-                    _id, name, file_path, type_, _ = reg
-                    if file_path == package_name and type_ == 'script':
-                        remove_app(_id)
-                GLib.idle_add(self.on_uninstall_complete, progress_dialog, True, None, app_name)
-            threading.Thread(target=do_uninstall, daemon=True).start()
+            registered = [reg[0] for reg in list_installed() if reg[2] == package_name and reg[3] == 'script']
+            paths = []
+            for _id in registered:
+                paths += manifest_paths(get_manifest(_id) or {})
+            if not registered:
+                paths = [package_name]
+            self.confirm_removal(app_name, paths, lambda: self.uninstall_script_app(app_name, package_name, registered))
             return
         else:
             # Paquete deb: flujo original
@@ -612,6 +616,129 @@ class LibraryPanel(Gtk.Box):
             dialog.connect('response', on_response)
             dialog.show()
 
+    def uninstall_script_app(self, app_name, package_name, registered):
+        """Desinstalar un script .sh/.run: se borra lo que anotó su manifiesto"""
+        from src.core.installer import Installer
+        progress_dialog = Gtk.Window()
+        progress_dialog.set_title("Desinstalando aplicación")
+        progress_dialog.set_transient_for(self.get_root())
+        progress_dialog.set_modal(True)
+        progress_dialog.set_default_size(400, 200)
+        main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=24)
+        main_box.set_margin_top(24)
+        main_box.set_margin_bottom(24)
+        main_box.set_margin_start(24)
+        main_box.set_margin_end(24)
+        spinner = Gtk.Spinner()
+        spinner.set_size_request(32, 32)
+        spinner.start()
+        label = Gtk.Label(label=f"Desinstalando {app_name}...")
+        main_box.append(spinner)
+        main_box.append(label)
+        progress_dialog.set_child(main_box)
+        progress_dialog.show()
+        def do_uninstall():
+            # El instalador usa el manifiesto de la instalación y elimina el registro
+            installer = Installer()
+            if registered:
+                success = all([installer.uninstall_file(_id) for _id in registered])
+            else:
+                success = installer.script_handler.uninstall(package_name)
+            error = None if success else f"No se pudieron eliminar todos los archivos de {app_name}"
+            GLib.idle_add(self.on_uninstall_complete, progress_dialog, success, error, app_name)
+        # El manifiesto del script se deshace sin otros trabajos tocando el directorio personal
+        get_scheduler().submit('script', lambda job: do_uninstall(), app_name, exclusive=True)
+
+    def confirm_removal(self, app_name, paths, on_confirm):
+        """Enseña las rutas que se van a borrar y solo sigue si el usuario acepta"""
+        if not paths:
+            on_confirm()
+            return
+        dialog = Gtk.MessageDialog(
+            transient_for=self.get_root(),
+            modal=True,
+            message_type=Gtk.MessageType.QUESTION,
+            buttons=Gtk.ButtonsType.YES_NO,
+            text=f"¿Desinstalar {app_name}?"
+        )
+        dialog.format_secondary_text(f"Se eliminarán {len(paths)} elementos creados durante la instalación:")
+        scroll = Gtk.ScrolledWindow()
+        scroll.set_policy(Gtk.PolicyType.AUTOMATIC, Gtk.PolicyType.AUTOMATIC)
+        scroll.set_min_content_height(160)
+        scroll.set_max_content_height(320)
+        scroll.set_propagate_natural_height(True)
+        path_label = Gtk.Label(label='\n'.join(paths), xalign=0)
+        path_label.set_selectable(True)
+        scroll.set_child(path_label)
+        dialog.get_message_area().append(scroll)
+        def on_response(dialog, response):
+            dialog.destroy()
+            if response == Gtk.ResponseType.YES:
+                on_confirm()
+        dialog.connect('response', on_response)
+        dialog.show()
+
+    def uninstall_windows_app(self, app):
+        """Desinstalar una aplicación de Wine/Proton: el prefijo se retira al momento y se borra en segundo plano"""
+        from src.core.installer import Installer
+        kind = app.get('type')
+        app_name = app.get('name', '')
+        # Nombre del prefijo: del .desktop que generó dotInstaller o de la ruta del prefijo indexado
+        desktop_path = app.get('desktop') or ''
+        suffix = f'-{kind}.desktop'
+        if os.path.basename(desktop_path).endswith(suffix):
+            prefix_name = os.path.basename(desktop_path)[:-len(suffix)]
+        elif app.get('prefix'):
+            prefix = app['prefix']
+            prefix_name = os.path.basename(os.path.dirname(prefix) if kind == 'proton' else prefix)
+        else:
+            self.show_library_error(f"No se pudo encontrar el prefijo de {app_name}.")
+            return
+        app_id = None
+        for _id, name, file_path, type_, _ in list_installed():
+            if type_ == kind and os.path.splitext(os.path.basename(file_path))[0] == prefix_name:
+                app_id = _id
+        paths = Installer().windows_removal_paths(kind, prefix_name, app_id)
+        self.confirm_removal(app_name, paths, lambda: self.start_windows_uninstall(app_name, kind, prefix_name, app_id))
+
+    def start_windows_uninstall(self, app_name, kind, prefix_name, app_id):
+        """Retirar el prefijo y lo que la instalación dejó fuera de él"""
+        from src.core.installer import Installer
+        size = get_install_size(app_id) if app_id is not None else None
+        progress_dialog = Gtk.Window()
+        progress_dialog.set_title("Desinstalando aplicación")
+        progress_dialog.set_transient_for(self.get_root())
+        progress_dialog.set_modal(True)
+        progress_dialog.set_default_size(400, 200)
+        main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=24)
+        main_box.set_margin_top(24)
+        main_box.set_margin_bottom(24)
+        main_box.set_margin_start(24)
+        main_box.set_margin_end(24)
+        spinner = Gtk.Spinner()
+        spinner.set_size_request(32, 32)
+        spinner.start()
+        label = Gtk.Label(label=f"Desinstalando {app_name}...")
+        main_box.append(spinner)
+        main_box.append(label)
+        progress_dialog.set_child(main_box)
+        progress_dialog.show()
+        def on_deleted(freed, failed):
+            # Solo informativo: la biblioteca ya no muestra la aplicación
+            print(f"[Biblioteca] {app_name}: {format_size(freed)} liberados")
+        def do_uninstall():
+            installer = Installer()
+            if app_id is not None:
+                success = installer.uninstall_file(app_id, on_deleted)
+            else:
+                success = installer.uninstall_windows(kind, prefix_name, done_callback=on_deleted)
+            details = f"{app_name} desinstalado; el prefijo se borra en segundo plano"
+            if size:
+                details += f" ({format_size(size)})"
+            error = None if success else f"No se pudo retirar el prefijo de {app_name}"
+            GLib.idle_add(self.on_uninstall_complete, progress_dialog, success, error, app_name, details)
+        get_scheduler().submit('wine', lambda job: do_uninstall(), app_name)
+
     def perform_uninstall(self, package_name):
         """Realizar desinstalación con animación"""
         # Crear diálogo de progreso mejorado
@@ -707,12 +834,10 @@ class LibraryPanel(Gtk.Box):
         
         def uninstall_task():
             try:
-                result = subprocess.run([
-                    'pkexec', 'apt-get', 'autoremove', '--purge', '-y', package_name
-                ], capture_output=True, text=True, timeout=300)
+                result = run_privileged('apt-autoremove', [package_name])
                 
-                success = result.returncode == 0
-                error_msg = result.stderr if not success else None
+                success = result['returncode'] == 0
+                error_msg = (result.get('error') or result['output'][-500:]) if not success else None
                 
                 # Detener animaciones de forma segura
                 try:
@@ -727,14 +852,13 @@ class LibraryPanel(Gtk.Box):
                     pass
                 
                 GLib.idle_add(self.on_uninstall_complete, progress_dialog, success, error_msg, package_name)
-            except subprocess.TimeoutExpired:
-                GLib.idle_add(self.on_uninstall_complete, progress_dialog, False, "Timeout", package_name)
             except Exception as e:
                 GLib.idle_add(self.on_uninstall_complete, progress_dialog, False, str(e), package_name)
         
-        threading.Thread(target=uninstall_task, daemon=True).start()
+        # apt comparte el candado de dpkg con las instalaciones de .deb
+        get_scheduler().submit('dpkg', lambda job: uninstall_task(), package_name)
 
-    def on_uninstall_complete(self, progress_dialog, success, error_msg, package_name):
+    def on_uninstall_complete(self, progress_dialog, success, error_msg, package_name, details=None):
         """Manejar la finalización de la desinstalación con animación"""
         # Obtener el contenedor principal
         main_box = progress_dialog.get_child()
@@ -761,7 +885,7 @@ class LibraryPanel(Gtk.Box):
             success_label.set_name("uninstall-success-label")
             
             # Detalles
-            details_label = Gtk.Label(label=f"El paquete {package_name} se ha desinstalado correctamente")
+            details_label = Gtk.Label(label=details or f"El paquete {package_name} se ha desinstalado correctamente")
             details_label.set_name("uninstall-details")
             
             # Botón para cerrar
@@ -818,6 +942,109 @@ class LibraryPanel(Gtk.Box):
             
             main_box.append(error_box)
 
+    def check_appimage_update(self, app):
+        """Comprobar si hay una versión nueva de una AppImage (solo se descarga su .zsync)"""
+        from src.handlers.appimage_handler import AppImageHandler
+        app_name = app.get('name', app.get('package'))
+        exec_path = self.find_appimage_path(app)
+        if not exec_path:
+            self.show_library_error("No se pudo encontrar el archivo AppImage para actualizar.")
+            return
+        def do_check():
+            result = AppImageHandler().check_update(exec_path)
+            GLib.idle_add(self.on_update_checked, app_name, exec_path, result)
+        get_scheduler().submit('appimage', lambda job: do_check(), app_name)
+
+    def show_update_message(self, text, secondary, message_type=Gtk.MessageType.INFO):
+        dialog = Gtk.MessageDialog(
+            transient_for=self.get_root(),
+            modal=True,
+            message_type=message_type,
+            buttons=Gtk.ButtonsType.OK,
+            text=text
+        )
+        dialog.set_secondary_text(secondary)
+        dialog.connect('response', lambda dialog, response: dialog.destroy())
+        dialog.show()
+
+    def on_update_checked(self, app_name, exec_path, result):
+        """Mostrar el resultado de la comprobación y ofrecer la actualización"""
+        if 'error' in result:
+            self.show_update_message(f"No se pudo comprobar {app_name}", result['error'], Gtk.MessageType.ERROR)
+        elif result.get('status') == 'up_to_date':
+            self.show_update_message(f"{app_name} está actualizada", "Ya tienes la última versión publicada.")
+        else:
+            dialog = Gtk.MessageDialog(
+                transient_for=self.get_root(),
+                modal=True,
+                message_type=Gtk.MessageType.QUESTION,
+                buttons=Gtk.ButtonsType.YES_NO,
+                text=f"Hay una versión nueva de {app_name}"
+            )
+            dialog.set_secondary_text(
+                f"{result.get('filename') or os.path.basename(exec_path)} ({format_size(result.get('size', 0))}).\n\n"
+                "Solo se descargan las partes que cambian respecto a la versión instalada. ¿Actualizar ahora?"
+            )
+            def on_response(dialog, response):
+                dialog.destroy()
+                if response == Gtk.ResponseType.YES:
+                    self.update_appimage(app_name, exec_path)
+            dialog.connect('response', on_response)
+            dialog.show()
+        return False
+
+    def update_appimage(self, app_name, exec_path):
+        """Actualizar una AppImage con zsync mostrando el progreso"""
+        from src.handlers.appimage_handler import AppImageHandler
+        progress_dialog = Gtk.Window()
+        progress_dialog.set_title("Actualizando aplicación")
+        progress_dialog.set_transient_for(self.get_root())
+        progress_dialog.set_modal(True)
+        progress_dialog.set_default_size(400, 160)
+        main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=16)
+        main_box.set_margin_top(24)
+        main_box.set_margin_bottom(24)
+        main_box.set_margin_start(24)
+        main_box.set_margin_end(24)
+        title_label = Gtk.Label(label=f"Actualizando {app_name}...")
+        progress_bar = Gtk.ProgressBar()
+        status_label = Gtk.Label(label="Preparando actualización...")
+        main_box.append(title_label)
+        main_box.append(progress_bar)
+        main_box.append(status_label)
+        progress_dialog.set_child(main_box)
+        progress_dialog.show()
+
+        def show_progress(fraction, message):
+            progress_bar.set_fraction(fraction)
+            if message:
+                status_label.set_label(message)
+            return False
+
+        def on_progress(fraction, message):
+            GLib.idle_add(show_progress, fraction, message)
+
+        def do_update():
+            result = AppImageHandler().update(exec_path, on_progress)
+            GLib.idle_add(self.on_update_complete, progress_dialog, app_name, result)
+        get_scheduler().submit('appimage', lambda job: do_update(), app_name)
+
+    def on_update_complete(self, progress_dialog, app_name, result):
+        """Cerrar el progreso y resumir lo que se reutilizó y descargó"""
+        progress_dialog.destroy()
+        if 'error' in result:
+            self.show_update_message(f"No se pudo actualizar {app_name}", result['error'], Gtk.MessageType.ERROR)
+        elif result.get('status') == 'up_to_date':
+            self.show_update_message(f"{app_name} está actualizada", "Ya tienes la última versión publicada.")
+        else:
+            self.show_update_message(
+                f"{app_name} actualizada",
+                f"Bloques reutilizados: {result['reused_blocks']}/{result['total_blocks']}\n"
+                f"Descargado: {format_size(result['downloaded_bytes'])}"
+            )
+            self.load_library_apps()
+        return False
+
     def repair_app(self, app):
         """Mostrar diálogo de reparación para apps Wine/Proton/AppImage (placeholder)."""
         dialog = Gtk.MessageDialog(
@@ -3,10 +3,18 @@ import gi
 gi.require_version('Gtk', '4.0')
 from gi.repository import Gtk, Gio, Gdk, GLib, Pango  # type: ignore
 from src.core.installer import Installer
+from src.core.scheduler import get_scheduler, DONE
+from src.handlers.registry import handler_for, list_handlers
+from src.handlers.deb_handler import DebHandler
+from src.handlers.proton_handler import ProtonHandler
+from src.utils.deb_preflight import format_report
+from src.utils.deb_folder import plan_folder, format_plan
+from src.utils.apt_progress import FRAME_INTERVAL
+from src.utils.makeself import format_preview
+from src.utils.silent_install import detect_installer, is_silent_enabled
 from src.ui.animation_helper import AnimationHelper
 import os
 import threading
-import subprocess
 
 class ManualPanel(Gtk.Box):
     def __init__(self):
@@ -56,7 +64,8 @@ class ManualPanel(Gtk.Box):
         
         # Configurar como destino de arrastre
         drop_target = Gtk.DropTarget.new(Gio.File, Gdk.DragAction.COPY)
-        drop_target.set_gtypes([Gio.File])
+        # Aceptar también varios archivos a la vez (los .deb se instalan en un solo lote)
+        drop_target.set_gtypes([Gdk.FileList, Gio.File])
         drop_target.connect("drop", self.on_file_dropped)
         drop_target.connect("enter", self.on_drag_enter)
         drop_target.connect("leave", self.on_drag_leave)
@@ -95,26 +104,135 @@ class ManualPanel(Gtk.Box):
         """Manejar movimiento del drag"""
         return Gdk.DragAction.COPY
 
-    def on_file_dropped(self, drop_target, file, x, y):
-        """Manejar archivo soltado"""
-        path = file.get_path()
-        print(f"Archivo soltado: {path}")  # Debug
-        
-        if path.endswith('.deb'):
-            self.install_deb_file(path)
-        elif path.endswith('.AppImage') or path.endswith('.appimage'):
-            self.install_appimage_file(path)
-        elif path.endswith('.exe'):
-            self.install_exe_file(path)
-        elif path.endswith('.sh') or path.endswith('.run'):
-            self.install_script_file(path)
-        else:
-            self.install_status.set_label("❌ Solo se admiten archivos .deb, .AppImage, .exe, .sh o .run")
+    def on_file_dropped(self, drop_target, value, x, y):
+        """Manejar archivo(s) soltado(s)"""
+        files = value.get_files() if isinstance(value, Gdk.FileList) else [value]
+        paths = [f.get_path() for f in files if f.get_path()]
+        print(f"Archivos soltados: {paths}")  # Debug
+        
+        # Cada archivo se clasifica una sola vez, por su contenido
+        handlers = {path: handler_for(path) for path in paths if not os.path.isdir(path)}
+        # Varios .deb se instalan juntos con una sola autenticación
+        debs = [path for path in paths if handlers.get(path) and handlers[path].kind == 'deb']
+        if len(debs) > 1:
+            self.install_deb_files(debs)
+            paths = [path for path in paths if path not in debs]
+        
+        for path in paths:
+            self.install_path(path, handlers.get(path))
         
         # Restaurar estilo normal
         self.drop_box.set_name("drop-area")
         return True
 
+    def install_path(self, path, handler=None):
+        """Instalar un archivo según su contenido (la extensión solo si el contenido no lo aclara)"""
+        if os.path.isdir(path):
+            self.install_deb_folder(path)
+            return
+        handler = handler or handler_for(path)
+        if handler is None:
+            self.install_status.set_label(f"❌ Formato no reconocido: {os.path.basename(path)}")
+            return
+        install = {
+            'deb': self.install_deb_file,
+            'appimage': self.install_appimage_file,
+            'windows': self.install_exe_file,
+            'script': self.install_script_file,
+        }.get(handler.kind)
+        if install:
+            install(path)
+        else:
+            self.install_registered_file(path, handler)
+
+    def install_registered_file(self, file_path, handler):
+        """Instalar un archivo de un tipo registrado por un módulo externo"""
+        name = os.path.basename(file_path)
+        self.install_status.set_label(f"⏳ Instalando {name} ({handler.label})...")
+        def on_finished(job):
+            message = f"✅ {name} instalado" if job.state == DONE else f"❌ Error instalando {name}"
+            GLib.idle_add(self.install_status.set_label, message)
+        get_scheduler().submit_install(file_path, callback=on_finished)
+
+    def install_deb_files(self, file_paths):
+        """Instalar varios .deb en una única transacción"""
+        label = f"{len(file_paths)} paquetes .deb"
+        install_dialog, status_label, progress_bar = self.animation_helper.create_animated_progress_dialog(
+            f"Instalando {label}",
+            "\n".join(os.path.basename(path) for path in file_paths[:5]) + ("\n..." if len(file_paths) > 5 else ""),
+            self.get_root()
+        )
+        install_dialog.show()
+        self.animation_helper.start_progress_animation(progress_bar)
+        status_label.set_label("Instalando paquetes y dependencias...")
+        
+        def show_progress(fraction, message):
+            # Con el primer porcentaje real se detiene el pulso de la barra
+            self.animation_helper.stop_all_animations()
+            progress_bar.set_fraction(fraction)
+            if message:
+                status_label.set_label(message)
+            return False
+        
+        def on_progress(fraction, message):
+            GLib.idle_add(show_progress, fraction, message)
+        
+        def install_task():
+            try:
+                results = Installer().install_files(file_paths, progress_callback=on_progress)
+                failed = [os.path.basename(path) for path, result in results.items() if result is not True]
+                self.animation_helper.stop_all_animations()
+                if failed:
+                    GLib.idle_add(self.show_installation_result, False, f"Fallaron: {', '.join(failed)}", label, install_dialog)
+                else:
+                    GLib.idle_add(self.show_installation_result, True, None, label, install_dialog)
+            except Exception as e:
+                self.animation_helper.stop_all_animations()
+                GLib.idle_add(self.show_installation_result, False, str(e), label, install_dialog)
+        
+        get_scheduler().submit('dpkg', lambda job: install_task(), label)
+
+    def install_deb_folder(self, directory):
+        """Instalar una carpeta de .deb resolviendo sus dependencias antes de pedir privilegios"""
+        label = os.path.basename(directory.rstrip('/')) or directory
+        install_dialog, status_label, progress_bar = self.animation_helper.create_animated_progress_dialog(
+            f"Instalando carpeta {label}",
+            "Leyendo los paquetes de la carpeta...",
+            self.get_root()
+        )
+        install_dialog.show()
+        self.animation_helper.start_progress_animation(progress_bar)
+        status_label.set_label("Resolviendo dependencias...")
+        
+        def show_progress(fraction, message):
+            self.animation_helper.stop_all_animations()
+            progress_bar.set_fraction(fraction)
+            if message:
+                status_label.set_label(message)
+            return False
+        
+        def on_progress(fraction, message):
+            GLib.idle_add(show_progress, fraction, message)
+        
+        def install_task():
+            try:
+                installer = Installer()
+                plan = plan_folder(directory)
+                if plan['ok']:
+                    summary = format_plan(plan)
+                    GLib.idle_add(lambda: status_label.set_label(summary) or False)
+                result = installer.install_deb_folder(directory, on_progress, plan)
+                self.animation_helper.stop_all_animations()
+                if isinstance(result, dict):
+                    GLib.idle_add(self.show_installation_result, False, result['error'], label, install_dialog)
+                else:
+                    GLib.idle_add(self.show_installation_result, True, None, label, install_dialog)
+            except Exception as e:
+                self.animation_helper.stop_all_animations()
+                GLib.idle_add(self.show_installation_result, False, str(e), label, install_dialog)
+        
+        get_scheduler().submit('dpkg', lambda job: install_task(), os.path.basename(directory))
+
     def install_script_file(self, file_path):
         """Instalar archivo script (.sh, .run)"""
         if not os.path.exists(file_path):
@@ -143,17 +261,6 @@ class ManualPanel(Gtk.Box):
         
         self.animation_helper.start_arrow_animation(arrow_icon)
         
-        # Mensajes de estado para scripts
-        status_messages = [
-            "Preparando instalación...",
-            "Verificando permisos...",
-            "Ejecutando script...",
-            "Configurando aplicación...",
-            "Finalizando instalación..."
-        ]
-        
-        self.animation_helper.create_status_updater(status_label, status_messages, 3000)
-        
         # Animar la barra de progreso
         def pulse_progress():
             progress_bar.pulse()
@@ -169,55 +276,59 @@ class ManualPanel(Gtk.Box):
             arrow_pos += 1
             return True
         
-        # Actualizar mensajes de estado
-        status_messages = [
-            "Preparando instalación...",
-            "Verificando permisos...",
-            "Ejecutando script...",
-            "Configurando aplicación...",
-            "Finalizando instalación..."
-        ]
+        # Iniciar animaciones
+        progress_id = GLib.timeout_add(100, pulse_progress)
+        arrow_id = GLib.timeout_add(500, animate_arrow)
         
-        status_index = 0
+        # La última línea que escribe el script se muestra como estado
+        def on_output_line(line):
+            if line.strip():
+                GLib.idle_add(lambda: status_label.set_label(line.strip()[:120]) or False)
         
-        def update_status():
-            nonlocal status_index
-            if status_index < len(status_messages):
-                status_label.set_label(status_messages[status_index])
-                status_index += 1
-                return True
+        # Progreso real al desempaquetar un .run de makeself: la barra deja de oscilar
+        pulsing = True
+        
+        def show_progress(fraction, message):
+            nonlocal pulsing
+            if pulsing:
+                GLib.source_remove(progress_id)
+                self.animation_helper.stop_all_animations()
+                pulsing = False
+            progress_bar.set_fraction(fraction)
+            if message:
+                status_label.set_label(message[:120])
             return False
         
-        # Iniciar animaciones
-        progress_id = GLib.timeout_add(100, pulse_progress)
-        arrow_id = GLib.timeout_add(500, animate_arrow)
-        status_id = GLib.timeout_add(3000, update_status)
+        def on_progress(fraction, message):
+            GLib.idle_add(show_progress, fraction, message)
         
         def install_task():
             try:
-                # Actualizar estado
                 GLib.idle_add(lambda: status_label.set_label("Ejecutando script...") or False)
                 
-                # Hacer el script ejecutable
-                os.chmod(file_path, 0o755)
+                # Vista previa de la carga útil de un .run: sale de la misma pasada que la extrae
+                def on_preview(info):
+                    summary = format_preview(info)
+                    GLib.idle_add(lambda: status_label.set_label(summary) or False)
                 
-                # Ejecutar el script
-                result = subprocess.run(
-                    [file_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=300
-                )
+                # Ejecutar el script: salida completa al registro comprimido, en memoria solo el final.
+                # El instalador anota lo que el script crea en disco para desinstalarlo después.
+                capture = Installer().install_script(file_path, on_output_line, FRAME_INTERVAL, timeout=300,
+                                                     progress_callback=on_progress, preview_callback=on_preview)
+                returncode = capture.returncode
                 
                 # Detener animaciones usando el helper
                 self.animation_helper.stop_all_animations()
                 
-                if result.returncode == 0:
+                if returncode == 0:
                     # Mostrar resultado exitoso usando el helper
                     GLib.idle_add(self.show_installation_result, True, None, file_path, install_dialog)
                 else:
-                    # Mostrar error
-                    error_msg = result.stderr if result.stderr else "Error desconocido"
+                    # Mostrar error con las últimas líneas y la ruta del registro completo
+                    error_msg = capture.tail(15) or "Error desconocido"
+                    if capture.timed_out:
+                        error_msg = "El script superó el tiempo máximo de ejecución\n" + error_msg
+                    error_msg += f"\n\nRegistro completo: {capture.log_path}"
                     GLib.idle_add(self.show_installation_result, False, error_msg, file_path, install_dialog)
                     
             except Exception as e:
@@ -225,7 +336,8 @@ class ManualPanel(Gtk.Box):
                 self.animation_helper.stop_all_animations()
                 GLib.idle_add(self.show_installation_result, False, str(e), file_path, install_dialog)
         
-        threading.Thread(target=install_task, daemon=True).start()
+        # El script se vigila con una instantánea del directorio personal: corre sin otros trabajos a la vez
+        get_scheduler().submit('script', lambda job: install_task(), os.path.basename(file_path), exclusive=True)
 
     def on_select_file(self, button):
         dialog = Gtk.FileChooserNative(
@@ -233,36 +345,22 @@ class ManualPanel(Gtk.Box):
             transient_for=self.get_root(),
             action=Gtk.FileChooserAction.OPEN
         )
-        filter_deb = Gtk.FileFilter()
-        filter_deb.set_name("Paquetes Debian")
-        filter_deb.add_pattern("*.deb")
-        dialog.add_filter(filter_deb)
-        filter_appimage = Gtk.FileFilter()
-        filter_appimage.set_name("AppImages")
-        filter_appimage.add_pattern("*.AppImage")
-        filter_appimage.add_pattern("*.appimage")
-        dialog.add_filter(filter_appimage)
-        filter_exe = Gtk.FileFilter()
-        filter_exe.set_name("Ejecutables de Windows")
-        filter_exe.add_pattern("*.exe")
-        dialog.add_filter(filter_exe)
-        filter_script = Gtk.FileFilter()
-        filter_script.set_name("Scripts")
-        filter_script.add_pattern("*.sh")
-        filter_script.add_pattern("*.run")
-        dialog.add_filter(filter_script)
+        # Un filtro por cada tipo registrado; el último deja elegir archivos sin extensión
+        for handler in list_handlers():
+            file_filter = Gtk.FileFilter()
+            file_filter.set_name(handler.label)
+            for extension in handler.extensions:
+                file_filter.add_suffix(extension[1:])
+            dialog.add_filter(file_filter)
+        filter_all = Gtk.FileFilter()
+        filter_all.set_name("Todos los archivos")
+        filter_all.add_pattern("*")
+        dialog.add_filter(filter_all)
         def on_response(dialog, response):
             if response == Gtk.ResponseType.ACCEPT:
                 file = dialog.get_file()
                 file_path = file.get_path()
-                if file_path.endswith('.deb'):
-                    self.install_deb_file(file_path)
-                elif file_path.endswith('.AppImage') or file_path.endswith('.appimage'):
-                    self.install_appimage_file(file_path)
-                elif file_path.endswith('.exe'):
-                    self.install_exe_file(file_path)
-                elif file_path.endswith('.sh') or file_path.endswith('.run'):
-                    self.install_script_file(file_path)
+                self.install_path(file_path)
             dialog.destroy()
         dialog.connect('response', on_response)
         dialog.show()
@@ -298,27 +396,42 @@ class ManualPanel(Gtk.Box):
             text="Instalando aplicación...\n\nInstalando dependencias y aplicación, por favor espera..."
         )
         cancel_requested = {"value": False}
+        job = None
         def on_cancel(dialog, response):
             cancel_requested["value"] = True
             dialog.destroy()
-            self.install_status.set_label("Instalación cancelada por el usuario.")
+            # Si aún esperaba en la cola, ni siquiera llega a empezar; una vez en marcha no se interrumpe
+            if job is None or job.cancel():
+                self.install_status.set_label("Instalación cancelada por el usuario.")
+            else:
+                self.install_status.set_label("La instalación ya había empezado: termina en segundo plano.")
         progress_dialog.connect('response', on_cancel)
         progress_dialog.show()
         
+        # Los instaladores con modo silencioso van en paralelo con otros; los interactivos, solos
+        silent = is_silent_enabled() and detect_installer(exe_path) is not None
         def do_install():
             try:
                 installer = Installer()
-                import io, sys
-                old_stdout, old_stderr = sys.stdout, sys.stderr
-                sys.stdout = io.StringIO()
-                sys.stderr = io.StringIO()
                 result = None
-                try:
-                    result = installer.install_file(exe_path, use_proton=auto_use_proton)
-                except Exception as e:
-                    result = e
-                output = sys.stdout.getvalue() + '\n' + sys.stderr.getvalue()
-                sys.stdout, sys.stderr = old_stdout, old_stderr
+                output = ''
+                if silent:
+                    try:
+                        result = installer.install_windows(exe_path, auto_use_proton, unattended=True)
+                    except Exception as e:
+                        result = e
+                else:
+                    # Solo sin otros trabajos en marcha se puede capturar la salida estándar del proceso
+                    import io, sys
+                    old_stdout, old_stderr = sys.stdout, sys.stderr
+                    sys.stdout = io.StringIO()
+                    sys.stderr = io.StringIO()
+                    try:
+                        result = installer.install_file(exe_path, use_proton=auto_use_proton)
+                    except Exception as e:
+                        result = e
+                    output = sys.stdout.getvalue() + '\n' + sys.stderr.getvalue()
+                    sys.stdout, sys.stderr = old_stdout, old_stderr
                 if cancel_requested["value"]:
                     return
                 def show_result():
@@ -335,19 +448,31 @@ class ManualPanel(Gtk.Box):
                         def on_response(dialog, response):
                             dialog.destroy()
                             if response == Gtk.ResponseType.YES:
-                                import subprocess
-                                subprocess.run(['pkexec', 'apt', 'update'])
-                                subprocess.run(['pkexec', 'apt', 'install', '-y', 'steam'])
-                                info_dialog = Gtk.MessageDialog(
-                                    transient_for=self.get_root(),
-                                    modal=True,
-                                    message_type=Gtk.MessageType.INFO,
-                                    buttons=Gtk.ButtonsType.OK,
-                                    text="Steam instalado\n\nAbre Steam, ve a la Biblioteca > Herramientas y descarga Proton. Luego vuelve a intentar la instalación del juego."
-                                )
-                                info_dialog.connect('response', lambda d, r: d.destroy())
-                                info_dialog.show()
-                                self.install_status.set_label("Steam instalado. Descarga Proton desde Steam y vuelve a intentar.")
+                                self.install_status.set_label("Instalando Steam...")
+                                def steam_installed(installed):
+                                    if not installed:
+                                        self.install_status.set_label("❌ No se pudo instalar Steam.")
+                                        return False
+                                    info_dialog = Gtk.MessageDialog(
+                                        transient_for=self.get_root(),
+                                        modal=True,
+                                        message_type=Gtk.MessageType.INFO,
+                                        buttons=Gtk.ButtonsType.OK,
+                                        text="Steam instalado\n\nAbre Steam, ve a la Biblioteca > Herramientas y descarga Proton. Luego vuelve a intentar la instalación del juego."
+                                    )
+                                    info_dialog.connect('response', lambda d, r: d.destroy())
+                                    info_dialog.show()
+                                    self.install_status.set_label("Steam instalado. Descarga Proton desde Steam y vuelve a intentar.")
+                                    return False
+                                def steam_task():
+                                    try:
+                                        installed = ProtonHandler().install_steam()
+                                    except Exception as e:
+                                        print(f"[ManualPanel] Error instalando Steam: {e}")
+                                        installed = False
+                                    GLib.idle_add(steam_installed, installed)
+                                # install_steam ocupa el carril dpkg por su cuenta; encolarlo en él lo bloquearía
+                                get_scheduler().submit('wine', lambda job: steam_task(), "Steam")
                             else:
                                 self.install_status.set_label("Instalación cancelada. No se instaló Steam.")
                         dialog.connect('response', on_response)
@@ -391,7 +516,7 @@ class ManualPanel(Gtk.Box):
                     progress_dialog.destroy()
                     self.install_status.set_label(f"❌ Error inesperado: {e}")
                 GLib.idle_add(show_error)
-        threading.Thread(target=do_install, daemon=True).start()
+        job = get_scheduler().submit('wine', lambda job: do_install(), os.path.basename(exe_path), exclusive=not silent)
 
     def install_deb_file(self, file_path):
         """Instalar archivo .deb con animación"""
@@ -399,6 +524,13 @@ class ManualPanel(Gtk.Box):
             self.install_status.set_label("❌ El archivo no existe")
             return
         
+        # Leer el control del paquete antes de pedir privilegios
+        deb_handler = DebHandler()
+        deb_info = deb_handler.get_info(file_path)
+        if not deb_info or not deb_info.get('Package'):
+            self.install_status.set_label("❌ El archivo no es un paquete .deb válido")
+            return
+        
         # Crear ventana de instalación con animación
         install_dialog = Gtk.Window()
         install_dialog.set_title("Instalando paquete")
@@ -418,7 +550,7 @@ class ManualPanel(Gtk.Box):
         animation_box.set_halign(Gtk.Align.CENTER)
         
         # Animación de instalación
-        package_name = os.path.basename(file_path)
+        package_name = f"{deb_info['Package']} {deb_info['Version']}".strip()
         
         # Contenedor para la animación de paquete
         package_animation = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=8)
@@ -457,8 +589,12 @@ class ManualPanel(Gtk.Box):
         title_label.set_name("install-title")
         
         # Descripción
-        desc_label = Gtk.Label(label="El paquete se está instalando en el sistema...")
+        # Primera línea de la descripción del paquete, si la tiene
+        summary = deb_info.get('Description', '').split('\n')[0]
+        desc_label = Gtk.Label(label=summary or "El paquete se está instalando en el sistema...")
         desc_label.set_name("install-desc")
+        desc_label.set_wrap(True)
+        desc_label.set_max_width_chars(50)
         
         info_box.append(title_label)
         info_box.append(desc_label)
@@ -484,8 +620,33 @@ class ManualPanel(Gtk.Box):
         install_dialog.set_child(main_box)
         install_dialog.show()
         
-        # Animar la barra de progreso
+        # Mostrar el icono real del paquete (se lee de data.tar en segundo plano)
+        def show_package_icon(icon_data):
+            try:
+                texture = Gdk.Texture.new_from_bytes(GLib.Bytes.new(icon_data))
+            except GLib.Error:
+                return False
+            image = Gtk.Image.new_from_paintable(texture)
+            image.set_pixel_size(64)
+            package_animation.prepend(image)
+            package_icon.set_visible(False)
+            return False
+        
+        def load_preview():
+            preview = deb_handler.preview(file_path)
+            if preview and preview.get('icon'):
+                GLib.idle_add(show_package_icon, preview['icon'][1])
+        
+        threading.Thread(target=load_preview, daemon=True).start()
+        
+        # La barra pulsa hasta que apt envía el primer porcentaje real (p. ej. mientras se autentica)
+        real_progress = False
+        
         def pulse_progress():
+            nonlocal progress_id
+            if real_progress:
+                progress_id = 0
+                return False
             progress_bar.pulse()
             return True
         
@@ -499,114 +660,77 @@ class ManualPanel(Gtk.Box):
             arrow_pos += 1
             return True
         
-        # Actualizar mensajes de estado
-        status_messages = [
-            "Preparando instalación...",
-            "Extrayendo archivos...",
-            "Configurando paquete...",
-            "Instalando dependencias...",
-            "Registrando aplicación...",
-            "Finalizando instalación..."
-        ]
+        # Iniciar animaciones
+        progress_id = GLib.timeout_add(100, pulse_progress)
+        arrow_id = GLib.timeout_add(500, animate_arrow)
         
-        status_index = 0
+        def stop_animations():
+            for source_id in (progress_id, arrow_id):
+                try:
+                    if source_id > 0:
+                        GLib.source_remove(source_id)
+                except:
+                    pass
         
-        def update_status():
-            nonlocal status_index
-            if status_index < len(status_messages):
-                status_label.set_label(status_messages[status_index])
-                status_index += 1
-                return True
+        def show_progress(fraction, message):
+            nonlocal real_progress
+            real_progress = True
+            progress_bar.set_fraction(fraction)
+            progress_bar.set_text(f"{int(fraction * 100)} %")
+            progress_bar.set_show_text(True)
+            if message:
+                status_label.set_label(message)
             return False
         
-        # Iniciar animaciones
-        progress_id = GLib.timeout_add(100, pulse_progress)
-        arrow_id = GLib.timeout_add(500, animate_arrow)
-        status_id = GLib.timeout_add(3500, update_status)
+        def on_progress(fraction, message):
+            # Llega desde el hilo lector ya limitado a un aviso por fotograma
+            GLib.idle_add(show_progress, fraction, message)
         
         def install_task():
             try:
+                # Comprobar dependencias sin privilegios antes de lanzar pkexec
+                GLib.idle_add(lambda: status_label.set_label("Comprobando dependencias...") or False)
+                report = deb_handler.preflight(file_path, deb_info)
+                if report:
+                    summary = format_report(report)
+                    if report['already_installed']:
+                        stop_animations()
+                        GLib.idle_add(self.show_deb_already_installed, summary, install_dialog)
+                        return
+                    if not report['ok']:
+                        stop_animations()
+                        GLib.idle_add(self.on_install_complete, False, summary, file_path, install_dialog)
+                        return
+                    if summary:
+                        GLib.idle_add(lambda: desc_label.set_label(summary) or False)
+                
                 # Actualizar estado
-                GLib.idle_add(lambda: status_label.set_label("Instalando paquete...") or False)
+                GLib.idle_add(lambda: status_label.set_label("Esperando autenticación...") or False)
                 
-                result = subprocess.run(
-                    ['pkexec', 'dpkg', '-i', file_path],
-                    capture_output=True,
-                    text=True,
-                    timeout=300
-                )
+                # Una sola transacción de apt: instala el paquete y sus dependencias, y lo registra
+                result = Installer().install_deb_packages([file_path], on_progress, {file_path: deb_info})
                 
-                if result.returncode == 0:
-                    # Actualizar estado
-                    GLib.idle_add(lambda: status_label.set_label("Resolviendo dependencias...") or False)
-                    
-                    # Resolver dependencias
-                    subprocess.run(
-                        ['pkexec', 'apt-get', 'install', '-f', '-y'],
-                        capture_output=True,
-                        text=True,
-                        timeout=300
-                    )
-                    
-                    # Detener animaciones de forma segura
-                    try:
-                        if progress_id > 0:
-                            GLib.source_remove(progress_id)
-                    except:
-                        pass
-                    try:
-                        if arrow_id > 0:
-                            GLib.source_remove(arrow_id)
-                    except:
-                        pass
-                    try:
-                        if status_id > 0:
-                            GLib.source_remove(status_id)
-                    except:
-                        pass
-                    
+                # Detener animaciones de forma segura
+                stop_animations()
+                
+                if result['returncode'] == 0:
                     # Mostrar resultado
                     GLib.idle_add(self.on_install_complete, True, None, file_path, install_dialog)
                 else:
-                    # Detener animaciones de forma segura
-                    try:
-                        if progress_id > 0:
-                            GLib.source_remove(progress_id)
-                    except:
-                        pass
-                    try:
-                        if arrow_id > 0:
-                            GLib.source_remove(arrow_id)
-                    except:
-                        pass
-                    try:
-                        if status_id > 0:
-                            GLib.source_remove(status_id)
-                    except:
-                        pass
-                    
-                    GLib.idle_add(self.on_install_complete, False, result.stderr, file_path, install_dialog)
+                    error_msg = '\n'.join(result['errors']) or result['output'].strip()[-500:]
+                    GLib.idle_add(self.on_install_complete, False, error_msg, file_path, install_dialog)
             except Exception as e:
                 # Detener animaciones en caso de error de forma segura
-                try:
-                    if progress_id > 0:
-                        GLib.source_remove(progress_id)
-                except:
-                    pass
-                try:
-                    if arrow_id > 0:
-                        GLib.source_remove(arrow_id)
-                except:
-                    pass
-                try:
-                    if status_id > 0:
-                        GLib.source_remove(status_id)
-                except:
-                    pass
-                
+                stop_animations()
                 GLib.idle_add(self.on_install_complete, False, str(e), file_path, install_dialog)
         
-        threading.Thread(target=install_task, daemon=True).start()
+        get_scheduler().submit('dpkg', lambda job: install_task(), os.path.basename(file_path))
+
+    def show_deb_already_installed(self, summary, install_dialog):
+        """La versión exacta del paquete ya está instalada: no se pide autenticación"""
+        install_dialog.destroy()
+        self.install_status.set_label(f"ℹ️ {summary}")
+        return False
 
     def install_appimage_file(self, file_path):
         """Instalar archivo AppImage con animación"""
@@ -755,7 +879,7 @@ class ManualPanel(Gtk.Box):
                     except:
                         pass
                     GLib.idle_add(self.on_install_complete, False, str(e), file_path, install_dialog)
-            threading.Thread(target=install_task, daemon=True).start()
+            get_scheduler().submit('appimage', lambda job: install_task(), os.path.basename(file_path))
         do_install()
 
     def show_installation_result(self, success, error_msg, file_path, install_dialog=None):
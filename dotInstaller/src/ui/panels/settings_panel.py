@@ -1,9 +1,16 @@
 import gi
 # Especificar versión de GTK antes de importar
 gi.require_version('Gtk', '4.0')
-from gi.repository import Gtk, Gdk, Pango  # type: ignore
-from src.data.database import list_installed, remove_app
+from gi.repository import Gtk, Gdk, GLib, Pango  # type: ignore
+from src.data.database import list_installed, remove_app, get_install_size, get_setting, set_setting
+from src.handlers.deb_handler import DebHandler
+from src.utils.deb_repo import find_cached
+from src.utils.fs_tracker import format_size
+from src.utils.readahead import DEFAULT_TOP_N, DEFAULT_BUDGET_MB
+from src.utils.wine_pool import DEFAULT_POOL_SIZE
+from src.core.background import install_timer, remove_timer
 import os
+import threading
 import subprocess
 import datetime
 
@@ -37,9 +44,84 @@ class SettingsPanel(Gtk.Box):
         description.set_margin_bottom(16)
         self.append(description)
         
+        # Opciones de la aplicación (se guardan en la tabla settings)
+        self.options_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=8)
+        self.options_box.set_name("settings-options")
+        self.options_box.set_margin_bottom(16)
+        self.options_box.append(self.create_switch_row(
+            'deb_cache_enabled', "Guardar una copia de los .deb instalados",
+            "Permite reinstalar o volver a una versión anterior sin el archivo original"))
+        self.options_box.append(self.create_switch_row(
+            'readahead_enabled', "Precargar las AppImages más usadas",
+            "Con el sistema ocioso, las lee en la caché de memoria para que arranquen antes", default='1'))
+        self.options_box.append(self.create_spin_row(
+            'readahead_top_n', "AppImages que se precargan", DEFAULT_TOP_N, 1, 50))
+        self.options_box.append(self.create_spin_row(
+            'readahead_budget_mb', "Memoria máxima para la precarga (MB)", DEFAULT_BUDGET_MB, 64, 8192, 64))
+        self.options_box.append(self.create_switch_row(
+            'wine_pool_enabled', "Mantener Wine preparado para los programas más usados",
+            "Deja un wineserver en espera en los prefijos lanzados hace poco: arrancan sin esperar a Wine"))
+        self.options_box.append(self.create_spin_row(
+            'wine_pool_size', "Prefijos de Wine en espera", DEFAULT_POOL_SIZE, 1, 10))
+        self.options_box.append(self.create_switch_row(
+            'background_tasks_enabled', "Mantenimiento con dotInstaller cerrado",
+            "Un temporizador de usuario (o el autoarranque) repite la precarga y el grupo de Wine sin abrir la aplicación",
+            on_change=self.on_background_toggled))
+        self.append(self.options_box)
+        
         # Cargar registros
         self.load_registry_data()
     
+    def create_switch_row(self, key, title, subtitle, default='0', on_change=None):
+        """Fila con un interruptor que guarda '1' o '0' en la opción key; on_change(activo) se llama después"""
+        row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
+        row.set_name("settings-option-row")
+        
+        text_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=2)
+        text_box.set_hexpand(True)
+        title_label = Gtk.Label(label=title, xalign=0)
+        subtitle_label = Gtk.Label(xalign=0)
+        subtitle_label.set_markup(f"<span size='small'>{GLib.markup_escape_text(subtitle)}</span>")
+        subtitle_label.set_name("settings-description")
+        text_box.append(title_label)
+        text_box.append(subtitle_label)
+        
+        switch = Gtk.Switch()
+        switch.set_valign(Gtk.Align.CENTER)
+        switch.set_active(get_setting(key, default) == '1')
+        def on_active(switch, _):
+            set_setting(key, '1' if switch.get_active() else '0')
+            if on_change:
+                on_change(switch.get_active())
+        switch.connect("notify::active", on_active)
+        
+        row.append(text_box)
+        row.append(switch)
+        return row
+    
+    def create_spin_row(self, key, title, default, lower, upper, step=1):
+        """Fila con un campo numérico que guarda su valor en la opción key"""
+        row = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=12)
+        row.set_name("settings-option-row")
+        title_label = Gtk.Label(label=title, xalign=0)
+        title_label.set_hexpand(True)
+        
+        spin = Gtk.SpinButton.new_with_range(lower, upper, step)
+        spin.set_valign(Gtk.Align.CENTER)
+        try:
+            spin.set_value(int(get_setting(key, default)))
+        except ValueError:
+            spin.set_value(default)
+        spin.connect("value-changed", lambda s: set_setting(key, s.get_value_as_int()))
+        
+        row.append(title_label)
+        row.append(spin)
+        return row
+    
+    def on_background_toggled(self, active):
+        """Programa o quita el mantenimiento fuera de la interfaz (systemctl puede tardar)"""
+        threading.Thread(target=install_timer if active else remove_timer, daemon=True).start()
+    
     def load_registry_data(self):
         """Cargar datos de la base de datos"""
         registros = list_installed()
@@ -245,6 +327,20 @@ class SettingsPanel(Gtk.Box):
             open_btn.connect("clicked", lambda b: self.on_settings_menu_item_clicked(popover, lambda: self.open_file_location(file_path)))
             menu_box.append(open_btn)
         
+        # Opción: Reinstalar desde la caché local de paquetes (si hay copia guardada)
+        if type_ == 'deb' and find_cached(name):
+            cache_btn = Gtk.Button()
+            cache_btn.set_name("context-menu-item")
+            cache_box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=8)
+            cache_icon = Gtk.Label(label="📦")
+            cache_label = Gtk.Label(label="Reinstalar desde caché", xalign=0)
+            cache_label.set_hexpand(True)
+            cache_box.append(cache_icon)
+            cache_box.append(cache_label)
+            cache_btn.set_child(cache_box)
+            cache_btn.connect("clicked", lambda b: self.on_settings_menu_item_clicked(popover, lambda: self.reinstall_from_cache(name)))
+            menu_box.append(cache_btn)
+        
         # Añadir opciones al menú
         menu_box.append(details_btn)
         menu_box.append(delete_btn)
@@ -357,6 +453,18 @@ class SettingsPanel(Gtk.Box):
         details_grid.attach(date_label, 0, 4, 1, 1)
         details_grid.attach(date_value, 1, 4, 1, 1)
         
+        # Espacio en disco (solo instalaciones con manifiesto de cambios)
+        install_size = get_install_size(_id)
+        if install_size is not None:
+            size_label = Gtk.Label(label="Espacio en disco:")
+            size_label.set_halign(Gtk.Align.START)
+            size_label.set_name("detail-label")
+            size_value = Gtk.Label(label=format_size(install_size))
+            size_value.set_halign(Gtk.Align.START)
+            size_value.set_selectable(True)
+            details_grid.attach(size_label, 0, 5, 1, 1)
+            details_grid.attach(size_value, 1, 5, 1, 1)
+        
         content_area.append(details_grid)
         
         # Botones
@@ -395,6 +503,26 @@ class SettingsPanel(Gtk.Box):
             self.clear_content()
             self.load_registry_data()
     
+    def reinstall_from_cache(self, package_name):
+        """Reinstalar un .deb desde el repositorio local sin buscar el archivo original"""
+        def show_result(success):
+            dialog = Gtk.MessageDialog(
+                transient_for=self.get_root(),
+                modal=True,
+                message_type=Gtk.MessageType.INFO if success else Gtk.MessageType.ERROR,
+                buttons=Gtk.ButtonsType.OK,
+                text=f"{package_name} reinstalado desde la caché" if success else f"No se pudo reinstalar {package_name}"
+            )
+            dialog.connect('response', lambda d, r: d.destroy())
+            dialog.show()
+            return False
+        
+        def reinstall_task():
+            success = DebHandler().install_from_cache(package_name)
+            GLib.idle_add(show_result, success)
+        
+        threading.Thread(target=reinstall_task, daemon=True).start()
+    
     def open_file_location(self, file_path):
         """Abrir la ubicación del archivo en el explorador de archivos"""
         directory = os.path.dirname(file_path)
@@ -415,6 +543,6 @@ class SettingsPanel(Gtk.Box):
     
     def clear_content(self):
         """Limpiar contenido del panel para recargar"""
-        # Remover todos los widgets excepto el header y descripción
-        while self.get_last_child() and self.get_last_child() != self.get_first_child().get_next_sibling():
+        # Remover todos los widgets excepto el header, la descripción y las opciones
+        while self.get_last_child() and self.get_last_child() != self.options_box:
             self.remove(self.get_last_child()) 
\ No newline at end of file
@@ -0,0 +1,94 @@
+import os
+import platform
+import struct
+from src.utils.elf import read_elf_header, elf_end_offset
+
+# Valores de e_machine de la cabecera ELF
+EM_386 = 3
+EM_ARM = 40
+EM_X86_64 = 62
+EM_AARCH64 = 183
+
+MACHINE_NAMES = {
+    EM_386: 'i386',
+    EM_ARM: 'armhf',
+    EM_X86_64: 'x86_64',
+    EM_AARCH64: 'aarch64',
+}
+
+# Arquitecturas ELF que puede ejecutar cada máquina
+HOST_COMPATIBLE_MACHINES = {
+    'x86_64': {EM_X86_64, EM_386},
+    'amd64': {EM_X86_64, EM_386},
+    'i386': {EM_386},
+    'i686': {EM_386},
+    'aarch64': {EM_AARCH64, EM_ARM},
+    'arm64': {EM_AARCH64, EM_ARM},
+    'armv7l': {EM_ARM},
+}
+
+SQUASHFS_MAGIC = b'hsqs'
+DWARFS_MAGIC = b'DWARFS'
+ISO9660_MAGIC = b'CD001'
+ISO9660_MAGIC_OFFSET = 32769
+
+def validate_appimage(file_path):
+    """Valida una AppImage leyendo solo sus cabeceras (sin ejecutarla ni leerla entera).
+
+    Devuelve un dict con 'valid' y, según el caso, 'type', 'arch' o 'error'.
+    """
+    try:
+        fd = os.open(file_path, os.O_RDONLY)
+    except OSError as e:
+        return {'valid': False, 'error': f"No se pudo abrir el archivo: {e}"}
+    try:
+        size = os.fstat(fd).st_size
+        header = read_elf_header(fd)
+        if not header:
+            return {'valid': False, 'error': "El archivo no es un ejecutable ELF"}
+
+        # Bytes mágicos de AppImage en el relleno de e_ident (offset 8)
+        ident = header['ident']
+        if ident[8:10] != b'AI' or ident[10] not in (1, 2):
+            return {'valid': False, 'error': "El ELF no contiene la firma de AppImage (AI\\x01/AI\\x02)"}
+        appimage_type = ident[10]
+
+        arch = MACHINE_NAMES.get(header['machine'], f"desconocida ({header['machine']})")
+        compatible = HOST_COMPATIBLE_MACHINES.get(platform.machine().lower())
+        if compatible is not None and header['machine'] not in compatible:
+            return {'valid': False, 'type': appimage_type, 'arch': arch,
+                    'error': f"La AppImage es para {arch} y este equipo es {platform.machine()}"}
+
+        if appimage_type == 1:
+            magic = os.pread(fd, len(ISO9660_MAGIC), ISO9660_MAGIC_OFFSET)
+            if magic != ISO9660_MAGIC:
+                return {'valid': False, 'type': 1, 'arch': arch,
+                        'error': "AppImage tipo 1 sin imagen ISO 9660 válida"}
+            return {'valid': True, 'type': 1, 'arch': arch}
+
+        # Tipo 2: el sistema de archivos empieza justo donde acaba el ELF
+        fs_offset = elf_end_offset(header)
+        if fs_offset <= 0 or fs_offset >= size:
+            return {'valid': False, 'type': 2, 'arch': arch,
+                    'error': "AppImage truncada: no hay sistema de archivos tras el ELF"}
+        superblock = os.pread(fd, 96, fs_offset)
+        if superblock[:6] == DWARFS_MAGIC:
+            return {'valid': True, 'type': 2, 'arch': arch, 'filesystem': 'dwarfs', 'offset': fs_offset}
+        if superblock[:4] != SQUASHFS_MAGIC or len(superblock) < 48:
+            return {'valid': False, 'type': 2, 'arch': arch,
+                    'error': "No se encontró el superbloque squashfs tras el ELF"}
+        block_size, = struct.unpack_from('<I', superblock, 12)
+        block_log, = struct.unpack_from('<H', superblock, 22)
+        major, = struct.unpack_from('<H', superblock, 28)
+        bytes_used, = struct.unpack_from('<Q', superblock, 40)
+        if major != 4 or block_log >= 32 or block_size != (1 << block_log):
+            return {'valid': False, 'type': 2, 'arch': arch,
+                    'error': "Superbloque squashfs corrupto"}
+        if fs_offset + bytes_used > size:
+            return {'valid': False, 'type': 2, 'arch': arch,
+                    'error': "AppImage truncada: el squashfs es más grande que el archivo"}
+        return {'valid': True, 'type': 2, 'arch': arch, 'filesystem': 'squashfs', 'offset': fs_offset}
+    except OSError as e:
+        return {'valid': False, 'error': f"Error leyendo el archivo: {e}"}
+    finally:
+        os.close(fd)
@@ -0,0 +1,140 @@
+import subprocess
+import time
+from collections import deque
+
+# Parte de la barra que ocupa la descarga cuando apt tiene que bajar dependencias
+DOWNLOAD_SHARE = 0.3
+# Como mucho una actualización de la interfaz por fotograma
+FRAME_INTERVAL = 1 / 60
+# Líneas de salida normal que se conservan para mostrar en caso de error
+MAX_OUTPUT_LINES = 500
+
+_DPKG_PHASES = {
+    'unpack': 'Desempaquetando',
+    'configure': 'Configurando',
+    'remove': 'Eliminando',
+    'purge': 'Purgando',
+    'trigproc': 'Procesando disparadores de',
+    'install': 'Preparando',
+}
+
+def parse_status_line(line):
+    """Interpreta una línea del canal de estado de apt (APT::Status-Fd) o dpkg (--status-fd).
+
+    Devuelve un diccionario con kind (download, install, error, conffile,
+    dpkg), package, percent (0-100 o None) y message, o None si la línea es
+    salida normal del programa.
+    """
+    line = line.rstrip('\n')
+    prefix, sep, rest = line.partition(':')
+    if not sep:
+        return None
+    if prefix in ('dlstatus', 'pmstatus', 'pmerror', 'pmconffile'):
+        parts = rest.split(':', 2)
+        if len(parts) < 3:
+            return None
+        package, percent, message = parts
+        kind = {'dlstatus': 'download', 'pmstatus': 'install',
+                'pmerror': 'error', 'pmconffile': 'conffile'}[prefix]
+        try:
+            percent = float(percent)
+        except ValueError:
+            percent = None
+        return {'kind': kind, 'package': package, 'percent': percent, 'message': message.strip()}
+    if prefix == 'processing':
+        # processing: <fase>: <paquete>
+        phase, _, package = rest.strip().partition(': ')
+        label = _DPKG_PHASES.get(phase, phase)
+        return {'kind': 'dpkg', 'package': package, 'percent': None, 'message': f"{label} {package}".strip()}
+    if prefix == 'status':
+        # status: <paquete>: <estado> | status: <paquete>: error: <mensaje>
+        package, _, state = rest.strip().partition(': ')
+        if state.startswith('error: '):
+            return {'kind': 'error', 'package': package, 'percent': None, 'message': state[len('error: '):]}
+        return {'kind': 'dpkg', 'package': package, 'percent': None, 'message': f"{package}: {state}"}
+    return None
+
+class InstallProgress:
+    """Convierte las líneas de estado en un progreso global (0.0-1.0) y una fase legible"""
+
+    def __init__(self):
+        self.fraction = 0.0
+        self.message = ''
+        self.errors = []
+        self._downloaded = False
+
+    def feed(self, status):
+        """Aplica una línea ya parseada; devuelve True si cambió algo visible"""
+        kind = status['kind']
+        if kind == 'error':
+            self.errors.append(f"{status['package']}: {status['message']}")
+            return False
+        if kind == 'download' and status['percent'] is not None:
+            self._downloaded = True
+            fraction = status['percent'] / 100 * DOWNLOAD_SHARE
+        elif kind == 'install' and status['percent'] is not None:
+            start = DOWNLOAD_SHARE if self._downloaded else 0.0
+            fraction = start + status['percent'] / 100 * (1.0 - start)
+        else:
+            fraction = self.fraction
+        fraction = min(max(fraction, self.fraction), 1.0)
+        changed = fraction != self.fraction or status['message'] != self.message
+        self.fraction = fraction
+        if status['message']:
+            self.message = status['message']
+        return changed
+
+class ProgressTracker:
+    """Alimenta InstallProgress línea a línea y avisa a progress_callback con límite de frecuencia.
+
+    progress_callback(fraction, message) se llama como mucho una vez cada
+    min_interval segundos; finish() envía siempre el último estado pendiente.
+    """
+
+    def __init__(self, progress_callback=None, min_interval=FRAME_INTERVAL):
+        self.progress = InstallProgress()
+        self.progress_callback = progress_callback
+        self.min_interval = min_interval
+        self.output = deque(maxlen=MAX_OUTPUT_LINES)
+        self._last_sent = 0.0
+        self._pending = False
+
+    @property
+    def errors(self):
+        return self.progress.errors
+
+    def feed_line(self, line):
+        status = parse_status_line(line)
+        if status is None:
+            self.output.append(line if line.endswith('\n') else line + '\n')
+            return
+        if not self.progress.feed(status) or self.progress_callback is None:
+            return
+        now = time.monotonic()
+        if now - self._last_sent >= self.min_interval:
+            self.progress_callback(self.progress.fraction, self.progress.message)
+            self._last_sent = now
+            self._pending = False
+        else:
+            self._pending = True
+
+    def finish(self):
+        if self.progress_callback and self._pending:
+            self.progress_callback(self.progress.fraction, self.progress.message)
+            self._pending = False
+
+def run_with_progress(command, progress_callback=None, min_interval=FRAME_INTERVAL):
+    """Ejecuta command leyendo su canal de estado línea a línea.
+
+    Devuelve {'returncode', 'output', 'errors'}; ver ProgressTracker para los avisos de progreso.
+    """
+    tracker = ProgressTracker(progress_callback, min_interval)
+    process = subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+        text=True, errors='replace', bufsize=1
+    )
+    with process:
+        for line in process.stdout:
+            tracker.feed_line(line)
+    tracker.finish()
+    return {'returncode': process.returncode, 'output': ''.join(tracker.output), 'errors': tracker.errors}
@@ -0,0 +1,130 @@
+import glob
+import os
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.deb_reader import DebArchive
+from src.utils.deb_version import compare_versions, parse_relations
+from src.utils.deb_preflight import (PackageIndex, load_installed, load_available, native_architecture,
+                                     resolve_closure)
+
+# Leer el control de cada .deb es sobre todo E/S y descompresión: basta con unos pocos hilos
+MAX_READ_WORKERS = 8
+
+def read_folder(directory, max_workers=MAX_READ_WORKERS):
+    """Lee en paralelo el control de todos los .deb de una carpeta.
+
+    Devuelve (paquetes, errores): cada paquete es su diccionario de control
+    con la ruta del archivo en 'Filename', como en un índice de apt.
+    """
+    paths = sorted(glob.glob(os.path.join(directory, '*.deb')))
+
+    def read(path):
+        try:
+            return path, DebArchive(path).control(), None
+        except Exception as e:
+            return path, None, str(e)
+
+    packages = []
+    errors = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for path, info, error in executor.map(read, paths):
+            if info is None or not info.get('Package'):
+                errors.append(f"{os.path.basename(path)}: {error or 'sin campo Package'}")
+                continue
+            packages.append(dict(info, Filename=path))
+    return packages, errors
+
+def _referenced_names(packages):
+    names = set()
+    for info in packages:
+        for field in ('Pre-Depends', 'Depends'):
+            try:
+                groups = parse_relations(info.get(field, ''))
+            except ValueError:
+                continue
+            for group in groups:
+                names.update(relation[0] for relation in group)
+    return names
+
+def _provided_names(info):
+    try:
+        return {group[0][0] for group in parse_relations(info.get('Provides', ''))}
+    except ValueError:
+        return set()
+
+def find_roots(packages):
+    """Paquetes de la carpeta de los que no depende ningún otro (lo que el usuario quiere instalar)"""
+    newest = {}
+    for info in packages:
+        current = newest.get(info['Package'])
+        if current is None or compare_versions(info.get('Version', ''), current.get('Version', '')) > 0:
+            newest[info['Package']] = info
+    referenced = _referenced_names(packages)
+    roots = [info for name, info in newest.items()
+             if name not in referenced and not (_provided_names(info) & referenced)]
+    # Si todos dependen de todos (ciclos) no hay raíz clara: se instala la versión más nueva de cada uno
+    return roots or list(newest.values())
+
+def plan_folder(directory, installed=None, available=None):
+    """Calcula el conjunto mínimo de .deb de una carpeta que hay que instalar.
+
+    Se parte de los paquetes raíz de la carpeta y solo se añaden las
+    dependencias que no estén ya instaladas, tomándolas de la propia carpeta
+    antes que de las listas de apt. Devuelve un plan con las rutas a
+    instalar, las que se omiten, lo que apt descargará, lo que se eliminará
+    y los problemas que impiden la instalación (plan['ok'] es False).
+    """
+    installed = installed if installed is not None else load_installed()
+    if available is None:
+        available = load_available(arch=native_architecture(installed))
+    packages, errors = read_folder(directory)
+
+    local = PackageIndex()
+    for info in packages:
+        local.add(info)
+
+    skipped = []
+    roots = []
+    for info in find_roots(packages):
+        if any(compare_versions(entry.get('Version', ''), info.get('Version', '')) == 0
+               for entry in installed.get(info['Package'])):
+            skipped.append(info['Filename'])
+        else:
+            roots.append(info)
+
+    closure = resolve_closure(roots, installed, available, local) if roots else {
+        'local': {}, 'repo': {}, 'missing': [], 'to_remove': [], 'conflicts': []}
+    install = sorted(info['Filename'] for info in closure['local'].values())
+    missing = closure['missing']
+    plan = {
+        'install': install,
+        'skipped': skipped,
+        'unused': sorted(info['Filename'] for info in packages
+                         if info['Filename'] not in install and info['Filename'] not in skipped),
+        'from_repo': sorted(f"{name} {info.get('Version', '')}".strip() for name, info in closure['repo'].items()),
+        'to_remove': closure['to_remove'],
+        'missing': missing,
+        'conflicts': closure['conflicts'],
+        'errors': errors,
+    }
+    # Sin listas de apt no se sabe qué podría descargar: las dependencias que faltan no bloquean
+    plan['ok'] = (not missing or len(available) == 0) and not plan['conflicts'] and not errors
+    return plan
+
+def format_plan(plan):
+    """Resumen legible del plan de instalación de una carpeta"""
+    lines = [f"Se instalarán {len(plan['install'])} paquetes de la carpeta"]
+    if plan['skipped']:
+        lines.append(f"Ya instalados: {', '.join(os.path.basename(path) for path in plan['skipped'])}")
+    if plan['unused']:
+        lines.append(f"No necesarios: {', '.join(os.path.basename(path) for path in plan['unused'])}")
+    if plan['from_repo']:
+        lines.append(f"Se descargarán: {', '.join(plan['from_repo'])}")
+    if plan['to_remove']:
+        lines.append(f"Se eliminarán: {', '.join(plan['to_remove'])}")
+    if plan['missing']:
+        lines.append(f"Dependencias no disponibles: {', '.join(plan['missing'])}")
+    if plan['conflicts']:
+        lines.append(f"Paquetes incompatibles entre sí: {', '.join(plan['conflicts'])}")
+    if plan['errors']:
+        lines.append(f"Archivos ilegibles: {', '.join(plan['errors'])}")
+    return '\n'.join(lines)
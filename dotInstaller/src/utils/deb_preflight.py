@@ -0,0 +1,342 @@
+import glob
+import gzip
+import lzma
+import os
+import platform
+import threading
+from collections import deque
+from src.utils.deb_version import compare_versions, version_satisfies, version_key, parse_relations, format_relation
+
+DPKG_STATUS = '/var/lib/dpkg/status'
+APT_LISTS_DIR = '/var/lib/apt/lists'
+
+# Solo se guardan estos campos de cada párrafo; el resto (Description, Filename...) se descarta
+INDEX_FIELDS = ('Package', 'Version', 'Architecture', 'Status', 'Provides',
+                'Depends', 'Pre-Depends', 'Conflicts', 'Breaks')
+
+_MACHINE_TO_DEB_ARCH = {
+    'x86_64': 'amd64', 'amd64': 'amd64', 'i386': 'i386', 'i686': 'i386',
+    'aarch64': 'arm64', 'arm64': 'arm64', 'armv7l': 'armhf', 'ppc64le': 'ppc64el',
+    'riscv64': 'riscv64', 's390x': 's390x',
+}
+
+# Índices ya cargados: ruta -> (firma de los archivos, PackageIndex)
+_index_cache = {}
+_index_lock = threading.Lock()
+
+def _open_index(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    if path.endswith('.xz'):
+        return lzma.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+def scan_index(path):
+    """Recorre un archivo status/Packages devolviendo solo los campos de INDEX_FIELDS.
+
+    Más rápido que parsear el párrafo completo: las líneas de continuación
+    (Description, Conffiles...) se saltan sin procesarlas.
+    """
+    fields = {}
+    with _open_index(path) as f:
+        for line in f:
+            if line == '\n':
+                if fields:
+                    yield fields
+                    fields = {}
+                continue
+            if line[0] in ' \t':
+                continue
+            key, sep, value = line.partition(':')
+            if sep and key in INDEX_FIELDS:
+                fields[key] = value.strip()
+    if fields:
+        yield fields
+
+def _files_signature(paths):
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            pass
+    return tuple(signature)
+
+class PackageIndex:
+    """Paquetes por nombre y paquetes virtuales (Provides) por nombre"""
+
+    def __init__(self):
+        self.packages = {}
+        self.provides = {}
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.packages.values())
+
+    def add(self, fields):
+        name = fields.get('Package')
+        if not name:
+            return
+        self.packages.setdefault(name, []).append(fields)
+        provides = fields.get('Provides')
+        if provides:
+            try:
+                groups = parse_relations(provides)
+            except ValueError:
+                return
+            for group in groups:
+                virtual, _, version, _ = group[0]
+                self.provides.setdefault(virtual, []).append((fields, version))
+
+    def get(self, name):
+        return self.packages.get(name, [])
+
+    def find(self, relation):
+        """Paquetes que satisfacen la relación, el de mayor versión primero"""
+        name, operator, version, _ = relation
+        matches = [entry for entry in self.packages.get(name, [])
+                   if version_satisfies(entry.get('Version'), operator, version)]
+        for provider, provided_version in self.provides.get(name, []):
+            # Un Provides sin versión solo satisface relaciones sin versión
+            if operator is None or version_satisfies(provided_version, operator, version):
+                matches.append(provider)
+        if len(matches) > 1:
+            matches.sort(key=lambda entry: version_key(entry.get('Version', '')), reverse=True)
+        return matches
+
+def native_architecture(installed=None):
+    """Arquitectura nativa de dpkg (la del propio paquete dpkg instalado)"""
+    if installed is not None:
+        for entry in installed.get('dpkg'):
+            if entry.get('Architecture'):
+                return entry['Architecture']
+    machine = platform.machine().lower()
+    return _MACHINE_TO_DEB_ARCH.get(machine, machine)
+
+def _cached_index(key, paths, build):
+    signature = _files_signature(paths)
+    with _index_lock:
+        cached = _index_cache.get(key)
+        if cached and cached[0] == signature:
+            return cached[1]
+    index = build()
+    with _index_lock:
+        _index_cache[key] = (signature, index)
+    return index
+
+def load_installed(status_path=None):
+    """Índice de los paquetes instalados según el archivo status de dpkg"""
+    status_path = status_path or DPKG_STATUS
+
+    def build():
+        index = PackageIndex()
+        if not os.path.exists(status_path):
+            return index
+        for fields in scan_index(status_path):
+            # Status: install ok installed -> solo cuentan los completamente instalados
+            if fields.get('Status', '').split()[-1:] == ['installed']:
+                index.add(fields)
+        return index
+
+    return _cached_index(('status', status_path), [status_path], build)
+
+def list_index_files(lists_dir=None, arch=None):
+    """Archivos Packages de las listas de apt para la arquitectura nativa y 'all'"""
+    lists_dir = lists_dir or APT_LISTS_DIR
+    arch = arch or native_architecture()
+    paths = []
+    for path in sorted(glob.glob(os.path.join(lists_dir, '*_Packages*'))):
+        name = os.path.basename(path)
+        if not name.endswith(('_Packages', '_Packages.gz', '_Packages.xz')):
+            continue
+        if 'binary-' in name and f'binary-{arch}_' not in name and 'binary-all_' not in name:
+            continue
+        paths.append(path)
+    return paths
+
+def load_available(lists_dir=None, arch=None):
+    """Índice de los paquetes disponibles en las listas locales de apt (sin red)"""
+    paths = list_index_files(lists_dir, arch)
+
+    def build():
+        index = PackageIndex()
+        for path in paths:
+            try:
+                for fields in scan_index(path):
+                    index.add(fields)
+            except (OSError, EOFError, lzma.LZMAError) as e:
+                print(f"No se pudo leer {path}: {e}")
+        return index
+
+    return _cached_index(('lists', lists_dir or APT_LISTS_DIR, arch), paths, build)
+
+def _relation_groups(fields, *names):
+    groups = []
+    for name in names:
+        try:
+            groups.extend(parse_relations(fields.get(name, '')))
+        except ValueError as e:
+            print(f"Relación ignorada en {fields.get('Package')}: {e}")
+    return groups
+
+def _conflicts_with(fields, targets):
+    """Indica si las relaciones Conflicts/Breaks de fields afectan a alguno de los paquetes targets"""
+    for group in _relation_groups(fields, 'Conflicts', 'Breaks'):
+        for name, operator, version, _ in group:
+            for target in targets:
+                if name == target.get('Package') and version_satisfies(target.get('Version'), operator, version):
+                    return True
+    return False
+
+def _planned_satisfies(planned, relation):
+    name, operator, version, _ = relation
+    entry = planned.get(name)
+    if entry and version_satisfies(entry.get('Version'), operator, version):
+        return True
+    for entry in planned.values():
+        for group in _relation_groups(entry, 'Provides'):
+            virtual, _, provided_version, _ = group[0]
+            if virtual == name and (operator is None or version_satisfies(provided_version, operator, version)):
+                return True
+    return False
+
+def check_deb(info, installed=None, available=None):
+    """Compara las relaciones de un .deb con los paquetes instalados y las listas de apt.
+
+    info es el diccionario de control del .deb (DebArchive.control()). Devuelve
+    un informe con la acción (install, upgrade, downgrade, reinstall), si la
+    misma versión ya está instalada, los paquetes que apt traerá, los que
+    tendrá que eliminar y las dependencias que no se pueden satisfacer.
+    """
+    installed = installed if installed is not None else load_installed()
+    if available is None:
+        available = load_available(arch=native_architecture(installed))
+
+    package = info.get('Package', '')
+    version = info.get('Version', '')
+    arch = info.get('Architecture', '')
+    report = {
+        'package': package,
+        'version': version,
+        'installed_version': None,
+        'already_installed': False,
+        'action': 'install',
+        'to_install': [],
+        'to_remove': [],
+        'missing': [],
+        'conflicts': [],
+        'lists_available': len(available) > 0,
+        'ok': True,
+    }
+
+    for entry in installed.get(package):
+        if arch and entry.get('Architecture') not in (arch, 'all') and arch != 'all':
+            continue
+        report['installed_version'] = entry.get('Version')
+        result = compare_versions(version, entry.get('Version', ''))
+        if result == 0:
+            report['already_installed'] = True
+            report['action'] = 'reinstall'
+        else:
+            report['action'] = 'upgrade' if result > 0 else 'downgrade'
+        break
+
+    closure = resolve_closure([info], installed, available)
+    report['to_install'] = [f"{name} {fields.get('Version', '')}".strip() for name, fields in closure['repo'].items()]
+    report['to_remove'] = closure['to_remove']
+    report['missing'] = closure['missing']
+    report['conflicts'] = closure['conflicts']
+    # Sin listas de apt no se puede saber qué traería apt: no se bloquea la instalación
+    report['ok'] = (not report['missing'] or not report['lists_available']) and not report['conflicts']
+    return report
+
+def resolve_closure(roots, installed, available, local=None):
+    """Cierre de dependencias de los paquetes roots (diccionarios de control).
+
+    Cada dependencia se da por resuelta si ya está instalada o si la cumple
+    algo ya planificado; si no, se busca primero en local (un PackageIndex
+    de .deb sueltos, p. ej. una carpeta) y después en las listas de apt.
+    Devuelve {'local': {nombre: campos}, 'repo': {nombre: campos},
+    'missing': [...], 'to_remove': [...], 'conflicts': [...]}.
+    """
+    planned_local = {root['Package']: root for root in roots}
+    planned_repo = {}
+    missing = []
+    queue = deque((group, root) for root in roots for group in _relation_groups(root, 'Pre-Depends', 'Depends'))
+    while queue:
+        group, owner = queue.popleft()
+        if any(installed.find(relation) for relation in group):
+            continue
+        if any(_planned_satisfies(planned_local, relation) or _planned_satisfies(planned_repo, relation)
+               for relation in group):
+            continue
+        candidate = None
+        for index, planned in ((local, planned_local), (available, planned_repo)):
+            if index is None:
+                continue
+            for relation in group:
+                found = index.find(relation)
+                if found:
+                    candidate = found[0]
+                    break
+            if candidate is not None:
+                planned[candidate['Package']] = candidate
+                break
+        if candidate is None:
+            text = ' | '.join(format_relation(relation) for relation in group)
+            if len(roots) > 1 or owner is not roots[0]:
+                text += f" (requerido por {owner.get('Package')})"
+            missing.append(text)
+            continue
+        for dependency in _relation_groups(candidate, 'Pre-Depends', 'Depends'):
+            queue.append((dependency, candidate))
+
+    # Paquetes instalados que chocan con lo que se va a instalar
+    sources = list(planned_local.values()) + list(planned_repo.values())
+    names = {source.get('Package') for source in sources}
+    to_remove = {}
+    for source in sources:
+        for group in _relation_groups(source, 'Conflicts', 'Breaks'):
+            for relation in group:
+                for entry in installed.find(relation):
+                    if entry.get('Package') not in names:
+                        to_remove[entry['Package']] = entry
+    for entries in installed.packages.values():
+        for entry in entries:
+            if entry.get('Package') in names or entry.get('Package') in to_remove:
+                continue
+            if _conflicts_with(entry, sources):
+                to_remove[entry['Package']] = entry
+
+    # Choques entre los propios paquetes planificados: no se pueden instalar juntos
+    conflicts = []
+    for source in sources:
+        others = [other for other in sources if other is not source]
+        if _conflicts_with(source, others):
+            conflicts.append(source.get('Package'))
+
+    return {
+        'local': planned_local,
+        'repo': planned_repo,
+        'missing': missing,
+        'to_remove': sorted(to_remove),
+        'conflicts': conflicts,
+    }
+
+def format_report(report):
+    """Resumen legible del informe de check_deb"""
+    lines = []
+    if report['already_installed']:
+        lines.append(f"{report['package']} {report['version']} ya está instalado")
+    elif report['installed_version']:
+        verb = 'Actualizar' if report['action'] == 'upgrade' else 'Cambiar a versión anterior'
+        lines.append(f"{verb}: {report['installed_version']} → {report['version']}")
+    if report['to_install']:
+        lines.append(f"Se instalarán: {', '.join(report['to_install'])}")
+    if report['to_remove']:
+        lines.append(f"Se eliminarán: {', '.join(report['to_remove'])}")
+    if report['missing']:
+        lines.append(f"Dependencias no disponibles: {', '.join(report['missing'])}")
+    if report.get('conflicts'):
+        lines.append(f"Paquetes incompatibles entre sí: {', '.join(report['conflicts'])}")
+    return '\n'.join(lines)
@@ -0,0 +1,251 @@
+import configparser
+import io
+import os
+import tarfile
+
+try:
+    import zstandard  # type: ignore
+except ImportError:  # zstd es opcional: solo lo usan algunos paquetes de Ubuntu recientes
+    zstandard = None
+
+AR_MAGIC = b'!<arch>\n'
+AR_HEADER_SIZE = 60
+
+# Campos que se devuelven siempre (vacíos si el paquete no los declara)
+MAIN_FIELDS = ('Package', 'Version', 'Architecture', 'Depends', 'Installed-Size')
+
+ICON_EXTENSIONS = ('.png', '.svg', '.xpm')
+ICON_DIRS = ('usr/share/icons/', 'usr/share/pixmaps/')
+# Límite de memoria para los iconos candidatos que se guardan al recorrer data.tar
+MAX_ICON_BYTES = 4 * 1024 * 1024
+
+def parse_control_fields(text):
+    """Parsea un párrafo de control Debian (formato RFC 822 con líneas de continuación)"""
+    fields = {}
+    current = None
+    for line in text.splitlines():
+        if not line.strip():
+            if fields:
+                break
+            continue
+        if line[0] in ' \t' and current:
+            fields[current] += '\n' + line.strip()
+        elif ':' in line:
+            current, value = line.split(':', 1)
+            current = current.strip()
+            fields[current] = value.strip()
+    return fields
+
+def parse_control_paragraphs(stream):
+    """Itera los párrafos de un archivo con formato de control (status, Packages)"""
+    lines = []
+    for line in stream:
+        if line.strip():
+            lines.append(line)
+        elif lines:
+            yield parse_control_fields(''.join(lines))
+            lines = []
+    if lines:
+        yield parse_control_fields(''.join(lines))
+
+def _member_path(member):
+    """Ruta de un miembro de tar sin el prefijo './'"""
+    name = member.name
+    if name.startswith('./'):
+        name = name[2:]
+    return name.lstrip('/')
+
+def _parse_desktop_entry(data, path):
+    config = configparser.ConfigParser(interpolation=None, strict=False)
+    try:
+        config.read_string(data.decode('utf-8', errors='replace'))
+    except configparser.Error:
+        return None
+    if 'Desktop Entry' not in config:
+        return None
+    entry = config['Desktop Entry']
+    return {
+        'name': entry.get('Name', ''),
+        'exec': entry.get('Exec', ''),
+        'icon': entry.get('Icon', ''),
+        'categories': entry.get('Categories', ''),
+        'comment': entry.get('Comment', ''),
+        'path': path
+    }
+
+class _BoundedReader(io.RawIOBase):
+    """Vista de solo lectura de un rango de un archivo, para descomprimir en streaming"""
+
+    def __init__(self, f, offset, size):
+        self._f = f
+        self._offset = offset
+        self._remaining = size
+        self._f.seek(offset)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._remaining <= 0:
+            return 0
+        data = self._f.read(min(len(buffer), self._remaining))
+        self._remaining -= len(data)
+        buffer[:len(data)] = data
+        return len(data)
+
+class DebArchive:
+    """Lector de paquetes .deb (ar + control.tar + data.tar) sin extraerlos a disco"""
+
+    def __init__(self, path):
+        self.path = path
+        self._members = None
+        self._control = None
+
+    def members(self):
+        """Lista los miembros del ar como (nombre, offset, tamaño) saltando el contenido"""
+        if self._members is not None:
+            return self._members
+        members = []
+        with open(self.path, 'rb') as f:
+            if f.read(len(AR_MAGIC)) != AR_MAGIC:
+                raise ValueError(f"{os.path.basename(self.path)} no es un archivo .deb (falta la firma ar)")
+            offset = len(AR_MAGIC)
+            while True:
+                f.seek(offset)
+                header = f.read(AR_HEADER_SIZE)
+                if len(header) < AR_HEADER_SIZE:
+                    break
+                if header[58:60] != b'`\n':
+                    raise ValueError("Cabecera ar corrupta en el .deb")
+                name = header[0:16].decode('ascii', errors='replace').strip().rstrip('/')
+                size = int(header[48:58].decode('ascii').strip())
+                members.append((name, offset + AR_HEADER_SIZE, size))
+                # Los miembros del ar se alinean a 2 bytes
+                offset += AR_HEADER_SIZE + size + (size % 2)
+        if not members or members[0][0] != 'debian-binary':
+            raise ValueError(f"{os.path.basename(self.path)} no es un paquete Debian (falta debian-binary)")
+        self._members = members
+        return members
+
+    def _find_member(self, prefix):
+        for name, offset, size in self.members():
+            if name.startswith(prefix):
+                return name, offset, size
+        raise ValueError(f"El paquete no contiene {prefix}*")
+
+    def _open_tar(self, f, prefix):
+        name, offset, size = self._find_member(prefix)
+        raw = io.BufferedReader(_BoundedReader(f, offset, size))
+        if name.endswith('.gz'):
+            return tarfile.open(fileobj=raw, mode='r|gz')
+        if name.endswith('.xz'):
+            return tarfile.open(fileobj=raw, mode='r|xz')
+        if name.endswith('.bz2'):
+            return tarfile.open(fileobj=raw, mode='r|bz2')
+        if name.endswith('.zst'):
+            if zstandard is None:
+                raise ValueError("El paquete usa compresión zstd y el módulo 'zstandard' no está instalado")
+            return tarfile.open(fileobj=zstandard.ZstdDecompressor().stream_reader(raw), mode='r|')
+        if name.endswith('.tar'):
+            return tarfile.open(fileobj=raw, mode='r|')
+        raise ValueError(f"Compresión no soportada: {name}")
+
+    def control(self):
+        """Devuelve los campos del archivo control (Package, Version, Depends...)"""
+        if self._control is not None:
+            return self._control
+        with open(self.path, 'rb') as f:
+            with self._open_tar(f, 'control.tar') as tar:
+                for member in tar:
+                    if member.isfile() and _member_path(member) == 'control':
+                        text = tar.extractfile(member).read().decode('utf-8', errors='replace')
+                        fields = parse_control_fields(text)
+                        for field in MAIN_FIELDS:
+                            fields.setdefault(field, '')
+                        self._control = fields
+                        return fields
+        raise ValueError("El paquete no contiene el archivo control")
+
+    def extract_members(self, wanted):
+        """Lee de data.tar los miembros para los que wanted(TarInfo) es cierto.
+
+        Recorre data.tar una sola vez en streaming y devuelve {ruta: bytes} sin
+        escribir nada a disco.
+        """
+        found = {}
+        with open(self.path, 'rb') as f:
+            with self._open_tar(f, 'data.tar') as tar:
+                for member in tar:
+                    if member.isfile() and wanted(member):
+                        found[_member_path(member)] = tar.extractfile(member).read()
+        return found
+
+    def list_files(self):
+        """Lista las rutas que instalará el paquete"""
+        names = []
+        with open(self.path, 'rb') as f:
+            with self._open_tar(f, 'data.tar') as tar:
+                for member in tar:
+                    if not member.isdir():
+                        names.append('/' + _member_path(member))
+        return names
+
+    def preview(self):
+        """Control, entradas .desktop e icono del paquete en una sola pasada por data.tar"""
+        info = dict(self.control())
+        icon_budget = [MAX_ICON_BYTES]
+
+        def wanted(member):
+            name = _member_path(member)
+            if name.startswith('usr/share/applications/') and name.endswith('.desktop'):
+                return True
+            if name.startswith(ICON_DIRS) and name.endswith(ICON_EXTENSIONS) and member.size <= icon_budget[0]:
+                icon_budget[0] -= member.size
+                return True
+            return False
+
+        files = self.extract_members(wanted)
+        desktop_entries = []
+        icons = {}
+        for name, data in files.items():
+            if name.endswith('.desktop'):
+                entry = _parse_desktop_entry(data, '/' + name)
+                if entry:
+                    desktop_entries.append(entry)
+            else:
+                icons[name] = data
+
+        icon_name = None
+        for entry in desktop_entries:
+            if entry['icon']:
+                icon_name = entry['icon']
+                break
+        return {
+            'info': info,
+            'desktop_entries': desktop_entries,
+            'icon': self._pick_icon(icons, icon_name or info.get('Package', '')),
+        }
+
+    def _pick_icon(self, icons, icon_name):
+        """Elige el icono que corresponde al nombre, prefiriendo SVG y luego el PNG más grande"""
+        if icon_name and icon_name.startswith('/'):
+            data = icons.get(icon_name.lstrip('/'))
+            return (icon_name, data) if data else None
+        candidates = []
+        for name, data in icons.items():
+            base = os.path.splitext(os.path.basename(name))[0]
+            if base != icon_name:
+                continue
+            if name.endswith('.svg'):
+                score = 100000
+            else:
+                # hicolor/<N>x<N>/apps: usar el tamaño del directorio como prioridad
+                score = 0
+                for part in name.split('/'):
+                    if 'x' in part and part.split('x')[0].isdigit():
+                        score = int(part.split('x')[0])
+            candidates.append((score, name, data))
+        if not candidates:
+            return None
+        _, name, data = max(candidates)
+        return ('/' + name, data)
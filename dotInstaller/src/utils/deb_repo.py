@@ -0,0 +1,145 @@
+import hashlib
+import os
+import threading
+from src.data.database import get_setting
+from src.utils.deb_reader import DebArchive, parse_control_paragraphs
+from src.utils.deb_version import version_key
+from src.utils.reflink import clone_file
+
+# Repositorio plano de apt: los .deb y un único Packages en el mismo directorio
+DEB_REPO_DIR = os.path.expanduser('~/.local/share/dotInstaller/deb-repo')
+INDEX_NAME = 'Packages'
+# Versiones de cada paquete que se conservan para poder volver atrás
+DEFAULT_KEEP_VERSIONS = 3
+
+_repo_lock = threading.Lock()
+
+def is_cache_enabled():
+    return get_setting('deb_cache_enabled', '0') == '1'
+
+def repo_filename(info):
+    """Nombre canónico paquete_versión_arquitectura.deb.
+
+    La época se conserva escrita como %3a, igual que en los archivos de apt:
+    1:0.5 y 0.5 son versiones distintas y no pueden compartir archivo.
+    """
+    version = info.get('Version', '').replace(':', '%3a')
+    return f"{info['Package']}_{version}_{info.get('Architecture') or 'all'}.deb"
+
+def format_paragraph(fields):
+    """Escribe un párrafo de control; las líneas de continuación llevan un espacio delante"""
+    lines = []
+    for key, value in fields.items():
+        if not value:
+            continue
+        first, *rest = value.split('\n')
+        lines.append(f"{key}: {first}")
+        lines.extend(' ' + (line or '.') for line in rest)
+    return '\n'.join(lines) + '\n'
+
+def _file_hashes(path):
+    md5 = hashlib.md5()
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            md5.update(block)
+            sha256.update(block)
+    return md5.hexdigest(), sha256.hexdigest()
+
+def load_index(repo_dir=None):
+    """Entradas del Packages del repositorio local"""
+    index_path = os.path.join(repo_dir or DEB_REPO_DIR, INDEX_NAME)
+    if not os.path.exists(index_path):
+        return []
+    with open(index_path, 'r', encoding='utf-8') as f:
+        return [entry for entry in parse_control_paragraphs(f) if entry.get('Filename')]
+
+def _write_index(repo_dir, entries):
+    index_path = os.path.join(repo_dir, INDEX_NAME)
+    temp_path = index_path + '.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(format_paragraph(entry) for entry in entries))
+    os.replace(temp_path, index_path)
+
+def _filename_path(repo_dir, entry):
+    return os.path.join(repo_dir, os.path.basename(entry['Filename']))
+
+def add_to_repo(deb_path, info=None, repo_dir=None, keep_versions=None):
+    """Guarda una copia (reflink si se puede) del .deb y actualiza el índice.
+
+    Solo se calcula el hash del paquete nuevo: el resto de entradas del
+    Packages se conservan tal cual. Devuelve la ruta del .deb en el repositorio.
+    """
+    repo_dir = repo_dir or DEB_REPO_DIR
+    if keep_versions is None:
+        keep_versions = int(get_setting('deb_cache_keep_versions', str(DEFAULT_KEEP_VERSIONS)))
+    info = info or DebArchive(deb_path).control()
+    filename = repo_filename(info)
+    target = os.path.join(repo_dir, filename)
+    with _repo_lock:
+        os.makedirs(repo_dir, exist_ok=True)
+        if os.path.abspath(deb_path) != target:
+            temp_target = target + '.part'
+            clone_file(deb_path, temp_target)
+            os.replace(temp_target, target)
+        md5, sha256 = _file_hashes(target)
+
+        entry = {key: value for key, value in info.items() if value}
+        entry['Filename'] = f"./{filename}"
+        entry['Size'] = str(os.path.getsize(target))
+        entry['MD5sum'] = md5
+        entry['SHA256'] = sha256
+        entries = [e for e in load_index(repo_dir) if e['Filename'] != entry['Filename']]
+        entries.append(entry)
+
+        # Descartar las versiones más antiguas del mismo paquete y arquitectura
+        same = [e for e in entries if e.get('Package') == entry['Package']
+                and e.get('Architecture') == entry.get('Architecture')]
+        same.sort(key=lambda e: version_key(e.get('Version', '')), reverse=True)
+        for old in same[max(keep_versions, 1):]:
+            entries.remove(old)
+            old_path = _filename_path(repo_dir, old)
+            if os.path.exists(old_path):
+                os.remove(old_path)
+        _write_index(repo_dir, entries)
+    return target
+
+def remove_from_repo(package, version=None, repo_dir=None):
+    """Quita del repositorio las versiones de un paquete (todas si version es None)"""
+    repo_dir = repo_dir or DEB_REPO_DIR
+    removed = 0
+    with _repo_lock:
+        entries = []
+        for entry in load_index(repo_dir):
+            if entry.get('Package') == package and (version is None or entry.get('Version') == version):
+                path = _filename_path(repo_dir, entry)
+                if os.path.exists(path):
+                    os.remove(path)
+                removed += 1
+            else:
+                entries.append(entry)
+        if removed:
+            _write_index(repo_dir, entries)
+    return removed
+
+def list_versions(package, repo_dir=None):
+    """Versiones guardadas de un paquete, de la más nueva a la más antigua"""
+    versions = [entry.get('Version', '') for entry in load_index(repo_dir) if entry.get('Package') == package]
+    versions.sort(key=version_key, reverse=True)
+    return versions
+
+def find_cached(package, version=None, repo_dir=None):
+    """Ruta del .deb guardado (la versión pedida o la más nueva), o None"""
+    repo_dir = repo_dir or DEB_REPO_DIR
+    candidates = [entry for entry in load_index(repo_dir)
+                  if entry.get('Package') == package and (version is None or entry.get('Version') == version)]
+    candidates.sort(key=lambda e: version_key(e.get('Version', '')), reverse=True)
+    for entry in candidates:
+        path = _filename_path(repo_dir, entry)
+        if os.path.exists(path):
+            return path
+    return None
+
+def sources_line(repo_dir=None):
+    """Línea de sources.list para usar el repositorio con apt en otra máquina o sin red"""
+    return f"deb [trusted=yes] file:{repo_dir or DEB_REPO_DIR} ./"
@@ -0,0 +1,125 @@
+import re
+from functools import cmp_to_key
+
+# Operadores de relación de Debian (los de un solo carácter son formas antiguas)
+RELATION_OPERATORS = ('<<', '<=', '=', '>=', '>>', '<', '>')
+
+_RELATION_RE = re.compile(r'^\s*([a-zA-Z0-9][a-zA-Z0-9+.\-]*)(?::([a-z0-9\-]+))?\s*(?:\(\s*(<<|<=|>=|>>|=|<|>)\s*([^)\s]+)\s*\))?\s*$')
+
+def _order(char):
+    if char == '~':
+        return -1
+    if char.isdigit():
+        return 0
+    if not char:
+        return 0
+    if char.isalpha():
+        return ord(char)
+    return ord(char) + 256
+
+def _compare_part(a, b):
+    """Comparación de dpkg (verrevcmp) para la parte upstream o la revisión"""
+    i = j = 0
+    while i < len(a) or j < len(b):
+        first_diff = 0
+        while (i < len(a) and not a[i].isdigit()) or (j < len(b) and not b[j].isdigit()):
+            ac = _order(a[i] if i < len(a) else '')
+            bc = _order(b[j] if j < len(b) else '')
+            if ac != bc:
+                return ac - bc
+            i += 1
+            j += 1
+        while i < len(a) and a[i] == '0':
+            i += 1
+        while j < len(b) and b[j] == '0':
+            j += 1
+        while i < len(a) and a[i].isdigit() and j < len(b) and b[j].isdigit():
+            if not first_diff:
+                first_diff = ord(a[i]) - ord(b[j])
+            i += 1
+            j += 1
+        if i < len(a) and a[i].isdigit():
+            return 1
+        if j < len(b) and b[j].isdigit():
+            return -1
+        if first_diff:
+            return first_diff
+    return 0
+
+def _split_version(version):
+    version = version.strip()
+    epoch = 0
+    if ':' in version:
+        epoch_text, version = version.split(':', 1)
+        epoch = int(epoch_text) if epoch_text.isdigit() else 0
+    if '-' in version:
+        upstream, revision = version.rsplit('-', 1)
+    else:
+        upstream, revision = version, ''
+    return epoch, upstream, revision
+
+def compare_versions(a, b):
+    """Compara dos versiones Debian: negativo si a < b, 0 si son iguales, positivo si a > b"""
+    epoch_a, upstream_a, revision_a = _split_version(a)
+    epoch_b, upstream_b, revision_b = _split_version(b)
+    if epoch_a != epoch_b:
+        return epoch_a - epoch_b
+    result = _compare_part(upstream_a, upstream_b)
+    if result:
+        return result
+    return _compare_part(revision_a, revision_b)
+
+# Clave para ordenar versiones Debian con sorted()/sort()
+version_key = cmp_to_key(compare_versions)
+
+def version_satisfies(version, operator, reference):
+    """Indica si version cumple 'operator reference' (p. ej. '>=', '2.31')"""
+    if operator is None:
+        return True
+    if version is None:
+        return False
+    result = compare_versions(version, reference)
+    if operator == '<<':
+        return result < 0
+    if operator in ('<=', '<'):
+        return result <= 0
+    if operator == '=':
+        return result == 0
+    if operator in ('>=', '>'):
+        return result >= 0
+    if operator == '>>':
+        return result > 0
+    raise ValueError(f"Operador de versión desconocido: {operator}")
+
+def parse_relations(field):
+    """Parsea un campo Depends/Conflicts/Breaks.
+
+    Devuelve una lista de grupos de alternativas; cada alternativa es una tupla
+    (nombre, operador, versión, arquitectura). Se descartan las restricciones de
+    arquitectura [..] y los perfiles de compilación <..>.
+    """
+    groups = []
+    if not field:
+        return groups
+    field = re.sub(r'\[[^\]]*\]', '', field)
+    field = re.sub(r'<[^<>]*[a-z!][^<>]*>', '', field)
+    for group_text in field.split(','):
+        group = []
+        for alternative in group_text.split('|'):
+            if not alternative.strip():
+                continue
+            match = _RELATION_RE.match(alternative)
+            if not match:
+                raise ValueError(f"Relación de dependencia no válida: {alternative.strip()}")
+            name, arch, operator, version = match.groups()
+            group.append((name, operator, version, arch))
+        if group:
+            groups.append(group)
+    return groups
+
+def format_relation(relation):
+    name, operator, version, arch = relation
+    text = f"{name}:{arch}" if arch else name
+    if operator:
+        text += f" ({operator} {version})"
+    return text
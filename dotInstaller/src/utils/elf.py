@@ -0,0 +1,89 @@
+import os
+import struct
+
+ELF_MAGIC = b'\x7fELF'
+ELFCLASS32 = 1
+ELFCLASS64 = 2
+ELFDATA2LSB = 1
+ELFDATA2MSB = 2
+
+def read_elf_header(fd):
+    """Lee la cabecera ELF de un descriptor abierto usando pread. Devuelve None si no es ELF"""
+    ident = os.pread(fd, 64, 0)
+    if len(ident) < 52 or ident[:4] != ELF_MAGIC:
+        return None
+    elf_class = ident[4]
+    elf_data = ident[5]
+    if elf_class not in (ELFCLASS32, ELFCLASS64) or elf_data not in (ELFDATA2LSB, ELFDATA2MSB):
+        return None
+    endian = '<' if elf_data == ELFDATA2LSB else '>'
+    if elf_class == ELFCLASS64:
+        if len(ident) < 64:
+            return None
+        machine, = struct.unpack_from(endian + 'H', ident, 0x12)
+        shoff, = struct.unpack_from(endian + 'Q', ident, 0x28)
+        shentsize, shnum, shstrndx = struct.unpack_from(endian + 'HHH', ident, 0x3A)
+    else:
+        machine, = struct.unpack_from(endian + 'H', ident, 0x12)
+        shoff, = struct.unpack_from(endian + 'I', ident, 0x20)
+        shentsize, shnum, shstrndx = struct.unpack_from(endian + 'HHH', ident, 0x2E)
+    return {
+        'ident': ident[:16],
+        'class': elf_class,
+        'endian': endian,
+        'machine': machine,
+        'shoff': shoff,
+        'shentsize': shentsize,
+        'shnum': shnum,
+        'shstrndx': shstrndx,
+    }
+
+def elf_end_offset(header):
+    """Offset donde termina el ELF (en una AppImage tipo 2 ahí empieza el squashfs)"""
+    return header['shoff'] + header['shentsize'] * header['shnum']
+
+def _read_section_headers(fd, header):
+    count = header['shnum']
+    size = header['shentsize']
+    if count == 0 or size == 0:
+        return []
+    table = os.pread(fd, count * size, header['shoff'])
+    if len(table) < count * size:
+        return []
+    endian = header['endian']
+    sections = []
+    for i in range(count):
+        base = i * size
+        if header['class'] == ELFCLASS64:
+            name, type_, _flags, _addr, offset, length = struct.unpack_from(endian + 'IIQQQQ', table, base)
+        else:
+            name, type_, _flags, _addr, offset, length = struct.unpack_from(endian + 'IIIIII', table, base)
+        sections.append({'name_offset': name, 'type': type_, 'offset': offset, 'size': length})
+    return sections
+
+def read_section(path, section_name):
+    """Devuelve el contenido de una sección ELF por nombre, o None si no existe"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        header = read_elf_header(fd)
+        if not header:
+            return None
+        sections = _read_section_headers(fd, header)
+        if not sections or header['shstrndx'] >= len(sections):
+            return None
+        strtab = sections[header['shstrndx']]
+        names = os.pread(fd, strtab['size'], strtab['offset'])
+        wanted = section_name.encode()
+        for section in sections:
+            start = section['name_offset']
+            end = names.find(b'\x00', start)
+            if end == -1:
+                continue
+            if names[start:end] == wanted:
+                return os.pread(fd, section['size'], section['offset'])
+        return None
+    finally:
+        os.close(fd)
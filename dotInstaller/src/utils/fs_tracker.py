@@ -0,0 +1,241 @@
+import os
+import shutil
+import stat
+from fnmatch import fnmatch
+from concurrent.futures import ThreadPoolExecutor
+from src.data.database import get_setting
+
+# Directorios donde instalan los instaladores .sh/.run y Wine (no todo ~/.local: ahí escriben
+# el navegador, el escritorio y los hilos de dotInstaller mientras dura la instalación)
+DEFAULT_ROOTS = ('~/.local/bin', '~/.local/lib', '~/.local/opt', '~/.local/share/applications',
+                 '~/.local/share/icons', '~/.local/share/mime/packages', '~/.local/share/desktop-directories',
+                 '~/opt', '~/bin', '~/Applications', '~/Desktop')
+# Lo que cambia solo durante una instalación y no pertenece a la aplicación
+DEFAULT_EXCLUDE = ('~/.local/share/dotInstaller', '~/.local/share/Trash', '~/.local/share/Steam',
+                   '~/.local/share/flatpak', '~/.local/share/recently-used.xbel', '~/.local/state',
+                   '~/.local/share/gvfs-metadata')
+# Nombres de cachés, temporales y bloqueos: nunca se atribuyen a la aplicación
+VOLATILE_NAMES = ('*.cache', '*.tmp', '*.part', '*.swp', '*~', '*.pyc', '__pycache__', '.goutputstream-*',
+                  '.~lock.*', 'recently-used.xbel*')
+# En estas raíces solo se anotan lanzadores: el resto lo suelen dejar el navegador u otros programas
+LAUNCHER_ONLY_ROOTS = ('~/Desktop',)
+# scandir y stat liberan el GIL: varios hilos recorren subárboles a la vez
+MAX_SCAN_WORKERS = 8
+
+def _expand(paths):
+    return [os.path.normpath(os.path.expanduser(path)) for path in paths if path]
+
+def _protected(roots):
+    """Las raíces vigiladas y sus antecesores: nunca son de una aplicación aunque se creen al instalar"""
+    protected = set()
+    for root in _expand(roots):
+        while root and root not in protected:
+            protected.add(root)
+            if root == os.path.dirname(root):
+                break
+            root = os.path.dirname(root)
+    return protected
+
+def tracked_roots(extra=()):
+    """Raíces vigiladas: las de la configuración (fs_track_roots, separadas por ':') más extra"""
+    configured = get_setting('fs_track_roots')
+    roots = configured.split(':') if configured else DEFAULT_ROOTS
+    return _expand(list(roots) + list(extra))
+
+def should_track(path):
+    """Si una ruta nueva se puede atribuir al instalador (y por tanto borrar al desinstalar)"""
+    for excluded in _expand(DEFAULT_EXCLUDE):
+        if path == excluded or path.startswith(excluded + os.sep):
+            return False
+    if any(fnmatch(os.path.basename(path), pattern) for pattern in VOLATILE_NAMES):
+        return False
+    for root in _expand(LAUNCHER_ONLY_ROOTS):
+        if path.startswith(root + os.sep):
+            return path.endswith('.desktop')
+    return True
+
+def filter_manifest(manifest):
+    """Quita del manifiesto las rutas volátiles o ajenas a la instalación y recalcula el tamaño"""
+    dirs = {path: size for path, size in manifest.get('dirs', {}).items() if should_track(path)}
+    files = {path: size for path, size in manifest.get('files', {}).items() if should_track(path)}
+    return dict(manifest, dirs=dirs, files=files, size=sum(dirs.values()) + sum(files.values()))
+
+def manifest_paths(manifest):
+    """Rutas que borraría la desinstalación, para enseñárselas al usuario antes"""
+    protected = _protected(list(DEFAULT_ROOTS) + list(manifest.get('roots', [])))
+    return sorted(path for path in list(manifest.get('dirs', {})) + list(manifest.get('files', {}))
+                  if should_track(path) and path not in protected)
+
+def _scan_tree(top, exclude):
+    """Recorre un árbol sin seguir enlaces: {ruta: (tamaño, mtime_ns, es_directorio)}"""
+    entries = {}
+    pending = [top]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.path in exclude:
+                        continue
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    is_dir = stat.S_ISDIR(st.st_mode)
+                    entries[entry.path] = (0 if is_dir else st.st_size, st.st_mtime_ns, is_dir)
+                    if is_dir:
+                        pending.append(entry.path)
+        except OSError:
+            continue
+    return entries
+
+def take_snapshot(roots, exclude=None, max_workers=MAX_SCAN_WORKERS):
+    """Instantánea de metadatos de varias raíces.
+
+    Cada subdirectorio de primer nivel se recorre en un hilo aparte, así
+    un árbol grande no deja a los demás esperando. Una raíz que no existe
+    simplemente no aparece; si existe, la propia raíz también se anota.
+    """
+    exclude = set(_expand(DEFAULT_EXCLUDE if exclude is None else exclude))
+    snapshot = {}
+    subtrees = []
+    for root in _expand(roots):
+        if root in exclude:
+            continue
+        try:
+            st = os.lstat(root)
+        except OSError:
+            continue
+        if not stat.S_ISDIR(st.st_mode):
+            continue
+        snapshot[root] = (0, st.st_mtime_ns, True)
+        try:
+            with os.scandir(root) as it:
+                top_entries = list(it)
+        except OSError:
+            continue
+        for entry in top_entries:
+            if entry.path in exclude:
+                continue
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            is_dir = stat.S_ISDIR(st.st_mode)
+            snapshot[entry.path] = (0 if is_dir else st.st_size, st.st_mtime_ns, is_dir)
+            if is_dir:
+                subtrees.append(entry.path)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for entries in executor.map(lambda top: _scan_tree(top, exclude), subtrees):
+            snapshot.update(entries)
+    return snapshot
+
+def _inside(path, directories):
+    # directories contiene los directorios nuevos ya confirmados (de fuera hacia dentro)
+    parent = os.path.dirname(path)
+    while parent and parent != os.path.dirname(parent):
+        if parent in directories:
+            return True
+        parent = os.path.dirname(parent)
+    return False
+
+def diff_snapshots(before, after, roots=()):
+    """Manifiesto de lo que cambió entre dos instantáneas.
+
+    Los directorios nuevos se guardan solo en su nivel más alto, con el
+    tamaño total de su contenido; los archivos nuevos en directorios que ya
+    existían se guardan uno a uno. Una raíz de roots que no existía antes no
+    se anota: otras aplicaciones la usarán después, así que se guarda lo nuevo
+    que hay debajo de ella. Los archivos modificados o borrados se anotan
+    pero no se pueden deshacer.
+    """
+    protected = _protected(roots)
+    new_dirs = {}
+    files = {}
+    modified = []
+    for path in sorted(after):
+        size, mtime_ns, is_dir = after[path]
+        old = before.get(path)
+        if path in protected:
+            continue
+        if old is None:
+            if _inside(path, new_dirs):
+                continue
+            if is_dir:
+                new_dirs[path] = 0
+            else:
+                files[path] = size
+        elif not is_dir and (old[0] != size or old[1] != mtime_ns):
+            modified.append(path)
+    # Tamaño de cada directorio nuevo: lo que hay debajo de él
+    for path, (size, _, is_dir) in after.items():
+        if is_dir or path in before:
+            continue
+        parent = os.path.dirname(path)
+        while parent and parent != os.path.dirname(parent):
+            if parent in new_dirs:
+                new_dirs[parent] += size
+                break
+            parent = os.path.dirname(parent)
+    removed = sorted(path for path in before if path not in after and path not in protected)
+    return {
+        'dirs': new_dirs,
+        'files': files,
+        'modified': modified,
+        'removed': removed,
+        'size': sum(new_dirs.values()) + sum(files.values()),
+    }
+
+def remove_manifest(manifest):
+    """Borra lo que la instalación creó; devuelve la lista de rutas que no se pudieron borrar.
+
+    Las rutas que should_track descarta no se tocan aunque estén en el
+    manifiesto (los de versiones anteriores vigilaban todo ~/.local), y
+    tampoco las raíces vigiladas, que manifiestos antiguos podían dar como
+    propias si se crearon durante la instalación.
+    """
+    protected = _protected(list(DEFAULT_ROOTS) + list(manifest.get('roots', [])))
+    failed = []
+    for path in manifest.get('files', {}):
+        if not should_track(path):
+            continue
+        try:
+            if os.path.lexists(path):
+                os.remove(path)
+        except OSError:
+            failed.append(path)
+    # Los más profundos primero por si un directorio nuevo cuelga de otro
+    for path in sorted(manifest.get('dirs', {}), key=len, reverse=True):
+        if not os.path.lexists(path) or not should_track(path) or path in protected:
+            continue
+        try:
+            if os.path.islink(path):
+                os.remove(path)
+            else:
+                shutil.rmtree(path)
+        except OSError:
+            failed.append(path)
+    return failed
+
+def format_size(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+class ChangeTracker:
+    """Toma una instantánea antes de instalar y otra después; finish() devuelve el manifiesto"""
+
+    def __init__(self, roots=None, exclude=None):
+        self.roots = tracked_roots() if roots is None else _expand(roots)
+        self.exclude = exclude
+        self._before = None
+
+    def start(self):
+        self._before = take_snapshot(self.roots, self.exclude)
+
+    def finish(self):
+        after = take_snapshot(self.roots, self.exclude)
+        manifest = filter_manifest(diff_snapshots(self._before or {}, after, self.roots))
+        manifest['roots'] = self.roots
+        return manifest
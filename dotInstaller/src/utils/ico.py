@@ -0,0 +1,99 @@
+import struct
+import zlib
+
+PNG_MAGIC = b'\x89PNG\r\n\x1a\n'
+# Los iconos de Windows llegan a 256x256; más grande solo puede ser una cabecera dañada
+MAX_ICON_SIZE = 1024
+
+def _png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+def encode_png(width, height, rgba):
+    """PNG RGBA de 8 bits a partir de los píxeles en bytes (filas de arriba abajo)"""
+    stride = width * 4
+    # Filtro 0 en cada fila: el icono es pequeño y zlib ya comprime bien
+    raw = b''.join(b'\x00' + rgba[y * stride:(y + 1) * stride] for y in range(height))
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return PNG_MAGIC + _png_chunk(b'IHDR', header) + _png_chunk(b'IDAT', zlib.compress(raw, 9)) + \
+        _png_chunk(b'IEND', b'')
+
+def dib_to_png(data):
+    """Convierte una imagen de RT_ICON (BITMAPINFOHEADER + XOR + máscara AND) a PNG; None si no se soporta"""
+    if len(data) < 40:
+        return None
+    header_size, width, double_height, _, bits, compression = struct.unpack_from('<IiiHHI', data, 0)
+    height = abs(double_height) // 2
+    if header_size < 40 or width <= 0 or height <= 0 or compression != 0 or bits not in (1, 4, 8, 24, 32):
+        return None
+    if width > MAX_ICON_SIZE or height > MAX_ICON_SIZE:
+        return None
+    colors_used, = struct.unpack_from('<I', data, 32)
+    palette = []
+    at = header_size
+    if bits <= 8:
+        count = colors_used or (1 << bits)
+        if count > (1 << bits) or at + count * 4 > len(data):
+            return None
+        for i in range(count):
+            b, g, r, _ = data[at + i * 4:at + i * 4 + 4]
+            palette.append((r, g, b))
+        at += count * 4
+    xor_stride = ((width * bits + 31) // 32) * 4
+    and_stride = ((width + 31) // 32) * 4
+    xor_at = at
+    and_at = xor_at + xor_stride * height
+    if and_at > len(data):
+        return None
+    has_mask = and_at + and_stride * height <= len(data)
+    # Con 32 bits el canal alfa manda; si viene todo a cero el icono es antiguo y se usa la máscara
+    use_alpha = bits == 32 and any(data[xor_at + 3:and_at:4])
+    pixels = bytearray(width * height * 4)
+    for row in range(height):
+        # Los DIB se guardan de abajo arriba
+        source = xor_at + (height - 1 - row) * xor_stride
+        mask = and_at + (height - 1 - row) * and_stride
+        for x in range(width):
+            if bits == 32:
+                b, g, r, a = data[source + x * 4:source + x * 4 + 4]
+            elif bits == 24:
+                b, g, r = data[source + x * 3:source + x * 3 + 3]
+                a = 255
+            else:
+                per_byte = 8 // bits
+                byte = data[source + x // per_byte]
+                shift = (per_byte - 1 - x % per_byte) * bits
+                index = (byte >> shift) & ((1 << bits) - 1)
+                # Un índice fuera de la paleta (colors_used menor que 2^bits) se pinta en negro
+                r, g, b = palette[index] if index < len(palette) else (0, 0, 0)
+                a = 255
+            if not use_alpha:
+                transparent = has_mask and data[mask + x // 8] & (0x80 >> (x % 8))
+                a = 0 if transparent else 255
+            out = (row * width + x) * 4
+            pixels[out:out + 4] = bytes((r, g, b, a))
+    return encode_png(width, height, bytes(pixels))
+
+def icon_to_png(data):
+    """Una imagen de icono ya en PNG se devuelve tal cual; un DIB se convierte"""
+    if data.startswith(PNG_MAGIC):
+        return data
+    return dib_to_png(data)
+
+def best_icon_png(entries, images):
+    """PNG de la mejor imagen de un grupo de iconos: la más grande y, a igual tamaño, la de más color.
+
+    entries son las entradas del grupo (width, height, bits, id) e images
+    los datos de RT_ICON por id. Si la mejor no se puede convertir se prueba
+    la siguiente.
+    """
+    for entry in sorted(entries, key=lambda e: (e['width'] * e['height'], e['bits']), reverse=True):
+        data = images.get(entry['id'])
+        if not data:
+            continue
+        try:
+            png = icon_to_png(data)
+        except (ValueError, IndexError, struct.error):
+            continue
+        if png:
+            return png
+    return None
@@ -0,0 +1,83 @@
+import struct
+
+# Formato Shell Link (.lnk) de Windows: cabecera fija, IDList, LinkInfo y cadenas opcionales
+HEADER_SIZE = 0x4C
+LINK_CLSID = bytes.fromhex('0114020000000000c000000000000046')
+
+HAS_ID_LIST = 0x01
+HAS_LINK_INFO = 0x02
+HAS_NAME = 0x04
+HAS_RELATIVE_PATH = 0x08
+HAS_WORKING_DIR = 0x10
+HAS_ARGUMENTS = 0x20
+HAS_ICON_LOCATION = 0x40
+IS_UNICODE = 0x80
+
+def _c_string(data, offset, unicode=False):
+    if unicode:
+        end = offset
+        while end + 1 < len(data) and data[end:end + 2] != b'\0\0':
+            end += 2
+        return data[offset:end].decode('utf-16-le', errors='replace')
+    end = data.find(b'\0', offset)
+    end = len(data) if end < 0 else end
+    # Las rutas ANSI van en la página de códigos del sistema; cp1252 cubre los casos habituales
+    return data[offset:end].decode('cp1252', errors='replace')
+
+def parse_lnk(data):
+    """Destino, argumentos, directorio e icono de un acceso directo, o None si no es un .lnk"""
+    if len(data) < HEADER_SIZE or struct.unpack_from('<I', data, 0)[0] != HEADER_SIZE:
+        return None
+    if data[4:20] != LINK_CLSID:
+        return None
+    flags = struct.unpack_from('<I', data, 0x14)[0]
+    offset = HEADER_SIZE
+    try:
+        if flags & HAS_ID_LIST:
+            offset += 2 + struct.unpack_from('<H', data, offset)[0]
+        target = None
+        if flags & HAS_LINK_INFO:
+            info = offset
+            size, header_size, info_flags = struct.unpack_from('<III', data, info)
+            local_offset, _, suffix_offset = struct.unpack_from('<III', data, info + 0x10)
+            if info_flags & 0x1:
+                if header_size >= 0x24:
+                    unicode_offset = struct.unpack_from('<I', data, info + 0x1C)[0]
+                    target = _c_string(data, info + unicode_offset, unicode=True)
+                else:
+                    target = _c_string(data, info + local_offset)
+                suffix = _c_string(data, info + suffix_offset) if suffix_offset else ''
+                if suffix:
+                    target = target.rstrip('\\') + '\\' + suffix
+            offset += size
+        unicode = bool(flags & IS_UNICODE)
+        strings = {}
+        for flag, key in ((HAS_NAME, 'description'), (HAS_RELATIVE_PATH, 'relative_path'),
+                          (HAS_WORKING_DIR, 'working_dir'), (HAS_ARGUMENTS, 'arguments'),
+                          (HAS_ICON_LOCATION, 'icon')):
+            if not flags & flag:
+                continue
+            count = struct.unpack_from('<H', data, offset)[0]
+            offset += 2
+            length = count * 2 if unicode else count
+            raw = data[offset:offset + length]
+            strings[key] = raw.decode('utf-16-le' if unicode else 'cp1252', errors='replace')
+            offset += length
+    except struct.error:
+        return None
+    return {
+        'target': target or None,
+        'relative_path': strings.get('relative_path'),
+        'working_dir': strings.get('working_dir'),
+        'arguments': strings.get('arguments', ''),
+        'icon': strings.get('icon'),
+        'description': strings.get('description'),
+    }
+
+def read_lnk(path):
+    try:
+        with open(path, 'rb') as f:
+            # Los accesos directos ocupan pocos KB; se limita por si acaso
+            return parse_lnk(f.read(65536))
+    except OSError:
+        return None
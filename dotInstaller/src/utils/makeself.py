@@ -0,0 +1,301 @@
+import hashlib
+import os
+import re
+import tarfile
+import time
+import zlib
+from src.utils.fs_tracker import format_size
+
+# Las cabeceras de makeself ocupan unas decenas de KB; esto sobra incluso con licencia incrustada
+HEADER_LIMIT = 512 * 1024
+# Los .desktop de la carga útil se leen enteros solo si son pequeños
+MAX_DESKTOP_BYTES = 64 * 1024
+ICON_EXTENSIONS = ('.png', '.svg', '.xpm', '.ico')
+
+# Firmas de compresión que tarfile sabe leer en modo flujo
+_COMPRESSION_MAGIC = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bzip2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+    (b'\x04\x22\x4d\x18', 'lz4'),
+    (b'\x89LZO', 'lzo'),
+)
+_SUPPORTED = ('gzip', 'bzip2', 'xz', 'none')
+
+_VAR_RE = re.compile(r'^([A-Za-z_][A-Za-z0-9_]*)="([^"]*)"\s*$')
+# Para calcular el CRC de cksum (MSB primero) con zlib.crc32 (LSB primero): bits de cada byte al revés
+_BIT_REVERSE = bytes(int(f'{i:08b}'[::-1], 2) for i in range(256))
+# makeself 2.1 no guarda skip: lo calcula con head -n N "$0" | wc -c
+_OLD_SKIP_RE = re.compile(r'head -n (\d+) "\$[01]"')
+
+def parse_header(data):
+    """Variables de la cabecera de makeself (label, script, filesizes, skip...) o None si no lo es"""
+    if not data.startswith(b'#!') or b'makeself' not in data[:4096].lower():
+        return None
+    text = data.decode('utf-8', errors='replace')
+    variables = {}
+    for line in text.splitlines():
+        match = _VAR_RE.match(line.strip())
+        if match and match.group(1) not in variables:
+            variables[match.group(1)] = match.group(2)
+    skip = variables.get('skip')
+    if not skip:
+        match = _OLD_SKIP_RE.search(text)
+        skip = match.group(1) if match else None
+    if not skip or not skip.isdigit() or not variables.get('filesizes'):
+        return None
+    try:
+        filesizes = [int(size) for size in variables['filesizes'].split()]
+    except ValueError:
+        return None
+
+    def sums(name):
+        # Una suma por archivo; makeself escribe ceros cuando se generó sin ella (--nomd5, --nocrc)
+        values = variables.get(name, '').split()
+        if len(values) != len(filesizes) or all(not value.strip('0') for value in values):
+            return None
+        return values
+
+    return {
+        'label': variables.get('label', ''),
+        'script': variables.get('script', ''),
+        'scriptargs': variables.get('scriptargs', ''),
+        'targetdir': variables.get('targetdir', ''),
+        'keep': variables.get('keep', 'n') == 'y',
+        'encrypted': bool(variables.get('decrypt_cmd')) or 'gpg -d' in text or 'openssl enc' in text,
+        'skip': int(skip),
+        'filesizes': filesizes,
+        'sha256': sums('SHA'),
+        'md5': sums('MD5'),
+        'crc': sums('CRCsum'),
+    }
+
+def sniff_compression(head):
+    for magic, name in _COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return name
+    if head[257:262] == b'ustar':
+        return 'none'
+    return 'unknown'
+
+class CksumCRC:
+    """CRC de la orden cksum de POSIX, el que guarda makeself en CRCsum"""
+
+    def __init__(self):
+        # zlib parte de ~valor: con 0xFFFFFFFF el registro empieza a cero, como cksum
+        self.value = 0xFFFFFFFF
+        self.length = 0
+
+    def update(self, data):
+        self.value = zlib.crc32(data.translate(_BIT_REVERSE), self.value)
+        self.length += len(data)
+
+    def hexdigest(self):
+        # cksum añade la longitud al final, byte a byte empezando por el menos significativo
+        length = self.length
+        tail = bytearray()
+        while length:
+            tail.append(length & 0xFF)
+            length >>= 8
+        value = zlib.crc32(bytes(tail).translate(_BIT_REVERSE), self.value)
+        return str(int(f'{value:032b}'[::-1], 2))
+
+class _PayloadReader:
+    """Vista de solo lectura de un tramo del archivo que cuenta los bytes consumidos"""
+
+    def __init__(self, f, offset, size, on_read=None, digest=None):
+        self.f = f
+        self.remaining = size
+        self.consumed = 0
+        self.on_read = on_read
+        self.digest = digest
+        f.seek(offset)
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        self.consumed += len(data)
+        if self.digest:
+            self.digest.update(data)
+        if self.on_read:
+            self.on_read(self.consumed)
+        return data
+
+    def drain(self):
+        # Lo que tarfile deja sin leer tras el final del tar (relleno) también entra en la suma
+        while self.remaining and self.read(1024 * 1024):
+            pass
+
+class MakeselfArchive:
+    """Lee un .run generado con makeself sin ejecutarlo"""
+
+    def __init__(self, path, header, offset):
+        self.path = path
+        self.header = header
+        self.offset = offset
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            self.compression = sniff_compression(f.read(512))
+
+    @property
+    def payload_size(self):
+        return sum(self.header['filesizes'])
+
+    def can_extract(self):
+        """Si la carga útil se puede desempaquetar aquí en lugar de dejarlo al propio script"""
+        return (self.compression in _SUPPORTED and not self.header['encrypted']
+                and not self.header['keep'] and bool(self.header['script']))
+
+    def _digest(self):
+        """Suma más fuerte que trae la cabecera: (clave, constructor) o None"""
+        if self.header.get('sha256'):
+            return 'sha256', hashlib.sha256
+        if self.header.get('md5'):
+            return 'md5', hashlib.md5
+        if self.header.get('crc'):
+            return 'crc', CksumCRC
+        return None
+
+    def _tars(self, f, on_read=None, verify=False):
+        """Los tar de la carga útil (un mismo .run puede llevar varios seguidos: makeself --append).
+
+        Con verify, cada tramo se comprueba contra la suma de la cabecera al
+        terminar de leerlo; si no coincide se lanza tarfile.TarError.
+        """
+        digest = self._digest() if verify else None
+        offset = self.offset
+        done = 0
+        for index, size in enumerate(self.header['filesizes']):
+            reader = _PayloadReader(f, offset, size,
+                                    on_read and (lambda consumed, done=done: on_read(done + consumed)),
+                                    digest and digest[1]())
+            with tarfile.open(fileobj=reader, mode='r|*') as tar:
+                yield tar
+            if digest:
+                reader.drain()
+                expected = self.header[digest[0]][index]
+                if reader.digest.hexdigest() != expected.lower():
+                    raise tarfile.TarError(f"La carga útil está dañada: la suma {digest[0].upper()} no coincide")
+            offset += size
+            done += size
+
+    def _new_info(self):
+        return {
+            'label': self.header['label'],
+            'script': self.header['script'],
+            'compression': self.compression,
+            'payload_size': self.payload_size,
+            'verified': False,
+            'files': 0,
+            'unpacked_size': 0,
+            'desktop_entries': {},
+            'icons': [],
+            'executables': [],
+        }
+
+    def _note_member(self, info, member, read_data):
+        # read_data() devuelve el contenido del miembro; solo se llama para los .desktop pequeños
+        name = member.name[2:] if member.name.startswith('./') else member.name
+        info['files'] += 1
+        info['unpacked_size'] += member.size
+        lower = name.lower()
+        if lower.endswith('.desktop') and member.size <= MAX_DESKTOP_BYTES:
+            info['desktop_entries'][name] = read_data().decode('utf-8', errors='replace')
+        elif lower.endswith(ICON_EXTENSIONS):
+            info['icons'].append(name)
+        elif member.mode & 0o111:
+            info['executables'].append(name)
+
+    def inspect(self):
+        """Lista la carga útil sin extraerla: archivos, tamaño desempaquetado, .desktop e iconos.
+
+        Desempaqueta todo el flujo: para instalar, extract() devuelve lo mismo en la misma pasada.
+        """
+        info = self._new_info()
+        if self.compression not in _SUPPORTED or self.header['encrypted']:
+            return info
+        with open(self.path, 'rb') as f:
+            for tar in self._tars(f):
+                for member in tar:
+                    if member.isfile():
+                        self._note_member(info, member, lambda: tar.extractfile(member).read())
+        return info
+
+    def extract(self, destination, progress_callback=None, min_interval=0):
+        """Desempaqueta la carga útil en destination y devuelve lo mismo que inspect().
+
+        Las sumas SHA256/MD5/CRC de la cabecera (como hace el propio script de
+        makeself) se comprueban en la misma lectura; si no coinciden se lanza
+        tarfile.TarError antes de poder ejecutar nada. progress_callback(fraction,
+        message) recibe la fracción de la carga útil comprimida ya leída y el
+        archivo en curso, como mucho una vez cada min_interval segundos.
+        """
+        info = self._new_info()
+        total = max(self.payload_size, 1)
+        state = {'member': '', 'last': 0.0}
+
+        def on_read(consumed):
+            if progress_callback is None:
+                return
+            now = time.monotonic()
+            if now - state['last'] >= min_interval:
+                state['last'] = now
+                progress_callback(min(consumed / total, 1.0), state['member'])
+
+        extract_filter = {'filter': 'tar'} if hasattr(tarfile, 'tar_filter') else {}
+        with open(self.path, 'rb') as f:
+            for tar in self._tars(f, on_read, verify=True):
+                for member in tar:
+                    if not extract_filter and (member.name.startswith('/') or '..' in member.name.split('/')):
+                        raise tarfile.TarError(f"Ruta no permitida en la carga útil: {member.name}")
+                    state['member'] = f"Extrayendo {member.name}"
+                    tar.extract(member, destination, **extract_filter)
+                    if member.isfile():
+                        self._note_member(info, member, lambda: _read_file(os.path.join(destination, member.name)))
+        info['verified'] = self._digest() is not None
+        if progress_callback:
+            progress_callback(1.0, 'Carga útil extraída')
+        return info
+
+    def startup_command(self):
+        """Orden que makeself ejecutaría dentro del directorio extraído"""
+        return ['/bin/sh', '-c', f"{self.header['script']} {self.header['scriptargs']}".strip()]
+
+def _read_file(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+def open_makeself(path):
+    """MakeselfArchive del archivo o None si no es un .run de makeself"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read(HEADER_LIMIT)
+    except OSError:
+        return None
+    header = parse_header(data)
+    if header is None:
+        return None
+    # La carga útil empieza tras las primeras skip líneas de la cabecera
+    offset = 0
+    for _ in range(header['skip']):
+        newline = data.find(b'\n', offset)
+        if newline < 0:
+            return None
+        offset = newline + 1
+    if offset + header['filesizes'][0] > os.path.getsize(path):
+        return None
+    return MakeselfArchive(path, header, offset)
+
+def format_preview(info):
+    """Resumen legible de lo que instala un .run"""
+    lines = [info['label'] or 'Archivo makeself']
+    lines.append(f"{info['files']} archivos, {format_size(info['unpacked_size'])} desempaquetado")
+    for name, content in info['desktop_entries'].items():
+        app_name = next((line[5:] for line in content.splitlines() if line.startswith('Name=')), name)
+        lines.append(f"Lanzador: {app_name}")
+    if info['icons']:
+        lines.append(f"Iconos: {len(info['icons'])}")
+    return '\n'.join(lines)
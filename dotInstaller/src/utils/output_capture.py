@@ -0,0 +1,120 @@
+import gzip
+import os
+import re
+import subprocess
+import threading
+import time
+from collections import deque
+
+LOG_DIR = os.path.expanduser('~/.local/share/dotInstaller/logs')
+# Líneas que se conservan en memoria para mostrarlas en la interfaz
+RING_LINES = 500
+# Una línea sin salto de línea no puede crecer sin límite en memoria
+MAX_LINE_BYTES = 64 * 1024
+# Registros comprimidos que se conservan en disco
+MAX_LOGS = 50
+
+def _log_name(name):
+    base = re.sub(r'[^A-Za-z0-9._-]+', '_', name or 'proceso').strip('_') or 'proceso'
+    return f"{base}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.log.gz"
+
+def prune_logs(log_dir=None, keep=MAX_LOGS):
+    """Borra los registros más antiguos dejando los keep más recientes"""
+    log_dir = log_dir or LOG_DIR
+    try:
+        logs = [entry for entry in os.scandir(log_dir) if entry.name.endswith('.log.gz')]
+    except FileNotFoundError:
+        return
+    logs.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in logs[keep:]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+class StreamingCapture:
+    """Captura la salida de un proceso sin guardarla entera en memoria.
+
+    Las últimas max_lines líneas quedan en un búfer circular para la
+    interfaz, la salida completa se escribe comprimida en log_path y cada
+    línea se reenvía a line_callback (como mucho una vez cada min_interval
+    segundos, siempre con la última línea).
+    """
+
+    def __init__(self, name=None, max_lines=RING_LINES, line_callback=None, min_interval=0,
+                 watch=(), log_dir=None):
+        self.lines = deque(maxlen=max_lines)
+        self.line_callback = line_callback
+        self.min_interval = min_interval
+        # Textos que interesa detectar aunque la línea ya haya salido del búfer
+        self.watch = tuple(watch)
+        self.seen = set()
+        self.total_lines = 0
+        self.total_bytes = 0
+        self.returncode = None
+        self.timed_out = False
+        log_dir = log_dir or LOG_DIR
+        os.makedirs(log_dir, exist_ok=True)
+        self.log_path = os.path.join(log_dir, _log_name(name))
+        self._last_sent = 0.0
+        self._pending = None
+
+    def feed(self, raw, log):
+        """Procesa una línea en bytes: registro comprimido, búfer circular y aviso"""
+        log.write(raw)
+        self.total_bytes += len(raw)
+        self.total_lines += 1
+        line = raw.decode('utf-8', errors='replace').rstrip('\r\n')
+        self.lines.append(line)
+        for text in self.watch:
+            if text in line:
+                self.seen.add(text)
+        if self.line_callback is None:
+            return
+        now = time.monotonic()
+        if now - self._last_sent >= self.min_interval:
+            self.line_callback(line)
+            self._last_sent = now
+            self._pending = None
+        else:
+            self._pending = line
+
+    def run(self, command, env=None, cwd=None, timeout=None):
+        """Ejecuta command capturando stdout y stderr juntos; devuelve el código de salida"""
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   stdin=subprocess.DEVNULL, env=env, cwd=cwd)
+        timer = None
+        if timeout:
+            def kill():
+                self.timed_out = True
+                process.kill()
+            timer = threading.Timer(timeout, kill)
+            timer.daemon = True
+            timer.start()
+        try:
+            with gzip.open(self.log_path, 'wb', compresslevel=3) as log, process:
+                while True:
+                    raw = process.stdout.readline(MAX_LINE_BYTES)
+                    if not raw:
+                        break
+                    self.feed(raw, log)
+        finally:
+            if timer:
+                timer.cancel()
+        if self.line_callback and self._pending is not None:
+            self.line_callback(self._pending)
+            self._pending = None
+        self.returncode = process.returncode
+        prune_logs(os.path.dirname(self.log_path))
+        return self.returncode
+
+    def tail(self, count=None):
+        """Últimas líneas capturadas (todas las del búfer si count es None)"""
+        lines = list(self.lines)
+        if count is not None:
+            lines = lines[-count:]
+        return '\n'.join(lines)
+
+    def completed(self, command):
+        """Resultado compatible con subprocess.run para el código que espera stdout/stderr"""
+        return subprocess.CompletedProcess(command, self.returncode, stdout=self.tail(), stderr='')
@@ -3,6 +3,8 @@ import os
 import glob
 import configparser
 import shlex
+from src.utils.wine_pool import LAUNCHER_NAME
+from src.utils.wine_programs import library_entries
 
 def list_installed_packages():
     # Obtiene la lista de paquetes instalados usando dpkg-query
@@ -78,16 +80,29 @@ def get_package_critical_info(package):
         'reverse_dependencies': reverse_deps
     }
 
+def _launched_text(exec_line, exec_bin):
+    # Lo que ejecuta una entrada: la línea Exec y, si es el lanzador del prefijo, su contenido
+    text = exec_line
+    if exec_bin.endswith(LAUNCHER_NAME):
+        try:
+            with open(exec_bin, 'r') as f:
+                text += f.read()
+        except OSError:
+            pass
+    return text
+
 def map_packages_to_desktop_entries():
     desktop_entries = get_desktop_entries()
     parsed_entries = [parse_desktop_entry(e) for e in desktop_entries]
     parsed_entries = [e for e in parsed_entries if e and e['exec']]
     seen = set()
     package_map = []
+    launched = []
     for entry in parsed_entries:
         pkg = get_package_name_from_exec(entry['exec'])
         exec_bin = shlex.split(entry['exec'])[0] if entry['exec'] else ''
         is_appimage = exec_bin.endswith('.AppImage') or exec_bin.endswith('.appimage')
+        launched.append(_launched_text(entry['exec'], exec_bin))
         # Detectar tipo wine/proton
         entry_type = ''
         if 'wine' in exec_bin:
@@ -111,4 +126,8 @@ def map_packages_to_desktop_entries():
                 'reverse_dependencies': critical_info['reverse_dependencies'],
                 'type': entry_type
             })
+    # Programas instalados dentro de los prefijos que ninguna entrada .desktop lanza ya
+    for program in library_entries():
+        if not any(program['package'] in text for text in launched):
+            package_map.append(program)
     return package_map 
\ No newline at end of file
@@ -0,0 +1,298 @@
+import os
+import re
+import struct
+from src.utils.ico import best_icon_png
+
+MZ_MAGIC = b'MZ'
+PE_MAGIC = b'PE\x00\x00'
+PE32 = 0x10b
+PE32_PLUS = 0x20b
+MACHINES = {0x14c: 'x86', 0x8664: 'x64', 0xaa64: 'arm64', 0x1c4: 'arm'}
+SUBSYSTEMS = {2: 'gui', 3: 'console'}
+
+RT_ICON = 3
+RT_GROUP_ICON = 14
+RT_VERSION = 16
+RT_MANIFEST = 24
+RESOURCE_DIRECTORY = 2
+# Los directorios de recursos reales tienen pocos niveles y entradas; esto evita bucles en archivos dañados
+MAX_RESOURCE_ENTRIES = 4096
+# VS_VERSIONINFO tiene 4 niveles (raíz, StringFileInfo, tabla, cadena); más es un archivo dañado
+MAX_VERSION_DEPTH = 8
+
+# GUID de <supportedOS> en el manifiesto de compatibilidad -> versión de winecfg, de más nueva a más antigua
+SUPPORTED_OS = (
+    ('8e0f7a12-bfb3-4fe8-b9a5-48fd50a15a9a', 'win10'),
+    ('1f676c76-80e1-4239-95bb-83d0f6d0da78', 'win81'),
+    ('4a2f28e3-53b9-4441-ba9c-d69d4a4a6e38', 'win8'),
+    ('35138b9a-5d96-4fbd-8e2d-a2440225f93a', 'win7'),
+    ('e2011457-1546-43c5-a5fe-008deee3d3f0', 'vista'),
+)
+
+_SUPPORTED_OS_RE = re.compile(r'supportedOS\s+Id\s*=\s*["\']\{([0-9a-fA-F-]+)\}["\']')
+_EXECUTION_LEVEL_RE = re.compile(r'requestedExecutionLevel\s+level\s*=\s*["\'](\w+)["\']')
+
+def read_pe_header(fd):
+    """Lee las cabeceras MZ/PE de un descriptor abierto usando pread. Devuelve None si no es PE"""
+    dos = os.pread(fd, 64, 0)
+    if len(dos) < 64 or dos[:2] != MZ_MAGIC:
+        return None
+    pe_offset, = struct.unpack_from('<I', dos, 0x3C)
+    coff = os.pread(fd, 24, pe_offset)
+    if len(coff) < 24 or coff[:4] != PE_MAGIC:
+        return None
+    machine, section_count, _, _, _, optional_size, characteristics = struct.unpack_from('<HHIIIHH', coff, 4)
+    optional = os.pread(fd, optional_size, pe_offset + 24)
+    if len(optional) < 72:
+        return None
+    magic, = struct.unpack_from('<H', optional, 0)
+    if magic not in (PE32, PE32_PLUS):
+        return None
+    os_major, os_minor = struct.unpack_from('<HH', optional, 40)
+    subsystem_major, subsystem_minor = struct.unpack_from('<HH', optional, 48)
+    subsystem, dll_characteristics = struct.unpack_from('<HH', optional, 68)
+    # El número de directorios de datos va justo antes de la tabla, que empieza en 96 (PE32) o 112 (PE32+)
+    directories_at = 96 if magic == PE32 else 112
+    directories = []
+    if len(optional) >= directories_at:
+        count, = struct.unpack_from('<I', optional, directories_at - 4)
+        for i in range(min(count, (len(optional) - directories_at) // 8)):
+            directories.append(struct.unpack_from('<II', optional, directories_at + i * 8))
+    return {
+        'machine': machine,
+        'characteristics': characteristics,
+        'pe32_plus': magic == PE32_PLUS,
+        'os_version': (os_major, os_minor),
+        'subsystem_version': (subsystem_major, subsystem_minor),
+        'subsystem': subsystem,
+        'dll_characteristics': dll_characteristics,
+        'directories': directories,
+        'sections_offset': pe_offset + 24 + optional_size,
+        'section_count': section_count,
+    }
+
+def read_sections(fd, header):
+    """Tabla de secciones: lista de (nombre, rva, tamaño virtual, offset en archivo, tamaño en archivo)"""
+    count = header['section_count']
+    table = os.pread(fd, count * 40, header['sections_offset'])
+    sections = []
+    for i in range(len(table) // 40):
+        name, virtual_size, rva, raw_size, raw_offset = struct.unpack_from('<8sIIII', table, i * 40)
+        sections.append((name.rstrip(b'\x00').decode('ascii', errors='replace'), rva, virtual_size,
+                         raw_offset, raw_size))
+    return sections
+
+def rva_to_offset(sections, rva):
+    for _, start, virtual_size, raw_offset, raw_size in sections:
+        if start <= rva < start + max(virtual_size, raw_size):
+            return raw_offset + rva - start
+    return None
+
+def _resource_directory(data, offset):
+    # Devuelve [(id o nombre, offset relativo, es_directorio)]
+    if offset + 16 > len(data):
+        return []
+    named, ids = struct.unpack_from('<HH', data, offset + 12)
+    entries = []
+    for i in range(min(named + ids, MAX_RESOURCE_ENTRIES)):
+        at = offset + 16 + i * 8
+        if at + 8 > len(data):
+            break
+        name, target = struct.unpack_from('<II', data, at)
+        if name & 0x80000000:
+            name_at = name & 0x7FFFFFFF
+            if name_at + 2 > len(data):
+                continue
+            length, = struct.unpack_from('<H', data, name_at)
+            name = data[name_at + 2:name_at + 2 + length * 2].decode('utf-16-le', errors='replace')
+        entries.append((name, target & 0x7FFFFFFF, bool(target & 0x80000000)))
+    return entries
+
+def read_resources(fd, header, resource_type, sections=None):
+    """Recursos de un tipo (RT_*): lista de (id, idioma, datos)"""
+    directories = header['directories']
+    if len(directories) <= RESOURCE_DIRECTORY or not directories[RESOURCE_DIRECTORY][0]:
+        return []
+    rva, size = directories[RESOURCE_DIRECTORY]
+    sections = sections if sections is not None else read_sections(fd, header)
+    base = rva_to_offset(sections, rva)
+    if base is None:
+        return []
+    data = os.pread(fd, size, base)
+    resources = []
+    for type_id, type_at, type_is_dir in _resource_directory(data, 0):
+        if type_id != resource_type or not type_is_dir:
+            continue
+        for name_id, name_at, name_is_dir in _resource_directory(data, type_at):
+            languages = _resource_directory(data, name_at) if name_is_dir else [(0, name_at, False)]
+            for language, entry_at, entry_is_dir in languages:
+                if entry_is_dir or entry_at + 16 > len(data):
+                    continue
+                data_rva, data_size = struct.unpack_from('<II', data, entry_at)
+                data_offset = rva_to_offset(sections, data_rva)
+                if data_offset is None:
+                    continue
+                resources.append((name_id, language, os.pread(fd, data_size, data_offset)))
+    return resources
+
+def _version_node(data, offset, depth=0):
+    # Nodo de VS_VERSIONINFO: (clave, valor, hijos, fin)
+    length, value_length, value_type = struct.unpack_from('<HHH', data, offset)
+    end = min(offset + length, len(data))
+    key_end = offset + 6
+    while key_end + 1 < end and data[key_end:key_end + 2] != b'\x00\x00':
+        key_end += 2
+    key = data[offset + 6:key_end].decode('utf-16-le', errors='replace')
+    at = (key_end + 2 + 3) & ~3
+    if value_type == 1:
+        # Texto: value_length cuenta caracteres UTF-16, incluido el nulo final
+        # (algunos enlazadores lo cuentan en bytes: se corta en el primer nulo)
+        value = data[at:at + value_length * 2].decode('utf-16-le', errors='replace').split('\x00')[0]
+        at += value_length * 2
+    else:
+        value = data[at:at + value_length]
+        at += value_length
+    children = []
+    at = (at + 3) & ~3
+    # Por debajo del límite los hijos se ignoran: un anidamiento sin fin no agota la pila
+    while at + 6 <= end and depth < MAX_VERSION_DEPTH:
+        child = _version_node(data, at, depth + 1)
+        if child[3] <= at:
+            break
+        children.append(child)
+        at = (child[3] + 3) & ~3
+    return key, value, children, max(end, offset + 6)
+
+def read_version_info(fd, header, sections=None):
+    """Cadenas de VERSIONINFO (ProductName, CompanyName, FileVersion...) y la versión fija"""
+    for _, _, data in read_resources(fd, header, RT_VERSION, sections):
+        if len(data) < 6:
+            continue
+        try:
+            key, fixed, children, _ = _version_node(data, 0)
+        except struct.error:
+            continue
+        if key != 'VS_VERSION_INFO':
+            continue
+        strings = {}
+        if len(fixed) >= 52 and struct.unpack_from('<I', fixed, 0)[0] == 0xFEEF04BD:
+            ms, ls = struct.unpack_from('<II', fixed, 8)
+            strings['FixedFileVersion'] = f"{ms >> 16}.{ms & 0xFFFF}.{ls >> 16}.{ls & 0xFFFF}"
+        for child_key, _, tables, _ in children:
+            if child_key != 'StringFileInfo':
+                continue
+            # Normalmente hay una tabla por idioma; la primera con cada clave gana
+            for _, _, entries, _ in tables:
+                for name, value, _, _ in entries:
+                    if isinstance(value, str) and value.strip():
+                        strings.setdefault(name, value.strip())
+        return strings
+    return {}
+
+def read_icon_groups(fd, header, sections=None):
+    """Grupos de iconos (RT_GROUP_ICON): lista de listas de entradas con width, height, bits e id de RT_ICON"""
+    groups = []
+    for _, _, data in read_resources(fd, header, RT_GROUP_ICON, sections):
+        if len(data) < 6:
+            continue
+        _, _, count = struct.unpack_from('<HHH', data, 0)
+        entries = []
+        for i in range(count):
+            at = 6 + i * 14
+            if at + 14 > len(data):
+                break
+            width, height, _, _, _, bits, size, icon_id = struct.unpack_from('<BBBBHHIH', data, at)
+            # 0 significa 256 píxeles
+            entries.append({'width': width or 256, 'height': height or 256, 'bits': bits,
+                            'size': size, 'id': icon_id})
+        groups.append(entries)
+    return groups
+
+def read_manifest(fd, header, sections=None):
+    """Manifiesto de aplicación incrustado (RT_MANIFEST) como texto, o None"""
+    for _, _, data in read_resources(fd, header, RT_MANIFEST, sections):
+        if data.startswith(b'\xef\xbb\xbf'):
+            data = data[3:]
+        encoding = 'utf-16' if data[:2] in (b'\xff\xfe', b'\xfe\xff') else 'utf-8'
+        return data.decode(encoding, errors='replace')
+    return None
+
+def read_pe_info(path):
+    """Datos de compatibilidad de un ejecutable de Windows, o None si no es PE"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        header = read_pe_header(fd)
+        if header is None:
+            return None
+        manifest = read_manifest(fd, header) or ''
+    except (OSError, struct.error):
+        return None
+    finally:
+        os.close(fd)
+    declared = {guid.lower() for guid in _SUPPORTED_OS_RE.findall(manifest)}
+    level = _EXECUTION_LEVEL_RE.search(manifest)
+    return {
+        'machine': MACHINES.get(header['machine'], hex(header['machine'])),
+        'subsystem': SUBSYSTEMS.get(header['subsystem'], header['subsystem']),
+        'subsystem_version': header['subsystem_version'],
+        'os_version': header['os_version'],
+        'supported_os': [name for guid, name in SUPPORTED_OS if guid in declared],
+        'execution_level': level.group(1) if level else None,
+        'has_manifest': bool(manifest),
+    }
+
+def read_exe_metadata(path):
+    """Nombre, fabricante, versión e icono (PNG en bytes o None) de un ejecutable de Windows.
+
+    Solo se leen las cabeceras y la sección de recursos, con pread: el
+    tamaño del instalador no influye. Devuelve None si no es PE.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        header = read_pe_header(fd)
+        if header is None:
+            return None
+        sections = read_sections(fd, header)
+        strings = read_version_info(fd, header, sections)
+        icon = None
+        try:
+            groups = read_icon_groups(fd, header, sections)
+            if groups:
+                images = {icon_id: data for icon_id, _, data in read_resources(fd, header, RT_ICON, sections)}
+                icon = best_icon_png(groups[0], images)
+        except (ValueError, IndexError, struct.error):
+            # Un icono dañado no impide usar el nombre y la versión
+            icon = None
+    except (OSError, struct.error):
+        return None
+    finally:
+        os.close(fd)
+    return {
+        'name': strings.get('ProductName') or strings.get('FileDescription'),
+        'company': strings.get('CompanyName'),
+        'version': strings.get('ProductVersion') or strings.get('FileVersion') or strings.get('FixedFileVersion'),
+        'strings': strings,
+        'icon_png': icon,
+    }
+
+def choose_windows_version(info):
+    """Versión de Windows (nombre de winecfg) con la que conviene instalar el ejecutable.
+
+    Si el manifiesto declara <supportedOS>, la más nueva de ellas. Si no,
+    lo que Windows mostraría a un ejecutable sin declarar: como mucho 6.2
+    (win8); los binarios anteriores (versión de subsistema menor que 6.2)
+    se instalan como win7, la época para la que se escribieron.
+    """
+    if not info:
+        return None
+    if info['supported_os']:
+        return info['supported_os'][0]
+    if info['subsystem_version'] >= (6, 2):
+        return 'win8'
+    return 'win7'
@@ -0,0 +1,235 @@
+import fcntl
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.fs_tracker import format_size
+from src.utils.prefix_template import HARDLINK_DIRS
+from src.utils.reflink import FICLONE
+from src.utils.wine_pool import is_server_running
+from src.utils.wine_programs import list_prefixes
+
+STATE_PATH = os.path.expanduser('~/.local/share/dotInstaller/prefix-dedup.json')
+# Solo los archivos de Wine que todos los prefijos comparten; el registro y drive_c del usuario nunca
+DEDUP_DIRS = ('drive_c/windows',)
+# Los archivos pequeños no compensan el coste de leerlos
+MIN_SIZE = 16 * 1024
+MAX_HASH_WORKERS = 4
+CHUNK_SIZE = 1024 * 1024
+
+_dedup_lock = threading.Lock()
+
+def _hardlink_allowed(relative):
+    # Un enlace duro no es copia diferida: escribir en uno cambia todos. Solo para lo que nadie reescribe
+    # (Mono y Gecko, como en las plantillas); el resto se comparte solo con reflink.
+    for directory in HARDLINK_DIRS:
+        if not directory.startswith('pfx/') and (relative == directory or relative.startswith(directory + '/')):
+            return True
+    return False
+
+def _signature(wine_root):
+    # Instalar en un prefijo cambia su registro y, si añade archivos, las carpetas de Windows
+    stamps = []
+    for relative in ('system.reg',) + DEDUP_DIRS + ('drive_c/windows/system32', 'drive_c/windows/syswow64'):
+        try:
+            stamps.append(os.stat(os.path.join(wine_root, relative)).st_mtime_ns)
+        except OSError:
+            stamps.append(None)
+    return stamps
+
+def scan_files(wine_root):
+    """{ruta relativa: [tamaño, mtime_ns, inodo]} de los archivos candidatos del prefijo"""
+    files = {}
+    for directory in DEDUP_DIRS:
+        pending = [os.path.join(wine_root, directory)]
+        while pending:
+            current = pending.pop()
+            try:
+                with os.scandir(current) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        if st.st_size >= MIN_SIZE:
+                            files[os.path.relpath(entry.path, wine_root)] = [st.st_size, st.st_mtime_ns, st.st_ino]
+                except OSError:
+                    continue
+    return files
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _replace_with(canonical, duplicate, allow_hardlink):
+    """Sustituye duplicate por una copia compartida de canonical; devuelve 'reflink', 'hardlink' o None"""
+    temp_path = f"{duplicate}.dotinstaller-dedup"
+    try:
+        try:
+            with open(canonical, 'rb') as source, open(temp_path, 'wb') as target:
+                fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+            method = 'reflink'
+        except OSError:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            if not allow_hardlink:
+                return None
+            os.link(canonical, temp_path)
+            method = 'hardlink'
+        if method == 'reflink':
+            # El reflink es un archivo propio: conserva permisos y fechas del que sustituye
+            st = os.stat(duplicate)
+            os.chmod(temp_path, st.st_mode & 0o7777)
+            os.utime(temp_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(temp_path, duplicate)
+        return method
+    except OSError as e:
+        print(f"[Dedup] No se pudo compartir {duplicate}: {e}")
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        return None
+
+def _load_state(state_path):
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def _save_state(state, state_path):
+    try:
+        os.makedirs(os.path.dirname(state_path), exist_ok=True)
+        temp_path = state_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, state_path)
+    except OSError as e:
+        print(f"[Dedup] No se pudo guardar el estado: {e}")
+
+def deduplicate_prefixes(roots=None, state_path=None, max_workers=MAX_HASH_WORKERS):
+    """Comparte los archivos idénticos de drive_c/windows entre todos los prefijos de Wine y Proton.
+
+    Solo se recorren los prefijos que cambiaron desde la última vez; los hashes
+    del resto salen del estado guardado. Los prefijos con un wineserver activo
+    se dejan para otra pasada. Devuelve un resumen con los bytes ahorrados.
+    """
+    state_path = state_path or STATE_PATH
+    summary = {'scanned': 0, 'hashed': 0, 'reflink': 0, 'hardlink': 0, 'saved': 0, 'skipped': []}
+    with _dedup_lock:
+        state = _load_state(state_path)
+        prefixes = [wine_root for _, _, wine_root in list_prefixes(roots)]
+        for wine_root in set(state) - set(prefixes):
+            del state[wine_root]
+        changed = []
+        for wine_root in prefixes:
+            if is_server_running(wine_root):
+                summary['skipped'].append(wine_root)
+                continue
+            signature = _signature(wine_root)
+            if (state.get(wine_root) or {}).get('signature') != signature:
+                changed.append(wine_root)
+                old_files = (state.get(wine_root) or {}).get('files', {})
+                files = scan_files(wine_root)
+                # Se conserva el hash de lo que no cambió (mismo tamaño, fecha e inodo)
+                for relative, info in files.items():
+                    old = old_files.get(relative)
+                    if old and len(old) == 4 and old[:3] == info:
+                        info.append(old[3])
+                state[wine_root] = {'signature': signature, 'files': files}
+        summary['scanned'] = len(changed)
+        if not changed:
+            return summary
+
+        # Solo hace falta el hash de los tamaños que se repiten en algún otro archivo
+        by_size = {}
+        for wine_root in prefixes:
+            for relative, info in (state.get(wine_root) or {}).get('files', {}).items():
+                by_size.setdefault(info[0], []).append((wine_root, relative))
+        to_hash = [(wine_root, relative) for group in by_size.values() if len(group) > 1
+                   for wine_root, relative in group if len(state[wine_root]['files'][relative]) < 4]
+
+        def hash_one(item):
+            try:
+                return item, hash_file(os.path.join(*item))
+            except OSError:
+                return item, None
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for (wine_root, relative), digest in executor.map(hash_one, to_hash):
+                if digest:
+                    state[wine_root]['files'][relative].append(digest)
+                    summary['hashed'] += 1
+
+        groups = {}
+        for wine_root in prefixes:
+            for relative, info in (state.get(wine_root) or {}).get('files', {}).items():
+                if len(info) == 4:
+                    groups.setdefault((info[0], info[3]), []).append((wine_root, relative))
+        changed_set = set(changed)
+        stale = set()
+        for (size, _), members in groups.items():
+            if len(members) < 2:
+                continue
+            # El original es, si puede ser, de un prefijo ya procesado: así no se mueven archivos compartidos
+            members.sort(key=lambda member: (member[0] in changed_set, member))
+            canonical_root, canonical_relative = members[0]
+            canonical = os.path.join(canonical_root, canonical_relative)
+            canonical_info = state[canonical_root]['files'][canonical_relative]
+            canonical_ino = canonical_info[2]
+            # Su hash puede venir del estado: si se reescribió en su sitio (sin cambiar la firma del
+            # prefijo) los demás recibirían otro contenido. Se descarta el hash y se repasa después.
+            try:
+                st = os.stat(canonical)
+                current = [st.st_size, st.st_mtime_ns, st.st_ino]
+            except OSError:
+                current = None
+            if current != canonical_info[:3]:
+                if current:
+                    state[canonical_root]['files'][canonical_relative] = current
+                else:
+                    del state[canonical_root]['files'][canonical_relative]
+                stale.add(canonical_root)
+                continue
+            for wine_root, relative in members[1:]:
+                info = state[wine_root]['files'][relative]
+                if wine_root not in changed_set or info[2] == canonical_ino:
+                    continue
+                path = os.path.join(wine_root, relative)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                # Si cambió desde que se calculó el hash, se deja para la próxima pasada
+                if [st.st_size, st.st_mtime_ns, st.st_ino] != info[:3]:
+                    continue
+                method = _replace_with(canonical, path, _hardlink_allowed(relative))
+                if method:
+                    summary[method] += 1
+                    summary['saved'] += size
+                    st = os.stat(path)
+                    state[wine_root]['files'][relative] = [st.st_size, st.st_mtime_ns, st.st_ino, info[3]]
+        # Los directorios cambian de fecha al sustituir archivos: se vuelve a tomar la firma
+        for wine_root in changed:
+            state[wine_root]['signature'] = _signature(wine_root)
+        # Los prefijos con un original desfasado se vuelven a recorrer en la próxima pasada
+        for wine_root in stale:
+            state[wine_root]['signature'] = None
+        _save_state(state, state_path)
+    if summary['saved']:
+        print(f"[Dedup] {summary['reflink'] + summary['hardlink']} archivos compartidos entre prefijos, "
+              f"{format_size(summary['saved'])} ahorrados")
+    return summary
@@ -0,0 +1,112 @@
+import os
+import re
+import shutil
+import threading
+from src.utils.reflink import clone_file
+
+TEMPLATE_DIR = os.path.expanduser('~/.local/share/dotInstaller/prefix-templates')
+# Se escribe al terminar el arranque: una plantilla sin él está a medias y se descarta
+READY_MARKER = '.dotinstaller-template'
+# Datos de ejecución que ningún instalador reescribe: si no hay reflink se comparten con enlaces duros.
+# El registro y el resto del prefijo se copian siempre para que cada aplicación tenga el suyo.
+HARDLINK_DIRS = ('drive_c/windows/mono', 'drive_c/windows/system32/gecko', 'drive_c/windows/syswow64/gecko',
+                 'pfx/drive_c/windows/mono', 'pfx/drive_c/windows/system32/gecko',
+                 'pfx/drive_c/windows/syswow64/gecko')
+
+_template_lock = threading.Lock()
+
+def template_path(kind, version, base_dir=None):
+    safe_version = re.sub(r'[^A-Za-z0-9._-]+', '_', version).strip('_') or 'desconocida'
+    return os.path.join(base_dir or TEMPLATE_DIR, f"{kind}-{safe_version}")
+
+def is_ready(path):
+    return os.path.exists(os.path.join(path, READY_MARKER))
+
+def ensure_template(kind, version, boot, base_dir=None):
+    """Devuelve la plantilla de prefijo de kind/version, creándola la primera vez.
+
+    boot(ruta) debe inicializar un prefijo vacío en esa ruta y devolver True
+    si lo consiguió. Se arranca en un directorio temporal y se renombra al
+    final, así nunca se clona una plantilla a medias. Devuelve None si falla.
+    """
+    path = template_path(kind, version, base_dir)
+    with _template_lock:
+        if is_ready(path):
+            return path
+        temp_path = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(temp_path, ignore_errors=True)
+        os.makedirs(temp_path)
+        try:
+            if not boot(temp_path):
+                shutil.rmtree(temp_path, ignore_errors=True)
+                return None
+            with open(os.path.join(temp_path, READY_MARKER), 'w') as f:
+                f.write(f"{kind} {version}\n")
+            shutil.rmtree(path, ignore_errors=True)
+            os.rename(temp_path, path)
+            _prune_old(kind, path)
+        except Exception as e:
+            print(f"No se pudo crear la plantilla de prefijo {kind} {version}: {e}")
+            shutil.rmtree(temp_path, ignore_errors=True)
+            return None
+    return path
+
+def _prune_old(kind, current):
+    # Las plantillas de versiones anteriores ya no se usan; los prefijos clonados no dependen de ellas
+    base_dir = os.path.dirname(current)
+    for entry in os.scandir(base_dir):
+        if entry.path != current and entry.name.startswith(f"{kind}-") and entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+def clone_tree(source, destination):
+    """Clona una plantilla en destination; devuelve cuántos archivos se clonaron de cada forma.
+
+    Cada archivo se clona con reflink (copia diferida) si el sistema de
+    archivos lo permite; si no, los de HARDLINK_DIRS se enlazan y el resto se
+    copian. Los enlaces simbólicos (dosdevices, DLL de Proton) se recrean tal cual.
+    """
+    counts = {'reflink': 0, 'hardlink': 0, 'copy': 0}
+    # Se descubre con el primer archivo: en el mismo sistema de archivos no cambia
+    reflink_ok = None
+    os.makedirs(destination, exist_ok=True)
+    pending = ['']
+    directories = []
+    while pending:
+        relative = pending.pop()
+        source_dir = os.path.join(source, relative)
+        with os.scandir(source_dir) as it:
+            entries = list(it)
+        for entry in entries:
+            if not relative and entry.name == READY_MARKER:
+                continue
+            rel_path = os.path.join(relative, entry.name)
+            target = os.path.join(destination, rel_path)
+            if entry.is_symlink():
+                os.symlink(os.readlink(entry.path), target)
+            elif entry.is_dir():
+                os.makedirs(target, exist_ok=True)
+                directories.append((entry.path, target))
+                pending.append(rel_path)
+            elif entry.is_file():
+                if reflink_ok is not False or not rel_path.startswith(HARDLINK_DIRS):
+                    method = clone_file(entry.path, target)
+                    if reflink_ok is None:
+                        reflink_ok = method == 'reflink'
+                else:
+                    try:
+                        os.link(entry.path, target)
+                        method = 'hardlink'
+                    except OSError:
+                        method = clone_file(entry.path, target)
+                counts[method] += 1
+    # Permisos y fechas de los directorios al final: crear archivos los modifica
+    for source_dir, target in reversed(directories):
+        shutil.copystat(source_dir, target)
+    return counts
+
+def is_empty_dir(path):
+    try:
+        with os.scandir(path) as it:
+            return next(it, None) is None
+    except FileNotFoundError:
+        return True
@@ -0,0 +1,162 @@
+import json
+import os
+import re
+import threading
+from src.utils.vdf import load as load_vdf, VDFError
+
+# Instalaciones de Steam habituales (nativa, enlaces de ~/.steam y Flatpak)
+STEAM_ROOTS = ('~/.steam/steam', '~/.steam/root', '~/.local/share/Steam',
+               '~/.var/app/com.valvesoftware.Steam/data/Steam')
+# Herramientas de compatibilidad instaladas para todo el sistema (p. ej. paquetes de GE-Proton)
+SYSTEM_COMPAT_DIRS = ('/usr/share/steam/compatibilitytools.d', '/usr/local/share/steam/compatibilitytools.d')
+INDEX_PATH = os.path.expanduser('~/.local/share/dotInstaller/proton-index.json')
+
+_memory = {'signature': None, 'tools': None}
+_memory_lock = threading.Lock()
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def steam_roots(roots=None):
+    """Raíces de Steam existentes, sin repetir las que son enlaces a la misma carpeta"""
+    seen = set()
+    result = []
+    for root in roots if roots is not None else STEAM_ROOTS:
+        root = os.path.expanduser(root)
+        real = os.path.realpath(root)
+        if real in seen or not os.path.isdir(real):
+            continue
+        seen.add(real)
+        result.append(real)
+    return result
+
+def library_folders(root):
+    """Bibliotecas de Steam según steamapps/libraryfolders.vdf (la propia raíz siempre incluida)"""
+    folders = [root]
+    path = os.path.join(root, 'steamapps', 'libraryfolders.vdf')
+    try:
+        data = load_vdf(path)
+    except (OSError, VDFError):
+        return folders
+    entries = data.get('libraryfolders') or data.get('LibraryFolders') or {}
+    for key, value in entries.items():
+        # Formato nuevo: "0" { "path" "..." }; antiguo: "1" "/ruta"
+        folder = value.get('path') if isinstance(value, dict) else (value if key.isdigit() else None)
+        if folder:
+            folder = os.path.realpath(folder)
+            if folder not in folders:
+                folders.append(folder)
+    return folders
+
+def _watched_paths(roots):
+    # Solo se vigila la fecha de estos archivos y directorios: instalar o borrar una versión los cambia
+    paths = []
+    for root in roots:
+        paths.append(os.path.join(root, 'steamapps', 'libraryfolders.vdf'))
+        paths.append(os.path.join(root, 'compatibilitytools.d'))
+        for folder in library_folders(root):
+            paths.append(os.path.join(folder, 'steamapps', 'common'))
+    paths.extend(SYSTEM_COMPAT_DIRS)
+    return sorted(set(paths))
+
+def version_key(name):
+    """Clave de orden natural: proton-9.0-2 > proton-8.0-5 > GE-Proton7-55"""
+    return tuple(int(number) for number in re.findall(r'\d+', name or ''))
+
+def _read_version(tool_dir):
+    # Proton trae un archivo version: "<marca de tiempo> proton-X.Y-Z"
+    try:
+        with open(os.path.join(tool_dir, 'version')) as f:
+            parts = f.read().split()
+        return parts[-1] if parts else None
+    except OSError:
+        return None
+
+def _compat_tool_name(tool_dir):
+    try:
+        data = load_vdf(os.path.join(tool_dir, 'compatibilitytool.vdf'))
+    except (OSError, VDFError):
+        return None
+    tools = (data.get('compatibilitytools') or {}).get('compat_tools') or {}
+    for internal_name, info in tools.items():
+        if isinstance(info, dict):
+            return info.get('display_name') or internal_name
+        return internal_name
+    return None
+
+def _scan_dir(directory, source):
+    tools = []
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return tools
+    for entry in entries:
+        script = os.path.join(entry.path, 'proton')
+        if not entry.is_dir() or not os.path.isfile(script):
+            continue
+        name = _compat_tool_name(entry.path) if source == 'compat' else None
+        version = _read_version(entry.path) or entry.name
+        tools.append({
+            'name': name or entry.name,
+            'version': version,
+            'path': script,
+            'dir': entry.path,
+            'source': source,
+        })
+    return tools
+
+def scan_protons(roots):
+    """Recorre las bibliotecas y compatibilitytools.d; devuelve las versiones de más nueva a más antigua"""
+    tools = []
+    for root in roots:
+        for folder in library_folders(root):
+            tools.extend(tool for tool in _scan_dir(os.path.join(folder, 'steamapps', 'common'), 'steam')
+                         if tool['name'].lower().startswith('proton'))
+        tools.extend(_scan_dir(os.path.join(root, 'compatibilitytools.d'), 'compat'))
+    for directory in SYSTEM_COMPAT_DIRS:
+        tools.extend(_scan_dir(directory, 'compat'))
+    unique = {}
+    for tool in tools:
+        unique.setdefault(os.path.realpath(tool['path']), tool)
+    return sorted(unique.values(), key=lambda tool: version_key(tool['version']), reverse=True)
+
+def list_protons(roots=None, index_path=None):
+    """Versiones de Proton instaladas, desde la caché mientras no cambie ningún directorio vigilado"""
+    index_path = index_path or INDEX_PATH
+    roots = steam_roots(roots)
+    watched = _watched_paths(roots)
+    signature = {path: _mtime(path) for path in watched}
+    with _memory_lock:
+        if _memory['signature'] == signature:
+            return list(_memory['tools'])
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('signature') == signature:
+                _memory.update(signature=signature, tools=cached['tools'])
+                return list(cached['tools'])
+        except (OSError, ValueError, KeyError):
+            pass
+        tools = scan_protons(roots)
+        try:
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+            temp_path = index_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'signature': signature, 'tools': tools}, f)
+            os.replace(temp_path, index_path)
+        except OSError as e:
+            print(f"[Proton] No se pudo guardar el índice: {e}")
+        _memory.update(signature=signature, tools=tools)
+        return list(tools)
+
+def find_proton(preferred=None, roots=None, index_path=None):
+    """Ruta del script proton: la versión preferida (por nombre o versión) o la más nueva"""
+    tools = list_protons(roots, index_path)
+    if preferred:
+        for tool in tools:
+            if preferred in (tool['name'], tool['version'], os.path.basename(tool['dir'])):
+                return tool['path']
+    return tools[0]['path'] if tools else None
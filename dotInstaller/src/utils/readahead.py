@@ -0,0 +1,122 @@
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+from src.data.database import record_launches, get_top_launched, get_setting
+
+# El wrapper de cada AppImage añade una línea "timestamp<TAB>tipo<TAB>ruta" a este archivo
+LAUNCH_LOG = os.path.expanduser("~/.local/share/dotInstaller/launches.log")
+
+DEFAULT_TOP_N = 5
+DEFAULT_BUDGET_MB = 512
+# Nunca usar más de esta fracción de la memoria disponible para precargar
+MAX_AVAILABLE_FRACTION = 0.25
+
+def collect_launch_log(log_path=None):
+    """Vuelca el registro de lanzamientos del wrapper a la base de datos"""
+    log_path = log_path or LAUNCH_LOG
+    if not os.path.exists(log_path):
+        return 0
+    # Renombrar antes de leer para no perder lanzamientos que ocurran mientras tanto. El nombre
+    # es propio de cada proceso: la ventana y el mantenimiento en segundo plano pueden coincidir
+    processing_path = f"{log_path}.{os.getpid()}-{time.time_ns()}.processing"
+    try:
+        os.replace(log_path, processing_path)
+    except FileNotFoundError:
+        # Otro proceso se lo llevó entre la comprobación y el renombrado
+        return 0
+    except OSError as e:
+        print(f"[Readahead] No se pudo rotar el registro de lanzamientos: {e}")
+        return 0
+
+    counts = defaultdict(int)
+    last_seen = {}
+    try:
+        with open(processing_path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                parts = line.rstrip('\n').split('\t', 2)
+                if len(parts) != 3 or not parts[2]:
+                    continue
+                timestamp, kind, path = parts
+                counts[(path, kind)] += 1
+                try:
+                    last_seen[(path, kind)] = datetime.fromtimestamp(int(timestamp)).isoformat()
+                except ValueError:
+                    last_seen[(path, kind)] = datetime.now().isoformat()
+    finally:
+        os.remove(processing_path)
+
+    record_launches([
+        (path, kind, count, last_seen[(path, kind)])
+        for (path, kind), count in counts.items()
+    ])
+    return sum(counts.values())
+
+def get_available_memory():
+    """Devuelve la memoria disponible en bytes según /proc/meminfo"""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+def is_system_idle():
+    """Considera el sistema ocioso si la carga media es baja"""
+    try:
+        load_1min = os.getloadavg()[0]
+    except OSError:
+        return True
+    return load_1min < (os.cpu_count() or 1) * 0.5
+
+def warm_file(path):
+    """Pide al kernel que lea el archivo en la caché de páginas sin bloquear"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        os.posix_fadvise(fd, 0, size, os.POSIX_FADV_WILLNEED)
+        return size
+    finally:
+        os.close(fd)
+
+def warm_top_appimages(top_n=None, budget_bytes=None, only_when_idle=True):
+    """Precarga las AppImages más lanzadas dentro de un presupuesto de memoria"""
+    if top_n is None:
+        top_n = int(get_setting('readahead_top_n', DEFAULT_TOP_N))
+    if budget_bytes is None:
+        budget_bytes = int(get_setting('readahead_budget_mb', DEFAULT_BUDGET_MB)) * 1024 * 1024
+
+    summary = {'warmed': [], 'skipped': [], 'bytes': 0}
+    if only_when_idle and not is_system_idle():
+        return summary
+
+    collect_launch_log()
+
+    available = get_available_memory()
+    if available is not None:
+        budget_bytes = min(budget_bytes, int(available * MAX_AVAILABLE_FRACTION))
+
+    remaining = budget_bytes
+    for path, launch_count, _ in get_top_launched('appimage', top_n):
+        if not os.path.exists(path):
+            summary['skipped'].append(path)
+            continue
+        try:
+            size = os.path.getsize(path)
+            # Las imágenes que no caben se saltan para dar paso a otras más pequeñas
+            if size > remaining:
+                summary['skipped'].append(path)
+                continue
+            warmed = warm_file(path)
+            remaining -= warmed
+            summary['bytes'] += warmed
+            summary['warmed'].append(path)
+        except OSError as e:
+            print(f"[Readahead] Error precargando {path}: {e}")
+            summary['skipped'].append(path)
+
+    if summary['warmed']:
+        print(f"[Readahead] Precargadas {len(summary['warmed'])} AppImages ({summary['bytes'] // (1024 * 1024)} MB)")
+    return summary
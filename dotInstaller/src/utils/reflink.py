@@ -0,0 +1,21 @@
+import fcntl
+import shutil
+
+# ioctl FICLONE de Linux (_IOW(0x94, 9, int)): comparte los bloques en btrfs, XFS, bcachefs...
+FICLONE = 0x40049409
+
+def clone_file(src, dst):
+    """Copia src en dst compartiendo bloques (reflink) si el sistema de archivos lo permite.
+
+    Si no, recurre a una copia normal (shutil usa sendfile en el kernel).
+    Devuelve 'reflink' o 'copy' según lo que se hizo.
+    """
+    try:
+        with open(src, 'rb') as source, open(dst, 'wb') as target:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        method = 'reflink'
+    except OSError:
+        shutil.copyfile(src, dst)
+        method = 'copy'
+    shutil.copystat(src, dst)
+    return method
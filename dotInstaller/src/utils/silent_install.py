@@ -0,0 +1,86 @@
+import os
+import struct
+from src.data.database import get_setting
+from src.utils.pe import read_pe_header, read_sections, read_version_info
+
+# Documento OLE compuesto: la cabecera de los .msi (y de los .msi incrustados)
+MSI_MAGIC = bytes.fromhex('d0cf11e0a1b11ae1')
+# Cuánto del principio de los datos añadidos tras las secciones se examina
+OVERLAY_SCAN = 256 * 1024
+# Firmas en los datos añadidos (overlay) de cada tipo de instalador
+OVERLAY_SIGNATURES = (
+    ('nsis', b'\xef\xbe\xad\xdeNullsoftInst'),
+    ('inno', b'Inno Setup Setup Data'),
+    ('inno', b'rDlPtS\xcd\xe6\xd7\x7b'),
+    ('installshield', b'InstallShield'),
+)
+# Textos de la información de versión que delatan al generador del instalador
+VERSION_MARKERS = (
+    ('inno', 'Inno Setup'),
+    ('installshield', 'InstallShield'),
+    ('nsis', 'Nullsoft'),
+)
+# Instalaciones desatendidas simultáneas (cada una con su prefijo y su wineserver)
+DEFAULT_PARALLEL_INSTALLS = 3
+# Argumentos para instalar sin ventanas ni preguntas
+SILENT_SWITCHES = {
+    'inno': ['/VERYSILENT', '/SUPPRESSMSGBOXES', '/NORESTART', '/SP-'],
+    'nsis': ['/S'],
+    # Los setup.exe de InstallShield suelen llevar un .msi: /v pasa /qn a msiexec
+    'installshield': ['/s', '/v/qn'],
+    'wix': ['/quiet', '/norestart'],
+    'msi': ['/qn', '/norestart'],
+}
+
+def is_silent_enabled():
+    return get_setting('wine_silent_install', '1') == '1'
+
+def parallel_install_limit():
+    return max(1, int(get_setting('wine_parallel_installs', DEFAULT_PARALLEL_INSTALLS)))
+
+def _scan_overlay(fd, sections):
+    # Lo que hay detrás de la última sección no lo carga Windows: ahí guardan los instaladores sus datos
+    end = max((raw_offset + raw_size for _, _, _, raw_offset, raw_size in sections), default=0)
+    data = os.pread(fd, OVERLAY_SCAN, end) if end else b''
+    for kind, signature in OVERLAY_SIGNATURES:
+        if signature in data:
+            return kind
+    if data.startswith(MSI_MAGIC):
+        return 'installshield'
+    return None
+
+def detect_installer(path):
+    """Tipo de instalador ('inno', 'nsis', 'installshield', 'wix' o 'msi'), o None si no se reconoce"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        if os.pread(fd, 8, 0) == MSI_MAGIC:
+            return 'msi'
+        header = read_pe_header(fd)
+        if header is None:
+            return None
+        sections = read_sections(fd, header)
+        # Los paquetes de WiX (Burn) llevan su propia sección
+        if any(name == '.wixburn' for name, _, _, _, _ in sections):
+            return 'wix'
+        kind = _scan_overlay(fd, sections)
+        if kind:
+            return kind
+        strings = read_version_info(fd, header, sections)
+    except (OSError, struct.error):
+        return None
+    finally:
+        os.close(fd)
+    text = ' '.join(str(value) for value in strings.values())
+    for kind, marker in VERSION_MARKERS:
+        if marker in text:
+            return kind
+    return None
+
+def silent_command(path, kind):
+    """Argumentos para Wine/Proton que instalan path sin interacción; [path] si el tipo es desconocido"""
+    if kind == 'msi':
+        return ['msiexec', '/i', path] + SILENT_SWITCHES['msi']
+    return [path] + SILENT_SWITCHES.get(kind, [])
@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Marca de los directorios ya retirados que esperan a borrarse (sobreviven a un cierre a medias)
+TOMBSTONE_MARK = '.dotinstaller-deleted-'
+# unlink y rmdir liberan el GIL: varios hilos vacían subárboles a la vez
+MAX_DELETE_WORKERS = 8
+
+def is_tombstone(name):
+    return name.startswith('.') and TOMBSTONE_MARK in name
+
+def entomb(path):
+    """Retira path renombrándolo junto a sí mismo (instantáneo); devuelve la ruta nueva o None si no existe"""
+    if not os.path.lexists(path):
+        return None
+    parent, name = os.path.split(os.path.normpath(path))
+    tomb = os.path.join(parent, f".{name}{TOMBSTONE_MARK}{os.getpid()}-{time.time_ns()}")
+    os.rename(path, tomb)
+    return tomb
+
+def _remove_subtree(top):
+    # Recorrido en profundidad sin recursión; los directorios se borran al quedar vacíos
+    freed = 0
+    failed = []
+    stack = [(top, False)]
+    while stack:
+        path, emptied = stack.pop()
+        if emptied:
+            try:
+                os.rmdir(path)
+            except OSError:
+                failed.append(path)
+            continue
+        stack.append((path, True))
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, False))
+                    continue
+                st = entry.stat(follow_symlinks=False)
+                os.unlink(entry.path)
+                # Un archivo con más enlaces (p. ej. compartido entre prefijos) no libera espacio
+                if st.st_nlink <= 1:
+                    freed += st.st_blocks * 512
+            except OSError:
+                failed.append(entry.path)
+    return freed, failed
+
+def remove_tree(path, max_workers=MAX_DELETE_WORKERS):
+    """Borra un árbol repartiendo sus subdirectorios entre hilos; devuelve (bytes liberados, fallos)"""
+    if os.path.islink(path) or not os.path.isdir(path):
+        try:
+            st = os.lstat(path)
+            os.unlink(path)
+            return (st.st_blocks * 512 if st.st_nlink <= 1 else 0), []
+        except OSError:
+            return 0, [path]
+    freed = 0
+    failed = []
+    subdirs = []
+    with os.scandir(path) as it:
+        entries = list(it)
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            subdirs.append(entry.path)
+            continue
+        try:
+            st = entry.stat(follow_symlinks=False)
+            os.unlink(entry.path)
+            if st.st_nlink <= 1:
+                freed += st.st_blocks * 512
+        except OSError:
+            failed.append(entry.path)
+    # Un prefijo tiene pocos subdirectorios arriba (drive_c, dosdevices): se reparte un nivel más abajo
+    tops = []
+    for subdir in subdirs:
+        try:
+            with os.scandir(subdir) as it:
+                children = [entry.path for entry in it if entry.is_dir(follow_symlinks=False)]
+        except OSError:
+            children = []
+        tops.extend(children)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for subtree_freed, subtree_failed in executor.map(_remove_subtree, tops):
+            freed += subtree_freed
+            failed.extend(subtree_failed)
+    # Lo que queda (archivos de primer nivel de cada subdirectorio y los propios directorios)
+    for subdir in subdirs + [path]:
+        subtree_freed, subtree_failed = _remove_subtree(subdir)
+        freed += subtree_freed
+        failed.extend(subtree_failed)
+    return freed, failed
+
+def remove_in_background(tombs, callback=None):
+    """Borra los directorios retirados en un hilo; callback(bytes liberados, fallos) al terminar"""
+    def worker():
+        freed = 0
+        failed = []
+        for tomb in tombs:
+            tomb_freed, tomb_failed = remove_tree(tomb)
+            freed += tomb_freed
+            failed.extend(tomb_failed)
+        if callback:
+            callback(freed, failed)
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    return thread
+
+def purge_tombstones(bases, callback=None):
+    """Retoma el borrado de los directorios retirados que quedaron a medias en bases"""
+    tombs = []
+    for base in bases:
+        base = os.path.expanduser(base)
+        try:
+            tombs.extend(entry.path for entry in os.scandir(base) if is_tombstone(entry.name))
+        except OSError:
+            continue
+    if tombs:
+        return remove_in_background(tombs, callback)
+    return None
@@ -0,0 +1,80 @@
+# Lector del formato VDF de texto de Valve (libraryfolders.vdf, compatibilitytool.vdf...)
+
+_ESCAPES = {'n': '\n', 't': '\t', '\\': '\\', '"': '"'}
+
+class VDFError(ValueError):
+    """El texto no es VDF válido"""
+
+def _tokens(text):
+    # Devuelve ('str', valor), ('{', None) o ('}', None); los comentarios // y las directivas #base se saltan
+    i = 0
+    length = len(text)
+    while i < length:
+        c = text[i]
+        if c.isspace():
+            i += 1
+        elif c == '/' and text.startswith('//', i):
+            newline = text.find('\n', i)
+            i = length if newline < 0 else newline + 1
+        elif c in '{}':
+            yield c, None
+            i += 1
+        elif c == '"':
+            i += 1
+            chars = []
+            while i < length and text[i] != '"':
+                if text[i] == '\\' and i + 1 < length:
+                    chars.append(_ESCAPES.get(text[i + 1], '\\' + text[i + 1]))
+                    i += 2
+                else:
+                    chars.append(text[i])
+                    i += 1
+            if i >= length:
+                raise VDFError("Cadena sin cerrar")
+            yield 'str', ''.join(chars)
+            i += 1
+        else:
+            start = i
+            while i < length and not text[i].isspace() and text[i] not in '{}"':
+                i += 1
+            token = text[start:i]
+            if token.startswith('#'):
+                # #include / #base "archivo": no se siguen
+                newline = text.find('\n', i)
+                i = length if newline < 0 else newline + 1
+                continue
+            # Condiciones como [$WIN32] tras un valor se ignoran
+            if token.startswith('[') and token.endswith(']'):
+                continue
+            yield 'str', token
+
+def loads(text):
+    """Convierte texto VDF en diccionarios anidados; las claves repetidas se quedan con el último valor"""
+    root = {}
+    stack = [root]
+    key = None
+    for kind, value in _tokens(text):
+        if kind == 'str':
+            if key is None:
+                key = value
+            else:
+                stack[-1][key] = value
+                key = None
+        elif kind == '{':
+            if key is None:
+                raise VDFError("Bloque sin nombre")
+            child = {}
+            stack[-1][key] = child
+            stack.append(child)
+            key = None
+        else:
+            if len(stack) == 1 or key is not None:
+                raise VDFError("Llave de cierre inesperada")
+            stack.pop()
+    if len(stack) != 1 or key is not None:
+        raise VDFError("Bloque sin cerrar")
+    return root
+
+def load(path):
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return loads(f.read())
@@ -0,0 +1,149 @@
+import fcntl
+import os
+import shlex
+import shutil
+import subprocess
+from datetime import datetime, timedelta
+from src.data.database import get_top_launched, get_setting
+from src.utils.readahead import collect_launch_log, is_system_idle
+
+DEFAULT_POOL_SIZE = 3
+# wineserver -p termina solo tras este tiempo sin clientes
+DEFAULT_IDLE_MINUTES = 30
+# Solo se calientan los prefijos usados hace poco
+DEFAULT_RECENT_DAYS = 7
+# Nombre del lanzador que WineHandler deja en cada prefijo
+LAUNCHER_NAME = 'dotinstaller-launch.sh'
+
+def is_pool_enabled():
+    return get_setting('wine_pool_enabled', '0') == '1'
+
+def launcher_script(prefix, exe_path, wine_bin='wine', arguments=(), working_dir=None):
+    """Lanzador del .desktop: anota el uso del prefijo (como el wrapper de las AppImage) y arranca Wine.
+
+    Entra antes en working_dir (por defecto la carpeta del ejecutable) y pasa
+    los argumentos del acceso directo de Windows delante de los del usuario.
+    """
+    working_dir = working_dir or os.path.dirname(exe_path)
+    extra = ''.join(f' {shlex.quote(argument)}' for argument in arguments)
+    # Las rutas vienen del nombre del .exe y del registro del prefijo: todo va entre comillas simples
+    name = ''.join(c if c.isprintable() else '?' for c in os.path.basename(exe_path))
+    return f"""#!/bin/bash
+# Lanzador de dotInstaller para {name}
+
+# Registrar el lanzamiento para mantener caliente el wineserver de los prefijos más usados
+LAUNCH_LOG="$HOME/.local/share/dotInstaller/launches.log"
+mkdir -p "${{LAUNCH_LOG%/*}}" 2>/dev/null
+printf '%(%s)T\\twine\\t%s\\n' -1 {shlex.quote(prefix)} >> "$LAUNCH_LOG" 2>/dev/null
+
+export WINEPREFIX={shlex.quote(prefix)}
+cd {shlex.quote(working_dir)} 2>/dev/null
+exec {shlex.quote(wine_bin)} {shlex.quote(exe_path)}{extra} "$@"
+"""
+
+def server_dir(prefix):
+    """Directorio del socket de wineserver para un prefijo (/tmp/.wine-UID/server-DEV-INO)"""
+    st = os.stat(prefix)
+    return os.path.join('/tmp', f'.wine-{os.getuid()}', f'server-{st.st_dev:x}-{st.st_ino:x}')
+
+def is_server_running(prefix):
+    """Hay un wineserver vivo en el prefijo: tiene tomado el candado de su directorio.
+
+    El socket no basta: un wineserver que terminó mal lo deja en su sitio.
+    """
+    try:
+        fd = os.open(os.path.join(server_dir(prefix), 'lock'), os.O_RDWR)
+    except OSError:
+        return False
+    try:
+        fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return False
+    except OSError:
+        return True
+    finally:
+        os.close(fd)
+
+def start_server(prefix, idle_seconds, wineserver=None):
+    """Arranca wineserver -p para el prefijo; vuelve en cuanto el servidor pasa a segundo plano"""
+    wineserver = wineserver or shutil.which('wineserver')
+    if not wineserver:
+        return False
+    env = dict(os.environ, WINEPREFIX=prefix)
+    try:
+        result = subprocess.run([wineserver, f'-p{int(idle_seconds)}'], env=env, timeout=30,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print(f"[WinePool] No se pudo arrancar wineserver en {prefix}: {e}")
+        return False
+    return result.returncode == 0
+
+def stop_server(prefix, wineserver=None):
+    """Termina el wineserver del prefijo y los programas que lo usan, y espera a que salga"""
+    wineserver = wineserver or shutil.which('wineserver')
+    if not wineserver or not os.path.isdir(prefix):
+        return False
+    env = dict(os.environ, WINEPREFIX=prefix)
+    try:
+        # -k mata el servidor (sin servidor no hace nada); -w espera a que haya soltado el prefijo
+        subprocess.run([wineserver, '-k'], env=env, timeout=30, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        subprocess.run([wineserver, '-w'], env=env, timeout=30, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print(f"[WinePool] No se pudo detener wineserver en {prefix}: {e}")
+        return False
+    return True
+
+def wait_server(prefix, wineserver=None, timeout=60):
+    """Espera a que el wineserver del prefijo termine y vuelque el registro a disco.
+
+    Si un programa lanzado por el instalador sigue abierto, el servidor no
+    termina: tras timeout segundos se sigue igualmente (Wine también guarda
+    el registro cada poco mientras está en marcha).
+    """
+    wineserver = wineserver or shutil.which('wineserver')
+    if not wineserver or not os.path.isdir(prefix):
+        return False
+    env = dict(os.environ, WINEPREFIX=prefix)
+    try:
+        subprocess.run([wineserver, '-w'], env=env, timeout=timeout,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        print(f"[WinePool] wineserver sigue activo en {prefix}: {e}")
+        return False
+    return True
+
+def warm_top_prefixes(pool_size=None, idle_minutes=None, recent_days=None, only_when_idle=True):
+    """Mantiene un wineserver persistente en los prefijos de Wine más lanzados últimamente"""
+    if pool_size is None:
+        pool_size = int(get_setting('wine_pool_size', DEFAULT_POOL_SIZE))
+    if idle_minutes is None:
+        idle_minutes = int(get_setting('wine_pool_idle_minutes', DEFAULT_IDLE_MINUTES))
+    if recent_days is None:
+        recent_days = int(get_setting('wine_pool_recent_days', DEFAULT_RECENT_DAYS))
+
+    summary = {'started': [], 'running': [], 'skipped': []}
+    if only_when_idle and not is_system_idle():
+        return summary
+
+    collect_launch_log()
+    wineserver = shutil.which('wineserver')
+    oldest = datetime.now() - timedelta(days=recent_days)
+    # Se piden más candidatos de los necesarios: algunos no se habrán usado últimamente
+    for prefix, _, last_launch in get_top_launched('wine', pool_size * 3):
+        if len(summary['started']) + len(summary['running']) >= pool_size:
+            break
+        try:
+            recent = last_launch and datetime.fromisoformat(last_launch) >= oldest
+        except ValueError:
+            recent = False
+        if not recent or not os.path.exists(os.path.join(prefix, 'system.reg')):
+            summary['skipped'].append(prefix)
+        elif is_server_running(prefix):
+            summary['running'].append(prefix)
+        elif start_server(prefix, idle_minutes * 60, wineserver):
+            summary['started'].append(prefix)
+        else:
+            summary['skipped'].append(prefix)
+
+    if summary['started']:
+        print(f"[WinePool] wineserver en espera para {len(summary['started'])} prefijos")
+    return summary
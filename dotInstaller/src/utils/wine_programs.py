@@ -0,0 +1,299 @@
+import json
+import ntpath
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.utils.lnk import read_lnk
+from src.utils.wine_registry import WineRegistry
+
+# Bases de los prefijos que crean WineHandler y ProtonHandler (en Proton el prefijo Wine está en pfx/)
+PREFIX_ROOTS = (('wine', '~/.wine-prefixes'), ('proton', '~/.proton-prefixes'))
+INDEX_PATH = os.path.expanduser('~/.local/share/dotInstaller/wine-programs.json')
+UNINSTALL_KEYS = ('Software\\Microsoft\\Windows\\CurrentVersion\\Uninstall',
+                  'Software\\Wow6432Node\\Microsoft\\Windows\\CurrentVersion\\Uninstall')
+# Carpetas con accesos directos, relativas a drive_c (users/* se expande por usuario)
+SHORTCUT_DIRS = ('ProgramData/Microsoft/Windows/Start Menu/Programs',
+                 'users/*/Desktop',
+                 'users/*/AppData/Roaming/Microsoft/Windows/Start Menu/Programs',
+                 'users/*/Start Menu/Programs')
+MAX_SCAN_WORKERS = 4
+# Se sube al cambiar lo que se guarda de cada programa: obliga a volver a leer los prefijos
+INDEX_FORMAT = 2
+
+_index_lock = threading.Lock()
+
+def list_prefixes(roots=None):
+    """[(kind, nombre, raíz del prefijo Wine)] de todos los prefijos con registro"""
+    prefixes = []
+    for kind, base in roots if roots is not None else PREFIX_ROOTS:
+        base = os.path.expanduser(base)
+        try:
+            entries = sorted(os.scandir(base), key=lambda entry: entry.name)
+        except OSError:
+            continue
+        for entry in entries:
+            if not entry.is_dir() or entry.name.startswith('.'):
+                continue
+            wine_root = os.path.join(entry.path, 'pfx') if kind == 'proton' else entry.path
+            if os.path.exists(os.path.join(wine_root, 'system.reg')):
+                prefixes.append((kind, entry.name, wine_root))
+    return prefixes
+
+def _resolve_case(base, parts):
+    # Windows no distingue mayúsculas: se busca cada componente sin importar cómo esté escrito
+    path = base
+    for part in parts:
+        candidate = os.path.join(path, part)
+        if not os.path.exists(candidate):
+            try:
+                matches = [name for name in os.listdir(path) if name.lower() == part.lower()]
+            except OSError:
+                matches = []
+            if matches:
+                candidate = os.path.join(path, matches[0])
+        path = candidate
+    return path
+
+def windows_to_unix(wine_root, path):
+    """C:\\Program Files\\App\\app.exe -> <prefijo>/drive_c/Program Files/App/app.exe"""
+    if not path:
+        return None
+    path = path.strip().strip('"')
+    drive, rest = ntpath.splitdrive(path)
+    if len(drive) != 2 or drive[1] != ':':
+        return None
+    letter = drive[0].lower()
+    base = os.path.join(wine_root, 'dosdevices', f'{letter}:')
+    if not os.path.exists(base):
+        if letter != 'c':
+            return None
+        base = os.path.join(wine_root, 'drive_c')
+    parts = [part for part in rest.replace('/', '\\').split('\\') if part]
+    return _resolve_case(base, parts)
+
+def _icon_exe(value):
+    # DisplayIcon: "C:\ruta\app.exe",0 -> C:\ruta\app.exe
+    if not value or not isinstance(value, str):
+        return None
+    value = value.strip()
+    if value.startswith('"'):
+        value = value[1:].split('"', 1)[0]
+    else:
+        value = value.rsplit(',', 1)[0] if ',' in value else value
+    return value if value.lower().endswith('.exe') else None
+
+def split_arguments(text):
+    """Argumentos de una línea de órdenes de Windows, con las reglas de CommandLineToArgvW"""
+    args = []
+    current = ''
+    quoted = False
+    pending = False
+    backslashes = 0
+    for char in text or '':
+        if char == '\\':
+            backslashes += 1
+            continue
+        if char == '"':
+            # 2n barras + comilla: n barras y la comilla abre o cierra; 2n+1: n barras y una comilla literal
+            current += '\\' * (backslashes // 2)
+            if backslashes % 2:
+                current += '"'
+            else:
+                quoted = not quoted
+            backslashes = 0
+            pending = True
+            continue
+        current += '\\' * backslashes
+        backslashes = 0
+        if char in ' \t' and not quoted:
+            if pending or current:
+                args.append(current)
+            current = ''
+            pending = False
+        else:
+            current += char
+            pending = True
+    current += '\\' * backslashes
+    if pending or current:
+        args.append(current)
+    return args
+
+def _is_uninstaller(path):
+    name = ntpath.basename(path or '').lower()
+    return name.startswith('unins') or 'uninst' in name or name == 'msiexec.exe'
+
+def _signature(wine_root):
+    # Instalar o desinstalar escribe en system.reg (o user.reg si es por usuario)
+    stamps = []
+    for hive in ('system.reg', 'user.reg'):
+        try:
+            stamps.append(os.stat(os.path.join(wine_root, hive)).st_mtime_ns)
+        except OSError:
+            stamps.append(None)
+    return stamps
+
+def read_uninstall_entries(wine_root):
+    """Programas registrados en las claves Uninstall (32 y 64 bits) de system.reg"""
+    registry = WineRegistry(os.path.join(wine_root, 'system.reg'))
+    entries = []
+    for base in UNINSTALL_KEYS:
+        for key in registry.subkeys(base):
+            values = registry.values(key)
+            name = values.get('DisplayName')
+            # Componentes del sistema y actualizaciones no son programas para el usuario
+            if not isinstance(name, str) or not name or values.get('SystemComponent') == 1 or values.get('ParentKeyName'):
+                continue
+            entries.append({
+                'name': name,
+                'version': values.get('DisplayVersion') if isinstance(values.get('DisplayVersion'), str) else '',
+                'publisher': values.get('Publisher') if isinstance(values.get('Publisher'), str) else '',
+                'install_location': values.get('InstallLocation') if isinstance(values.get('InstallLocation'), str) else '',
+                'icon_exe': _icon_exe(values.get('DisplayIcon')),
+                'uninstall': values.get('UninstallString') if isinstance(values.get('UninstallString'), str) else '',
+                'key': ntpath.basename(key),
+            })
+    return entries
+
+def read_shortcuts(wine_root):
+    """[(nombre, ruta Windows del destino, argumentos, directorio de trabajo)] de los .lnk del menú Inicio y el escritorio"""
+    drive_c = os.path.join(wine_root, 'drive_c')
+    try:
+        users = [name for name in os.listdir(os.path.join(drive_c, 'users'))]
+    except OSError:
+        users = []
+    directories = []
+    for relative in SHORTCUT_DIRS:
+        if relative.startswith('users/*/'):
+            directories.extend(os.path.join(drive_c, 'users', user, relative[8:]) for user in users)
+        else:
+            directories.append(os.path.join(drive_c, relative))
+    shortcuts = []
+    for directory in directories:
+        for dirpath, _, filenames in os.walk(directory):
+            for filename in sorted(filenames):
+                if not filename.lower().endswith('.lnk'):
+                    continue
+                link = read_lnk(os.path.join(dirpath, filename))
+                if link and link['target'] and link['target'].lower().endswith('.exe'):
+                    shortcuts.append((filename[:-4], link['target'], link['arguments'], link['working_dir'] or ''))
+    return shortcuts
+
+def scan_prefix(kind, app_name, wine_root):
+    """Programas instalados en un prefijo, con la ruta real de su ejecutable"""
+    try:
+        uninstall = read_uninstall_entries(wine_root)
+    except OSError as e:
+        print(f"[WinePrograms] No se pudo leer el registro de {wine_root}: {e}")
+        uninstall = []
+    shortcuts = [shortcut for shortcut in read_shortcuts(wine_root) if not _is_uninstaller(shortcut[1])]
+    programs = []
+    claimed = set()
+
+    def add(name, windows_path, source, extra, arguments='', working_dir=''):
+        exe = windows_to_unix(wine_root, windows_path)
+        if not exe or not os.path.isfile(exe) or exe in claimed:
+            return False
+        claimed.add(exe)
+        # Muchos programas buscan sus datos en el directorio actual: el del acceso directo o, si no
+        # lo indica, la carpeta del ejecutable (lo que hace el Explorador de Windows)
+        working_dir = windows_to_unix(wine_root, working_dir) if working_dir else None
+        if not working_dir or not os.path.isdir(working_dir):
+            working_dir = os.path.dirname(exe)
+        program = {'name': name, 'exe': exe, 'windows_path': windows_path, 'kind': kind,
+                   'app_name': app_name, 'prefix': wine_root, 'source': source,
+                   'version': '', 'publisher': '', 'uninstall': '',
+                   'arguments': split_arguments(arguments), 'working_dir': working_dir}
+        program.update(extra)
+        programs.append(program)
+        return True
+
+    for entry in uninstall:
+        extra = {key: entry[key] for key in ('version', 'publisher', 'uninstall')}
+        candidates = []
+        if entry['icon_exe'] and not _is_uninstaller(entry['icon_exe']):
+            candidates.append((entry['icon_exe'], '', ''))
+        # Si el icono no sirve, el acceso directo que apunta dentro de la carpeta de instalación
+        location = entry['install_location'].rstrip('\\').lower()
+        if location:
+            candidates.extend((target, arguments, working_dir) for _, target, arguments, working_dir in shortcuts
+                              if target.lower().startswith(location + '\\'))
+        for candidate, arguments, working_dir in candidates:
+            # El acceso directo al mismo ejecutable aporta sus argumentos y su directorio
+            for _, target, link_arguments, link_dir in shortcuts:
+                if not arguments and not working_dir and target.lower() == candidate.lower():
+                    arguments, working_dir = link_arguments, link_dir
+            if add(entry['name'], candidate, 'uninstall', extra, arguments, working_dir):
+                break
+    # Accesos directos a programas sin entrada en Uninstall (instaladores que no se registran)
+    for name, target, arguments, working_dir in shortcuts:
+        add(name, target, 'lnk', {}, arguments, working_dir)
+    return programs
+
+def _load_index(index_path):
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        return index if isinstance(index, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def list_programs(roots=None, index_path=None):
+    """Programas de todos los prefijos; solo se vuelven a leer los prefijos cuyo registro cambió"""
+    index_path = index_path or INDEX_PATH
+    with _index_lock:
+        index = _load_index(index_path)
+        prefixes = list_prefixes(roots)
+        signatures = {wine_root: _signature(wine_root) for _, _, wine_root in prefixes}
+        stale = [prefix for prefix in prefixes
+                 if (index.get(prefix[2]) or {}).get('signature') != signatures[prefix[2]]
+                 or index[prefix[2]].get('format') != INDEX_FORMAT]
+        if stale:
+            with ThreadPoolExecutor(max_workers=MAX_SCAN_WORKERS) as executor:
+                results = executor.map(lambda prefix: scan_prefix(*prefix), stale)
+                for (_, _, wine_root), programs in zip(stale, results):
+                    index[wine_root] = {'signature': signatures[wine_root], 'format': INDEX_FORMAT,
+                                        'programs': programs}
+        # Los prefijos borrados salen del índice
+        removed = set(index) - set(signatures)
+        for wine_root in removed:
+            del index[wine_root]
+        if stale or removed:
+            try:
+                os.makedirs(os.path.dirname(index_path), exist_ok=True)
+                temp_path = index_path + '.tmp'
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(index, f)
+                os.replace(temp_path, index_path)
+            except OSError as e:
+                print(f"[WinePrograms] No se pudo guardar el índice: {e}")
+    programs = []
+    for _, _, wine_root in prefixes:
+        programs.extend(index[wine_root]['programs'])
+    return programs
+
+def main_program(wine_root, index_path=None):
+    """El programa que instaló un prefijo por aplicación: primero los registrados en Uninstall"""
+    programs = [program for program in list_programs(index_path=index_path) if program['prefix'] == wine_root]
+    programs.sort(key=lambda program: program['source'] != 'uninstall')
+    return programs[0] if programs else None
+
+def library_entries(index_path=None):
+    """Programas de los prefijos con el formato de map_packages_to_desktop_entries"""
+    entries = []
+    for program in list_programs(index_path=index_path):
+        label = 'Proton' if program['kind'] == 'proton' else 'Wine'
+        comment = ' '.join(part for part in (program['publisher'], program['version']) if part)
+        entries.append({
+            'package': program['exe'],
+            'name': program['name'],
+            'icon': '',
+            'categories': f'{label};Application;',
+            'comment': comment or f'Instalado en el prefijo {program["app_name"]} ({label})',
+            'desktop': '',
+            'essential': False,
+            'priority_required': False,
+            'reverse_dependencies': [],
+            'type': program['kind'],
+            'prefix': program['prefix'],
+        })
+    return entries
@@ -0,0 +1,264 @@
+import fcntl
+import os
+import re
+import time
+from contextlib import contextmanager
+from src.utils.wine_pool import server_dir
+
+# Diferencia entre la época de Windows (1601) y la de Unix, en intervalos de 100 ns
+_FILETIME_OFFSET = 116444736000000000
+_KEY_RE = re.compile(r'^\[(.*)\](?:\s+(\d+))?\s*$')
+_HEX_DIGITS = '0123456789abcdefABCDEF'
+
+class RegistryBusyError(Exception):
+    """Hay un wineserver usando el prefijo: tiene el registro en memoria y pisaría los cambios"""
+
+def _unescape(text):
+    out = []
+    i = 0
+    while i < len(text):
+        c = text[i]
+        if c != '\\' or i + 1 >= len(text):
+            out.append(c)
+            i += 1
+            continue
+        n = text[i + 1]
+        if n == 'x':
+            j = i + 2
+            while j < len(text) and j < i + 6 and text[j] in _HEX_DIGITS:
+                j += 1
+            out.append(chr(int(text[i + 2:j] or '0', 16)))
+            i = j
+            continue
+        out.append({'n': '\n', 'r': '\r', 't': '\t', '0': '\0'}.get(n, n))
+        i += 2
+    return ''.join(out)
+
+def _escape(text):
+    out = []
+    for c in text:
+        if c in '\\"':
+            out.append('\\' + c)
+        elif c == '\n':
+            out.append('\\n')
+        elif c == '\r':
+            out.append('\\r')
+        elif c == '\t':
+            out.append('\\t')
+        elif ' ' <= c <= '~':
+            out.append(c)
+        else:
+            # Wine guarda fuera de ASCII como \xHHHH
+            out.append(f'\\x{ord(c):04x}')
+    return ''.join(out)
+
+def _split_quoted(line):
+    # '"nombre"=valor' -> (nombre, valor); '@=valor' -> ('', valor)
+    if line.startswith('@='):
+        return '', line[2:]
+    if not line.startswith('"'):
+        return None, None
+    i = 1
+    while i < len(line):
+        if line[i] == '\\':
+            i += 2
+            continue
+        if line[i] == '"':
+            break
+        i += 1
+    if line[i + 1:i + 2] != '=':
+        return None, None
+    return _unescape(line[1:i]), line[i + 2:]
+
+def parse_value(raw):
+    """Valor de una línea del registro: str, int (dword) o (tipo, bytes) para hex"""
+    if raw.startswith('"') and raw.endswith('"'):
+        return _unescape(raw[1:-1])
+    if raw.startswith('str(') and '"' in raw:
+        return _unescape(raw[raw.index('"') + 1:-1])
+    if raw.startswith('dword:'):
+        return int(raw[6:], 16)
+    if raw.startswith('hex'):
+        kind, _, data = raw.partition(':')
+        data = data.replace('\\', '').replace(' ', '').replace('\n', '')
+        return kind, bytes(int(byte, 16) for byte in data.split(',') if byte)
+    return raw
+
+def format_value(value):
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, int):
+        return f'dword:{value & 0xFFFFFFFF:08x}'
+    if isinstance(value, tuple):
+        kind, data = value
+        return f"{kind}:{','.join(f'{byte:02x}' for byte in data)}"
+    return f'"{_escape(value)}"'
+
+class WineRegistry:
+    """Una colmena de texto de Wine (system.reg, user.reg...) que conserva todo lo que no se toca"""
+
+    def __init__(self, path):
+        self.path = path
+        self.header = []
+        # Cada clave: {'name', 'stamp', 'lines'}; lines guarda las líneas originales ya unidas
+        self.keys = []
+        self._index = {}
+        self.modified = False
+        self._load()
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+            lines = f.read().split('\n')
+        current = None
+        pending = ''
+        for line in lines:
+            # Las líneas hex largas continúan con una barra invertida al final
+            if pending:
+                line = pending + line
+                pending = ''
+            if line.endswith('\\') and current is not None and not line.endswith('\\\\'):
+                pending = line + '\n'
+                continue
+            match = _KEY_RE.match(line)
+            if match:
+                current = {'name': match.group(1).replace('\\\\', '\\'), 'stamp': match.group(2), 'lines': []}
+                self.keys.append(current)
+                self._index[current['name'].lower()] = current
+            elif current is None:
+                self.header.append(line)
+            else:
+                current['lines'].append(line)
+        # Las líneas vacías que separan las claves se vuelven a poner al guardar
+        for key in self.keys:
+            while key['lines'] and key['lines'][-1] == '':
+                key['lines'].pop()
+
+    def _find_line(self, key, name):
+        for i, line in enumerate(key['lines']):
+            line_name, _ = _split_quoted(line)
+            if line_name is not None and line_name.lower() == name.lower():
+                return i
+        return None
+
+    def get(self, key_name, name, default=None):
+        key = self._index.get(key_name.lower())
+        if key is None:
+            return default
+        i = self._find_line(key, name)
+        if i is None:
+            return default
+        return parse_value(_split_quoted(key['lines'][i])[1])
+
+    def values(self, key_name):
+        """Valores de una clave como diccionario {nombre: valor}"""
+        key = self._index.get(key_name.lower())
+        result = {}
+        for line in key['lines'] if key else []:
+            line_name, raw = _split_quoted(line)
+            if line_name is not None:
+                result[line_name] = parse_value(raw)
+        return result
+
+    def subkeys(self, key_name):
+        """Claves que cuelgan directamente de key_name"""
+        prefix = key_name.lower() + '\\'
+        return [key['name'] for key in self.keys
+                if key['name'].lower().startswith(prefix) and '\\' not in key['name'][len(prefix):]]
+
+    def _touch(self, key):
+        now = time.time()
+        key['stamp'] = str(int(now))
+        filetime = f"#time={int(now * 10000000) + _FILETIME_OFFSET:x}"
+        if key['lines'] and key['lines'][0].startswith('#time='):
+            key['lines'][0] = filetime
+        else:
+            key['lines'].insert(0, filetime)
+        self.modified = True
+
+    def set(self, key_name, name, value):
+        key = self._index.get(key_name.lower())
+        if key is None:
+            key = {'name': key_name, 'stamp': None, 'lines': []}
+            self.keys.append(key)
+            self._index[key_name.lower()] = key
+        line = ('@' if name == '' else f'"{_escape(name)}"') + '=' + format_value(value)
+        i = self._find_line(key, name)
+        if i is None:
+            key['lines'].append(line)
+        elif key['lines'][i] == line:
+            return
+        else:
+            key['lines'][i] = line
+        self._touch(key)
+
+    def delete(self, key_name, name):
+        key = self._index.get(key_name.lower())
+        i = self._find_line(key, name) if key else None
+        if i is None:
+            return False
+        del key['lines'][i]
+        self._touch(key)
+        return True
+
+    def dumps(self):
+        blocks = []
+        for key in self.keys:
+            name = key['name'].replace('\\', '\\\\')
+            head = f"[{name}] {key['stamp']}" if key['stamp'] else f"[{name}]"
+            blocks.append('\n'.join([head] + key['lines']) + '\n')
+        return '\n'.join(self.header) + '\n' + '\n'.join(blocks)
+
+    def save(self):
+        """Escritura atómica: un archivo temporal en el mismo directorio y rename"""
+        if not self.modified:
+            return False
+        temp_path = f"{self.path}.dotinstaller-tmp"
+        with open(temp_path, 'w', encoding='utf-8', errors='surrogateescape') as f:
+            f.write(self.dumps())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        self.modified = False
+        return True
+
+@contextmanager
+def prefix_lock(prefix):
+    """Toma el mismo candado que wineserver para el prefijo.
+
+    Si un wineserver lo tiene, lanza RegistryBusyError; mientras se tiene,
+    ningún wineserver puede arrancar en el prefijo y leer el registro a medias.
+    """
+    directory = server_dir(prefix)
+    os.makedirs(os.path.dirname(directory), mode=0o700, exist_ok=True)
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    fd = os.open(os.path.join(directory, 'lock'), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            raise RegistryBusyError(f"wineserver está usando {prefix}")
+        yield
+    finally:
+        os.close(fd)
+
+@contextmanager
+def edit_hive(prefix, hive='user.reg'):
+    """Abre una colmena del prefijo bajo el candado de wineserver y la guarda al salir sin errores"""
+    with prefix_lock(prefix):
+        registry = WineRegistry(os.path.join(prefix, hive))
+        yield registry
+        registry.save()
+
+def set_windows_version(prefix, version):
+    """Versión de Windows de todo el prefijo (lo que ntdll lee de HKCU\\Software\\Wine\\Version)"""
+    with edit_hive(prefix) as registry:
+        registry.set('Software\\Wine', 'Version', version)
+
+def set_dll_overrides(prefix, overrides):
+    """overrides: {dll: 'native,builtin' | 'builtin' | '' (desactivada) | None (quitar)}"""
+    with edit_hive(prefix) as registry:
+        for dll, mode in overrides.items():
+            if mode is None:
+                registry.delete('Software\\Wine\\DllOverrides', dll)
+            else:
+                registry.set('Software\\Wine\\DllOverrides', dll, mode)
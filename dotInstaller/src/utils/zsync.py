@@ -0,0 +1,310 @@
+import hashlib
+import mmap
+import os
+import struct
+from itertools import accumulate, compress, repeat
+from operator import and_, lshift, mul, or_, sub
+
+# Posiciones que se procesan de una vez en la búsqueda byte a byte (limita la memoria)
+ROLLING_CHUNK = 64 * 1024
+
+def _md4_pure(data):
+    """Implementación de MD4 (RFC 1320) para sistemas donde OpenSSL ya no la ofrece.
+
+    Las tres rondas van desenrolladas de cuatro en cuatro pasos: es el cálculo
+    que más se repite al buscar bloques si hashlib no tiene MD4.
+    """
+    mask = 0xffffffff
+    message = bytearray(data)
+    bit_length = (len(data) * 8) & 0xffffffffffffffff
+    message.append(0x80)
+    message.extend(b'\x00' * ((56 - len(message) % 64) % 64))
+    message += struct.pack('<Q', bit_length)
+
+    h0, h1, h2, h3 = 0x67452301, 0xefcdab89, 0x98badcfe, 0x10325476
+    for offset in range(0, len(message), 64):
+        x = struct.unpack_from('<16I', message, offset)
+        a, b, c, d = h0, h1, h2, h3
+        for i in (0, 4, 8, 12):
+            a = (a + (d ^ (b & (c ^ d))) + x[i]) & mask
+            a = ((a << 3) | (a >> 29)) & mask
+            d = (d + (c ^ (a & (b ^ c))) + x[i + 1]) & mask
+            d = ((d << 7) | (d >> 25)) & mask
+            c = (c + (b ^ (d & (a ^ b))) + x[i + 2]) & mask
+            c = ((c << 11) | (c >> 21)) & mask
+            b = (b + (a ^ (c & (d ^ a))) + x[i + 3]) & mask
+            b = ((b << 19) | (b >> 13)) & mask
+        for i in (0, 1, 2, 3):
+            a = (a + ((b & c) | (d & (b | c))) + x[i] + 0x5a827999) & mask
+            a = ((a << 3) | (a >> 29)) & mask
+            d = (d + ((a & b) | (c & (a | b))) + x[i + 4] + 0x5a827999) & mask
+            d = ((d << 5) | (d >> 27)) & mask
+            c = (c + ((d & a) | (b & (d | a))) + x[i + 8] + 0x5a827999) & mask
+            c = ((c << 9) | (c >> 23)) & mask
+            b = (b + ((c & d) | (a & (c | d))) + x[i + 12] + 0x5a827999) & mask
+            b = ((b << 13) | (b >> 19)) & mask
+        for i in (0, 2, 1, 3):
+            a = (a + (b ^ c ^ d) + x[i] + 0x6ed9eba1) & mask
+            a = ((a << 3) | (a >> 29)) & mask
+            d = (d + (a ^ b ^ c) + x[i + 8] + 0x6ed9eba1) & mask
+            d = ((d << 9) | (d >> 23)) & mask
+            c = (c + (d ^ a ^ b) + x[i + 4] + 0x6ed9eba1) & mask
+            c = ((c << 11) | (c >> 21)) & mask
+            b = (b + (c ^ d ^ a) + x[i + 12] + 0x6ed9eba1) & mask
+            b = ((b << 15) | (b >> 17)) & mask
+        h0 = (h0 + a) & mask
+        h1 = (h1 + b) & mask
+        h2 = (h2 + c) & mask
+        h3 = (h3 + d) & mask
+    return struct.pack('<4I', h0, h1, h2, h3)
+
+def md4(data):
+    """MD4 usando hashlib si está disponible, si no la versión en Python puro"""
+    try:
+        return hashlib.new('md4', data).digest()
+    except ValueError:
+        return _md4_pure(data)
+
+def rsum(block):
+    """Checksum débil de zsync: (a, b) de 16 bits cada uno"""
+    a = sum(block) & 0xffff
+    b = sum(accumulate(block)) & 0xffff
+    return a, b
+
+class ZsyncControl:
+    """Contenido de un archivo de control .zsync"""
+
+    def __init__(self, headers, block_sums):
+        self.headers = headers
+        self.filename = headers.get('Filename', '')
+        self.blocksize = int(headers['Blocksize'])
+        self.length = int(headers['Length'])
+        self.url = headers.get('URL', '')
+        self.sha1 = headers.get('SHA-1', '').lower()
+        self.mtime = headers.get('MTime')
+        seq_matches, rsum_bytes, checksum_bytes = (int(v) for v in headers.get('Hash-Lengths', '1,4,16').split(','))
+        self.seq_matches = seq_matches
+        self.rsum_bytes = rsum_bytes
+        self.checksum_bytes = checksum_bytes
+        # block_sums: lista de (clave débil truncada, checksum fuerte truncado)
+        self.block_sums = block_sums
+
+    @property
+    def block_count(self):
+        return len(self.block_sums)
+
+    def weak_key(self, a, b):
+        """Trunca el rsum (a, b) a los bytes que guarda el archivo de control"""
+        return ((a << 16) | b) & ((1 << (8 * self.rsum_bytes)) - 1)
+
+    def strong_sum(self, block):
+        if len(block) < self.blocksize:
+            block = block + bytes(self.blocksize - len(block))
+        return md4(block)[:self.checksum_bytes]
+
+def parse_control(data):
+    """Parsea un archivo .zsync (cabeceras de texto + checksums binarios por bloque)"""
+    separator = data.find(b'\n\n')
+    if separator == -1:
+        raise ValueError("Archivo .zsync inválido: no se encontró el final de las cabeceras")
+    headers = {}
+    for line in data[:separator].decode('utf-8', errors='replace').split('\n'):
+        if ':' in line:
+            key, value = line.split(':', 1)
+            headers[key.strip()] = value.strip()
+    for required in ('Blocksize', 'Length'):
+        if required not in headers:
+            raise ValueError(f"Archivo .zsync inválido: falta la cabecera {required}")
+
+    control = ZsyncControl(headers, [])
+    entry_size = control.rsum_bytes + control.checksum_bytes
+    block_count = (control.length + control.blocksize - 1) // control.blocksize
+    body = data[separator + 2:]
+    if len(body) < block_count * entry_size:
+        raise ValueError("Archivo .zsync inválido: faltan checksums de bloques")
+    for i in range(block_count):
+        entry = body[i * entry_size:(i + 1) * entry_size]
+        weak = int.from_bytes(entry[:control.rsum_bytes], 'big')
+        control.block_sums.append((weak, entry[control.rsum_bytes:]))
+    return control
+
+def _rolling_keys(control, buf, count):
+    """Claves débiles de las ventanas que empiezan en buf[0:count], sin bucle en Python.
+
+    Con S la suma acumulada de los bytes y T la de S, el rsum de la ventana
+    en p es a = S[p+n] - S[p] y b = T[p+n] - T[p] - n*S[p]; cada paso es un
+    map() de operator, así que todo el trabajo por byte se hace en C.
+    """
+    blocksize = control.blocksize
+    sums = [0]
+    sums += accumulate(buf[:count + blocksize - 1])
+    sums2 = [0]
+    sums2 += accumulate(sums[1:])
+    b = map(sub, map(sub, sums2[blocksize:], sums2), map(mul, sums, repeat(blocksize)))
+    if control.rsum_bytes <= 2:
+        # La clave truncada solo conserva b (lo habitual con Hash-Lengths 2,2,5)
+        return list(map(and_, b, repeat((1 << (8 * control.rsum_bytes)) - 1)))
+    a = map(and_, map(sub, sums[blocksize:], sums), repeat(0xffff))
+    keys = map(or_, map(lshift, a, repeat(16)), map(and_, b, repeat(0xffff)))
+    return list(map(and_, keys, repeat((1 << (8 * control.rsum_bytes)) - 1)))
+
+def match_local_blocks(control, local_path, chunk_size=ROLLING_CHUNK):
+    """Busca en un archivo local los bloques del archivo destino.
+
+    Devuelve un dict {índice de bloque: offset en el archivo local}. Primero
+    se comprueba el archivo de bloque en bloque (lo que no se ha desplazado);
+    solo los tramos sin coincidencias se recorren byte a byte con el checksum
+    rodante de zsync, calculado por trozos de chunk_size posiciones. Si
+    seq_matches > 1 se exige que coincida también el bloque siguiente antes de
+    calcular el checksum fuerte.
+    """
+    blocksize = control.blocksize
+    block_count = control.block_count
+    seq = 2 if control.seq_matches > 1 and block_count > 1 else 1
+
+    # Agrupar bloques idénticos para rellenarlos todos con una sola coincidencia
+    groups = {}
+    for i, sums in enumerate(control.block_sums):
+        groups.setdefault(sums, []).append(i)
+
+    # Tabla de búsqueda por clave débil (pareja de claves si se exigen dos bloques seguidos)
+    table = {}
+    last_block = block_count - 1
+    for i, (weak, _) in enumerate(control.block_sums):
+        if seq == 2 and i < last_block:
+            key = (weak, control.block_sums[i + 1][0])
+        else:
+            key = (weak, None)
+        table.setdefault(key, []).append(i)
+    # Las mismas claves como enteros, para filtrar posiciones sin salir de C
+    pair_keys = {(k1 << 32) | k2 for k1, k2 in table if k2 is not None}
+    single_keys = {k1 for k1, k2 in table if k2 is None}
+
+    found = {}
+    if block_count == 0:
+        return found
+    try:
+        size = os.path.getsize(local_path)
+    except OSError:
+        return found
+    if size == 0:
+        return found
+
+    with open(local_path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            def window(pos, length=blocksize):
+                # Más allá del final del archivo las ventanas se rellenan con ceros
+                block = data[pos:pos + length]
+                if len(block) < length:
+                    block += bytes(length - len(block))
+                return block
+
+            def key_at(pos):
+                return control.weak_key(*rsum(window(pos)))
+
+            def try_match(pos, key1, key2, next_block):
+                candidates = table.get((key1, key2), [])
+                if key2 is not None:
+                    # El último bloque no tiene siguiente, se busca solo por su clave
+                    candidates = candidates + table.get((key1, None), [])
+                # Tras una coincidencia, el bloque siguiente basta con su propia clave
+                if next_block is not None and next_block < block_count and control.block_sums[next_block][0] == key1:
+                    candidates = [next_block] + candidates
+                strong = None
+                for i in candidates:
+                    if i in found:
+                        continue
+                    if strong is None:
+                        strong = control.strong_sum(window(pos))
+                    if control.block_sums[i][1] == strong:
+                        for j in groups[control.block_sums[i]]:
+                            found.setdefault(j, pos)
+                        return i
+                return None
+
+            def follow(pos, key1, next_block):
+                """Prueba pos y sigue bloque a bloque mientras coincida; devuelve desde dónde seguir buscando"""
+                while pos < size and len(found) < block_count:
+                    key2 = key_at(pos + blocksize) if seq == 2 else None
+                    matched = try_match(pos, key1, key2, next_block)
+                    if matched is None:
+                        return pos + 1
+                    next_block = matched + 1
+                    pos += blocksize
+                    key1 = key2 if seq == 2 else key_at(pos)
+                return pos
+
+            # 1) De bloque en bloque: lo que no se ha movido cuesta una suma por bloque
+            missed = []
+            pos = 0
+            next_block = None
+            key1 = key_at(0)
+            while pos < size and len(found) < block_count:
+                key2 = key_at(pos + blocksize) if seq == 2 else None
+                matched = try_match(pos, key1, key2, next_block)
+                if matched is None:
+                    missed.append(pos)
+                    next_block = None
+                else:
+                    next_block = matched + 1
+                pos += blocksize
+                key1 = key2 if seq == 2 else key_at(pos)
+
+            # 2) Byte a byte solo donde falló: ventanas que empiezan dentro de los bloques sin coincidencia
+            gaps = []
+            for pos in missed:
+                start = max(pos - blocksize + 1, 0)
+                if gaps and start <= gaps[-1][1]:
+                    gaps[-1][1] = pos + blocksize
+                else:
+                    gaps.append([start, pos + blocksize])
+            skip_until = 0
+            for start, end in gaps:
+                chunk_start = max(start, skip_until)
+                end = min(end, size)
+                while chunk_start < end and len(found) < block_count:
+                    count = min(chunk_size, end - chunk_start)
+                    buf = window(chunk_start, count + seq * blocksize)
+                    keys = _rolling_keys(control, buf, count + (seq - 1) * blocksize)
+                    if seq == 2:
+                        pairs = map(or_, map(lshift, keys, repeat(32)), keys[blocksize:])
+                        hits = map(or_, map(pair_keys.__contains__, pairs), map(single_keys.__contains__, keys))
+                    else:
+                        hits = map(single_keys.__contains__, keys)
+                    for offset in compress(range(count), hits):
+                        pos = chunk_start + offset
+                        if pos < skip_until:
+                            continue
+                        key2 = keys[offset + blocksize] if seq == 2 else None
+                        matched = try_match(pos, keys[offset], key2, None)
+                        if matched is not None:
+                            # Un bloque desplazado suele ir seguido de más con el mismo desplazamiento
+                            skip_until = follow(pos + blocksize, key2 if seq == 2 else key_at(pos + blocksize),
+                                                matched + 1)
+                    # Lo que ya cubrió una serie de coincidencias no se vuelve a recorrer
+                    chunk_start = max(chunk_start + count, skip_until)
+        finally:
+            data.close()
+    return found
+
+def missing_ranges(control, found, merge_gap_blocks=0):
+    """Convierte los bloques que faltan en rangos de bytes (inicio, fin exclusivo)"""
+    ranges = []
+    start = None
+    gap = 0
+    for i in range(control.block_count + 1):
+        missing = i < control.block_count and i not in found
+        if missing:
+            if start is None:
+                start = i
+            gap = 0
+            last_missing = i
+        elif start is not None:
+            gap += 1
+            if gap > merge_gap_blocks or i == control.block_count:
+                ranges.append((start * control.blocksize,
+                               min((last_missing + 1) * control.blocksize, control.length)))
+                start = None
+                gap = 0
+    return ranges
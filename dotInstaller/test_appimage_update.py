@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para las actualizaciones delta (zsync) de AppImages contra un servidor HTTP local
+"""
+
+import hashlib
+import os
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.handlers.appimage_updater import AppImageUpdater
+from src.utils.zsync import md4, rsum, parse_control, match_local_blocks
+
+BLOCKSIZE = 2048
+
+def build_appimage(update_info, payload):
+    """Crea un ELF64 mínimo con sección .upd_info seguido de un payload (como una AppImage tipo 2)"""
+    upd_info = update_info.encode() + b'\x00' * (512 - len(update_info))
+    shstrtab = b'\x00.upd_info\x00.shstrtab\x00'
+    upd_offset = 64
+    strtab_offset = upd_offset + len(upd_info)
+    shoff = strtab_offset + len(shstrtab)
+    ident = b'\x7fELF' + bytes([2, 1, 1, 0]) + b'AI\x02' + b'\x00' * 5
+    header = ident + struct.pack('<HHIQQQIHHHHHH', 2, 62, 1, 0, 0, shoff, 0, 64, 0, 0, 64, 3, 2)
+    sections = b'\x00' * 64
+    sections += struct.pack('<IIQQQQIIQQ', 1, 7, 0, 0, upd_offset, len(upd_info), 0, 0, 1, 0)
+    sections += struct.pack('<IIQQQQIIQQ', 11, 3, 0, 0, strtab_offset, len(shstrtab), 0, 0, 1, 0)
+    return header + upd_info + shstrtab + sections + payload
+
+def build_zsync(data, url, blocksize=BLOCKSIZE):
+    """Genera un archivo .zsync equivalente al de zsyncmake (Hash-Lengths 2,2,5)"""
+    headers = (
+        "zsync: 0.6.2\n"
+        "Filename: app.AppImage\n"
+        f"Blocksize: {blocksize}\n"
+        f"Length: {len(data)}\n"
+        "Hash-Lengths: 2,2,5\n"
+        f"URL: {url}\n"
+        f"SHA-1: {hashlib.sha1(data).hexdigest()}\n"
+        "\n"
+    ).encode()
+    sums = bytearray()
+    for offset in range(0, len(data), blocksize):
+        block = data[offset:offset + blocksize]
+        block += bytes(blocksize - len(block))
+        a, b = rsum(block)
+        sums += struct.pack('>HH', a, b)[2:]
+        sums += md4(block)[:5]
+    return headers + bytes(sums)
+
+class RangeHandler(BaseHTTPRequestHandler):
+    files = {}
+    support_ranges = True
+    requests_log = []
+
+    def do_GET(self):
+        body = self.files.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        range_header = self.headers.get('Range')
+        self.requests_log.append((self.path, range_header))
+        if range_header and self.support_ranges:
+            start, end = range_header.replace('bytes=', '').split('-')
+            chunk = body[int(start):int(end) + 1]
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{end}/{len(body)}")
+        else:
+            chunk = body
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(chunk)))
+        self.end_headers()
+        self.wfile.write(chunk)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RangeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def make_versions(base_url):
+    rng = random.Random(1234)
+    old_payload = b'hsqs' + bytes(rng.getrandbits(8) for _ in range(400 * 1024))
+    new_payload = bytearray(old_payload)
+    new_payload[100 * 1024:100 * 1024] = bytes(rng.getrandbits(8) for _ in range(1000))
+    new_payload[300 * 1024:305 * 1024] = bytes(rng.getrandbits(8) for _ in range(5 * 1024))
+    update_info = f"zsync|{base_url}/app.AppImage.zsync"
+    return build_appimage(update_info, old_payload), build_appimage(update_info, bytes(new_payload))
+
+def run_update(support_ranges):
+    server = start_server()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    old, new = make_versions(base_url)
+    RangeHandler.files = {
+        '/app.AppImage': new,
+        '/app.AppImage.zsync': build_zsync(new, 'app.AppImage'),
+    }
+    RangeHandler.support_ranges = support_ranges
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, 'app.AppImage')
+        with open(path, 'wb') as f:
+            f.write(old)
+        updater = AppImageUpdater()
+        result = updater.update(path)
+        with open(path, 'rb') as f:
+            updated = f.read()
+        return result, updated, new
+    finally:
+        server.shutdown()
+        shutil.rmtree(temp_dir)
+
+def test_update_info_section():
+    """Prueba la lectura de la sección .upd_info"""
+    print("🧪 Probando lectura de .upd_info...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, 'app.AppImage')
+        with open(path, 'wb') as f:
+            f.write(build_appimage("zsync|http://example.com/app.zsync", b'hsqs'))
+        info = AppImageUpdater().get_update_info(path)
+        assert info == "zsync|http://example.com/app.zsync", info
+        print("✅ Información de actualización leída correctamente")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_control_parsing():
+    """Prueba el parseo del archivo .zsync"""
+    print("\n🧪 Probando parseo del archivo .zsync...")
+    data = bytes(range(256)) * 40
+    control = parse_control(build_zsync(data, 'app.AppImage'))
+    assert control.length == len(data)
+    assert control.block_count == (len(data) + BLOCKSIZE - 1) // BLOCKSIZE
+    assert (control.seq_matches, control.rsum_bytes, control.checksum_bytes) == (2, 2, 5)
+    print("✅ Archivo .zsync parseado correctamente")
+
+def test_shifted_blocks():
+    """Prueba la búsqueda de bloques desplazados, a trozos pequeños y con el final relleno de ceros"""
+    print("\n🧪 Probando búsqueda de bloques desplazados...")
+    rng = random.Random(99)
+    old = bytes(rng.getrandbits(8) for _ in range(64 * 1024 + 300))
+    # Una inserción y un borrado: el resto del archivo queda desplazado dos veces
+    new = old[:10000] + bytes(rng.getrandbits(8) for _ in range(777)) + old[10000:40000] + old[41234:]
+    control = parse_control(build_zsync(new, 'app.AppImage'))
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, 'app.AppImage')
+        with open(path, 'wb') as f:
+            f.write(old)
+        found = match_local_blocks(control, path, chunk_size=1000)
+        for i, offset in found.items():
+            block = old[offset:offset + BLOCKSIZE]
+            assert md4(block + bytes(BLOCKSIZE - len(block)))[:5] == control.block_sums[i][1], i
+        # Solo faltan los bloques que tocan la inserción y el borrado
+        missing = sorted(set(range(control.block_count)) - set(found))
+        assert missing == [4, 5, 19], missing
+        print(f"✅ {len(found)}/{control.block_count} bloques encontrados en el archivo antiguo")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_delta_update():
+    """Prueba que la actualización solo descarga los bloques modificados"""
+    print("\n🧪 Probando actualización delta con soporte de rangos...")
+    RangeHandler.requests_log = []
+    result, updated, new = run_update(support_ranges=True)
+    assert result.get("status") == "updated", result
+    assert updated == new
+    # Se modificaron ~6 KB de 400 KB: debería descargarse una fracción pequeña
+    assert result["downloaded_bytes"] < len(new) // 10, result
+    print(f"✅ Actualizado descargando {result['downloaded_bytes']} de {len(new)} bytes")
+
+def test_update_without_range_support():
+    """Prueba que sin soporte de rangos se usa la descarga completa"""
+    print("\n🧪 Probando actualización contra un servidor sin rangos...")
+    result, updated, new = run_update(support_ranges=False)
+    assert result.get("status") == "updated", result
+    assert updated == new
+    print("✅ Actualización correcta con descarga completa")
+
+def test_corrupt_block():
+    """Prueba que un bloque descargado dañado aborta sin tocar la AppImage instalada"""
+    print("\n🧪 Probando un bloque descargado dañado...")
+    server = start_server()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    old, new = make_versions(base_url)
+    # El servidor sirve el archivo con un byte cambiado en la zona modificada
+    served = bytearray(new)
+    served[100 * 1024 + 10] ^= 0xff
+    RangeHandler.files = {
+        '/app.AppImage': bytes(served),
+        '/app.AppImage.zsync': build_zsync(new, 'app.AppImage'),
+    }
+    RangeHandler.support_ranges = True
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, 'app.AppImage')
+        with open(path, 'wb') as f:
+            f.write(old)
+        result = AppImageUpdater().update(path)
+        assert 'checksum' in result.get("error", ''), result
+        with open(path, 'rb') as f:
+            assert f.read() == old
+        assert os.listdir(temp_dir) == ['app.AppImage'], os.listdir(temp_dir)
+        print("✅ Actualización abortada y archivo temporal eliminado")
+    finally:
+        server.shutdown()
+        shutil.rmtree(temp_dir)
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas de actualización de AppImages...")
+    test_update_info_section()
+    test_control_parsing()
+    test_shifted_blocks()
+    test_delta_update()
+    test_update_without_range_support()
+    test_corrupt_block()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la validación de AppImages por cabeceras
+"""
+
+import os
+import platform
+import shutil
+import struct
+import sys
+import tempfile
+import time
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.handlers.appimage_handler import AppImageHandler
+from src.utils.appimage_validator import validate_appimage, HOST_COMPATIBLE_MACHINES, EM_X86_64, EM_AARCH64
+
+def host_machine():
+    """e_machine compatible con este equipo (x86_64 si no se conoce)"""
+    compatible = HOST_COMPATIBLE_MACHINES.get(platform.machine().lower(), {EM_X86_64})
+    return EM_AARCH64 if EM_AARCH64 in compatible else EM_X86_64
+
+def build_elf(machine, magic=b'AI\x02', payload=b''):
+    """ELF64 mínimo sin secciones cuyo final coincide con el inicio del payload"""
+    shoff = 64
+    ident = b'\x7fELF' + bytes([2, 1, 1, 0]) + magic.ljust(8, b'\x00')
+    header = ident + struct.pack('<HHIQQQIHHHHHH', 2, machine, 1, 0, 0, shoff, 0, 64, 0, 0, 64, 0, 0)
+    return header + payload
+
+def squashfs_superblock(bytes_used):
+    superblock = bytearray(96)
+    superblock[0:4] = b'hsqs'
+    struct.pack_into('<I', superblock, 12, 131072)
+    struct.pack_into('<H', superblock, 22, 17)
+    struct.pack_into('<H', superblock, 28, 4)
+    struct.pack_into('<Q', superblock, 40, bytes_used)
+    return bytes(superblock)
+
+def write_file(directory, name, data):
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    os.chmod(path, 0o755)
+    return path
+
+def test_validator_cases():
+    """Prueba los distintos casos de validación"""
+    print("🧪 Probando validación por cabeceras...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        machine = host_machine()
+        other = EM_AARCH64 if machine == EM_X86_64 else EM_X86_64
+        superblock = squashfs_superblock(4096)
+        valid = write_file(temp_dir, 'valid.AppImage', build_elf(machine, payload=superblock + bytes(4000)))
+        script = write_file(temp_dir, 'script.AppImage', b"#!/bin/bash\necho 'AppImage'\n")
+        plain_elf = write_file(temp_dir, 'plain.AppImage', build_elf(machine, magic=b'', payload=superblock + bytes(4000)))
+        wrong_arch = write_file(temp_dir, 'arch.AppImage', build_elf(other, payload=superblock + bytes(4000)))
+        truncated = write_file(temp_dir, 'truncated.AppImage', build_elf(machine, payload=superblock))
+        no_fs = write_file(temp_dir, 'nofs.AppImage', build_elf(machine, payload=bytes(200)))
+
+        result = validate_appimage(valid)
+        assert result['valid'] and result['type'] == 2, result
+        for path in (script, plain_elf, truncated, no_fs):
+            result = validate_appimage(path)
+            assert not result['valid'], (path, result)
+            print(f"✅ Rechazado {os.path.basename(path)}: {result['error']}")
+        if platform.machine().lower() in HOST_COMPATIBLE_MACHINES:
+            assert not validate_appimage(wrong_arch)['valid']
+        print("✅ Validación por cabeceras correcta")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_install_rejects_fast():
+    """Prueba que install() rechaza archivos inválidos sin intentar extraerlos"""
+    print("\n🧪 Probando rechazo rápido en la instalación...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        fake = write_file(temp_dir, 'fake.AppImage', b"#!/bin/bash\nsleep 60\n")
+        handler = AppImageHandler()
+        start = time.monotonic()
+        result = handler.install(fake)
+        elapsed = time.monotonic() - start
+        assert isinstance(result, dict) and 'error' in result, result
+        assert elapsed < 1.0, elapsed
+        print(f"✅ Rechazado en {elapsed * 1000:.2f} ms")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas de validación de AppImages...")
+    test_validator_cases()
+    test_install_rejects_fast()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el progreso real de apt/dpkg (canal de estado)
+"""
+
+import os
+import sys
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.utils.apt_progress import parse_status_line, InstallProgress, run_with_progress
+
+STREAM = """Leyendo lista de paquetes...
+dlstatus:1:0.0000:Retrieving file 1 of 2
+dlstatus:2:50.0000:Retrieving file 2 of 2
+pmstatus:libfoo:20.0000:Preparing libfoo (amd64)
+pmstatus:libfoo:40.0000:Unpacking libfoo (amd64)
+pmerror:/tmp/bar.deb:60.0000:trying to overwrite '/usr/bin/bar'
+pmstatus:hello-test:100.0000:Installed hello-test (amd64)
+"""
+
+def test_parse_lines():
+    """Prueba el parseo de las líneas de apt y dpkg"""
+    print("🧪 Probando parseo del canal de estado...")
+    status = parse_status_line("pmstatus:libfoo:42.8571:Configuring libfoo (amd64)")
+    assert status == {'kind': 'install', 'package': 'libfoo', 'percent': 42.8571,
+                      'message': 'Configuring libfoo (amd64)'}
+    status = parse_status_line("pmconffile:/etc/foo.conf:50.0:'/etc/foo.conf' '/etc/foo.conf.dpkg-new' 1 1")
+    assert status['kind'] == 'conffile'
+    assert parse_status_line("processing: unpack: hello-test")['message'] == 'Desempaquetando hello-test'
+    error = parse_status_line("status: hello-test: error: dependency problems")
+    assert error['kind'] == 'error' and error['message'] == 'dependency problems'
+    assert parse_status_line("Setting up hello-test (1.0) ...") is None
+    assert parse_status_line("Leyendo lista de paquetes... Hecho") is None
+    print("✅ Líneas parseadas correctamente")
+
+def test_progress_fraction():
+    """Prueba que el progreso global es monótono y reparte descarga e instalación"""
+    print("\n🧪 Probando progreso global...")
+    progress = InstallProgress()
+    fractions = []
+    for line in STREAM.splitlines():
+        status = parse_status_line(line)
+        if status:
+            progress.feed(status)
+            fractions.append(progress.fraction)
+    assert fractions == sorted(fractions)
+    assert abs(fractions[1] - 0.15) < 1e-9, fractions
+    assert progress.fraction == 1.0
+    assert progress.errors == ["/tmp/bar.deb: trying to overwrite '/usr/bin/bar'"]
+    print("✅ Progreso global correcto")
+
+def test_run_with_progress():
+    """Prueba la lectura en streaming con límite de frecuencia"""
+    print("\n🧪 Probando ejecución con progreso...")
+    script = "import sys\nfor i in range(500):\n    print(f'pmstatus:pkg:{i / 5}:Paso {i}', flush=True)\nprint('salida normal')\n"
+    updates = []
+    result = run_with_progress([sys.executable, '-c', script],
+                               lambda fraction, message: updates.append((fraction, message)),
+                               min_interval=10)
+    assert result['returncode'] == 0
+    assert result['output'] == 'salida normal\n'
+    # Con un intervalo tan largo solo llegan la primera y la última actualización
+    assert len(updates) == 2, updates
+    assert updates[-1][1] == 'Paso 499'
+    print(f"✅ {len(updates)} actualizaciones para 500 líneas de estado")
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas del progreso de apt...")
+    test_parse_lines()
+    test_progress_fraction()
+    test_run_with_progress()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la instalación de carpetas de .deb (cierre de dependencias)
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.utils.deb_folder import plan_folder, format_plan
+from src.utils.deb_preflight import load_installed, load_available
+from test_deb_reader import make_tar, ar_member
+
+STATUS = """Package: libx
+Status: install ok installed
+Architecture: amd64
+Version: 2.0
+"""
+
+PACKAGES = """Package: libssl3
+Version: 3.0.2
+Architecture: amd64
+"""
+
+def build_deb(directory, package, version, extra=''):
+    control = f"Package: {package}\nVersion: {version}\nArchitecture: amd64\n{extra}Description: Prueba\n"
+    path = os.path.join(directory, f"{package}_{version}_amd64.deb")
+    with open(path, 'wb') as f:
+        f.write(b'!<arch>\n')
+        f.write(ar_member('debian-binary', b'2.0\n'))
+        f.write(ar_member('control.tar.gz', make_tar({'./control': control.encode()}, 'w:gz')))
+        f.write(ar_member('data.tar.gz', make_tar({}, 'w:gz')))
+    return path
+
+def indexes(temp_dir):
+    status = os.path.join(temp_dir, 'status')
+    with open(status, 'w') as f:
+        f.write(STATUS)
+    lists = os.path.join(temp_dir, 'lists')
+    os.makedirs(lists)
+    with open(os.path.join(lists, 'repo_main_binary-amd64_Packages'), 'w') as f:
+        f.write(PACKAGES)
+    return load_installed(status), load_available(lists, 'amd64')
+
+def test_minimal_set():
+    """Prueba que solo se instala lo necesario para los paquetes raíz"""
+    print("🧪 Probando conjunto mínimo de una carpeta...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        installed, available = indexes(temp_dir)
+        folder = os.path.join(temp_dir, 'vendor')
+        os.makedirs(folder)
+        plugin = build_deb(folder, 'vendor-plugin', '1.0', 'Depends: vendor-app (>= 1.0)\n')
+        app = build_deb(folder, 'vendor-app', '1.0', 'Depends: libvendor (>= 1.0), libb | libc, libx, libssl3\n')
+        lib_new = build_deb(folder, 'libvendor', '1.1')
+        lib_old = build_deb(folder, 'libvendor', '0.9')
+        libb = build_deb(folder, 'libb', '1.0')
+        libc = build_deb(folder, 'libc', '1.0', 'Depends: libx (>= 2.0)\n')
+        libx = build_deb(folder, 'libx', '1.5')
+
+        plan = plan_folder(folder, installed, available)
+        print(format_plan(plan))
+        assert plan['ok'], plan
+        assert plan['install'] == sorted([plugin, app, lib_new, libb]), plan['install']
+        assert plan['unused'] == sorted([lib_old, libc, libx]), plan['unused']
+        assert plan['from_repo'] == ['libssl3 3.0.2']
+        print("✅ Conjunto mínimo correcto")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_rejects_unsatisfiable():
+    """Prueba que un conjunto imposible se rechaza antes de pedir privilegios"""
+    print("\n🧪 Probando conjunto imposible...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        installed, available = indexes(temp_dir)
+        folder = os.path.join(temp_dir, 'vendor')
+        os.makedirs(folder)
+        build_deb(folder, 'tool', '1.0', 'Depends: libvendor (>= 2.0), helper\n')
+        build_deb(folder, 'libvendor', '1.1')
+        build_deb(folder, 'helper', '1.0', 'Conflicts: libx\n')
+        with open(os.path.join(folder, 'roto.deb'), 'wb') as f:
+            f.write(b'basura')
+
+        plan = plan_folder(folder, installed, available)
+        print(format_plan(plan))
+        assert not plan['ok']
+        assert plan['missing'] == ['libvendor (>= 2.0)'], plan['missing']
+        assert plan['to_remove'] == ['libx']
+        assert len(plan['errors']) == 1 and plan['errors'][0].startswith('roto.deb')
+        print("✅ Conjunto imposible rechazado")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas de instalación de carpetas de .deb...")
+    test_minimal_set()
+    test_rejects_unsatisfiable()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la comprobación previa de dependencias de .deb
+"""
+
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.utils.deb_version import compare_versions, parse_relations
+from src.utils.deb_preflight import load_installed, load_available, check_deb, format_report
+
+STATUS = """Package: dpkg
+Status: install ok installed
+Architecture: amd64
+Version: 1.21.1
+
+Package: libc6
+Status: install ok installed
+Architecture: amd64
+Version: 2.35-0ubuntu3
+Description: GNU C Library
+ líneas de continuación que se ignoran
+
+Package: old-tool
+Status: install ok installed
+Architecture: amd64
+Version: 0.9
+Conflicts: hello-test (<< 2.0)
+
+Package: removed-lib
+Status: deinstall ok config-files
+Architecture: amd64
+Version: 1.0
+
+Package: mail-server
+Status: install ok installed
+Architecture: amd64
+Version: 3.0
+Provides: mail-transport-agent
+
+Package: hello-test
+Status: install ok installed
+Architecture: amd64
+Version: 1.2-3
+"""
+
+PACKAGES = """Package: libgtk-3-0
+Version: 3.24.33-1
+Architecture: amd64
+Depends: libc6 (>= 2.34), libgtk-common
+
+Package: libgtk-common
+Version: 3.24.33-1
+Architecture: all
+
+Package: libfoo1
+Version: 1.0
+Architecture: amd64
+"""
+
+def test_version_compare():
+    """Prueba la comparación de versiones de Debian"""
+    print("🧪 Probando comparación de versiones...")
+    cases = [
+        ('1.0', '1.0', 0), ('1.0', '1.0-0', 0), ('1.0~rc1', '1.0', -1),
+        ('1.0', '1.0+b1', -1), ('2:1.0', '1:9.9', 1), ('1.10', '1.9', 1),
+        ('1.0-1ubuntu1', '1.0-1', 1), ('1.0a', '1.0', 1), ('1.0~~', '1.0~', -1),
+        ('0001.0', '1.0', 0), ('1.2-3', '1.2-10', -1),
+    ]
+    for a, b, expected in cases:
+        result = compare_versions(a, b)
+        result = (result > 0) - (result < 0)
+        assert result == expected, (a, b, result)
+    groups = parse_relations('libc6 (>= 2.31), libgtk-3-0 | libgtk-4-1 [amd64], python3:any <!nocheck>')
+    assert groups[0] == [('libc6', '>=', '2.31', None)]
+    assert [r[0] for r in groups[1]] == ['libgtk-3-0', 'libgtk-4-1']
+    assert groups[2] == [('python3', None, None, 'any')]
+    print("✅ Comparación de versiones correcta")
+
+def make_indexes(temp_dir):
+    status = os.path.join(temp_dir, 'status')
+    with open(status, 'w') as f:
+        f.write(STATUS)
+    lists = os.path.join(temp_dir, 'lists')
+    os.makedirs(lists)
+    with gzip.open(os.path.join(lists, 'repo_dists_main_binary-amd64_Packages.gz'), 'wt') as f:
+        f.write(PACKAGES)
+    with open(os.path.join(lists, 'repo_dists_main_binary-arm64_Packages'), 'w') as f:
+        f.write("Package: arm-only\nVersion: 1\nArchitecture: arm64\n")
+    installed = load_installed(status)
+    return installed, load_available(lists, 'amd64')
+
+def test_preflight_report():
+    """Prueba el informe de dependencias, conflictos y versión ya instalada"""
+    print("\n🧪 Probando comprobación previa...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        installed, available = make_indexes(temp_dir)
+        assert 'removed-lib' not in installed.packages
+        assert 'arm-only' not in available.packages
+
+        info = {'Package': 'hello-test', 'Version': '1.2-3', 'Architecture': 'amd64',
+                'Depends': 'libc6 (>= 2.31)'}
+        report = check_deb(info, installed, available)
+        assert report['already_installed'] and report['action'] == 'reinstall'
+
+        info = {'Package': 'hello-test', 'Version': '1.5-1', 'Architecture': 'amd64',
+                'Depends': 'libc6 (>= 2.31), libgtk-3-0 | libgtk-4-1, mail-transport-agent',
+                'Breaks': 'libfoo1'}
+        report = check_deb(info, installed, available)
+        assert not report['already_installed'] and report['action'] == 'upgrade'
+        assert report['to_install'] == ['libgtk-3-0 3.24.33-1', 'libgtk-common 3.24.33-1'], report
+        assert report['to_remove'] == ['old-tool'], report
+        assert report['ok'] and not report['missing']
+
+        info = {'Package': 'hello-test', 'Version': '2.0', 'Architecture': 'amd64',
+                'Depends': 'libc6 (>= 2.40), libbar2', 'Conflicts': 'mail-server'}
+        report = check_deb(info, installed, available)
+        assert not report['ok']
+        assert report['missing'] == ['libc6 (>= 2.40)', 'libbar2'], report
+        assert report['to_remove'] == ['mail-server'], report
+        print(format_report(report))
+        print("✅ Informe de dependencias correcto")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas de la comprobación previa de .deb...")
+    test_version_compare()
+    test_preflight_report()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
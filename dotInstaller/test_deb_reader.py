@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el lector nativo de paquetes .deb
+"""
+
+import io
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.utils.deb_reader import DebArchive
+from src.core.installer import Installer
+
+CONTROL = """Package: hello-test
+Version: 1.2-3
+Architecture: amd64
+Maintainer: Test <test@example.com>
+Installed-Size: 42
+Depends: libc6 (>= 2.31), libgtk-3-0 | libgtk-4-1
+Description: Aplicación de prueba
+ Descripción larga
+ en varias líneas.
+"""
+
+DESKTOP = """[Desktop Entry]
+Name=Hello Test
+Exec=hello-test
+Icon=hello-test
+Type=Application
+Categories=Utility;
+
+[Desktop Action new]
+Name=Nueva ventana
+Exec=hello-test --new
+"""
+
+def make_tar(files, mode):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=mode) as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+def ar_member(name, data):
+    header = f"{name:<16}{0:<12}{0:<6}{0:<6}{100644:<8}{len(data):<10}`\n".encode()
+    return header + data + (b'\n' if len(data) % 2 else b'')
+
+def build_deb(path, data_files, data_mode='w:xz'):
+    """Crea un .deb con control.tar.gz y data.tar.xz como lo haría dpkg-deb"""
+    control_tar = make_tar({'./control': CONTROL.encode()}, 'w:gz')
+    data_tar = make_tar(data_files, data_mode)
+    data_name = 'data.tar.xz' if data_mode == 'w:xz' else 'data.tar.gz'
+    with open(path, 'wb') as f:
+        f.write(b'!<arch>\n')
+        f.write(ar_member('debian-binary', b'2.0\n'))
+        f.write(ar_member('control.tar.gz', control_tar))
+        f.write(ar_member(data_name, data_tar))
+
+def data_files():
+    return {
+        './usr/bin/hello-test': b'#!/bin/sh\necho hello\n',
+        './usr/share/applications/hello-test.desktop': DESKTOP.encode(),
+        './usr/share/icons/hicolor/48x48/apps/hello-test.png': b'\x89PNG48',
+        './usr/share/icons/hicolor/256x256/apps/hello-test.png': b'\x89PNG256',
+        './usr/share/icons/hicolor/256x256/apps/other.png': b'\x89PNGother',
+    }
+
+def test_control_fields():
+    """Prueba la lectura de los campos de control"""
+    print("🧪 Probando lectura de control...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, 'hello-test_1.2-3_amd64.deb')
+        build_deb(path, data_files())
+        info = DebArchive(path).control()
+        assert info['Package'] == 'hello-test'
+        assert info['Version'] == '1.2-3'
+        assert info['Architecture'] == 'amd64'
+        assert info['Installed-Size'] == '42'
+        assert info['Depends'] == 'libc6 (>= 2.31), libgtk-3-0 | libgtk-4-1'
+        assert info['Description'].startswith('Aplicación de prueba\nDescripción larga')
+        print("✅ Campos de control leídos correctamente")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_preview_members():
+    """Prueba la extracción de .desktop e icono sin extraer el paquete"""
+    print("\n🧪 Probando vista previa (.desktop e icono)...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        for mode in ('w:xz', 'w:gz'):
+            path = os.path.join(temp_dir, 'hello.deb')
+            build_deb(path, data_files(), mode)
+            preview = DebArchive(path).preview()
+            assert len(preview['desktop_entries']) == 1
+            entry = preview['desktop_entries'][0]
+            assert entry['name'] == 'Hello Test' and entry['icon'] == 'hello-test'
+            assert preview['icon'] == ('/usr/share/icons/hicolor/256x256/apps/hello-test.png', b'\x89PNG256')
+        files = DebArchive(path).list_files()
+        assert '/usr/bin/hello-test' in files
+        print("✅ Vista previa correcta")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_invalid_files():
+    """Prueba que los archivos que no son .deb se rechazan"""
+    print("\n🧪 Probando archivos inválidos...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, 'fake.deb')
+        with open(path, 'wb') as f:
+            f.write(b'not a deb at all')
+        try:
+            DebArchive(path).control()
+            assert False, "Debería fallar"
+        except ValueError as e:
+            print(f"✅ Rechazado: {e}")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_package_name_for_uninstall():
+    """Prueba que la desinstalación usa el nombre real del paquete"""
+    print("\n🧪 Probando nombre de paquete para desinstalar...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, 'vendor-download.deb')
+        build_deb(path, data_files())
+        installer = Installer()
+        assert installer._deb_package_name('vendor-download.deb', path) == 'hello-test'
+        assert installer._deb_package_name('hello-test', path) == 'hello-test'
+        assert installer._deb_package_name('foo_1.0_amd64.deb', '/nonexistent.deb') == 'foo'
+        print("✅ Nombre de paquete correcto")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas del lector de .deb...")
+    test_control_fields()
+    test_preview_members()
+    test_invalid_files()
+    test_package_name_for_uninstall()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
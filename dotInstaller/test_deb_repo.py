@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la caché local de paquetes .deb (repositorio plano)
+"""
+
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.utils.deb_repo import add_to_repo, repo_filename, find_cached, list_versions, load_index, remove_from_repo, sources_line
+from test_deb_reader import make_tar, ar_member
+from src.data import database
+from src.utils import deb_repo
+from src.core.installer import Installer
+
+def build_deb(path, version):
+    control = f"Package: hello-test\nVersion: {version}\nArchitecture: amd64\nDescription: Prueba\n Línea larga\n .\n Otro párrafo\n"
+    with open(path, 'wb') as f:
+        f.write(b'!<arch>\n')
+        f.write(ar_member('debian-binary', b'2.0\n'))
+        f.write(ar_member('control.tar.gz', make_tar({'./control': control.encode()}, 'w:gz')))
+        f.write(ar_member('data.tar.gz', make_tar({'./usr/bin/hello-test': version.encode()}, 'w:gz')))
+
+def test_repo_cache():
+    """Prueba que el índice se mantiene al añadir, podar y quitar versiones"""
+    print("🧪 Probando caché local de .deb...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        repo = os.path.join(temp_dir, 'repo')
+        for version in ('1.0-1', '1:0.5', '1.1-1', '1.2-1'):
+            deb = os.path.join(temp_dir, 'descarga.deb')
+            build_deb(deb, version)
+            path = add_to_repo(deb, repo_dir=repo, keep_versions=3)
+            assert os.path.basename(path) == f"hello-test_{version.replace(':', '%3a')}_amd64.deb"
+        # Con y sin época son versiones distintas: cada una en su archivo
+        assert repo_filename({'Package': 'a', 'Version': '0.5'}) != repo_filename({'Package': 'a', 'Version': '1:0.5'})
+
+        # La época hace que 1:0.5 sea la más nueva; la más antigua (1.0-1) se poda
+        assert list_versions('hello-test', repo) == ['1:0.5', '1.2-1', '1.1-1']
+        assert not os.path.exists(os.path.join(repo, 'hello-test_1.0-1_amd64.deb'))
+        entries = load_index(repo)
+        assert len(entries) == 3
+        for entry in entries:
+            with open(os.path.join(repo, entry['Filename'][2:]), 'rb') as f:
+                data = f.read()
+            assert entry['SHA256'] == hashlib.sha256(data).hexdigest()
+            assert entry['Size'] == str(len(data))
+            assert entry['Description'] == 'Prueba\nLínea larga\n.\nOtro párrafo'
+
+        assert find_cached('hello-test', repo_dir=repo).endswith('hello-test_1%3a0.5_amd64.deb')
+        assert find_cached('hello-test', '1.1-1', repo).endswith('hello-test_1.1-1_amd64.deb')
+        assert find_cached('otro', repo_dir=repo) is None
+        assert remove_from_repo('hello-test', '1.1-1', repo) == 1
+        assert list_versions('hello-test', repo) == ['1:0.5', '1.2-1']
+        assert sources_line(repo) == f"deb [trusted=yes] file:{repo} ./"
+        print("✅ Caché local correcta")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_single_install_cached():
+    """Prueba que un único .deb instalado desde el panel se registra y entra en la caché"""
+    print("\n🧪 Probando registro y caché de un solo .deb...")
+    temp_dir = tempfile.mkdtemp()
+    original_db, original_repo = database.DB_PATH, deb_repo.DEB_REPO_DIR
+    database.DB_PATH = os.path.join(temp_dir, 'prueba.db')
+    deb_repo.DEB_REPO_DIR = os.path.join(temp_dir, 'repo')
+    try:
+        database.init_db()
+        database.set_setting('deb_cache_enabled', '1')
+        deb = os.path.join(temp_dir, 'descarga.deb')
+        build_deb(deb, '2:1.0-1')
+        installer = Installer()
+        installer.deb_handler.install_packages = lambda paths, progress_callback=None: \
+            {'returncode': 0, 'output': '', 'errors': []}
+        assert installer.install_deb_packages([deb])['returncode'] == 0
+        assert [(name, path, type_) for _, name, path, type_, _ in database.list_installed()] == \
+            [('hello-test', deb, 'deb')]
+        assert find_cached('hello-test').endswith('hello-test_2%3a1.0-1_amd64.deb')
+
+        # Si apt falla no se registra ni se guarda nada
+        installer.deb_handler.install_packages = lambda paths, progress_callback=None: \
+            {'returncode': 100, 'output': '', 'errors': ['E: fallo']}
+        build_deb(deb, '3.0-1')
+        assert installer.install_deb_packages([deb])['errors'] == ['E: fallo']
+        assert len(database.list_installed()) == 1 and list_versions('hello-test') == ['2:1.0-1']
+        print("✅ Paquete registrado en la biblioteca y guardado en la caché")
+    finally:
+        database.DB_PATH, deb_repo.DEB_REPO_DIR = original_db, original_repo
+        shutil.rmtree(temp_dir)
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas de la caché de .deb...")
+    test_repo_cache()
+    test_single_install_cached()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el seguimiento de cambios en disco de las instalaciones
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.data import database
+from src.utils.fs_tracker import ChangeTracker, take_snapshot, remove_manifest, format_size, should_track, manifest_paths
+
+def write(path, data=b'x'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def test_manifest():
+    """Prueba el manifiesto de un instalador que crea, modifica y borra archivos"""
+    print("🧪 Probando manifiesto de cambios...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        local = os.path.join(temp_dir, 'local')
+        opt = os.path.join(temp_dir, 'opt')
+        prefix = os.path.join(temp_dir, 'prefix')
+        write(os.path.join(local, 'share', 'applications', 'otra.desktop'))
+        write(os.path.join(local, 'share', 'config.ini'), b'a')
+        write(os.path.join(local, 'share', 'viejo.txt'))
+        write(os.path.join(local, 'ignorado', 'nada'))
+        os.makedirs(opt)
+
+        tracker = ChangeTracker([local, opt, prefix], exclude=[os.path.join(local, 'ignorado')])
+        tracker.start()
+        # Lo que haría un .run: una carpeta en ~/opt, un lanzador y un cambio de configuración
+        write(os.path.join(opt, 'app', 'bin', 'app'), b'b' * 1000)
+        write(os.path.join(opt, 'app', 'lib', 'libapp.so'), b'c' * 3000)
+        write(os.path.join(local, 'share', 'applications', 'app.desktop'), b'd' * 24)
+        write(os.path.join(local, 'share', 'config.ini'), b'cambiado')
+        os.remove(os.path.join(local, 'share', 'viejo.txt'))
+        write(os.path.join(local, 'ignorado', 'cache'))
+        write(os.path.join(prefix, 'drive_c', 'app.exe'), b'e' * 500)
+        manifest = tracker.finish()
+
+        # El prefijo es una raíz vigilada: se anota lo nuevo que hay dentro, no él mismo
+        assert manifest['dirs'] == {os.path.join(opt, 'app'): 4000, os.path.join(prefix, 'drive_c'): 500}, manifest['dirs']
+        assert manifest['files'] == {os.path.join(local, 'share', 'applications', 'app.desktop'): 24}
+        assert manifest['modified'] == [os.path.join(local, 'share', 'config.ini')]
+        assert manifest['removed'] == [os.path.join(local, 'share', 'viejo.txt')]
+        assert manifest['size'] == 4524
+        assert format_size(manifest['size']) == '4.4 KB'
+
+        assert remove_manifest(manifest) == []
+        assert not os.path.exists(os.path.join(opt, 'app')) and not os.path.exists(os.path.join(prefix, 'drive_c'))
+        assert os.path.exists(os.path.join(local, 'share', 'applications', 'otra.desktop'))
+        assert os.path.exists(os.path.join(local, 'share', 'config.ini'))
+        assert os.path.isdir(opt)
+        print(f"✅ Manifiesto correcto ({format_size(manifest['size'])}) y desinstalación precisa")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_volatile_paths():
+    """Prueba que cachés, temporales y archivos ajenos no entran en el manifiesto ni se borran"""
+    print("\n🧪 Probando rutas ajenas a la instalación...")
+    home = os.path.expanduser('~')
+    assert not should_track(os.path.join(home, '.local/share/dotInstaller/launches.log'))
+    assert not should_track(os.path.join(home, 'Desktop', 'factura.pdf'))
+    assert should_track(os.path.join(home, 'Desktop', 'app.desktop'))
+    assert should_track(os.path.join(home, '.local/share/applications', 'app.desktop'))
+    temp_dir = tempfile.mkdtemp()
+    try:
+        local = os.path.join(temp_dir, 'local')
+        os.makedirs(os.path.join(local, 'applications'))
+        tracker = ChangeTracker([local])
+        tracker.start()
+        write(os.path.join(local, 'applications', 'app.desktop'), b'a' * 10)
+        write(os.path.join(local, 'applications', 'mimeinfo.cache'), b'b' * 100)
+        write(os.path.join(local, 'applications', '.goutputstream-XYZ1'))
+        write(os.path.join(local, 'descarga.part'))
+        manifest = tracker.finish()
+        assert manifest_paths(manifest) == [os.path.join(local, 'applications', 'app.desktop')], manifest
+        assert manifest['size'] == 10
+
+        # Un manifiesto antiguo con una caché: la desinstalación la deja en su sitio
+        manifest['files'][os.path.join(local, 'applications', 'mimeinfo.cache')] = 100
+        assert remove_manifest(manifest) == []
+        assert os.path.exists(os.path.join(local, 'applications', 'mimeinfo.cache'))
+        assert not os.path.exists(os.path.join(local, 'applications', 'app.desktop'))
+        print("✅ Solo se anota y borra lo que es de la aplicación")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_root_created_during_install():
+    """Prueba que una raíz que crea el instalador no se anota como suya ni se borra al desinstalar"""
+    print("\n🧪 Probando raíz creada durante la instalación...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        applications = os.path.join(temp_dir, 'share', 'applications')
+        bin_dir = os.path.join(temp_dir, 'bin')
+        tracker = ChangeTracker([applications, bin_dir])
+        tracker.start()
+        write(os.path.join(applications, 'app.desktop'), b'a' * 10)
+        write(os.path.join(bin_dir, 'app', 'app'), b'b' * 20)
+        manifest = tracker.finish()
+        assert manifest['dirs'] == {os.path.join(bin_dir, 'app'): 20}, manifest
+        assert manifest['files'] == {os.path.join(applications, 'app.desktop'): 10}, manifest
+        assert applications not in manifest_paths(manifest) and bin_dir not in manifest_paths(manifest)
+
+        # Otra aplicación deja su lanzador después; desinstalar la primera no lo toca
+        write(os.path.join(applications, 'otra.desktop'))
+        assert remove_manifest(manifest) == []
+        assert os.path.exists(os.path.join(applications, 'otra.desktop'))
+        assert not os.path.exists(os.path.join(applications, 'app.desktop'))
+        assert os.path.isdir(bin_dir) and not os.path.exists(os.path.join(bin_dir, 'app'))
+
+        # Un manifiesto antiguo que daba la raíz como propia tampoco la borra
+        old_manifest = {'dirs': {applications: 30}, 'files': {}, 'roots': [applications]}
+        assert manifest_paths(old_manifest) == []
+        assert remove_manifest(old_manifest) == []
+        assert os.path.exists(os.path.join(applications, 'otra.desktop'))
+        print("✅ Solo se anota lo que hay debajo de la raíz")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_snapshot_parallel():
+    """Prueba que la instantánea en paralelo ve todo el árbol"""
+    print("\n🧪 Probando instantánea en paralelo...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        for i in range(20):
+            for j in range(10):
+                write(os.path.join(temp_dir, f'd{i}', f's{j}', 'f'))
+        os.symlink('/', os.path.join(temp_dir, 'enlace'))
+        snapshot = take_snapshot([temp_dir], exclude=())
+        # raíz + 20 dirs + 200 subdirs + 200 archivos + el enlace (sin seguirlo)
+        assert len(snapshot) == 1 + 20 + 200 + 200 + 1, len(snapshot)
+        assert take_snapshot([os.path.join(temp_dir, 'no-existe')]) == {}
+        print(f"✅ {len(snapshot)} entradas")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_registry():
+    """Prueba que el manifiesto se guarda con el registro y se borra con él"""
+    print("\n🧪 Probando manifiesto en el registro...")
+    temp_dir = tempfile.mkdtemp()
+    original = database.DB_PATH
+    database.DB_PATH = os.path.join(temp_dir, 'prueba.db')
+    try:
+        database.init_db()
+        app_id = database.register_install('app.run', '/tmp/app.run', 'script')
+        database.save_manifest(app_id, {'dirs': {'/opt/app': 10}, 'files': {}, 'size': 10})
+        assert database.get_manifest(app_id)['dirs'] == {'/opt/app': 10}
+        assert database.get_install_size(app_id) == 10
+        database.remove_app(app_id)
+        assert database.get_manifest(app_id) is None
+        print("✅ Manifiesto guardado y eliminado con el registro")
+    finally:
+        database.DB_PATH = original
+        shutil.rmtree(temp_dir)
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas de seguimiento de cambios...")
+    test_manifest()
+    test_volatile_paths()
+    test_root_created_during_install()
+    test_snapshot_parallel()
+    test_registry()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el reconocimiento de archivos por contenido
+"""
+
+import os
+import shutil
+import sys
+import struct
+import tempfile
+import uuid
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.handlers.registry import (FileHandler, handler_for, register_handler, unregister_handler, get_handler,
+                                   supported_extensions)
+from src.utils.silent_install import MSI_MAGIC
+
+ELF = b'\x7fELF\x02\x01\x01\x00'
+DEB = b'!<arch>\ndebian-binary   1342943816  0     0     100644  4         `\n2.0\n'
+
+def ole(clsid):
+    """Cabecera OLE mínima: sectores de 512 bytes, directorio en el sector 0 y la raíz con clsid"""
+    header = bytearray(MSI_MAGIC + b'\x00' * 504)
+    struct.pack_into('<H', header, 30, 9)
+    struct.pack_into('<I', header, 48, 0)
+    root = bytearray(128)
+    root[80:96] = uuid.UUID(clsid).bytes_le
+    return bytes(header + root)
+
+MSI = ole('000c1084-0000-0000-c000-000000000046')
+# CLSID de un documento de Word 97
+DOC = ole('00020906-0000-0000-c000-000000000046')
+
+def write(directory, name, data):
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+def test_classification():
+    """Prueba que el contenido manda sobre la extensión y que la extensión solo desempata"""
+    print("🧪 Probando clasificación por contenido...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        cases = {
+            # Contenido reconocible: da igual el nombre
+            'app.AppImage': (ELF + b'AI\x02' + b'\x00' * 64, 'appimage'),
+            'descarga': (ELF + b'AI\x01' + b'\x00' * 64, 'appimage'),
+            'paquete.deb': (DEB, 'deb'),
+            'paquete.AppImage': (DEB, 'deb'),
+            'setup': (b'MZ\x90\x00' + b'\x00' * 60, 'windows'),
+            'instalador.bin': (MSI, 'windows'),
+            # Los documentos de Office también son OLE: no van a Wine
+            'informe.doc': (DOC, None),
+            'documento': (DOC, None),
+            'hoja.xls': (MSI_MAGIC + b'\x00' * 64, None),
+            # Directorio fuera de la cabecera: la extensión lo confirma
+            'paquete.msi': (MSI_MAGIC + b'\x00' * 64, 'windows'),
+            'renombrado.msi': (DOC, 'windows'),
+            'instalar': (b'#!/bin/sh\necho hola\n', 'script'),
+            'instalar-env': (b'#! /usr/bin/env bash\nset -e\n', 'script'),
+            'juego.run': (b'#!/bin/sh\n# This script was generated using Makeself 2.4.0\n', 'script'),
+            # El contenido no lo aclara: decide la extensión
+            'driver.run': (ELF + b'\x00' * 64, 'script'),
+            'viejo.appimage': (ELF + b'\x00' * 64, 'appimage'),
+            'sin-shebang.sh': (b'echo hola\n', 'script'),
+            'roto.deb': (b'', 'deb'),
+            # Ni contenido ni extensión
+            'binario': (ELF + b'\x00' * 64, None),
+            'archivo.ar': (b'!<arch>\nlibfoo.o/       0           0     0     644     4         `\n', None),
+            'notas.txt': (b'hola\n', None),
+            # Otros intérpretes no se ejecutan salvo que el nombre diga que es un instalador
+            'herramienta.py': (b'#!/usr/bin/env python3\nprint(1)\n', None),
+            'limpiar': (b'#!/usr/bin/perl\nunlink @ARGV;\n', None),
+            'wrapper.sh': (b'#!/usr/bin/python3\n', 'script'),
+        }
+        for name, (data, expected) in cases.items():
+            handler = handler_for(write(temp_dir, name, data))
+            assert (handler.kind if handler else None) == expected, (name, handler and handler.kind)
+        assert handler_for(os.path.join(temp_dir, 'no-existe.exe')).kind == 'windows'
+        assert handler_for('/x/paquete.deb', header=DEB).lane == 'dpkg'
+        assert supported_extensions() == ['.appimage', '.deb', '.exe', '.msi', '.run', '.sh']
+        print(f"✅ {len(cases)} archivos clasificados correctamente")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_external_handler():
+    """Prueba que un módulo externo registra su tipo y la instalación llega a él"""
+    print("🧪 Probando manejadores externos...")
+    calls = []
+    flatpak = FileHandler('flatpak', lambda installer, path, use_proton=None: calls.append(path) or True,
+                          'appimage', [b'\x89FLATPAK'], None, ['.flatpak'], 'Paquetes Flatpak')
+    register_handler(flatpak)
+    try:
+        handler = handler_for('/tmp/app.flatpak', header=b'\x89FLATPAK' + b'\x00' * 32)
+        assert handler is flatpak and handler.install(None, '/tmp/app.flatpak') is True
+        assert calls == ['/tmp/app.flatpak']
+        # Registrar de nuevo el mismo tipo lo reemplaza
+        register_handler(FileHandler('flatpak', flatpak.install, 'appimage', [b'\x89FPK2']))
+        assert handler_for('/tmp/x', header=b'\x89FLATPAK') is None
+        assert handler_for('/tmp/x', header=b'\x89FPK2').kind == 'flatpak'
+    finally:
+        unregister_handler('flatpak')
+    assert get_handler('flatpak') is None and handler_for('/tmp/app.flatpak', header=b'\x89FLATPAK') is None
+    assert get_handler('deb') and handler_for('/tmp/x', header=DEB).kind == 'deb'
+    print("✅ Manejador externo registrado, usado y retirado")
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas del registro de manejadores...")
+    test_classification()
+    test_external_handler()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
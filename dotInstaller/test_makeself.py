@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el lector de archivos .run de makeself
+"""
+
+import hashlib
+import io
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.utils.makeself import open_makeself, format_preview, CksumCRC
+from src.handlers.script_handler import ScriptHandler
+
+HEADER = """#!/bin/sh
+# This script was generated using Makeself 2.4.5
+# The license covering this archive and its contents, if any, is wholly independent of the Makeself license (GPL)
+
+CRCsum="{crc}"
+MD5="{md5}"
+label="Mi Aplicación 1.0"
+script="./setup.sh"
+scriptargs="--silent"
+targetdir="miapp"
+filesizes="{size}"
+keep="n"
+decrypt_cmd=""
+skip="{skip}"
+
+echo "Este script no debe ejecutarse en las pruebas"
+exit 1
+"""
+
+SETUP = b"""#!/bin/sh
+echo "instalando $1 desde $(pwd)"
+cp app.bin "$DESTINO/app.bin"
+"""
+
+def build_payload(mode='w:gz'):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=mode) as tar:
+        for name, data, file_mode in (
+            ('./setup.sh', SETUP, 0o755),
+            ('./app.bin', b'\x7fELF' + b'\x00' * 5000, 0o755),
+            ('./share/miapp.desktop', b'[Desktop Entry]\nName=Mi App\nExec=app.bin\n', 0o644),
+            ('./share/icons/miapp.png', b'\x89PNG' + b'\x00' * 100, 0o644),
+        ):
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mode = file_mode
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+def build_run(path, payload, crc='0000000000', md5='0' * 32):
+    header = HEADER.format(size=len(payload), skip=0, crc=crc, md5=md5)
+    skip = header.count('\n')
+    header = HEADER.format(size=len(payload), skip=skip, crc=crc, md5=md5)
+    with open(path, 'wb') as f:
+        f.write(header.encode('utf-8'))
+        f.write(payload)
+
+def test_inspect():
+    """Prueba la lectura de la cabecera y el listado de la carga útil"""
+    print("🧪 Probando lectura de un .run de makeself...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        for mode, compression in (('w:gz', 'gzip'), ('w:xz', 'xz'), ('w', 'none')):
+            path = os.path.join(temp_dir, f'miapp-{compression}.run')
+            build_run(path, build_payload(mode))
+            archive = open_makeself(path)
+            assert archive is not None and archive.compression == compression
+            assert archive.can_extract()
+            info = archive.inspect()
+            assert info['label'] == 'Mi Aplicación 1.0'
+            assert info['files'] == 4
+            assert info['unpacked_size'] == len(SETUP) + 5004 + 41 + 104
+            assert list(info['desktop_entries']) == ['share/miapp.desktop']
+            assert info['icons'] == ['share/icons/miapp.png']
+            assert 'Lanzador: Mi App' in format_preview(info)
+
+        plain = os.path.join(temp_dir, 'normal.sh')
+        with open(plain, 'w') as f:
+            f.write('#!/bin/sh\necho hola\n')
+        assert open_makeself(plain) is None
+        print("✅ Cabecera, compresión y contenido leídos sin ejecutar nada")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_extract_and_run():
+    """Prueba el desempaquetado con progreso y la ejecución del script interno"""
+    print("\n🧪 Probando desempaquetado y ejecución...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, 'miapp.run')
+        build_run(path, build_payload())
+        destination = os.path.join(temp_dir, 'destino')
+        os.makedirs(destination)
+
+        progress = []
+        info = open_makeself(path).extract(os.path.join(temp_dir, 'extraido'), lambda f, m: progress.append(f))
+        assert progress[-1] == 1.0 and progress == sorted(progress)
+        # La vista previa sale de la misma pasada que extrae
+        assert info == open_makeself(path).inspect(), info
+        assert 'Lanzador: Mi App' in format_preview(info)
+        assert os.access(os.path.join(temp_dir, 'extraido', 'setup.sh'), os.X_OK)
+
+        os.environ['DESTINO'] = destination
+        previews = []
+        capture = ScriptHandler().run(path, preview_callback=previews.append)
+        assert [preview['files'] for preview in previews] == [4]
+        assert capture.returncode == 0, capture.tail()
+        assert 'instalando --silent desde' in capture.tail()
+        assert os.path.exists(os.path.join(destination, 'app.bin'))
+        print("✅ Carga útil extraída y script de instalación ejecutado")
+    finally:
+        os.environ.pop('DESTINO', None)
+        shutil.rmtree(temp_dir)
+
+def test_checksums():
+    """Prueba que las sumas MD5/CRC de la cabecera se comprueban antes de ejecutar el script"""
+    print("\n🧪 Probando sumas de la carga útil...")
+    crc = CksumCRC()
+    crc.update(b'123456789')
+    # Valor de printf 123456789 | cksum
+    assert crc.hexdigest() == '930766865'
+    temp_dir = tempfile.mkdtemp()
+    try:
+        # Sin comprimir: el tar no tiene forma propia de notar un byte cambiado
+        payload = build_payload('w')
+        crc = CksumCRC()
+        crc.update(payload)
+        md5 = hashlib.md5(payload).hexdigest()
+        destination = os.path.join(temp_dir, 'destino')
+        os.makedirs(destination)
+        os.environ['DESTINO'] = destination
+        for name, sums in (('md5', {'md5': md5}), ('crc', {'crc': crc.hexdigest()})):
+            path = os.path.join(temp_dir, f'{name}.run')
+            build_run(path, payload, **sums)
+            info = open_makeself(path).extract(os.path.join(temp_dir, name))
+            assert info['verified'] and info['files'] == 4
+
+        # Un byte cambiado en la carga útil: no se llega a ejecutar nada
+        position = payload.index(b'\x7fELF') + 100
+        damaged = payload[:position] + b'\x01' + payload[position + 1:]
+        for name, sums in (('md5-roto', {'md5': md5}), ('crc-roto', {'crc': crc.hexdigest()})):
+            path = os.path.join(temp_dir, f'{name}.run')
+            build_run(path, damaged, **sums)
+            try:
+                ScriptHandler().run(path)
+                assert False, f"{name} debería rechazarse"
+            except tarfile.TarError as e:
+                assert 'suma' in str(e), e
+        assert not os.path.exists(os.path.join(destination, 'app.bin'))
+        print("✅ Sumas comprobadas y carga útil dañada rechazada")
+    finally:
+        os.environ.pop('DESTINO', None)
+        shutil.rmtree(temp_dir)
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas de makeself...")
+    test_inspect()
+    test_extract_and_run()
+    test_checksums()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
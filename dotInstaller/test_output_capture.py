@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la captura de salida acotada en memoria
+"""
+
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.utils.output_capture import StreamingCapture, prune_logs
+
+CHATTY = """import sys
+print('not compatible with the version of Windows', flush=True)
+for i in range(50000):
+    print(f'línea {i}')
+sys.stdout.write('x' * 200000)
+sys.exit(3)
+"""
+
+def test_bounded_capture():
+    """Prueba el búfer circular, el registro comprimido y los textos vigilados"""
+    print("🧪 Probando captura acotada...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        lines = []
+        capture = StreamingCapture('instalador ruidoso.run', max_lines=100, line_callback=lines.append,
+                                   watch=('not compatible with the version of Windows',), log_dir=temp_dir)
+        returncode = capture.run([sys.executable, '-c', CHATTY])
+        assert returncode == 3
+        assert len(capture.lines) == 100
+        # La línea final sin salto se trocea en vez de crecer sin límite
+        assert all(len(line) <= 64 * 1024 for line in capture.lines)
+        assert capture.seen == {'not compatible with the version of Windows'}
+        assert len(lines) == capture.total_lines
+        assert os.path.basename(capture.log_path).startswith('instalador_ruidoso.run-')
+        with gzip.open(capture.log_path, 'rt', encoding='utf-8') as f:
+            log = f.read()
+        assert log.count('\n') == 50001 and log.endswith('x' * 200000)
+        assert capture.completed(['x']).returncode == 3
+        print(f"✅ {capture.total_lines} líneas, {capture.total_bytes} bytes; 100 en memoria")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_throttle_and_timeout():
+    """Prueba el aviso limitado por intervalo y el tiempo máximo"""
+    print("\n🧪 Probando límite de avisos y tiempo máximo...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        lines = []
+        capture = StreamingCapture('lento', line_callback=lines.append, min_interval=10, log_dir=temp_dir)
+        capture.run([sys.executable, '-c', "for i in range(1000): print(i)"])
+        assert lines == ['0', '999'], lines
+
+        capture = StreamingCapture('colgado', log_dir=temp_dir)
+        returncode = capture.run([sys.executable, '-c', "import time; print('inicio', flush=True); time.sleep(30)"], timeout=0.5)
+        assert capture.timed_out and returncode != 0
+        assert capture.tail() == 'inicio'
+
+        prune_logs(temp_dir, keep=1)
+        assert len(os.listdir(temp_dir)) == 1
+        print("✅ Avisos limitados y proceso colgado terminado")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas de captura de salida...")
+    test_bounded_capture()
+    test_throttle_and_timeout()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
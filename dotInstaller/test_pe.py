@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el lector de cabeceras y manifiestos PE
+"""
+
+import os
+import shutil
+import struct
+import sys
+import tempfile
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.utils.pe import (read_pe_info, choose_windows_version, read_exe_metadata, RT_MANIFEST, RT_VERSION,
+                          RT_ICON, RT_GROUP_ICON)
+from src.utils.ico import PNG_MAGIC, dib_to_png
+
+RESOURCE_RVA = 0x1000
+RESOURCE_OFFSET = 0x200
+
+MANIFEST = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<assembly xmlns="urn:schemas-microsoft-com:asm.v1" manifestVersion="1.0">
+  <trustInfo xmlns="urn:schemas-microsoft-com:asm.v3">
+    <security><requestedPrivileges>
+      <requestedExecutionLevel level="requireAdministrator" uiAccess="false"/>
+    </requestedPrivileges></security>
+  </trustInfo>
+  <compatibility xmlns="urn:schemas-microsoft-com:compatibility.v1">
+    <application>
+      <supportedOS Id="{35138b9a-5d96-4fbd-8e2d-a2440225f93a}"/>
+      <supportedOS Id="{4a2f28e3-53b9-4441-ba9c-d69d4a4a6e38}"/>
+      <supportedOS Id="{1f676c76-80e1-4239-95bb-83d0f6d0da78}"/>
+    </application>
+  </compatibility>
+</assembly>
+"""
+
+def build_resources(resources):
+    """Árbol de recursos (tipo -> id -> idioma -> datos) tal como lo escribe un enlazador"""
+    types = sorted(resources)
+    offset = 16 + 8 * len(types)
+    type_offsets = {}
+    for type_id in types:
+        type_offsets[type_id] = offset
+        offset += 16 + 8 * len(resources[type_id])
+    name_offsets = {}
+    for type_id in types:
+        for resource_id, _, _ in resources[type_id]:
+            name_offsets[(type_id, resource_id)] = offset
+            offset += 16 + 8
+    entry_offsets = {}
+    for type_id in types:
+        for resource_id, _, _ in resources[type_id]:
+            entry_offsets[(type_id, resource_id)] = offset
+            offset += 16
+    data_offsets = {}
+    for type_id in types:
+        for resource_id, _, data in resources[type_id]:
+            offset = (offset + 3) & ~3
+            data_offsets[(type_id, resource_id)] = offset
+            offset += len(data)
+    blob = bytearray(offset)
+
+    def directory(at, entries):
+        struct.pack_into('<IIHHHH', blob, at, 0, 0, 0, 0, 0, len(entries))
+        for i, (name, target, is_dir) in enumerate(entries):
+            struct.pack_into('<II', blob, at + 16 + i * 8, name, target | (0x80000000 if is_dir else 0))
+
+    directory(0, [(type_id, type_offsets[type_id], True) for type_id in types])
+    for type_id in types:
+        directory(type_offsets[type_id], [(resource_id, name_offsets[(type_id, resource_id)], True)
+                                          for resource_id, _, _ in resources[type_id]])
+        for resource_id, language, data in resources[type_id]:
+            key = (type_id, resource_id)
+            directory(name_offsets[key], [(language, entry_offsets[key], False)])
+            struct.pack_into('<IIII', blob, entry_offsets[key], RESOURCE_RVA + data_offsets[key], len(data), 0, 0)
+            blob[data_offsets[key]:data_offsets[key] + len(data)] = data
+    return bytes(blob)
+
+def build_pe(path, resources=None, subsystem_version=(6, 0), pe32_plus=False, machine=0x14c):
+    """Escribe un PE mínimo con una sección .rsrc"""
+    rsrc = build_resources(resources or {})
+    optional_size = 240 if pe32_plus else 224
+    directories_at = 112 if pe32_plus else 96
+    optional = bytearray(optional_size)
+    struct.pack_into('<H', optional, 0, 0x20b if pe32_plus else 0x10b)
+    struct.pack_into('<HH', optional, 40, 6, 0)
+    struct.pack_into('<HH', optional, 48, *subsystem_version)
+    struct.pack_into('<HH', optional, 68, 2, 0x8140)
+    struct.pack_into('<I', optional, directories_at - 4, 16)
+    struct.pack_into('<II', optional, directories_at + 2 * 8, RESOURCE_RVA, len(rsrc))
+    dos = bytearray(64)
+    dos[:2] = b'MZ'
+    struct.pack_into('<I', dos, 0x3C, 64)
+    coff = b'PE\x00\x00' + struct.pack('<HHIIIHH', machine, 1, 0, 0, 0, optional_size, 0x102)
+    section = struct.pack('<8sIIIIIIHHI', b'.rsrc', len(rsrc), RESOURCE_RVA, len(rsrc), RESOURCE_OFFSET,
+                          0, 0, 0, 0, 0x40000040)
+    head = bytes(dos) + coff + bytes(optional) + section
+    with open(path, 'wb') as f:
+        f.write(head.ljust(RESOURCE_OFFSET, b'\x00'))
+        f.write(rsrc)
+
+def version_node(key, value=b'', children=(), text=False):
+    """Nodo de VS_VERSIONINFO con su clave UTF-16, valor y relleno a 4 bytes"""
+    def pad(data):
+        return data + b'\x00' * (-len(data) % 4)
+    if text:
+        value_length = len(value) + 1
+        value = (value + '\x00').encode('utf-16-le')
+    else:
+        value_length = len(value)
+    head = pad(b'\x00' * 6 + (key + '\x00').encode('utf-16-le'))
+    node = pad(head + value) + b''.join(pad(child) for child in children)
+    node = bytearray(node)
+    struct.pack_into('<HHH', node, 0, len(node), value_length, 1 if text else 0)
+    return bytes(node)
+
+def build_version_info(strings):
+    fixed = struct.pack('<IIIIII', 0xFEEF04BD, 0x10000, (2 << 16) | 5, (1 << 16) | 7, 0, 0) + b'\x00' * 28
+    table = version_node('040904b0', children=[version_node(k, v, text=True) for k, v in strings.items()])
+    return version_node('VS_VERSION_INFO', fixed, [version_node('StringFileInfo', children=[table])])
+
+def build_dib(width, height, bgra):
+    """Imagen de RT_ICON en formato DIB de 32 bits con máscara AND vacía"""
+    header = struct.pack('<IiiHHIIiiII', 40, width, height * 2, 1, 32, 0, 0, 0, 0, 0, 0)
+    rows = [bgra * width for _ in range(height)]
+    mask = b'\x00' * (((width + 31) // 32) * 4 * height)
+    return header + b''.join(rows) + mask
+
+def build_group(entries):
+    data = struct.pack('<HHH', 0, 1, len(entries))
+    for width, bits, size, icon_id in entries:
+        data += struct.pack('<BBBBHHIH', width % 256, width % 256, 0, 0, 1, bits, size, icon_id)
+    return data
+
+def test_manifest_version():
+    """Prueba la lectura de supportedOS y del nivel de ejecución"""
+    print("🧪 Probando manifiesto de compatibilidad...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, 'setup.exe')
+        build_pe(path, {RT_MANIFEST: [(1, 1033, MANIFEST.encode('utf-8'))]}, pe32_plus=True, machine=0x8664)
+        info = read_pe_info(path)
+        assert info['machine'] == 'x64' and info['subsystem'] == 'gui'
+        assert info['supported_os'] == ['win81', 'win8', 'win7']
+        assert info['execution_level'] == 'requireAdministrator'
+        assert choose_windows_version(info) == 'win81'
+        print(f"✅ {info['supported_os']} -> {choose_windows_version(info)}")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_without_manifest():
+    """Prueba la elección por versión de subsistema y los archivos que no son PE"""
+    print("\n🧪 Probando ejecutables sin manifiesto...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        old = os.path.join(temp_dir, 'viejo.exe')
+        build_pe(old, subsystem_version=(5, 1))
+        info = read_pe_info(old)
+        assert info['supported_os'] == [] and not info['has_manifest']
+        assert choose_windows_version(info) == 'win7'
+        new = os.path.join(temp_dir, 'nuevo.exe')
+        build_pe(new, subsystem_version=(6, 2))
+        assert choose_windows_version(read_pe_info(new)) == 'win8'
+        text = os.path.join(temp_dir, 'falso.exe')
+        with open(text, 'wb') as f:
+            f.write(b'MZ' + b'\xff' * 100)
+        assert read_pe_info(text) is None and choose_windows_version(None) is None
+        print("✅ Versión elegida por subsistema y archivos no PE descartados")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_version_and_icon():
+    """Prueba VERSIONINFO y la conversión del mejor icono a PNG"""
+    print("\n🧪 Probando nombre, versión e icono del ejecutable...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        small = build_dib(16, 16, b'\x00\x00\xff\xff')
+        large = build_dib(48, 48, b'\xff\x00\x00\x80')
+        path = os.path.join(temp_dir, 'setup.exe')
+        build_pe(path, {
+            RT_VERSION: [(1, 1033, build_version_info({'CompanyName': 'Ejemplo S.A.', 'ProductName': 'Mi Programa',
+                                                       'FileVersion': '2.5.1.7'}))],
+            RT_ICON: [(1, 1033, small), (2, 1033, large)],
+            RT_GROUP_ICON: [(101, 1033, build_group([(16, 32, len(small), 1), (48, 32, len(large), 2)]))],
+        })
+        metadata = read_exe_metadata(path)
+        assert metadata['name'] == 'Mi Programa', metadata
+        assert metadata['company'] == 'Ejemplo S.A.'
+        assert metadata['version'] == '2.5.1.7'
+        assert metadata['strings']['FixedFileVersion'] == '2.5.1.7'
+        png = metadata['icon_png']
+        assert png.startswith(PNG_MAGIC)
+        width, height = struct.unpack_from('>II', png, 16)
+        assert (width, height) == (48, 48)
+        # Ejecutable sin recursos: sin nombre ni icono, pero sigue siendo PE
+        bare = os.path.join(temp_dir, 'vacio.exe')
+        build_pe(bare)
+        assert read_exe_metadata(bare) == {'name': None, 'company': None, 'version': None,
+                                           'strings': {}, 'icon_png': None}
+        # VERSIONINFO dañado: miles de nodos anidados (cada uno dice ocupar 64 KB) no deben romper la instalación
+        nested = os.path.join(temp_dir, 'danado.exe')
+        build_pe(nested, {RT_VERSION: [(1, 1033, (struct.pack('<HHH', 0xFFFF, 0, 0) + b'\x00\x00') * 5000)]})
+        assert read_exe_metadata(nested)['strings'] == {}
+        print(f"✅ {metadata['name']} {metadata['version']} con icono {width}x{height}")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def build_palette_dib(width, height, colors_used, palette, index):
+    """Imagen de RT_ICON de 8 bits con paleta; todos los píxeles usan index"""
+    header = struct.pack('<IiiHHIIiiII', 40, width, height * 2, 1, 8, 0, 0, 0, 0, colors_used, 0)
+    rows = bytes([index]) * (((width * 8 + 31) // 32) * 4 * height)
+    mask = b'\x00' * (((width + 31) // 32) * 4 * height)
+    return header + palette + rows + mask
+
+def test_damaged_icon():
+    """Prueba que una paleta corta o un índice fuera de ella no rompen la lectura del ejecutable"""
+    print("\n🧪 Probando iconos dañados...")
+    # Índice 5 con solo dos colores en la paleta: se pinta en negro
+    png = dib_to_png(build_palette_dib(16, 16, 2, b'\x00\x00\xff\x00' * 2, 5))
+    assert png.startswith(PNG_MAGIC)
+    # La paleta dice 256 colores pero el recurso termina antes
+    truncated = build_palette_dib(16, 16, 0, b'\x00\x00\xff', 0)[:40 + 3]
+    assert dib_to_png(truncated) is None
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, 'setup.exe')
+        build_pe(path, {
+            RT_VERSION: [(1, 1033, build_version_info({'ProductName': 'Mi Programa'}))],
+            RT_ICON: [(1, 1033, truncated)],
+            RT_GROUP_ICON: [(101, 1033, build_group([(16, 8, len(truncated), 1)]))],
+        })
+        metadata = read_exe_metadata(path)
+        assert metadata['name'] == 'Mi Programa' and metadata['icon_png'] is None, metadata
+        print("✅ Icono dañado descartado; el resto de los metadatos se conserva")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas de cabeceras PE...")
+    test_manifest_version()
+    test_without_manifest()
+    test_version_and_icon()
+    test_damaged_icon()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para compartir archivos repetidos entre prefijos de Wine/Proton
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.utils import prefix_dedup
+from src.utils.wine_pool import server_dir, is_server_running
+
+SIZE = 64 * 1024
+
+def make_prefix(wine_root, system_data, mono_data):
+    for relative, data in (('drive_c/windows/system32/shell32.dll', system_data),
+                           ('drive_c/windows/mono/mono-2.0/lib/mscorlib.dll', mono_data),
+                           ('drive_c/windows/system32/pequeño.dll', b'x' * 100)):
+        path = os.path.join(wine_root, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+    with open(os.path.join(wine_root, 'system.reg'), 'w') as f:
+        f.write('WINE REGISTRY Version 2\n')
+
+def test_dedup():
+    """Prueba que los duplicados se comparten, que se informa lo ahorrado y que solo se repasa lo que cambió"""
+    print("🧪 Probando deduplicación entre prefijos...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        wine_base = os.path.join(temp_dir, 'wine-prefixes')
+        proton_base = os.path.join(temp_dir, 'proton-prefixes')
+        roots = (('wine', wine_base), ('proton', proton_base))
+        system_data = os.urandom(SIZE)
+        mono_data = os.urandom(SIZE)
+        prefixes = [os.path.join(wine_base, 'uno'), os.path.join(wine_base, 'dos'),
+                    os.path.join(proton_base, 'tres', 'pfx')]
+        for wine_root in prefixes:
+            make_prefix(wine_root, system_data, mono_data)
+        state_path = os.path.join(temp_dir, 'estado.json')
+
+        summary = prefix_dedup.deduplicate_prefixes(roots, state_path)
+        assert summary['scanned'] == 3 and summary['hashed'] == 6, summary
+        mono = [os.path.join(wine_root, 'drive_c/windows/mono/mono-2.0/lib/mscorlib.dll') for wine_root in prefixes]
+        system = [os.path.join(wine_root, 'drive_c/windows/system32/shell32.dll') for wine_root in prefixes]
+        # Mono se puede enlazar; system32 solo se comparte si hay reflink (copia diferida)
+        assert len({os.stat(path).st_ino for path in mono}) == 1
+        if summary['reflink']:
+            assert summary['reflink'] == 4 and summary['saved'] == 6 * SIZE, summary
+        else:
+            assert summary['hardlink'] == 2 and summary['saved'] == 2 * SIZE, summary
+            assert len({os.stat(path).st_ino for path in system}) == 3
+        for path in mono + system:
+            with open(path, 'rb') as f:
+                assert f.read() in (system_data, mono_data)
+        assert not [name for name in os.listdir(os.path.dirname(system[1])) if 'dotinstaller' in name]
+
+        # Nada cambió: no se recorre ningún prefijo
+        assert prefix_dedup.deduplicate_prefixes(roots, state_path)['scanned'] == 0
+
+        # Un prefijo nuevo solo obliga a leer ese prefijo; el resto sale del estado
+        nuevo = os.path.join(wine_base, 'cuatro')
+        make_prefix(nuevo, system_data, mono_data)
+        summary = prefix_dedup.deduplicate_prefixes(roots, state_path)
+        assert summary['scanned'] == 1 and summary['hashed'] == 2, summary
+        assert os.stat(os.path.join(nuevo, 'drive_c/windows/mono/mono-2.0/lib/mscorlib.dll')).st_ino == os.stat(mono[0]).st_ino
+        print(f"✅ Duplicados compartidos ({'reflink' if summary['reflink'] else 'enlaces duros en Mono'}); "
+              f"{summary['saved']} bytes ahorrados en la última pasada")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_rewritten_canonical():
+    """Prueba que un original reescrito en su sitio no se copia a los demás prefijos"""
+    print("🧪 Probando originales reescritos desde la última pasada...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        wine_base = os.path.join(temp_dir, 'wine-prefixes')
+        roots = (('wine', wine_base),)
+        state_path = os.path.join(temp_dir, 'estado.json')
+        original = os.urandom(SIZE)
+        uno = os.path.join(wine_base, 'uno')
+        # Otro archivo del mismo tamaño hace que se calcule y guarde el hash del original
+        make_prefix(uno, os.urandom(SIZE), original)
+        prefix_dedup.deduplicate_prefixes(roots, state_path)
+
+        # Reescritura en el sitio: cambia el archivo pero no las fechas de los directorios
+        mono = 'drive_c/windows/mono/mono-2.0/lib/mscorlib.dll'
+        path = os.path.join(uno, mono)
+        st = os.stat(path)
+        with open(path, 'r+b') as f:
+            f.write(os.urandom(SIZE))
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        dos = os.path.join(wine_base, 'dos')
+        make_prefix(dos, os.urandom(SIZE), original)
+        summary = prefix_dedup.deduplicate_prefixes(roots, state_path)
+        with open(os.path.join(dos, mono), 'rb') as f:
+            assert f.read() == original
+        assert summary['saved'] == 0, summary
+        # El prefijo del original desfasado se vuelve a leer en la siguiente pasada
+        assert prefix_dedup.deduplicate_prefixes(roots, state_path)['scanned'] == 1
+        print("✅ El original reescrito se descarta y su prefijo se repasa")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_stale_server():
+    """Prueba que un socket huérfano no cuenta como wineserver vivo y un candado tomado sí"""
+    print("🧪 Probando detección de wineserver por el candado...")
+    temp_dir = tempfile.mkdtemp()
+    directory = None
+    try:
+        prefix = os.path.join(temp_dir, 'prefijo')
+        os.makedirs(prefix)
+        directory = server_dir(prefix)
+        assert not is_server_running(prefix)
+        os.makedirs(directory, mode=0o700)
+        for name in ('socket', 'lock'):
+            open(os.path.join(directory, name), 'w').close()
+        assert not is_server_running(prefix)
+        # Otro proceso con el candado (como wineserver); en el mismo proceso lockf no choca
+        holder = subprocess.Popen([sys.executable, '-c', (
+            "import fcntl, os, sys, time\n"
+            "fd = os.open(sys.argv[1], os.O_RDWR)\n"
+            "fcntl.lockf(fd, fcntl.LOCK_EX)\n"
+            "print('ok', flush=True)\n"
+            "time.sleep(30)\n"), os.path.join(directory, 'lock')], stdout=subprocess.PIPE, text=True)
+        try:
+            assert holder.stdout.readline().strip() == 'ok'
+            assert is_server_running(prefix)
+        finally:
+            holder.kill()
+            holder.wait()
+        assert not is_server_running(prefix)
+        print("✅ Solo el candado tomado indica un wineserver vivo")
+    finally:
+        if directory:
+            shutil.rmtree(directory, ignore_errors=True)
+        shutil.rmtree(temp_dir)
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas de deduplicación de prefijos...")
+    test_dedup()
+    test_rewritten_canonical()
+    test_stale_server()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
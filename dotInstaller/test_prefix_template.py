@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para las plantillas de prefijos de Wine/Proton
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.utils.prefix_template import ensure_template, clone_tree, template_path, READY_MARKER
+
+def fake_boot(calls):
+    """Simula wineboot: registro, drive_c, mono y los enlaces de dosdevices"""
+    def boot(prefix):
+        calls.append(prefix)
+        for name, data in (('system.reg', b'WINE REGISTRY\n'), ('user.reg', b'WINE REGISTRY\n'),
+                           ('drive_c/windows/system32/kernel32.dll', b'MZ' + b'\x00' * 1000),
+                           ('drive_c/windows/mono/mono-2.0/lib/mscorlib.dll', b'MZ' + b'\x01' * 5000)):
+            path = os.path.join(prefix, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+        os.makedirs(os.path.join(prefix, 'dosdevices'))
+        os.symlink('../drive_c', os.path.join(prefix, 'dosdevices', 'c:'))
+        os.symlink('/', os.path.join(prefix, 'dosdevices', 'z:'))
+        return True
+    return boot
+
+def test_template_and_clone():
+    """Prueba que la plantilla se arranca una vez y cada clon es independiente"""
+    print("🧪 Probando plantilla y clonado de prefijos...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        base = os.path.join(temp_dir, 'plantillas')
+        calls = []
+        template = ensure_template('wine', 'wine-8.0', fake_boot(calls), base)
+        assert template == template_path('wine', 'wine-8.0', base)
+        assert ensure_template('wine', 'wine-8.0', fake_boot(calls), base) == template
+        assert len(calls) == 1, calls
+        assert os.path.exists(os.path.join(template, READY_MARKER))
+
+        prefix = os.path.join(temp_dir, 'prefijos', 'miapp')
+        counts = clone_tree(template, prefix)
+        assert sum(counts.values()) == 4, counts
+        assert not os.path.exists(os.path.join(prefix, READY_MARKER))
+        assert os.readlink(os.path.join(prefix, 'dosdevices', 'c:')) == '../drive_c'
+        assert os.path.isdir(os.path.join(prefix, 'dosdevices', 'c:', 'windows'))
+        # El registro de cada aplicación es suyo
+        with open(os.path.join(prefix, 'system.reg'), 'ab') as f:
+            f.write(b'[Software\\\\MiApp]\n')
+        with open(os.path.join(template, 'system.reg'), 'rb') as f:
+            assert f.read() == b'WINE REGISTRY\n'
+        assert not os.path.samefile(os.path.join(prefix, 'system.reg'), os.path.join(template, 'system.reg'))
+        print(f"✅ Plantilla arrancada una vez y clonada: {counts}")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_failed_boot_and_upgrade():
+    """Prueba que un arranque fallido no deja plantilla y que las versiones viejas se borran"""
+    print("\n🧪 Probando arranque fallido y cambio de versión...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        assert ensure_template('wine', 'wine-7.0', lambda prefix: False, temp_dir) is None
+        assert os.listdir(temp_dir) == []
+        old = ensure_template('wine', 'wine-7.0', fake_boot([]), temp_dir)
+        proton = ensure_template('proton', 'proton-8.0-5', fake_boot([]), temp_dir)
+        new = ensure_template('wine', 'wine 8.0 (Staging)', fake_boot([]), temp_dir)
+        assert os.path.basename(new) == 'wine-wine_8.0_Staging'
+        assert not os.path.exists(old) and os.path.exists(proton) and os.path.exists(new)
+        print("✅ Sin plantillas a medias y solo la versión actual de cada tipo")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas de plantillas de prefijos...")
+    test_template_and_clone()
+    test_failed_boot_and_upgrade()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
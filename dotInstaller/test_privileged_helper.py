@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el auxiliar con privilegios (con el auxiliar local de eco)
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.core import privileged
+from src.core.privileged import PrivilegedHelper, PrivilegedError, HELPER_SCRIPT, build_command, is_trusted_path
+
+def test_allow_list():
+    """Prueba que solo se construyen órdenes de la lista permitida"""
+    print("🧪 Probando lista de operaciones permitidas...")
+    assert build_command('apt-remove', ['hello-test'])[-1] == 'hello-test'
+    assert '--allow-downgrades' not in build_command('apt-install', ['hello-test'])
+    for op, args in [('rm', ['-rf', '/']), ('apt-remove', ['--purge-all']), ('apt-remove', ['foo; reboot']),
+                     ('apt-install', ['/tmp/no-existe.deb']), ('apt-install', []), ('apt-update', ['x']),
+                     ('apt-reinstall', ['hello-test'])]:
+        try:
+            build_command(op, args)
+            assert False, f"Debería rechazar {op} {args}"
+        except ValueError as e:
+            print(f"✅ Rechazado: {e}")
+
+def test_stand_in_helper():
+    """Prueba que varias operaciones usan el mismo proceso auxiliar y los .deb locales uno aparte"""
+    print("\n🧪 Probando auxiliar local...")
+    temp_dir = tempfile.mkdtemp()
+    helper = PrivilegedHelper(launcher=[sys.executable, HELPER_SCRIPT, '--echo'])
+    launches = []
+    real_launch = helper._launch
+    helper._launch = lambda extra=(): launches.append(list(extra)) or real_launch(extra)
+    try:
+        deb = os.path.join(temp_dir, 'hello.deb')
+        with open(deb, 'wb') as f:
+            f.write(b'!<arch>\n')
+        result = helper.run('apt-update')
+        assert result['returncode'] == 0 and result['output'] == 'apt-get update\n'
+        pid = helper._process.pid
+
+        # Un .deb local pide autenticarse otra vez: auxiliar de una sola petición
+        lines = []
+        result = helper.run('apt-install', [deb, 'libfoo1'], lines.append)
+        assert result['returncode'] == 0, result
+        assert lines == [f"apt-get install -y -o APT::Status-Fd=1 -o Dpkg::Use-Pty=0 {deb} libfoo1"], lines
+        lines = []
+        helper.run('apt-reinstall', [deb], lines.append)
+        assert lines[0].startswith('apt-get install -y --reinstall --allow-downgrades'), lines
+        assert launches == [[], ['--once'], ['--once']], launches
+        # El auxiliar de la sesión no acepta rutas locales aunque se le pidan directamente
+        result = helper._exchange(helper._socket_path, {'op': 'apt-install', 'args': [deb]})
+        assert 'autenticarse' in result['error'], result
+
+        result = helper.run('apt-remove', ['--force'])
+        assert result['returncode'] != 0 and 'no permitido' in result['error']
+        result = helper.run('apt-install', ['hello-test'])
+        assert result['returncode'] == 0 and result['output'].startswith('apt-get install -y')
+        assert helper._process.pid == pid
+        print("✅ Operaciones de la sesión con un solo auxiliar; .deb locales con su propia autenticación")
+
+        process = helper._process
+        helper.stop()
+        assert process.returncode == 0 and not helper.is_running()
+        print("✅ El auxiliar termina al cerrar la sesión")
+    finally:
+        helper.stop()
+        shutil.rmtree(temp_dir)
+
+def test_idle_timeout():
+    """Prueba que el auxiliar termina solo tras un rato sin peticiones"""
+    print("\n🧪 Probando tiempo de espera del auxiliar...")
+    helper = PrivilegedHelper(launcher=[sys.executable, HELPER_SCRIPT, '--echo', '--idle-timeout', '1'])
+    try:
+        assert helper.run('apt-update')['returncode'] == 0
+        process = helper._process
+        # Entre peticiones no queda ninguna conexión abierta que lo mantenga vivo
+        process.wait(timeout=5)
+        assert not helper.is_running()
+        assert helper.run('apt-update')['returncode'] == 0 and helper._process is not process
+        print("✅ El auxiliar sale tras el tiempo de espera y se relanza al hacer falta")
+    finally:
+        helper.stop()
+
+def test_trusted_path():
+    """Prueba que pkexec no lanza un auxiliar que el usuario pueda modificar"""
+    print("\n🧪 Probando ubicación del auxiliar...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        script = os.path.join(temp_dir, 'helper.py')
+        with open(script, 'w') as f:
+            f.write('')
+        # /tmp lo puede escribir cualquiera
+        assert not is_trusted_path(script)
+        assert not is_trusted_path(os.path.join(temp_dir, 'no-existe'))
+        print("✅ Auxiliar en un directorio modificable rechazado")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_direct_fallback():
+    """Prueba que sin auxiliar instalado cada orden permitida se lanza directamente con pkexec"""
+    print("\n🧪 Probando pkexec directo sin auxiliar instalado...")
+    real_find = privileged.find_helper_script
+    privileged.find_helper_script = lambda: None
+    # En lugar de pkexec, un intérprete que repite la orden recibida
+    helper = PrivilegedHelper(direct_launcher=[sys.executable, '-c', 'import sys; print(" ".join(sys.argv[1:]))'])
+    try:
+        lines = []
+        result = helper.run('apt-remove', ['hello-test'], lines.append)
+        assert result['returncode'] == 0, result
+        assert lines == ['apt-get remove --purge -y hello-test'], lines
+        assert not helper.is_running()
+        # La lista permitida se aplica igual que en el auxiliar
+        result = helper.run('apt-remove', ['foo; reboot'])
+        assert result['returncode'] != 0 and 'no permitido' in result['error'], result
+        print("✅ Misma orden permitida con una autenticación por operación")
+    finally:
+        privileged.find_helper_script = real_find
+
+def test_failed_start():
+    """Prueba que una autenticación cancelada se informa como error"""
+    print("\n🧪 Probando autenticación cancelada...")
+    helper = PrivilegedHelper(launcher=[sys.executable, '-c', 'import sys; sys.exit(126)', '--'])
+    try:
+        helper.run('apt-update')
+        assert False, "Debería fallar"
+    except PrivilegedError as e:
+        print(f"✅ {e}")
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas del auxiliar con privilegios...")
+    test_allow_list()
+    test_stand_in_helper()
+    test_idle_timeout()
+    test_trusted_path()
+    test_direct_fallback()
+    test_failed_start()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
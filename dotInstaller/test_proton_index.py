@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el lector VDF y el índice de versiones de Proton
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.utils.vdf import loads, VDFError
+from src.utils import proton_index
+
+LIBRARY_FOLDERS = """// Generado por Steam
+"libraryfolders"
+{
+\t"0"
+\t{
+\t\t"path"\t\t"%s"
+\t\t"label"\t\t""
+\t\t"apps"
+\t\t{
+\t\t\t"1493710"\t\t"1212160232"
+\t\t}
+\t}
+\t"1"
+\t{
+\t\t"path"\t\t"%s"
+\t}
+}
+"""
+
+COMPAT_TOOL = """"compatibilitytools"
+{
+  "compat_tools"
+  {
+    "GE-Proton9-2"
+    {
+      "install_path" "."
+      "display_name" "GE-Proton9-2"
+      "from_oslist"  "windows"
+      "to_oslist"    "linux"
+    }
+  }
+}
+"""
+
+def make_tool(directory, version_line):
+    os.makedirs(directory)
+    with open(os.path.join(directory, 'proton'), 'w') as f:
+        f.write('#!/usr/bin/env python3\n')
+    with open(os.path.join(directory, 'version'), 'w') as f:
+        f.write(version_line + '\n')
+
+def test_vdf():
+    """Prueba el lector VDF con comentarios, escapes y el formato antiguo"""
+    print("🧪 Probando lector VDF...")
+    data = loads('"a" { "b" "c \\"x\\"" // comentario\n "d" { } sin_comillas valor [$WIN32] }')
+    assert data == {'a': {'b': 'c "x"', 'd': {}, 'sin_comillas': 'valor'}}, data
+    for broken in ('"a" {', '"a" "b" }', '{ }', '"a'):
+        try:
+            loads(broken)
+            assert False, broken
+        except VDFError:
+            pass
+    print("✅ VDF leído correctamente")
+
+def test_index():
+    """Prueba el índice: todas las bibliotecas, versión más nueva y caché invalidada por fecha"""
+    print("\n🧪 Probando índice de Proton...")
+    temp_dir = tempfile.mkdtemp()
+    original = proton_index.SYSTEM_COMPAT_DIRS
+    proton_index.SYSTEM_COMPAT_DIRS = ()
+    proton_index._memory.update(signature=None, tools=None)
+    try:
+        root = os.path.join(temp_dir, 'Steam')
+        library = os.path.join(temp_dir, 'Juegos')
+        os.makedirs(os.path.join(root, 'steamapps', 'common'))
+        with open(os.path.join(root, 'steamapps', 'libraryfolders.vdf'), 'w') as f:
+            f.write(LIBRARY_FOLDERS % (root, library))
+        make_tool(os.path.join(root, 'steamapps', 'common', 'Proton 7.0'), '1660000000 proton-7.0-6')
+        make_tool(os.path.join(library, 'steamapps', 'common', 'Proton 8.0'), '1690000000 proton-8.0-5')
+        os.makedirs(os.path.join(library, 'steamapps', 'common', 'Portal 2'))
+        ge = os.path.join(root, 'compatibilitytools.d', 'GE-Proton9-2')
+        make_tool(ge, '1700000000 GE-Proton9-2')
+        with open(os.path.join(ge, 'compatibilitytool.vdf'), 'w') as f:
+            f.write(COMPAT_TOOL)
+
+        index_path = os.path.join(temp_dir, 'indice.json')
+        tools = proton_index.list_protons([root], index_path)
+        assert [tool['version'] for tool in tools] == ['GE-Proton9-2', 'proton-8.0-5', 'proton-7.0-6'], tools
+        assert proton_index.find_proton(roots=[root], index_path=index_path) == os.path.join(ge, 'proton')
+        assert proton_index.find_proton('Proton 7.0', [root], index_path).endswith('Proton 7.0/proton')
+
+        # Desde la caché en disco sin recorrer nada
+        proton_index._memory.update(signature=None, tools=None)
+        scans = []
+        real_scan = proton_index.scan_protons
+        proton_index.scan_protons = lambda roots: scans.append(roots) or real_scan(roots)
+        try:
+            assert len(proton_index.list_protons([root], index_path)) == 3
+            assert scans == []
+            # Borrar una versión cambia la fecha de su directorio: el índice se rehace
+            shutil.rmtree(os.path.join(root, 'steamapps', 'common', 'Proton 7.0'))
+            os.utime(os.path.join(root, 'steamapps', 'common'), ns=(1, 1))
+            assert len(proton_index.list_protons([root], index_path)) == 2
+            assert len(scans) == 1
+        finally:
+            proton_index.scan_protons = real_scan
+        print(f"✅ {len(tools)} versiones encontradas; la más nueva es {tools[0]['name']}")
+    finally:
+        proton_index.SYSTEM_COMPAT_DIRS = original
+        proton_index._memory.update(signature=None, tools=None)
+        shutil.rmtree(temp_dir)
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas del índice de Proton...")
+    test_vdf()
+    test_index()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
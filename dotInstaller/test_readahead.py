@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la precarga de las AppImages más lanzadas
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.data import database
+from src.utils import readahead
+from src.core import background
+
+def with_temp_db(test):
+    """Ejecuta la prueba con una base de datos y un registro de lanzamientos temporales"""
+    def wrapper():
+        temp_dir = tempfile.mkdtemp()
+        original_db, original_log = database.DB_PATH, readahead.LAUNCH_LOG
+        database.DB_PATH = os.path.join(temp_dir, 'prueba.db')
+        readahead.LAUNCH_LOG = os.path.join(temp_dir, 'launches.log')
+        try:
+            database.init_db()
+            test(temp_dir)
+        finally:
+            database.DB_PATH, readahead.LAUNCH_LOG = original_db, original_log
+            shutil.rmtree(temp_dir)
+    wrapper.__name__ = test.__name__
+    wrapper.__doc__ = test.__doc__
+    return wrapper
+
+def write_log(lines):
+    with open(readahead.LAUNCH_LOG, 'a', encoding='utf-8') as f:
+        f.write(''.join(lines))
+
+@with_temp_db
+def test_collect_launch_log(temp_dir):
+    """Prueba que el registro del wrapper se vuelca a la base de datos y se vacía"""
+    print("🧪 Probando registro de lanzamientos...")
+    write_log(['1700000000\tappimage\t/apps/a.AppImage\n',
+               '1700000100\tappimage\t/apps/a.AppImage\n',
+               '1700000050\tappimage\t/apps/b.AppImage\n',
+               'línea rota\n',
+               '1700000200\twine\t/prefijos/juego\n'])
+    assert readahead.collect_launch_log() == 4
+    assert not os.path.exists(readahead.LAUNCH_LOG)
+    assert readahead.collect_launch_log() == 0
+    top = database.get_top_launched('appimage', 5)
+    assert [(path, count) for path, count, _ in top] == [('/apps/a.AppImage', 2), ('/apps/b.AppImage', 1)], top
+    # Los lanzamientos nuevos se suman a los anteriores
+    write_log(['1700000300\tappimage\t/apps/b.AppImage\n'] * 2)
+    readahead.collect_launch_log()
+    assert database.get_top_launched('appimage', 1)[0][:2] == ('/apps/b.AppImage', 3)
+    assert database.get_top_launched('wine', 5)[0][0] == '/prefijos/juego'
+    print("✅ Lanzamientos contados y ordenados")
+
+@with_temp_db
+def test_warm_top_appimages(temp_dir):
+    """Prueba la precarga de las más lanzadas dentro del presupuesto"""
+    print("\n🧪 Probando precarga dentro del presupuesto...")
+    sizes = {'grande': 3000, 'media': 1500, 'pequeña': 500, 'rara': 100}
+    paths = {}
+    for name, size in sizes.items():
+        paths[name] = os.path.join(temp_dir, f'{name}.AppImage')
+        with open(paths[name], 'wb') as f:
+            f.write(b'\0' * size)
+    launches = {'grande': 9, 'media': 5, 'pequeña': 3, 'rara': 1, 'borrada': 7}
+    write_log([f'1700000000\tappimage\t{paths.get(name, "/no/existe.AppImage")}\n' * count
+               for name, count in launches.items()])
+
+    summary = readahead.warm_top_appimages(top_n=4, budget_bytes=2100, only_when_idle=False)
+    # grande no cabe; media y pequeña sí; rara queda fuera del top 4
+    assert summary['warmed'] == [paths['media'], paths['pequeña']], summary
+    assert summary['skipped'] == [paths['grande'], '/no/existe.AppImage'], summary
+    assert summary['bytes'] == 2000
+
+    # Los ajustes de la configuración se usan cuando no se pasan argumentos
+    database.set_setting('readahead_top_n', 1)
+    database.set_setting('readahead_budget_mb', 1)
+    summary = readahead.warm_top_appimages(only_when_idle=False)
+    assert summary['warmed'] == [paths['grande']], summary
+    print(f"✅ {len(summary['warmed'])} AppImage precargada con la configuración guardada")
+
+@with_temp_db
+def test_background_entry_point(temp_dir):
+    """Prueba la pasada sin interfaz y la programación con el autoarranque"""
+    print("\n🧪 Probando mantenimiento sin interfaz...")
+    database.set_setting('readahead_enabled', '0')
+    assert background.run_once() == {}
+    database.set_setting('readahead_enabled', '1')
+    assert 'readahead' in background.run_once()
+    assert f"WorkingDirectory={background.APP_DIR}" in background.service_unit()
+    assert '-m src.core.background' in background.service_unit()
+    assert '--loop' in background.autostart_entry()
+    print("✅ Pasada de mantenimiento y unidades de systemd correctas")
+
+@with_temp_db
+def test_concurrent_collect(temp_dir):
+    """Prueba que la ventana y el mantenimiento pueden volcar el registro a la vez sin perder líneas"""
+    print("\n🧪 Probando volcado simultáneo del registro...")
+    real_datetime = readahead.datetime
+    nested = []
+
+    class InterruptingDatetime:
+        """Mientras se lee el registro llega otro lanzamiento y otra pasada lo vuelca"""
+        @staticmethod
+        def fromtimestamp(timestamp):
+            if not nested:
+                nested.append(None)
+                write_log(['1700000100\tappimage\t/apps/b.AppImage\n'] * 3)
+                nested[0] = readahead.collect_launch_log()
+            return real_datetime.fromtimestamp(timestamp)
+
+        now = real_datetime.now
+
+    write_log(['1700000000\tappimage\t/apps/a.AppImage\n'] * 5)
+    readahead.datetime = InterruptingDatetime
+    try:
+        assert readahead.collect_launch_log() == 5
+    finally:
+        readahead.datetime = real_datetime
+    assert nested == [3]
+    top = database.get_top_launched('appimage', 5)
+    assert [(path, count) for path, count, _ in top] == [('/apps/a.AppImage', 5), ('/apps/b.AppImage', 3)], top
+    assert not [name for name in os.listdir(temp_dir) if name.endswith('.processing')]
+    # Si otro proceso ya se llevó el registro no hay nada que volcar
+    assert readahead.collect_launch_log() == 0
+    print("✅ Cada pasada vuelca su propio registro")
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas de la precarga...")
+    test_collect_launch_log()
+    test_warm_top_appimages()
+    test_background_entry_point()
+    test_concurrent_collect()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la cola de trabajos por carriles
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.core.scheduler import JobScheduler, CANCELLED, DONE, FAILED, RUNNING
+
+LIMITS = {'dpkg': 1, 'appimage': 2, 'script': 2, 'wine': 3}
+
+class FakeInstaller:
+    """Instalador de juguete: anota las transacciones de .deb agrupadas"""
+
+    def __init__(self):
+        self.batches = []
+
+    def install_file(self, file_path, use_proton=None):
+        return True
+
+    def install_files(self, paths):
+        self.batches.append(list(paths))
+        return {path: True for path in paths}
+
+class Probe:
+    """Cuenta cuántos trabajos corren a la vez, en total y por carril"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = {}
+        self.peak = {}
+        self.order = []
+
+    def job(self, lane, name, gate=None):
+        def func(job):
+            with self.lock:
+                self.running[lane] = self.running.get(lane, 0) + 1
+                total = sum(self.running.values())
+                self.peak[lane] = max(self.peak.get(lane, 0), self.running[lane])
+                self.peak['total'] = max(self.peak.get('total', 0), total)
+                self.order.append(name)
+            if gate:
+                gate.wait(5)
+            else:
+                time.sleep(0.05)
+            with self.lock:
+                self.running[lane] -= 1
+            return True
+        return func
+
+def test_lanes():
+    """Prueba los límites por carril, la prioridad y los trabajos exclusivos"""
+    print("🧪 Probando carriles de la cola...")
+    scheduler = JobScheduler(installer=FakeInstaller(), limits=LIMITS)
+    probe = Probe()
+    jobs = [scheduler.submit('appimage', probe.job('appimage', f'a{i}'), f'a{i}') for i in range(5)]
+    jobs += [scheduler.submit('dpkg', probe.job('dpkg', f'd{i}'), f'd{i}') for i in range(3)]
+    jobs += [scheduler.submit('wine', probe.job('wine', f'w{i}'), f'w{i}') for i in range(4)]
+    for job in jobs:
+        assert job.wait(10) and job.state == DONE, job.name
+    assert probe.peak['appimage'] == 2 and probe.peak['dpkg'] == 1 and probe.peak['wine'] <= 3, probe.peak
+    assert probe.peak['total'] > 2, probe.peak
+
+    # Con el carril ocupado, los que esperan salen por prioridad
+    gate = threading.Event()
+    probe = Probe()
+    first = scheduler.submit('dpkg', probe.job('dpkg', 'primero', gate), 'primero')
+    low = scheduler.submit('dpkg', probe.job('dpkg', 'baja'), 'baja', priority=0)
+    high = scheduler.submit('dpkg', probe.job('dpkg', 'alta'), 'alta', priority=5)
+    assert [job.name for job in scheduler.jobs()['dpkg']] == ['alta', 'baja']
+    assert low.cancel() and low.state == CANCELLED
+    gate.set()
+    assert high.wait(10) and first.state == DONE
+    assert probe.order == ['primero', 'alta'], probe.order
+    assert not first.cancel()
+
+    # Un exclusivo espera a que no corra nada y no deja arrancar a nadie mientras tanto
+    gate = threading.Event()
+    probe = Probe()
+    busy = scheduler.submit('appimage', probe.job('appimage', 'ocupado', gate), 'ocupado')
+    script = scheduler.submit('script', probe.job('script', 'script'), 'script', exclusive=True)
+    after = scheduler.submit('wine', probe.job('wine', 'despues'), 'despues')
+    time.sleep(0.1)
+    assert probe.order == ['ocupado'], probe.order
+    gate.set()
+    assert script.wait(10) and after.wait(10)
+    assert probe.order == ['ocupado', 'script', 'despues'], probe.order
+    assert busy.state == DONE
+
+    # Un trabajo de otro carril que necesita apt espera a que el carril dpkg quede libre
+    gate = threading.Event()
+    probe = Probe()
+    apt = scheduler.submit('dpkg', probe.job('dpkg', 'apt', gate), 'apt')
+    def needs_apt(job):
+        with scheduler.lane_slot('dpkg'):
+            probe.order.append('wine-apt')
+        return True
+    wine = scheduler.submit('wine', needs_apt, 'wine')
+    time.sleep(0.1)
+    assert wine.state == RUNNING and probe.order == ['apt'], probe.order
+    queued = scheduler.submit('dpkg', probe.job('dpkg', 'deb'), 'deb')
+    gate.set()
+    assert wine.wait(10) and queued.wait(10) and apt.state == DONE
+    assert probe.order.index('wine-apt') > 0 and probe.peak['dpkg'] == 1, probe.order
+    # Desde un exclusivo el hueco está libre: no hay bloqueo mutuo
+    inside = scheduler.submit('script', needs_apt, 'script', exclusive=True)
+    assert inside.wait(10) and inside.state == DONE
+
+    failing = scheduler.submit('script', lambda job: 1 / 0, 'roto')
+    assert failing.wait(10) and failing.state == FAILED and isinstance(failing.error, ZeroDivisionError)
+    print("✅ Límites, prioridad, exclusivos y cancelación correctos")
+
+def test_deb_batching():
+    """Prueba que los .deb en cola se instalan en una sola transacción"""
+    print("🧪 Probando agrupación de paquetes .deb...")
+    installer = FakeInstaller()
+    scheduler = JobScheduler(installer=installer, limits=LIMITS)
+    gate = threading.Event()
+    blocker = scheduler.submit('dpkg', lambda job: gate.wait(5), 'apt')
+    debs = [scheduler.submit_install(f'/tmp/paquete{i}.deb') for i in range(3)]
+    gate.set()
+    for job in debs:
+        assert job.wait(10) and job.state == DONE and job.result is True
+    assert blocker.state == DONE
+    assert installer.batches == [[f'/tmp/paquete{i}.deb' for i in range(3)]], installer.batches
+    print("✅ 3 paquetes instalados en una transacción")
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas de la cola de trabajos...")
+    test_lanes()
+    test_deb_batching()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la detección de instaladores de Windows y sus opciones silenciosas
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.utils.pe import RT_VERSION
+from src.utils.silent_install import detect_installer, silent_command, MSI_MAGIC
+from test_pe import build_pe, build_version_info
+
+def make_installer(path, overlay=b'', strings=None):
+    resources = {RT_VERSION: [(1, 1033, build_version_info(strings))]} if strings else None
+    build_pe(path, resources)
+    with open(path, 'ab') as f:
+        f.write(overlay)
+
+def test_detection():
+    """Prueba las firmas del overlay, la información de versión y los .msi"""
+    print("🧪 Probando detección de instaladores...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        cases = {
+            'nsis.exe': (b'\x00\x00\x00\x00\xef\xbe\xad\xdeNullsoftInst' + b'\x00' * 64, None, 'nsis'),
+            'inno.exe': (b'zlb\x1a' + b'\x00' * 32 + b'Inno Setup Setup Data (6.2.0)', None, 'inno'),
+            'inno-version.exe': (b'', {'Comments': 'This installation was built with Inno Setup.'}, 'inno'),
+            'installshield.exe': (MSI_MAGIC + b'\x00' * 64, {'ProductName': 'Juego'}, 'installshield'),
+            'normal.exe': (b'', {'ProductName': 'Editor'}, None),
+        }
+        for filename, (overlay, strings, expected) in cases.items():
+            path = os.path.join(temp_dir, filename)
+            make_installer(path, overlay, strings)
+            assert detect_installer(path) == expected, (filename, detect_installer(path))
+
+        msi = os.path.join(temp_dir, 'paquete.msi')
+        with open(msi, 'wb') as f:
+            f.write(MSI_MAGIC + b'\x00' * 504)
+        assert detect_installer(msi) == 'msi'
+        assert detect_installer(os.path.join(temp_dir, 'no-existe.exe')) is None
+
+        assert silent_command('C:/setup.exe', 'inno')[:2] == ['C:/setup.exe', '/VERYSILENT']
+        assert silent_command('setup.exe', 'nsis') == ['setup.exe', '/S']
+        assert silent_command(msi, 'msi') == ['msiexec', '/i', msi, '/qn', '/norestart']
+        assert silent_command('setup.exe', None) == ['setup.exe']
+        print(f"✅ {len(cases) + 1} instaladores clasificados correctamente")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas de instalación desatendida...")
+    test_detection()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
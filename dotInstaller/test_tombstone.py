@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el borrado de prefijos en segundo plano con lápidas
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.utils.tombstone import entomb, is_tombstone, remove_in_background, remove_tree, purge_tombstones
+
+def make_prefix(path):
+    """Prefijo de juguete con varios niveles, un enlace simbólico y un archivo con dos enlaces"""
+    for relative in ('drive_c/windows/system32', 'drive_c/Program Files/App/datos', 'dosdevices'):
+        os.makedirs(os.path.join(path, relative))
+    for i in range(20):
+        with open(os.path.join(path, 'drive_c/windows/system32', f'lib{i}.dll'), 'wb') as f:
+            f.write(b'x' * 8192)
+    with open(os.path.join(path, 'drive_c/Program Files/App/datos/app.dat'), 'wb') as f:
+        f.write(b'y' * 8192)
+    with open(os.path.join(path, 'system.reg'), 'w') as f:
+        f.write('WINE REGISTRY Version 2\n')
+    os.symlink('../drive_c', os.path.join(path, 'dosdevices', 'c:'))
+
+def test_tombstone():
+    """Prueba que el prefijo desaparece al instante y se borra después contando lo liberado"""
+    print("🧪 Probando lápidas de prefijos...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        prefix = os.path.join(temp_dir, 'juego')
+        make_prefix(prefix)
+        compartido = os.path.join(temp_dir, 'compartido.dll')
+        os.link(os.path.join(prefix, 'drive_c/windows/system32/lib0.dll'), compartido)
+
+        tomb = entomb(prefix)
+        assert not os.path.exists(prefix) and os.path.isdir(tomb)
+        assert is_tombstone(os.path.basename(tomb))
+        assert entomb(prefix) is None
+
+        done = threading.Event()
+        result = {}
+        remove_in_background([tomb], lambda freed, failed: result.update(freed=freed, failed=failed) or done.set())
+        assert done.wait(30)
+        assert not os.path.exists(tomb) and result['failed'] == []
+        # 20 archivos de system32 + app.dat, menos el que sigue enlazado fuera
+        assert result['freed'] >= 20 * 8192, result
+        with open(compartido, 'rb') as f:
+            assert f.read() == b'x' * 8192
+        assert sorted(os.listdir(temp_dir)) == ['compartido.dll']
+
+        # Una lápida que quedó a medias se termina de borrar al arrancar
+        make_prefix(os.path.join(temp_dir, 'otro'))
+        leftover = entomb(os.path.join(temp_dir, 'otro'))
+        thread = purge_tombstones([temp_dir])
+        thread.join(30)
+        assert not os.path.exists(leftover)
+        assert purge_tombstones([temp_dir]) is None
+        assert remove_tree(os.path.join(temp_dir, 'no-existe')) == (0, [os.path.join(temp_dir, 'no-existe')])
+        print(f"✅ Prefijo retirado y borrado en segundo plano ({result['freed']} bytes liberados)")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas de lápidas...")
+    test_tombstone()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el grupo de wineserver en espera de los prefijos más usados
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.data import database
+from src.utils import readahead, wine_pool
+from src.core import background
+
+def make_prefix(base, name, registry=True):
+    prefix = os.path.join(base, name)
+    os.makedirs(prefix)
+    if registry:
+        with open(os.path.join(prefix, 'system.reg'), 'w') as f:
+            f.write('WINE REGISTRY Version 2\n')
+    return prefix
+
+def test_warm_top_prefixes():
+    """Prueba el orden por lanzamientos, los prefijos antiguos o rotos y el tamaño del grupo"""
+    print("🧪 Probando grupo de wineserver en espera...")
+    temp_dir = tempfile.mkdtemp()
+    original_db, original_log = database.DB_PATH, readahead.LAUNCH_LOG
+    real_start, real_running = wine_pool.start_server, wine_pool.is_server_running
+    database.DB_PATH = os.path.join(temp_dir, 'prueba.db')
+    readahead.LAUNCH_LOG = os.path.join(temp_dir, 'launches.log')
+    started = []
+    try:
+        database.init_db()
+        prefixes = {name: make_prefix(temp_dir, name) for name in ('editor', 'juego', 'viejo', 'activo', 'otro')}
+        prefixes['roto'] = make_prefix(temp_dir, 'roto', registry=False)
+        now = int(time.time())
+        launches = {'editor': (6, now), 'juego': (4, now), 'viejo': (9, now - 30 * 86400),
+                    'activo': (5, now), 'otro': (2, now), 'roto': (8, now)}
+        # Las mismas líneas que escribe el lanzador de cada prefijo
+        with open(readahead.LAUNCH_LOG, 'w') as f:
+            for name, (count, timestamp) in launches.items():
+                f.write(f"{timestamp}\twine\t{prefixes[name]}\n" * count)
+            f.write(f"{now}\tappimage\t/apps/a.AppImage\n" * 20)
+
+        wine_pool.is_server_running = lambda prefix: prefix == prefixes['activo']
+        wine_pool.start_server = lambda prefix, idle_seconds, wineserver=None: started.append((prefix, idle_seconds)) or True
+        summary = wine_pool.warm_top_prefixes(pool_size=3, idle_minutes=5, recent_days=7, only_when_idle=False)
+
+        # viejo (9) no se usa hace una semana y roto no tiene registro; activo ya tenía servidor
+        assert summary['skipped'] == [prefixes['viejo'], prefixes['roto']], summary
+        assert summary['running'] == [prefixes['activo']], summary
+        assert summary['started'] == [prefixes['editor'], prefixes['juego']], summary
+        assert started == [(prefixes['editor'], 300), (prefixes['juego'], 300)], started
+        # El registro de lanzamientos se vació en la base de datos; las AppImages van aparte
+        assert not os.path.exists(readahead.LAUNCH_LOG)
+        assert [path for path, _, _ in database.get_top_launched('wine', 2)] == [prefixes['viejo'], prefixes['roto']]
+
+        # Con la configuración guardada y un servidor que no arranca
+        database.set_setting('wine_pool_size', 1)
+        wine_pool.start_server = lambda prefix, idle_seconds, wineserver=None: False
+        summary = wine_pool.warm_top_prefixes(only_when_idle=False)
+        # Se miran pool_size * 3 candidatos: editor no arranca y activo queda fuera
+        assert summary['started'] == [] and summary['running'] == [], summary
+        assert summary['skipped'] == [prefixes['viejo'], prefixes['roto'], prefixes['editor']], summary
+        print(f"✅ Grupo de {len(started)} prefijos con los más lanzados recientemente")
+    finally:
+        wine_pool.start_server, wine_pool.is_server_running = real_start, real_running
+        database.DB_PATH, readahead.LAUNCH_LOG = original_db, original_log
+        shutil.rmtree(temp_dir)
+
+def test_background_pool():
+    """Prueba que la pasada sin interfaz solo calienta prefijos si el grupo está activado"""
+    print("\n🧪 Probando grupo de Wine en el mantenimiento sin interfaz...")
+    temp_dir = tempfile.mkdtemp()
+    original_db, original_log = database.DB_PATH, readahead.LAUNCH_LOG
+    real_warm = background.warm_top_prefixes
+    database.DB_PATH = os.path.join(temp_dir, 'prueba.db')
+    readahead.LAUNCH_LOG = os.path.join(temp_dir, 'launches.log')
+    try:
+        database.init_db()
+        database.set_setting('readahead_enabled', '0')
+        background.warm_top_prefixes = lambda: {'started': ['x']}
+        assert background.run_once() == {}
+        database.set_setting('wine_pool_enabled', '1')
+        assert background.run_once() == {'wine_pool': {'started': ['x']}}
+        print("✅ El grupo de Wine sigue la configuración")
+    finally:
+        background.warm_top_prefixes = real_warm
+        database.DB_PATH, readahead.LAUNCH_LOG = original_db, original_log
+        shutil.rmtree(temp_dir)
+
+def test_launcher_quoting():
+    """Prueba que el lanzador no interpreta los nombres del prefijo ni del ejecutable"""
+    print("\n🧪 Probando lanzador con nombres peligrosos...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        prefix = make_prefix(temp_dir, 'setup$(touch PWNED)`touch PWNED`"x')
+        exe_path = os.path.join(prefix, 'drive_c', 'a "b" $HOME.exe')
+        os.makedirs(os.path.dirname(exe_path))
+        # Un wine falso que escribe lo que recibe
+        fake_wine = os.path.join(temp_dir, 'wine $x')
+        with open(fake_wine, 'w') as f:
+            f.write('#!/bin/sh\nprintf "%s\\n" "$WINEPREFIX" "$@"\n')
+        os.chmod(fake_wine, 0o755)
+        script = os.path.join(temp_dir, 'launcher.sh')
+        with open(script, 'w') as f:
+            f.write(wine_pool.launcher_script(prefix, exe_path, fake_wine, ['-x']))
+        result = subprocess.run(['bash', script, 'arg'], cwd=temp_dir, capture_output=True, text=True,
+                                env=dict(os.environ, HOME=temp_dir), timeout=30)
+        assert result.stdout.splitlines() == [prefix, exe_path, '-x', 'arg'], result
+        assert not os.path.exists(os.path.join(temp_dir, 'PWNED'))
+        with open(os.path.join(temp_dir, '.local/share/dotInstaller/launches.log')) as f:
+            assert f.read().split('\t', 1)[1] == f"wine\t{prefix}\n"
+        print("✅ Rutas pasadas tal cual, sin ejecutar nada")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas del grupo de wineserver...")
+    test_warm_top_prefixes()
+    test_background_pool()
+    test_launcher_quoting()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el índice de programas instalados en los prefijos de Wine/Proton
+"""
+
+import os
+import shutil
+import struct
+import sys
+import tempfile
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.utils.lnk import parse_lnk, LINK_CLSID, HAS_LINK_INFO, HAS_WORKING_DIR, HAS_ARGUMENTS, IS_UNICODE
+from src.utils import wine_programs
+from src.utils.wine_pool import launcher_script
+
+SYSTEM_REG = r'''WINE REGISTRY Version 2
+;; All keys relative to \\Machine
+
+#arch=win64
+
+[Software\\Microsoft\\Windows\\CurrentVersion\\Uninstall\\Editor_is1] 1700000000
+"DisplayIcon"="C:\\Program Files\\Editor\\editor.exe,0"
+"DisplayName"="Editor de Texto"
+"DisplayVersion"="2.1"
+"Publisher"="Ejemplo S.A."
+"UninstallString"="\"C:\\Program Files\\Editor\\unins000.exe\""
+
+[Software\\Microsoft\\Windows\\CurrentVersion\\Uninstall\\{MONO}] 1700000000
+"DisplayName"="Wine Mono Runtime"
+
+[Software\\Wow6432Node\\Microsoft\\Windows\\CurrentVersion\\Uninstall\\Juego] 1700000000
+"DisplayIcon"="C:\\Program Files (x86)\\Juego\\unins000.exe"
+"DisplayName"="Juego"
+"InstallLocation"="C:\\Program Files (x86)\\Juego"
+'''
+
+def build_lnk(target, arguments='', working_dir=''):
+    """Acceso directo mínimo con LinkInfo (ruta local ANSI), directorio de trabajo y argumentos en UTF-16"""
+    flags = HAS_LINK_INFO | HAS_ARGUMENTS | IS_UNICODE | (HAS_WORKING_DIR if working_dir else 0)
+    header = struct.pack('<I', 0x4C) + LINK_CLSID + struct.pack('<I', flags) + b'\0' * (0x4C - 24)
+    path = target.encode('cp1252') + b'\0'
+    info = struct.pack('<IIIIIII', 0x1C + len(path) + 1, 0x1C, 1, 0, 0x1C, 0, 0x1C + len(path)) + path + b'\0'
+    strings = b''
+    # Las cadenas van en orden fijo: el directorio de trabajo antes que los argumentos
+    for value in ([working_dir] if working_dir else []) + [arguments]:
+        strings += struct.pack('<H', len(value)) + value.encode('utf-16-le')
+    return header + info + strings
+
+def make_file(path, data=b'MZ'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def test_lnk():
+    """Prueba la lectura de accesos directos"""
+    print("🧪 Probando lector de .lnk...")
+    link = parse_lnk(build_lnk('C:\\Juegos\\juego.exe', '-ventana', 'C:\\Juegos\\datos'))
+    assert link['target'] == 'C:\\Juegos\\juego.exe', link
+    assert link['arguments'] == '-ventana' and link['working_dir'] == 'C:\\Juegos\\datos', link
+    assert parse_lnk(b'no es un acceso directo') is None
+    print("✅ Acceso directo leído")
+
+def test_split_arguments():
+    """Prueba la separación de argumentos con las reglas de Windows"""
+    print("\n🧪 Probando argumentos de accesos directos...")
+    cases = {
+        '': [],
+        '-a  -b': ['-a', '-b'],
+        '"C:\\Program Files\\x" /s': ['C:\\Program Files\\x', '/s'],
+        '""': [''],
+        'a\\\\"b c"': ['a\\b c'],
+        'a\\"b': ['a"b'],
+        'C:\\dir\\': ['C:\\dir\\'],
+    }
+    for text, expected in cases.items():
+        assert wine_programs.split_arguments(text) == expected, (text, wine_programs.split_arguments(text))
+    print(f"✅ {len(cases)} líneas de órdenes separadas")
+
+def test_index():
+    """Prueba el índice: Uninstall, accesos directos y actualización por prefijo"""
+    print("\n🧪 Probando índice de programas...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        wine_base = os.path.join(temp_dir, 'wine-prefixes')
+        proton_base = os.path.join(temp_dir, 'proton-prefixes')
+        roots = (('wine', wine_base), ('proton', proton_base))
+        prefix = os.path.join(wine_base, 'editor')
+        drive_c = os.path.join(prefix, 'drive_c')
+        make_file(os.path.join(prefix, 'system.reg'), SYSTEM_REG.encode())
+        make_file(os.path.join(drive_c, 'Program Files', 'Editor', 'editor.exe'))
+        make_file(os.path.join(drive_c, 'Program Files', 'Editor', 'unins000.exe'))
+        # Carpeta escrita con otras mayúsculas que en el registro
+        make_file(os.path.join(drive_c, 'Program Files (x86)', 'JUEGO', 'Juego.exe'))
+        start_menu = os.path.join(drive_c, 'ProgramData', 'Microsoft', 'Windows', 'Start Menu', 'Programs')
+        make_file(os.path.join(start_menu, 'Juego', 'Juego.lnk'),
+                  build_lnk('C:\\Program Files (x86)\\Juego\\Juego.exe', '-lang es "perfil 1"', 'C:\\Program Files (x86)\\Juego\\bin'))
+        os.makedirs(os.path.join(drive_c, 'Program Files (x86)', 'JUEGO', 'bin'))
+        make_file(os.path.join(start_menu, 'Juego', 'Desinstalar.lnk'), build_lnk('C:\\Program Files (x86)\\Juego\\unins000.exe'))
+        make_file(os.path.join(drive_c, 'users', 'steamuser', 'Desktop', 'Herramienta.lnk'), build_lnk('C:\\Herramienta\\tool.exe'))
+        make_file(os.path.join(drive_c, 'Herramienta', 'tool.exe'))
+        # Prefijo de Proton: el registro está en pfx/
+        make_file(os.path.join(proton_base, 'vacio', 'pfx', 'system.reg'), b'WINE REGISTRY Version 2\n')
+
+        index_path = os.path.join(temp_dir, 'indice.json')
+        programs = wine_programs.list_programs(roots, index_path)
+        names = {program['name']: program for program in programs}
+        assert set(names) == {'Editor de Texto', 'Juego', 'Herramienta'}, names
+        assert names['Editor de Texto']['exe'] == os.path.join(drive_c, 'Program Files', 'Editor', 'editor.exe')
+        assert names['Editor de Texto']['version'] == '2.1'
+        assert names['Juego']['exe'] == os.path.join(drive_c, 'Program Files (x86)', 'JUEGO', 'Juego.exe')
+        assert names['Juego']['source'] == 'uninstall' and names['Herramienta']['source'] == 'lnk'
+        # El acceso directo aporta argumentos y directorio; sin él, la carpeta del ejecutable
+        assert names['Juego']['arguments'] == ['-lang', 'es', 'perfil 1'], names['Juego']
+        assert names['Juego']['working_dir'] == os.path.join(drive_c, 'Program Files (x86)', 'JUEGO', 'bin')
+        assert names['Editor de Texto']['working_dir'] == os.path.join(drive_c, 'Program Files', 'Editor')
+        script = launcher_script(prefix, names['Juego']['exe'], 'wine', names['Juego']['arguments'],
+                                 names['Juego']['working_dir'])
+        assert f"cd '{names['Juego']['working_dir']}'" in script, script
+        assert script.rstrip().endswith(" -lang es 'perfil 1' \"$@\""), script
+
+        # Sin cambios en el registro no se vuelve a leer ningún prefijo
+        scans = []
+        real_scan = wine_programs.scan_prefix
+        wine_programs.scan_prefix = lambda *prefix: scans.append(prefix) or real_scan(*prefix)
+        try:
+            assert len(wine_programs.list_programs(roots, index_path)) == 3
+            assert scans == []
+            os.utime(os.path.join(prefix, 'system.reg'), ns=(1, 1))
+            wine_programs.list_programs(roots, index_path)
+            assert [scan[1] for scan in scans] == ['editor']
+        finally:
+            wine_programs.scan_prefix = real_scan
+        # Un prefijo borrado desaparece del índice
+        shutil.rmtree(prefix)
+        assert wine_programs.list_programs(roots, index_path) == []
+        print(f"✅ {len(programs)} programas encontrados con su ejecutable real")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas del índice de programas de Wine...")
+    test_lnk()
+    test_split_arguments()
+    test_index()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()
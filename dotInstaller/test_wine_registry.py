@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la edición directa del registro de Wine
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# Agregar el directorio src al path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from src.utils.wine_registry import (WineRegistry, RegistryBusyError, prefix_lock,
+                                     set_windows_version, set_dll_overrides)
+
+USER_REG = r'''WINE REGISTRY Version 2
+;; All keys relative to \\User\\S-1-5-21-0-0-0-1000
+
+#arch=win64
+
+[Control Panel\\Desktop] 1700000000
+#time=1da1b2c3d4e5f60
+"FontSmoothing"="2"
+"UserPreferencesMask"=hex:9e,1e,07,80,12,00,00,00,00,00,00,00,00,00,00,00,00,\
+  00,00,00,00,00,00,00,00,00
+"WheelScrollLines"=dword:00000003
+
+[Software\\Wine\\DllOverrides] 1700000000
+#time=1da1b2c3d4e5f60
+"*d3d11"="native,builtin"
+"winemenubuilder.exe"=""
+
+[Software\\Wine\\Explorer] 1700000000
+@="Ruta \"C:\\\\x\""
+"Nombre"="Espa\x00f1a"
+'''
+
+def test_roundtrip():
+    """Prueba que leer y guardar sin cambios deja el archivo idéntico"""
+    print("🧪 Probando lectura del registro...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, 'user.reg')
+        with open(path, 'w') as f:
+            f.write(USER_REG)
+        registry = WineRegistry(path)
+        assert registry.dumps() == USER_REG
+        assert registry.save() is False
+        assert registry.get('control panel\\desktop', 'WheelScrollLines') == 3
+        kind, data = registry.get('Control Panel\\Desktop', 'UserPreferencesMask')
+        assert kind == 'hex' and len(data) == 26 and data[:2] == b'\x9e\x1e'
+        assert registry.get('Software\\Wine\\Explorer', '') == 'Ruta "C:\\\\x"'
+        assert registry.get('Software\\Wine\\Explorer', 'Nombre') == 'España'
+        assert registry.values('Software\\Wine\\DllOverrides') == {'*d3d11': 'native,builtin',
+                                                                    'winemenubuilder.exe': ''}
+        assert registry.subkeys('Software\\Wine') == ['Software\\Wine\\DllOverrides', 'Software\\Wine\\Explorer']
+        print("✅ Registro leído y reescrito sin cambios")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_edit():
+    """Prueba los cambios de versión y de DLL y el candado compartido con wineserver"""
+    print("\n🧪 Probando edición del registro...")
+    temp_dir = tempfile.mkdtemp()
+    try:
+        prefix = os.path.join(temp_dir, 'prefix')
+        os.makedirs(prefix)
+        path = os.path.join(prefix, 'user.reg')
+        with open(path, 'w') as f:
+            f.write(USER_REG)
+
+        set_windows_version(prefix, 'win7')
+        set_dll_overrides(prefix, {'d3dx9_43': 'native', 'winemenubuilder.exe': None, '*d3d11': 'builtin'})
+        registry = WineRegistry(path)
+        assert registry.get('Software\\Wine', 'Version') == 'win7'
+        assert registry.values('Software\\Wine\\DllOverrides') == {'*d3d11': 'builtin', 'd3dx9_43': 'native'}
+        # Lo que no se tocó sigue igual y no quedan temporales
+        assert registry.get('Control Panel\\Desktop', 'WheelScrollLines') == 3
+        assert os.listdir(prefix) == ['user.reg']
+        with open(path) as f:
+            text = f.read()
+        assert '[Software\\\\Wine]' in text and '\n\n[Software\\\\Wine\\\\DllOverrides] ' in text
+
+        # Otro proceso con el candado de wineserver: no se toca el registro
+        holder = subprocess.Popen([sys.executable, '-c', f'''
+import sys
+sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})
+from src.utils.wine_registry import prefix_lock
+with prefix_lock({prefix!r}):
+    print("listo", flush=True)
+    sys.stdin.read()
+'''], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        try:
+            assert holder.stdout.readline().strip() == 'listo'
+            try:
+                set_windows_version(prefix, 'win10')
+                assert False, "el candado debería estar ocupado"
+            except RegistryBusyError:
+                pass
+        finally:
+            holder.stdin.close()
+            holder.wait()
+        assert WineRegistry(path).get('Software\\Wine', 'Version') == 'win7'
+        with prefix_lock(prefix):
+            pass
+        print("✅ Versión y DLL cambiadas; el candado de wineserver se respeta")
+    finally:
+        shutil.rmtree(temp_dir)
+
+def main():
+    """Función principal de pruebas"""
+    print("🚀 Iniciando pruebas del registro de Wine...")
+    test_roundtrip()
+    test_edit()
+    print("\n✅ Todas las pruebas completadas")
+
+if __name__ == "__main__":
+    main()